@@ -1,13 +1,161 @@
 """
 Activity logging system for admin actions
-Logs essential admin activities with 1-year retention
+Logs essential admin activities with 1-year retention (RETENTION_DAYS, enforced
+by a TTL index on timestamp)
+
+All admin actions, impersonation included, go to `admin_activity_logs`:
+
+    {"adminId", "adminName", "action", "targetType", "targetId", "details",
+     "ipAddress", "timestamp"}
+
+log_admin_activity() does not write to the database itself: entries are
+buffered per worker by `activity_sink` and written with one insert_many when
+FLUSH_SIZE entries are waiting or every FLUSH_INTERVAL_SECONDS, and the buffer
+is drained on shutdown. Without a running sink (scripts) entries are written
+right away.
+
+get_activity_logs() pages newest first by (timestamp, _id): the next page
+starts after the last entry of the previous one, so deep pages cost the same
+as the first.
 """
-from datetime import datetime, timezone, timedelta
+import asyncio
+import base64
+from datetime import datetime, timezone
+from typing import List, Optional
+from bson import ObjectId
 from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo.errors import BulkWriteError
 import logging
 
 logger = logging.getLogger(__name__)
 
+FLUSH_SIZE = 100
+FLUSH_INTERVAL_SECONDS = 2
+# Entries kept while the database is unreachable; the oldest are dropped beyond this
+MAX_BUFFERED = 10000
+DRAIN_TIMEOUT_SECONDS = 10
+DUPLICATE_KEY = 11000
+
+RETENTION_DAYS = 365
+# Filtered totals are counted up to this many entries
+COUNT_LIMIT = 10000
+
+# Impersonation logs written to `activity_logs` before the schemas were unified
+LEGACY_COLLECTION = "activity_logs"
+
+
+async def create_indexes(db: AsyncIOMotorDatabase):
+    """TTL on timestamp and one (filter, timestamp, _id) index per browse filter"""
+    collection = db.admin_activity_logs
+    existing = await collection.index_information()
+    ttl_seconds = RETENTION_DAYS * 86400
+    if "timestamp_1" in existing and existing["timestamp_1"].get("expireAfterSeconds") != ttl_seconds:
+        # Turn the plain timestamp index into the TTL index in place
+        await db.command(
+            "collMod", "admin_activity_logs",
+            index={"keyPattern": {"timestamp": 1}, "expireAfterSeconds": ttl_seconds}
+        )
+    else:
+        await collection.create_index("timestamp", expireAfterSeconds=ttl_seconds)
+    # Superseded by the keyset indexes below
+    for name in ("action_1_timestamp_-1", "adminId_1_timestamp_-1"):
+        if name in existing:
+            await collection.drop_index(name)
+    await collection.create_index([("timestamp", -1), ("_id", -1)])
+    await collection.create_index([("adminId", 1), ("timestamp", -1), ("_id", -1)])
+    await collection.create_index([("action", 1), ("timestamp", -1), ("_id", -1)])
+    await collection.create_index([("targetType", 1), ("targetId", 1), ("timestamp", -1), ("_id", -1)])
+
+
+class ActivityLogSink:
+    """In-memory buffer of activity log entries, flushed in batches"""
+
+    def __init__(self):
+        self._db = None
+        self._buffer: List[dict] = []
+        self._wake: Optional[asyncio.Event] = None
+        self._closing = False
+        self._task = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    @property
+    def pending(self) -> int:
+        return len(self._buffer)
+
+    async def start(self, db: AsyncIOMotorDatabase):
+        if self.running:
+            return
+        self._db = db
+        self._wake = asyncio.Event()
+        self._closing = False
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Write out everything still buffered and stop flushing"""
+        if not self.running:
+            return
+        self._closing = True
+        self._wake.set()
+        try:
+            await asyncio.wait_for(self._task, timeout=DRAIN_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            logger.error("Activity log drain timed out")
+        if self._buffer:
+            logger.error(f"Dropped {len(self._buffer)} activity log entries on shutdown")
+            self._buffer = []
+        self._task = None
+
+    def add(self, entry: dict):
+        self._buffer.append(entry)
+        if len(self._buffer) > MAX_BUFFERED:
+            dropped = len(self._buffer) - MAX_BUFFERED
+            del self._buffer[:dropped]
+            logger.error(f"Activity log buffer full, dropped {dropped} oldest entries")
+        if len(self._buffer) >= FLUSH_SIZE:
+            self._wake.set()
+
+    async def flush(self) -> int:
+        """
+        Write the buffered entries.
+
+        Returns:
+            Number of entries written (failed ones stay buffered for the next flush)
+        """
+        if not self._buffer:
+            return 0
+        batch, self._buffer = self._buffer, []
+        try:
+            # insert_many sets _id on the entries, so a retried entry that was
+            # in fact written fails as a duplicate instead of being logged twice
+            await self._db.admin_activity_logs.insert_many(batch, ordered=False)
+            return len(batch)
+        except BulkWriteError as e:
+            errors = e.details.get("writeErrors", [])
+            retry = [batch[error["index"]] for error in errors if error.get("code") != DUPLICATE_KEY]
+        except Exception as e:
+            logger.error(f"Failed to write activity logs: {str(e)}")
+            retry = batch
+        self._buffer[:0] = retry
+        return len(batch) - len(retry)
+
+    async def _run(self):
+        while not self._closing:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=FLUSH_INTERVAL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            await self.flush()
+        # Draining: the failed entries get one more try
+        await self.flush()
+
+
+# One sink per worker
+activity_sink = ActivityLogSink()
+
 
 async def log_admin_activity(
     db: AsyncIOMotorDatabase,
@@ -26,7 +174,7 @@ async def log_admin_activity(
         db: Database connection
         admin_id: ID of admin performing action
         admin_name: Name of admin
-        action: Action performed (create, edit, delete, etc.)
+        action: Action performed (create, edit, delete, impersonate, etc.)
         target_type: Type of target (user, invoice, event, news, etc.)
         target_id: ID of target entity
         details: Additional details about the action
@@ -44,91 +192,162 @@ async def log_admin_activity(
             "timestamp": datetime.now(timezone.utc)
         }
         
-        await db.admin_activity_logs.insert_one(log_entry)
+        if activity_sink.running:
+            activity_sink.add(log_entry)
+        else:
+            await db.admin_activity_logs.insert_one(log_entry)
         logger.info(f"Activity logged: {admin_name} {action} {target_type} {target_id}")
         
     except Exception as e:
         logger.error(f"Failed to log activity: {str(e)}")
 
 
-async def cleanup_old_logs(db: AsyncIOMotorDatabase, retention_days: int = 365):
+async def migrate_legacy_logs(db: AsyncIOMotorDatabase, batch_size: int = 500) -> int:
     """
-    Remove activity logs older than retention period (default 1 year)
-    Should be run periodically via scheduler
+    Move impersonation logs from `activity_logs` into admin_activity_logs
+    (no-op once the old collection is gone).
+
+    Returns:
+        Number of entries moved
     """
-    try:
-        cutoff_date = datetime.now(timezone.utc) - timedelta(days=retention_days)
-        
-        result = await db.admin_activity_logs.delete_many({
-            "timestamp": {"$lt": cutoff_date}
-        })
-        
-        logger.info(f"Cleaned up {result.deleted_count} old activity logs (older than {retention_days} days)")
-        return result.deleted_count
-        
-    except Exception as e:
-        logger.error(f"Failed to cleanup old logs: {str(e)}")
+    if LEGACY_COLLECTION not in await db.list_collection_names():
         return 0
+    moved = 0
+    batch = []
+    async for old in db[LEGACY_COLLECTION].find({}):
+        action = old.get("action")
+        batch.append({
+            # Same _id, so an interrupted migration can simply run again
+            "_id": old["_id"],
+            "adminId": old.get("superadmin_id"),
+            "adminName": old.get("superadmin_email"),
+            "action": "impersonate" if action == "user_impersonation" else action,
+            "targetType": "user",
+            "targetId": old.get("target_user_id"),
+            "details": {"adminEmail": old.get("superadmin_email"), "targetEmail": old.get("target_user_email")},
+            "ipAddress": None,
+            "timestamp": old.get("timestamp")
+        })
+        if len(batch) >= batch_size:
+            moved += await _insert_ignoring_duplicates(db, batch)
+            batch = []
+    if batch:
+        moved += await _insert_ignoring_duplicates(db, batch)
+    await db[LEGACY_COLLECTION].drop()
+    return moved
+
+
+async def _insert_ignoring_duplicates(db: AsyncIOMotorDatabase, entries: List[dict]) -> int:
+    try:
+        await db.admin_activity_logs.insert_many(entries, ordered=False)
+        return len(entries)
+    except BulkWriteError as e:
+        errors = e.details.get("writeErrors", [])
+        if any(error.get("code") != DUPLICATE_KEY for error in errors):
+            raise
+        return len(entries) - len(errors)
+
+
+def encode_cursor(entry: dict) -> str:
+    """Page cursor pointing just after `entry`"""
+    raw = f"{entry['timestamp'].replace(tzinfo=None).isoformat()}|{entry['_id']}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple:
+    """(timestamp, _id) of a cursor from encode_cursor(); ValueError if malformed"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        timestamp, entry_id = raw.split("|", 1)
+        return datetime.fromisoformat(timestamp), ObjectId(entry_id)
+    except Exception:
+        raise ValueError("Invalid cursor")
 
 
 async def get_activity_logs(
     db: AsyncIOMotorDatabase,
     admin_id: str = None,
     target_type: str = None,
+    target_id: str = None,
     action: str = None,
     start_date: datetime = None,
     end_date: datetime = None,
     limit: int = 100,
-    skip: int = 0
+    cursor: str = None
 ):
     """
-    Retrieve activity logs with filters
+    Retrieve activity logs with filters, newest first
     
     Args:
         db: Database connection
         admin_id: Filter by admin ID
         target_type: Filter by target type
+        target_id: Filter by target ID (with target_type)
         action: Filter by action
         start_date: Filter by start date
         end_date: Filter by end date
         limit: Number of results to return
-        skip: Number of results to skip
+        cursor: nextCursor of the previous page
         
     Returns:
-        List of activity log entries
-    """
-    try:
-        query = {}
-        
-        if admin_id:
-            query["adminId"] = admin_id
-        
-        if target_type:
-            query["targetType"] = target_type
-        
-        if action:
-            query["action"] = action
-        
-        if start_date or end_date:
-            query["timestamp"] = {}
-            if start_date:
-                query["timestamp"]["$gte"] = start_date
-            if end_date:
-                query["timestamp"]["$lte"] = end_date
-        
-        cursor = db.admin_activity_logs.find(query, {"_id": 0}).sort("timestamp", -1).skip(skip).limit(limit)
-        logs = await cursor.to_list(length=limit)
+        {"logs", "nextCursor" (None on the last page), "limit", and on the
+        first page "total" with "totalIsExact" (False when the total is an
+        estimate or capped at COUNT_LIMIT)}
         
-        # Get total count for pagination
-        total = await db.admin_activity_logs.count_documents(query)
-        
-        return {
-            "logs": logs,
-            "total": total,
-            "limit": limit,
-            "skip": skip
-        }
-        
-    except Exception as e:
-        logger.error(f"Failed to retrieve activity logs: {str(e)}")
-        return {"logs": [], "total": 0, "limit": limit, "skip": skip}
+    Raises:
+        ValueError: Malformed cursor
+    """
+    query = {}
+    
+    if admin_id:
+        query["adminId"] = admin_id
+    
+    if target_type:
+        query["targetType"] = target_type
+    
+    if target_id:
+        query["targetId"] = target_id
+    
+    if action:
+        query["action"] = action
+    
+    if start_date or end_date:
+        query["timestamp"] = {}
+        if start_date:
+            query["timestamp"]["$gte"] = start_date
+        if end_date:
+            query["timestamp"]["$lte"] = end_date
+    
+    page_query = query
+    if cursor:
+        timestamp, entry_id = decode_cursor(cursor)
+        page_query = {"$and": [query, {"$or": [
+            {"timestamp": {"$lt": timestamp}},
+            {"timestamp": timestamp, "_id": {"$lt": entry_id}}
+        ]}]}
+    
+    # One extra entry tells whether there is a next page
+    logs = await db.admin_activity_logs.find(page_query).sort(
+        [("timestamp", -1), ("_id", -1)]
+    ).limit(limit + 1).to_list(length=limit + 1)
+    has_more = len(logs) > limit
+    logs = logs[:limit]
+    
+    result = {
+        "logs": logs,
+        "nextCursor": encode_cursor(logs[-1]) if has_more else None,
+        "limit": limit
+    }
+    for entry in logs:
+        entry["id"] = str(entry.pop("_id"))
+    
+    if not cursor:
+        if query:
+            total = await db.admin_activity_logs.count_documents(query, limit=COUNT_LIMIT)
+            result["total"], result["totalIsExact"] = total, total < COUNT_LIMIT
+        else:
+            # Collection metadata, no scan
+            result["total"] = await db.admin_activity_logs.estimated_document_count()
+            result["totalIsExact"] = False
+    
+    return result
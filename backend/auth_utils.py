@@ -1,38 +1,121 @@
 from passlib.context import CryptContext
 from jose import JWTError, jwt
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import hashlib
 import secrets
 import os
 
 # Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# bcrypt cost factor. Hashes made with any other cost are re-hashed on the next
+# successful login (min == max makes passlib flag them as needing an update).
+BCRYPT_ROUNDS = int(os.environ.get("BCRYPT_ROUNDS", "12"))
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=BCRYPT_ROUNDS,
+    bcrypt__min_rounds=BCRYPT_ROUNDS,
+    bcrypt__max_rounds=BCRYPT_ROUNDS
+)
+
+# bcrypt is CPU bound (~200ms at cost 12) and would block the event loop, so it
+# runs in a small dedicated pool. At most PASSWORD_HASH_MAX_PENDING operations
+# may be running or queued; further callers wait up to PASSWORD_HASH_QUEUE_TIMEOUT
+# seconds for a slot and are then rejected with PasswordHasherBusy (HTTP 503).
+PASSWORD_HASH_WORKERS = int(os.environ.get("PASSWORD_HASH_WORKERS", "2"))
+PASSWORD_HASH_MAX_PENDING = int(os.environ.get("PASSWORD_HASH_MAX_PENDING", "16"))
+PASSWORD_HASH_QUEUE_TIMEOUT = float(os.environ.get("PASSWORD_HASH_QUEUE_TIMEOUT", "5"))
+
+_hash_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash")
+_hash_slots = asyncio.Semaphore(PASSWORD_HASH_MAX_PENDING)
+
+
+class PasswordHasherBusy(Exception):
+    """Raised when the password hashing pool is saturated"""
+    pass
 
 # JWT configuration
 SECRET_KEY = os.environ.get("JWT_SECRET_KEY", secrets.token_urlsafe(32))
 ALGORITHM = "HS256"
-ACCESS_TOKEN_EXPIRE_DAYS = 7
+# Access tokens are short-lived and carry the claims needed to authorise a
+# request without a database lookup; clients renew them with a refresh token.
+ACCESS_TOKEN_EXPIRE_MINUTES = int(os.environ.get("ACCESS_TOKEN_EXPIRE_MINUTES", "15"))
+REFRESH_TOKEN_EXPIRE_DAYS = int(os.environ.get("REFRESH_TOKEN_EXPIRE_DAYS", "30"))
 
 def hash_password(password: str) -> str:
-    """Hash a password"""
+    """Hash a password (blocking - use hash_password_async in request handlers)"""
     return pwd_context.hash(password)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """Verify a password against a hash"""
+    """Verify a password against a hash (blocking - use verify_password_async in request handlers)"""
     return pwd_context.verify(plain_password, hashed_password)
 
+async def _run_in_hash_pool(func, *args):
+    """Run a bcrypt operation in the hashing pool with admission control"""
+    try:
+        await asyncio.wait_for(_hash_slots.acquire(), timeout=PASSWORD_HASH_QUEUE_TIMEOUT)
+    except asyncio.TimeoutError:
+        raise PasswordHasherBusy("Password hashing queue is full")
+    
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_hash_executor, func, *args)
+    finally:
+        _hash_slots.release()
+
+async def hash_password_async(password: str) -> str:
+    """Hash a password without blocking the event loop"""
+    return await _run_in_hash_pool(pwd_context.hash, password)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password against a hash without blocking the event loop"""
+    return await _run_in_hash_pool(pwd_context.verify, plain_password, hashed_password)
+
+async def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """
+    Verify a password and re-hash it if the stored hash uses outdated parameters.
+    
+    Returns:
+        (valid, new_hash) - new_hash is set only when the password is valid and
+        the stored hash should be replaced
+    """
+    return await _run_in_hash_pool(pwd_context.verify_and_update, plain_password, hashed_password)
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create JWT access token"""
     to_encode = data.copy()
+    now = datetime.utcnow()
     if expires_delta:
-        expire = datetime.utcnow() + expires_delta
+        expire = now + expires_delta
     else:
-        expire = datetime.utcnow() + timedelta(days=ACCESS_TOKEN_EXPIRE_DAYS)
+        expire = now + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     
-    to_encode.update({"exp": expire})
+    # Sub-second iat so revocations can be compared precisely (see utils/auth_tokens)
+    to_encode.update({"exp": expire, "iat": (now - datetime(1970, 1, 1)).total_seconds(), "typ": "access"})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
+def user_token_claims(user: dict) -> dict:
+    """Claims that let dependencies authorise a request without loading the user"""
+    return {
+        "sub": str(user.get("_id") or user.get("id")),
+        "role": user.get("role", "user"),
+        "email": user.get("email"),
+        "username": user.get("username"),
+        "name": user.get("fullName"),
+        "suspended": bool(user.get("suspended", False))
+    }
+
+def generate_refresh_token() -> str:
+    """Generate an opaque refresh token"""
+    return secrets.token_urlsafe(48)
+
+def hash_refresh_token(token: str) -> str:
+    """Refresh tokens are stored hashed, like passwords, but need no slow hash"""
+    return hashlib.sha256(token.encode()).hexdigest()
+
 def decode_access_token(token: str) -> Optional[dict]:
     """Decode and verify JWT token"""
     try:
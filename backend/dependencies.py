@@ -1,6 +1,7 @@
 from fastapi import Depends, HTTPException, status, Request
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from auth_utils import decode_access_token
+from utils.auth_tokens import revocation_list
 
 security = HTTPBearer()
 
@@ -8,35 +9,70 @@ async def get_db(request: Request):
     """Get database from app state"""
     return request.app.state.db
 
-async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security), request: Request = None) -> dict:
-    """Verify JWT token and get current user"""
-    token = credentials.credentials
-    payload = decode_access_token(token)
-    
-    if not payload:
+async def get_token_claims(credentials: HTTPAuthorizationCredentials = Depends(security)) -> dict:
+    """Verify JWT access token and revocation status (no database lookup)"""
+    payload = decode_access_token(credentials.credentials)
+
+    if not payload or payload.get("typ") != "access":
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid or expired token"
         )
-    
-    user_id = payload.get("sub")
-    if not user_id:
+
+    if not payload.get("sub"):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid token payload"
         )
-    
+
+    if revocation_list.is_revoked(payload):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Session has been revoked"
+        )
+
+    if payload.get("suspended"):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Account suspended"
+        )
+
+    return payload
+
+async def get_token_user(claims: dict = Depends(get_token_claims)) -> dict:
+    """
+    Current user built from the access token claims.
+    Has _id/id, role, email, username and fullName - use get_current_user when
+    the handler needs the full user document.
+    """
+    return {
+        "_id": claims["sub"],
+        "id": claims["sub"],
+        "role": claims.get("role", "user"),
+        "email": claims.get("email"),
+        "username": claims.get("username"),
+        "fullName": claims.get("name")
+    }
+
+async def get_current_user(claims: dict = Depends(get_token_claims), request: Request = None) -> dict:
+    """Verify JWT token and load the current user document"""
     db = request.app.state.db
-    user = await db.users.find_one({"_id": user_id})
+    user = await db.users.find_one({"_id": claims["sub"]})
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="User not found"
         )
-    
+
+    if user.get("suspended"):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Account suspended"
+        )
+
     return user
 
-async def get_admin_user(current_user: dict = Depends(get_current_user)) -> dict:
+async def get_admin_user(current_user: dict = Depends(get_token_user)) -> dict:
     """Verify user is admin, moderator, or superadmin"""
     if current_user.get("role") not in ["admin", "moderator", "superadmin"]:
         raise HTTPException(
@@ -45,11 +81,11 @@ async def get_admin_user(current_user: dict = Depends(get_current_user)) -> dict
         )
     return current_user
 
-async def get_superadmin_user(current_user: dict = Depends(get_current_user)) -> dict:
+async def get_superadmin_user(current_user: dict = Depends(get_token_user)) -> dict:
     """Verify user is superadmin"""
     if current_user.get("role") != "superadmin":
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Super admin access required"
         )
-    return current_user
\ No newline at end of file
+    return current_user
@@ -36,6 +36,12 @@ async def get_smtp_config(db):
                 'start_tls': False
             }
         
+        # Cached so bulk notifications don't re-read platform settings per recipient
+        from utils.cache import cache, smtp_config_key, CACHE_TTL, TAG_PLATFORM_SETTINGS
+        cached_config = await cache.get(smtp_config_key())
+        if cached_config:
+            return cached_config
+        
         # Try to get settings from database
         settings = await db.platform_settings.find_one({"_id": "system"}, {"_id": 0})
         
@@ -62,7 +68,7 @@ async def get_smtp_config(db):
                 
                 logger.info(f"Using SMTP config from database: {email_config.get('smtpHost')}:{smtp_port}")
                 
-                return {
+                smtp_config = {
                     'host': email_config['smtpHost'],
                     'port': smtp_port,
                     'user': email_config['smtpUser'],
@@ -72,10 +78,12 @@ async def get_smtp_config(db):
                     'use_tls': use_tls,
                     'start_tls': start_tls
                 }
+                await cache.set(smtp_config_key(), smtp_config, CACHE_TTL['smtp'], tags=[TAG_PLATFORM_SETTINGS])
+                return smtp_config
         
         # If we get here, database config is incomplete or missing
         logger.info("Database SMTP config not fully configured, using defaults")
-        return {
+        smtp_config = {
             'host': DEFAULT_SMTP_HOST,
             'port': DEFAULT_SMTP_PORT,
             'user': DEFAULT_SMTP_USER,
@@ -85,6 +93,8 @@ async def get_smtp_config(db):
             'use_tls': True,
             'start_tls': False
         }
+        await cache.set(smtp_config_key(), smtp_config, CACHE_TTL['smtp'], tags=[TAG_PLATFORM_SETTINGS])
+        return smtp_config
         
     except Exception as e:
         logger.error(f"Error fetching SMTP config from database: {str(e)}, using defaults")
@@ -99,6 +109,38 @@ async def get_smtp_config(db):
             'start_tls': False
         }
 
+def _build_message(smtp_config: dict, to_email: str, subject: str, html_content: str, text_content: str = None):
+    message = MIMEMultipart('alternative')
+    
+    # Headers - using simple format that Loopia accepts (plain email address only)
+    message['From'] = smtp_config['from_email']
+    message['To'] = to_email
+    message['Subject'] = subject
+    message['Reply-To'] = smtp_config['from_email']
+    
+    # Add Message-ID to improve deliverability
+    import time
+    import hashlib
+    msg_id = hashlib.md5(f"{to_email}{time.time()}".encode()).hexdigest()
+    message['Message-ID'] = f"<{msg_id}@srpskoudruzenjetaby.se>"
+
+    # Add plain text version (important for spam filters)
+    if text_content:
+        text_part = MIMEText(text_content, 'plain', 'utf-8')
+        message.attach(text_part)
+    else:
+        # If no text provided, create a simple text version from HTML
+        import re
+        text_fallback = re.sub('<[^<]+?>', '', html_content)
+        text_part = MIMEText(text_fallback, 'plain', 'utf-8')
+        message.attach(text_part)
+
+    # Add HTML version
+    html_part = MIMEText(html_content, 'html', 'utf-8')
+    message.attach(html_part)
+    return message
+
+
 async def send_email(to_email: str, subject: str, html_content: str, text_content: str = None, db=None):
     """Send email using configured or default SMTP server"""
     try:
@@ -108,34 +150,7 @@ async def send_email(to_email: str, subject: str, html_content: str, text_conten
         # Log SMTP config being used (without password for security)
         logger.info(f"Attempting to send email to {to_email} via {smtp_config['host']}:{smtp_config['port']} (user: {smtp_config['user']}, password_length: {len(smtp_config.get('password', ''))})")
         
-        message = MIMEMultipart('alternative')
-        
-        # Headers - using simple format that Loopia accepts (plain email address only)
-        message['From'] = smtp_config['from_email']
-        message['To'] = to_email
-        message['Subject'] = subject
-        message['Reply-To'] = smtp_config['from_email']
-        
-        # Add Message-ID to improve deliverability
-        import time
-        import hashlib
-        msg_id = hashlib.md5(f"{to_email}{time.time()}".encode()).hexdigest()
-        message['Message-ID'] = f"<{msg_id}@srpskoudruzenjetaby.se>"
-
-        # Add plain text version (important for spam filters)
-        if text_content:
-            text_part = MIMEText(text_content, 'plain', 'utf-8')
-            message.attach(text_part)
-        else:
-            # If no text provided, create a simple text version from HTML
-            import re
-            text_fallback = re.sub('<[^<]+?>', '', html_content)
-            text_part = MIMEText(text_fallback, 'plain', 'utf-8')
-            message.attach(text_part)
-
-        # Add HTML version
-        html_part = MIMEText(html_content, 'html', 'utf-8')
-        message.attach(html_part)
+        message = _build_message(smtp_config, to_email, subject, html_content, text_content)
 
         # Connect and send - Using dynamic configuration
         await aiosmtplib.send(
@@ -159,6 +174,62 @@ async def send_email(to_email: str, subject: str, html_content: str, text_conten
         logger.error(f"Failed to send email to {to_email}: {type(e).__name__}: {str(e)}")
         return False
 
+async def send_emails(emails: list, db=None):
+    """
+    Send several emails over one SMTP session (one connection and login
+    instead of one per email). The session is reopened once if the server
+    drops it.
+
+    Args:
+        emails: [{"to_email", "subject", "html_content", "text_content"}, ...]
+        db: Database, for the SMTP configuration
+
+    Returns:
+        List of booleans, whether each email was sent
+    """
+    if not emails:
+        return []
+    smtp_config = await get_smtp_config(db)
+    results = []
+    smtp = None
+    try:
+        for email in emails:
+            sent = False
+            for attempt in range(2):
+                try:
+                    if smtp is None or not smtp.is_connected:
+                        smtp = aiosmtplib.SMTP(
+                            hostname=smtp_config['host'],
+                            port=smtp_config['port'],
+                            use_tls=smtp_config['use_tls'],
+                            start_tls=smtp_config['start_tls']
+                        )
+                        await smtp.connect()
+                        await smtp.login(smtp_config['user'], smtp_config['password'])
+                    await smtp.send_message(_build_message(smtp_config, **email))
+                    sent = True
+                    break
+                except (aiosmtplib.SMTPServerDisconnected, aiosmtplib.SMTPConnectError) as e:
+                    smtp = None
+                    if attempt:
+                        logger.error(f"SMTP connection failed for {email['to_email']}: {str(e)}")
+                except aiosmtplib.SMTPAuthenticationError as e:
+                    logger.error(f"SMTP Authentication failed: {str(e)} - Check SMTP_USER and SMTP_PASSWORD environment variables")
+                    # Nothing else will get through either
+                    return results + [False] * (len(emails) - len(results))
+                except Exception as e:
+                    logger.error(f"Failed to send email to {email['to_email']}: {type(e).__name__}: {str(e)}")
+                    break
+            results.append(sent)
+    finally:
+        if smtp is not None and smtp.is_connected:
+            try:
+                await smtp.quit()
+            except Exception:
+                pass
+    logger.info(f"Sent {sum(results)} of {len(emails)} emails over one SMTP session via {smtp_config['host']}:{smtp_config['port']}")
+    return results
+
 def get_verification_email_template(name: str, verification_link: str):
     """Generate verification email in Serbian and Swedish"""
     
@@ -253,8 +324,8 @@ Srpsko Kulturno Udruženje, Täby
     
     return html_content, text_content
 
-def get_training_reminder_template(name: str, event_title: str, event_date: str, event_time: str, location: str, event_title_sv: str = None):
-    """Generate training reminder email in Serbian and Swedish"""
+def get_training_reminder_template(name: str, event_title: str, event_date: str, event_time: str, location: str, event_title_sv: str = None, day_sr: str = "sutra", day_sv: str = "imorgon"):
+    """Generate training reminder email in Serbian and Swedish (day_sr / day_sv: when the training is, e.g. "sutra")"""
     title_sv = event_title_sv or event_title
     
     html_content = f"""
@@ -288,7 +359,7 @@ def get_training_reminder_template(name: str, event_title: str, event_date: str,
                     <tr><td class="header"><h1>Podsetnik za trening / Träningspåminnelse</h1></td></tr>
                     <tr><td class="body-content">
                         <h2>Poštovani/a {name},</h2>
-                        <p>Podsećamo vas da imate potvrđen trening sutra:</p>
+                        <p>Podsećamo vas da imate potvrđen trening {day_sr}:</p>
                         <div class="event-box">
                             <h3>{event_title}</h3>
                             <p><strong>Datum:</strong> {event_date}</p>
@@ -298,7 +369,7 @@ def get_training_reminder_template(name: str, event_title: str, event_date: str,
                         <p>Vidimo se!</p>
                         <hr class="divider">
                         <h2>Bästa {name},</h2>
-                        <p>Vi påminner dig om din bekräftade träning imorgon:</p>
+                        <p>Vi påminner dig om din bekräftade träning {day_sv}:</p>
                         <div class="event-box">
                             <h3>{title_sv}</h3>
                             <p><strong>Datum:</strong> {event_date}</p>
@@ -318,8 +389,8 @@ def get_training_reminder_template(name: str, event_title: str, event_date: str,
     return html_content, f"Podsetnik: {event_title} - {event_date} u {event_time}"
 
 
-def get_training_call_to_confirm_template(name: str, event_title: str, event_date: str, event_time: str, location: str, event_title_sv: str = None):
-    """Generate 'call to confirm' email for unconfirmed members - Serbian and Swedish"""
+def get_training_call_to_confirm_template(name: str, event_title: str, event_date: str, event_time: str, location: str, event_title_sv: str = None, day_sr: str = "sutra", day_sv: str = "imorgon"):
+    """Generate 'call to confirm' email for unconfirmed members - Serbian and Swedish (day_sr / day_sv as above)"""
     title_sv = event_title_sv or event_title
     
     html_content = f"""
@@ -355,7 +426,7 @@ def get_training_call_to_confirm_template(name: str, event_title: str, event_dat
                     <tr><td class="header"><h1>Potvrdite učešće / Bekräfta deltagande</h1></td></tr>
                     <tr><td class="body-content">
                         <h2>Poštovani/a {name},</h2>
-                        <p>Sutra se održava trening i još nismo primili vašu potvrdu učešća:</p>
+                        <p>{day_sr.capitalize()} se održava trening i još nismo primili vašu potvrdu učešća:</p>
                         <div class="event-box">
                             <h3>{event_title}</h3>
                             <p><strong>Datum:</strong> {event_date}</p>
@@ -368,7 +439,7 @@ def get_training_call_to_confirm_template(name: str, event_title: str, event_dat
                         </div>
                         <hr class="divider">
                         <h2>Bästa {name},</h2>
-                        <p>Det är träning imorgon och vi har inte fått din bekräftelse ännu:</p>
+                        <p>Det är träning {day_sv} och vi har inte fått din bekräftelse ännu:</p>
                         <div class="event-box">
                             <h3>{title_sv}</h3>
                             <p><strong>Datum:</strong> {event_date}</p>
@@ -388,7 +459,7 @@ def get_training_call_to_confirm_template(name: str, event_title: str, event_dat
     </html>
     """
     
-    return html_content, f"Potvrdite učešće: {event_title} - Sutra {event_date} u {event_time} / Bekräfta: {title_sv}"
+    return html_content, f"Potvrdite učešće: {event_title} - {day_sr.capitalize()} u {event_time} / Bekräfta: {title_sv}"
 
 def get_cancellation_email_template(name: str, event_title: str, reason: str):
     """Generate event cancellation email"""
@@ -696,7 +767,92 @@ def get_admin_event_participation_notification(user_name: str, user_email: str,
     Evenemang: {event_title}
     Datum: {event_date} kl {event_time}
     """
-    
+
+    return html, text
+
+
+def get_admin_rsvp_digest_template(notifications: list):
+    """Generate admin digest of event participation changes (confirm/cancel)
+
+    Args:
+        notifications: Buffered RSVP notifications (utils/rsvp_digest.py), each
+            with eventTitle, eventDate, eventTime, trainingGroup, userName,
+            userEmail, action and reason
+    """
+    events = {}
+    for n in sorted(notifications, key=lambda n: (n.get("eventDate") or "", n.get("eventTime") or "", n["createdAt"])):
+        events.setdefault((n.get("eventTitle"), n.get("eventDate"), n.get("eventTime"), n.get("trainingGroup")), []).append(n)
+
+    sections_html = ""
+    sections_text = ""
+    for (title, date, time, group), items in events.items():
+        confirmed = sum(1 for n in items if n["action"] == "confirmed")
+        cancelled = len(items) - confirmed
+        group_label = f" - {group}" if group else ""
+        rows = ""
+        sections_text += f"\n{title}{group_label} - {date} {time} (✓ {confirmed} / ✗ {cancelled})"
+        for n in items:
+            sign = "✓" if n["action"] == "confirmed" else "✗"
+            color = "#28a745" if n["action"] == "confirmed" else "#dc3545"
+            reason = f"<br><small>{n['reason']}</small>" if n.get("reason") else ""
+            rows += f"""
+                <tr>
+                    <td style="color: {color}; padding: 6px;">{sign}</td>
+                    <td style="padding: 6px;">{n.get('userName')}<br><small>{n.get('userEmail') or ''}</small>{reason}</td>
+                </tr>"""
+            reason_text = f" ({n['reason']})" if n.get("reason") else ""
+            sections_text += f"\n    {sign} {n.get('userName')} <{n.get('userEmail') or ''}>{reason_text}"
+        sections_text += "\n"
+        sections_html += f"""
+        <div class="info-box">
+            <p><strong>{title}{group_label}</strong><br>{date} {time}</p>
+            <p>✓ {confirmed} &nbsp; ✗ {cancelled}</p>
+            <table style="width: 100%; border-collapse: collapse;">{rows}
+            </table>
+        </div>
+        """
+
+    html = f"""
+    <!DOCTYPE html>
+    <html>
+    <head>
+        <meta charset="UTF-8">
+        <style>
+            body {{ font-family: Arial, sans-serif; line-height: 1.6; color: #333; }}
+            .container {{ max-width: 600px; margin: 0 auto; padding: 20px; background-color: #f9f9f9; }}
+            .header {{ background-color: #C1272D; color: white; padding: 20px; text-align: center; }}
+            .content {{ background-color: white; padding: 30px; border-radius: 5px; margin-top: 20px; }}
+            .info-box {{ background-color: #f5f5f5; padding: 15px; border-left: 4px solid #C1272D; margin: 20px 0; }}
+            .info-box p {{ margin: 8px 0; }}
+            .footer {{ text-align: center; margin-top: 30px; font-size: 12px; color: #666; }}
+        </style>
+    </head>
+    <body>
+        <div class="container">
+            <div class="header">
+                <h1>Prijave na Događaje / Anmälningar till Evenemang</h1>
+            </div>
+            <div class="content">
+                <p>Nove potvrde i otkazivanja od poslednjeg pregleda.<br>
+                Nya bekräftelser och avbokningar sedan förra sammanställningen.</p>
+                {sections_html}
+            </div>
+            <div class="footer">
+                <p>Detta är ett automatiskt meddelande från Srpsko Kulturno Udruženje Täby</p>
+            </div>
+        </div>
+    </body>
+    </html>
+    """
+
+    text = f"""
+    Prijave na Događaje / Anmälningar till Evenemang
+
+    Nove potvrde i otkazivanja od poslednjeg pregleda.
+    Nya bekräftelser och avbokningar sedan förra sammanställningen.
+    {sections_text}
+    """
+
     return html, text
 
 
@@ -814,6 +970,107 @@ def get_invoice_upload_notification(user_name: str, invoice_description: str, am
     return html, text
 
 
+def get_invoice_overdue_reminder_template(user_name: str, invoice_description: str, invoice_number: str, amount: float, currency: str, due_date: str, download_link: str = None):
+    """Generate reminder email for an overdue invoice"""
+    download_sr = f'''<center><a href="{download_link}" class="button">📥 Preuzmite Fakturu</a></center>''' if download_link else ""
+    download_sv = f'''<center><a href="{download_link}" class="button">📥 Ladda Ner Faktura</a></center>''' if download_link else ""
+    html = f"""
+    <!DOCTYPE html>
+    <html>
+    <head>
+        <meta charset="UTF-8">
+        <style>
+            body {{ font-family: Arial, sans-serif; line-height: 1.6; color: #333; }}
+            .container {{ max-width: 600px; margin: 0 auto; padding: 20px; background-color: #f9f9f9; }}
+            .header {{ background-color: #C1272D; color: white; padding: 20px; text-align: center; }}
+            .content {{ background-color: white; padding: 30px; border-radius: 5px; margin-top: 20px; }}
+            .invoice-box {{ background-color: #f5f5f5; padding: 20px; border-left: 4px solid #C1272D; margin: 20px 0; }}
+            .invoice-box p {{ margin: 10px 0; }}
+            .amount {{ font-size: 24px; font-weight: bold; color: #C1272D; }}
+            .button {{ display: inline-block; padding: 12px 30px; background-color: #C1272D; color: white; text-decoration: none; border-radius: 5px; margin: 20px 0; }}
+            .footer {{ text-align: center; margin-top: 30px; font-size: 12px; color: #666; }}
+        </style>
+    </head>
+    <body>
+        <div class="container">
+            <div class="header">
+                <h1>⏰ Podsetnik za Plaćanje / Betalningspåminnelse</h1>
+            </div>
+            <div class="content">
+                <h2>Srpski / Serbian</h2>
+                <p>Poštovani/a {user_name},</p>
+                <p>Rok plaćanja za sledeću fakturu je istekao, a uplata još nije evidentirana.</p>
+                
+                <div class="invoice-box">
+                    <p><strong>Faktura:</strong> {invoice_number}</p>
+                    <p><strong>Opis:</strong> {invoice_description}</p>
+                    <p><strong>Iznos:</strong> <span class="amount">{amount} {currency}</span></p>
+                    <p><strong>Rok plaćanja:</strong> {due_date}</p>
+                </div>
+                {download_sr}
+                <p>Ako ste već platili, molimo vas da zanemarite ovu poruku.</p>
+
+                <hr style="margin: 30px 0; border: none; border-top: 1px solid #ddd;">
+
+                <h2>Svenska / Swedish</h2>
+                <p>Hej {user_name},</p>
+                <p>Förfallodatumet för följande faktura har passerat och vi har inte registrerat någon betalning.</p>
+                
+                <div class="invoice-box">
+                    <p><strong>Faktura:</strong> {invoice_number}</p>
+                    <p><strong>Beskrivning:</strong> {invoice_description}</p>
+                    <p><strong>Belopp:</strong> <span class="amount">{amount} {currency}</span></p>
+                    <p><strong>Förfallodatum:</strong> {due_date}</p>
+                </div>
+                {download_sv}
+                <p>Om du redan har betalat kan du bortse från detta meddelande.</p>
+            </div>
+            <div class="footer">
+                <p>Srpsko Kulturno Društvo Täby</p>
+                <p>Detta är ett automatiskt meddelande / Ovo je automatska poruka</p>
+            </div>
+        </div>
+    </body>
+    </html>
+    """
+    
+    text = f"""
+    Podsetnik za Plaćanje / Betalningspåminnelse
+    
+    SRPSKI:
+    Poštovani/a {user_name},
+    
+    Rok plaćanja za sledeću fakturu je istekao, a uplata još nije evidentirana.
+    
+    Faktura: {invoice_number}
+    Opis: {invoice_description}
+    Iznos: {amount} {currency}
+    Rok plaćanja: {due_date}
+    
+    Ako ste već platili, molimo vas da zanemarite ovu poruku.
+    
+    ---
+    
+    SVENSKA:
+    Hej {user_name},
+    
+    Förfallodatumet för följande faktura har passerat och vi har inte registrerat någon betalning.
+    
+    Faktura: {invoice_number}
+    Beskrivning: {invoice_description}
+    Belopp: {amount} {currency}
+    Förfallodatum: {due_date}
+    
+    Om du redan har betalat kan du bortse från detta meddelande.
+    
+    ---
+    
+    Srpsko Kulturno Društvo Täby
+    """
+    
+    return html, text
+
+
 def get_admin_invitation_template(name: str, email: str, role: str, temporary_password: str):
     """Generate admin invitation email (bilingual: Serbian & Swedish)"""
     
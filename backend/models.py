@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field, EmailStr
-from typing import Optional, List, Dict
+from typing import Optional, List, Dict, Literal
 from datetime import datetime
 from bson import ObjectId
 
@@ -61,6 +61,7 @@ class UserUpdate(BaseModel):
     parentEmail: Optional[EmailStr] = None
     parentPhone: Optional[str] = None
     photoConsent: Optional[bool] = None
+    rsvpNotifications: Optional[Literal["digest", "immediate"]] = None  # moderators: RSVP emails
 
 class UserInDB(UserBase):
     id: str = Field(alias="_id")
@@ -85,9 +86,14 @@ class LoginRequest(BaseModel):
     username: str
     password: str
 
+class RefreshRequest(BaseModel):
+    refreshToken: str
+
 class LoginResponse(BaseModel):
     success: bool
     token: str
+    refreshToken: str
+    expiresIn: int
     user: UserResponse
 
 class RegisterResponse(BaseModel):
@@ -127,6 +133,7 @@ class EventBase(BaseModel):
     description: Dict[str, str]
     status: str = "active"  # active, cancelled
     cancellationReason: Optional[str] = None
+    trainingGroup: Optional[str] = None  # None: open to every group
 
 class EventCreate(EventBase):
     pass
@@ -139,10 +146,10 @@ class EventUpdate(BaseModel):
     description: Optional[Dict[str, str]] = None
     status: Optional[str] = None
     cancellationReason: Optional[str] = None
+    trainingGroup: Optional[str] = None
 
 class EventInDB(EventBase):
     id: str = Field(alias="_id")
-    participants: List[str] = []  # User IDs
     createdAt: datetime = Field(default_factory=datetime.utcnow)
 
     class Config:
@@ -153,7 +160,6 @@ class EventResponse(EventBase):
     id: str
     createdAt: datetime
     createdBy: Optional[str] = None
-    participants: List[str] = []
 
 # Invoice Models
 class InvoiceBase(BaseModel):
@@ -183,6 +189,7 @@ class InvoiceInDB(InvoiceBase):
 class InvoiceResponse(InvoiceBase):
     id: str
     invoiceNumber: Optional[str] = None
+    ocr: Optional[str] = None  # OCR payment reference
     status: str
     paymentDate: Optional[str] = None
     createdAt: datetime
@@ -1,16 +1,22 @@
-from fastapi import APIRouter, Depends, HTTPException, Request, Response, UploadFile, File
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, Request, Response, UploadFile, File
 from fastapi.responses import StreamingResponse
-from datetime import datetime
+from datetime import datetime, timedelta
 from export_utils import generate_members_pdf, generate_members_xml, generate_members_excel
 from email_service import send_email
 import os
 import logging
 
 from dependencies import get_admin_user, get_superadmin_user
+from utils.auth_tokens import revoke_user_sessions
+from utils.cache import TAG_BRANDING, TAG_PLATFORM_SETTINGS
+from utils.cache_bus import invalidate
+from utils import rosters
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
+IMPERSONATION_TOKEN_EXPIRE_MINUTES = 60
+
 @router.post("/test-email")
 async def test_email_configuration(request: Request, admin: dict = Depends(get_superadmin_user)):
     """Test email configuration by sending a test email to the admin (Super Admin only)"""
@@ -105,18 +111,8 @@ async def get_statistics(admin: dict = Depends(get_admin_user), request: Request
     paid_invoices_list = await db.invoices.find({"status": "paid"}).to_list(length=10000)
     total_revenue = sum(inv.get("amount", 0) for inv in paid_invoices_list)
     
-    # Count overdue invoices (7+ days past due date)
-    now = datetime.utcnow()
-    all_unpaid = await db.invoices.find({"status": "unpaid"}).to_list(length=10000)
-    overdue_count = 0
-    
-    for inv in all_unpaid:
-        try:
-            due_date = datetime.fromisoformat(inv.get("dueDate", ""))
-            if (now - due_date).days > 7:
-                overdue_count += 1
-        except:
-            pass
+    # Count overdue invoices (7+ days past due date, flagged by utils/invoice_overdue.py)
+    overdue_count = await db.invoices.count_documents({"status": "unpaid", "overdue": True})
     
     return {
         "totalMembers": total_members,
@@ -126,24 +122,48 @@ async def get_statistics(admin: dict = Depends(get_admin_user), request: Request
         "overdueInvoices": overdue_count
     }
 
+@router.get("/statistics/trends")
+async def get_statistics_trends(
+    start: str = Query(None, pattern=r"^\d{4}-\d{2}-\d{2}$"),
+    end: str = Query(None, pattern=r"^\d{4}-\d{2}-\d{2}$"),
+    admin: dict = Depends(get_admin_user),
+    request: Request = None
+):
+    """
+    Daily statistics snapshots for trend charts, oldest first (Admin only).
+    Defaults to the last year.
+    """
+    from utils.dashboard_snapshots import get_trend
+
+    return {"snapshots": await get_trend(request.app.state.db, start, end)}
+
 @router.post("/users/{user_id}/suspend")
 async def suspend_user(
     user_id: str,
+    data: dict = Body(default=None),
     superadmin: dict = Depends(get_superadmin_user),
     request: Request = None
 ):
-    """Suspend user account (Super Admin only)"""
+    """Suspend or reactivate user account (Super Admin only)"""
     db = request.app.state.db
+    suspended = (data or {}).get("suspended", True)
     
-    result = await db.users.update_one(
-        {"_id": user_id},
-        {"$set": {"suspended": True, "suspendedAt": datetime.utcnow()}}
-    )
+    if suspended:
+        update = {"$set": {"suspended": True, "suspendedAt": datetime.utcnow()}}
+    else:
+        update = {"$set": {"suspended": False}, "$unset": {"suspendedAt": ""}}
+    
+    result = await db.users.update_one({"_id": user_id}, update)
     
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="User not found")
     
-    return {"success": True, "message": "User suspended successfully"}
+    if suspended:
+        # Log the user out everywhere, access tokens stop working within seconds
+        await revoke_user_sessions(db, user_id, "user suspended")
+        return {"success": True, "message": "User suspended successfully"}
+    
+    return {"success": True, "message": "User activated successfully"}
 
 @router.delete("/users/{user_id}")
 async def delete_user(
@@ -168,6 +188,8 @@ async def delete_user(
     # Also delete related data
     await db.invoices.delete_many({"userId": user_id})
     await db.cancellation_requests.delete_many({"userId": user_id})
+    await revoke_user_sessions(db, user_id, "user deleted")
+    rosters.schedule_rebuild(db)
     
     return {"success": True, "message": "User and related data deleted successfully"}
 
@@ -182,7 +204,7 @@ async def impersonate_user(
     Impersonate a user (Super Admin only)
     Returns a token that allows the super admin to act as the target user
     """
-    from auth_utils import create_access_token
+    from auth_utils import create_access_token, user_token_claims
     
     db = request.app.state.db
     
@@ -198,30 +220,39 @@ async def impersonate_user(
     if target_user.get("role") == "superadmin":
         raise HTTPException(status_code=403, detail="Cannot impersonate another super admin")
     
-    # Create impersonation token with special flag
+    # Create impersonation token with special flag. It cannot be refreshed,
+    # so the session ends when the token expires.
     token_data = {
-        "sub": target_user.get("email") or target_user.get("username"),
-        "user_id": str(target_user.get("_id", target_user.get("id"))),
-        "role": target_user.get("role", "user"),
+        **user_token_claims(target_user),
         "impersonated_by": superadmin.get("_id") or superadmin.get("id"),
         "is_impersonation": True
     }
     
-    impersonation_token = create_access_token(token_data)
+    impersonation_token = create_access_token(
+        token_data,
+        expires_delta=timedelta(minutes=IMPERSONATION_TOKEN_EXPIRE_MINUTES)
+    )
     
     # Log the impersonation action
-    await db.activity_logs.insert_one({
-        "action": "user_impersonation",
-        "superadmin_id": superadmin.get("_id") or superadmin.get("id"),
-        "superadmin_email": superadmin.get("email"),
-        "target_user_id": user_id,
-        "target_user_email": target_user.get("email"),
-        "timestamp": datetime.utcnow()
-    })
+    from activity_logger import log_admin_activity
+    await log_admin_activity(
+        db=db,
+        admin_id=superadmin.get("_id") or superadmin.get("id"),
+        admin_name=superadmin.get("fullName", superadmin.get("email")),
+        action="impersonate",
+        target_type="user",
+        target_id=user_id,
+        details={
+            "adminEmail": superadmin.get("email"),
+            "targetEmail": target_user.get("email")
+        },
+        ip_address=request.client.host if request.client else None
+    )
     
     return {
         "success": True,
         "token": impersonation_token,
+        "expiresIn": IMPERSONATION_TOKEN_EXPIRE_MINUTES * 60,
         "user": {
             "id": str(target_user.get("_id", target_user.get("id"))),
             "email": target_user.get("email"),
@@ -293,9 +324,9 @@ async def get_filtered_members(
     # Build query - include all registered users
     query = {}
     
-    # Filter by training group
+    # Filter by training group (either group field, see utils/rosters.py)
     if training_group and training_group != "all":
-        query["trainingGroup"] = training_group
+        query["$or"] = [{"trainingGroup": training_group}, {"trainingGroups": training_group}]
     
     # Get all matching users
     users = await db.users.find(query, {"_id": 0}).to_list(length=10000)
@@ -420,9 +451,8 @@ async def update_user(
     
     # Handle password reset
     if "password" in user_data and user_data["password"]:
-        from passlib.context import CryptContext
-        pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-        update_fields["hashed_password"] = pwd_context.hash(user_data["password"])
+        from auth_utils import hash_password_async
+        update_fields["hashed_password"] = await hash_password_async(user_data["password"])
     
     result = await db.users.update_one(
         {"_id": user_id},
@@ -432,6 +462,12 @@ async def update_user(
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="User not found")
     
+    if result.modified_count and ("role" in update_fields or "email" in update_fields):
+        # Role and email are carried in the access token
+        await revoke_user_sessions(db, user_id, "account updated")
+    if result.modified_count:
+        rosters.schedule_rebuild(db)
+    
     return {"success": True, "message": "User updated successfully"}
 
 # Platform Settings Routes
@@ -493,8 +529,20 @@ async def update_platform_settings(
         upsert=True
     )
     
+    # SMTP config and security limits are read from platform settings and cached
+    await invalidate(db, TAG_PLATFORM_SETTINGS)
+    
     return {"success": True, "message": "Platform settings updated successfully"}
 
+@router.get("/rate-limits")
+async def get_rate_limit_stats(
+    superadmin: dict = Depends(get_superadmin_user),
+    request: Request = None
+):
+    """Get login/registration rate limit metrics and active lockouts (Super Admin only)"""
+    from utils.rate_limiter import rate_limiter
+    return await rate_limiter.get_stats(request.app.state.db)
+
 # Branding Settings Routes
 # Default hero backgrounds - Serbian-Swedish fusion patterns
 DEFAULT_HERO_BACKGROUNDS = [
@@ -624,6 +672,9 @@ async def update_branding_settings(
         upsert=True
     )
     
+    # Public branding is cached on every worker
+    await invalidate(db, TAG_BRANDING)
+    
     return {"success": True, "message": "Branding settings updated successfully"}
 
 @router.post("/branding/logo")
@@ -687,6 +738,7 @@ async def upload_logo(
         {"$set": {"logo": logo_url}},
         upsert=True
     )
+    await invalidate(db, TAG_BRANDING)
     
     return {"success": True, "logo": logo_url}
 
@@ -888,20 +940,83 @@ async def test_event_reminders(
     (Super Admin only - for testing purposes)
     """
     from scheduler import send_event_reminders
+    from utils.scheduler_jobs import run_recorded
     
     db = request.app.state.db
     
     try:
-        # Run the reminder job
-        await send_event_reminders(db)
+        # Run the reminder job (recorded in job_runs like the scheduled runs)
+        result = await run_recorded(db, "event_reminders", send_event_reminders, db, trigger="manual")
         return {
             "success": True,
-            "message": "Event reminder job executed. Check server logs for details."
+            "message": "Event reminder job executed. Check server logs for details.",
+            "result": result
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error executing reminder job: {str(e)}")
 
 
+@router.get("/scheduler/runs")
+async def get_scheduler_runs(
+    job_id: str = None,
+    limit: int = Query(50, ge=1, le=500),
+    superadmin: dict = Depends(get_superadmin_user),
+    request: Request = None
+):
+    """
+    Background job run history, newest first, and the worker currently
+    running the scheduled jobs (Super Admin only)
+    """
+    from utils.scheduler_jobs import leader_lease, recent_runs
+    
+    db = request.app.state.db
+    leader = await leader_lease.current(db)
+    
+    return {
+        "leader": {
+            "worker": leader.get("owner"),
+            "acquiredAt": leader.get("acquiredAt"),
+            "expiresAt": leader.get("expiresAt")
+        } if leader else None,
+        "runs": await recent_runs(db, job_id, limit)
+    }
+
+
+@router.get("/activity-logs")
+async def browse_activity_logs(
+    admin_id: str = None,
+    target_type: str = None,
+    target_id: str = None,
+    action: str = None,
+    start_date: datetime = None,
+    end_date: datetime = None,
+    limit: int = Query(50, ge=1, le=500),
+    cursor: str = None,
+    superadmin: dict = Depends(get_superadmin_user),
+    request: Request = None
+):
+    """
+    Admin activity and impersonation log, newest first (Super Admin only).
+    Pass the returned nextCursor to get the next page.
+    """
+    from activity_logger import get_activity_logs
+
+    try:
+        return await get_activity_logs(
+            request.app.state.db,
+            admin_id=admin_id,
+            target_type=target_type,
+            target_id=target_id,
+            action=action,
+            start_date=start_date,
+            end_date=end_date,
+            limit=limit,
+            cursor=cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
 
 # ==================== Phase 5.1: Admin Management ====================
 
@@ -959,7 +1074,7 @@ async def create_admin_account(
     Create new admin or moderator account (Super Admin only)
     Sends invitation email with temporary password
     """
-    from auth_utils import hash_password
+    from auth_utils import hash_password_async
     from email_service import send_email, get_admin_invitation_template
     from activity_logger import log_admin_activity
     import secrets
@@ -994,7 +1109,7 @@ async def create_admin_account(
             "username": admin_data["email"],
             "fullName": admin_data["fullName"],
             "role": admin_data["role"],
-            "hashed_password": hash_password(temp_password),
+            "hashed_password": await hash_password_async(temp_password),
             "emailVerified": True,
             "status": "active",
             "createdAt": datetime.utcnow(),
@@ -1072,7 +1187,7 @@ async def update_admin_account(
             raise HTTPException(status_code=400, detail="Cannot change your own role")
         
         # Fetch existing admin
-        existing_admin = await db.users.find_one({"id": admin_id}, {"_id": 0})
+        existing_admin = await db.users.find_one({"id": admin_id})
         if not existing_admin:
             raise HTTPException(status_code=404, detail="Admin not found")
         
@@ -1095,6 +1210,11 @@ async def update_admin_account(
             {"$set": update_doc}
         )
         
+        if update_doc.get("role", existing_admin["role"]) != existing_admin["role"] or update_doc.get("status") == "suspended":
+            # Tokens carry the user's _id, not the admin account id
+            await revoke_user_sessions(db, str(existing_admin["_id"]), "role changed")
+        rosters.schedule_rebuild(db)
+        
         # Log activity
         await log_admin_activity(
             db=db,
@@ -1129,7 +1249,7 @@ async def reset_admin_password(
     """
     Reset admin password and send new temporary password (Super Admin only)
     """
-    from auth_utils import hash_password
+    from auth_utils import hash_password_async
     from email_service import send_email
     from activity_logger import log_admin_activity
     import secrets
@@ -1154,7 +1274,7 @@ async def reset_admin_password(
         await db.users.update_one(
             {"id": admin_id},
             {"$set": {
-                "hashed_password": hash_password(temp_password),
+                "hashed_password": await hash_password_async(temp_password),
                 "updatedAt": datetime.utcnow()
             }}
         )
@@ -1229,7 +1349,7 @@ async def delete_admin_account(
             raise HTTPException(status_code=400, detail="Cannot delete your own account")
         
         # Fetch admin to delete
-        target_admin = await db.users.find_one({"id": admin_id}, {"_id": 0})
+        target_admin = await db.users.find_one({"id": admin_id})
         if not target_admin:
             raise HTTPException(status_code=404, detail="Admin not found")
         
@@ -1239,6 +1359,8 @@ async def delete_admin_account(
         
         # Delete admin
         await db.users.delete_one({"id": admin_id})
+        await revoke_user_sessions(db, str(target_admin["_id"]), "user deleted")
+        rosters.schedule_rebuild(db)
         
         # Log activity
         await log_admin_activity(
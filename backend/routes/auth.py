@@ -3,10 +3,13 @@ from datetime import datetime, timedelta
 import os
 import logging
 
-from models import UserCreate, LoginRequest, RegisterResponse, UserResponse
-from auth_utils import hash_password, verify_password, create_access_token, generate_verification_token
+from models import UserCreate, LoginRequest, RefreshRequest, RegisterResponse, UserResponse
+from auth_utils import hash_password_async, verify_and_update_password, generate_verification_token
 from email_service import send_email, get_verification_email_template, get_admin_new_user_notification_template
 from dependencies import get_db
+from utils.rate_limiter import rate_limiter
+from utils import rosters
+from utils.auth_tokens import issue_session, rotate_session, end_session
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
@@ -15,6 +18,7 @@ router = APIRouter()
 async def register(user_data: UserCreate, request: Request):
     """Register a new user"""
     db = request.app.state.db
+    await rate_limiter.consume(db, "register", request)
     
     # Check if username or email already exists
     existing = await db.users.find_one({
@@ -35,7 +39,7 @@ async def register(user_data: UserCreate, request: Request):
     user_dict = user_data.dict(exclude={"password"})
     user_dict.update({
         "_id": f"user_{int(datetime.utcnow().timestamp() * 1000)}",
-        "hashed_password": hash_password(user_data.password),
+        "hashed_password": await hash_password_async(user_data.password),
         "role": "user",
         "emailVerified": False,
         "verificationToken": verification_token,
@@ -102,6 +106,10 @@ async def register(user_data: UserCreate, request: Request):
 async def login(login_data: LoginRequest, request: Request):
     """Login user and return JWT token"""
     db = request.app.state.db
+    
+    # Locked out accounts/IPs are rejected before any bcrypt work
+    limit_state = await rate_limiter.check(db, "login", request, account=login_data.username)
+    
     # Check both username and email fields
     user = await db.users.find_one({
         "$or": [
@@ -110,14 +118,36 @@ async def login(login_data: LoginRequest, request: Request):
         ]
     })
     
-    if not user or not verify_password(login_data.password, user["hashed_password"]):
+    if not user:
+        await rate_limiter.hit(db, "login", request, account=login_data.username)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password"
         )
     
-    # Create access token
-    token = create_access_token(data={"sub": user["_id"], "role": user["role"]})
+    password_valid, new_hash = await verify_and_update_password(login_data.password, user["hashed_password"])
+    if not password_valid:
+        await rate_limiter.hit(db, "login", request, account=login_data.username)
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Incorrect username or password"
+        )
+    
+    if limit_state.has_attempts("account"):
+        await rate_limiter.reset(db, "login", account=login_data.username)
+    
+    if user.get("suspended"):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Account suspended"
+        )
+    
+    # Stored hash uses an outdated bcrypt cost - replace it while we have the password
+    if new_hash:
+        await db.users.update_one({"_id": user["_id"]}, {"$set": {"hashed_password": new_hash}})
+    
+    # Create short-lived access token and refresh token
+    session = await issue_session(db, user)
     
     # Prepare user response
     user_response = UserResponse(
@@ -139,10 +169,24 @@ async def login(login_data: LoginRequest, request: Request):
     
     return {
         "success": True,
-        "token": token,
+        **session,
         "user": user_response
     }
 
+@router.post("/refresh")
+async def refresh_session(refresh_data: RefreshRequest, request: Request):
+    """Exchange a refresh token for a new access token (the refresh token is rotated)"""
+    db = request.app.state.db
+    user, session = await rotate_session(db, refresh_data.refreshToken)
+    return {"success": True, **session}
+
+@router.post("/logout")
+async def logout(refresh_data: RefreshRequest, request: Request):
+    """End the session belonging to the refresh token"""
+    db = request.app.state.db
+    await end_session(db, refresh_data.refreshToken)
+    return {"success": True, "message": "Logged out"}
+
 @router.get("/verify-email")
 async def verify_email(token: str, request: Request):
     """Verify user email address"""
@@ -159,6 +203,7 @@ async def verify_email(token: str, request: Request):
         {"_id": user["_id"]},
         {"$set": {"emailVerified": True}, "$unset": {"verificationToken": ""}}
     )
+    rosters.schedule_rebuild(db)
     
     return {"success": True, "message": "Email verified successfully"}
 
@@ -214,6 +259,7 @@ async def resend_verification_email(email: str, request: Request):
 async def forgot_password(email: str, request: Request):
     """Send password reset email"""
     db = request.app.state.db
+    await rate_limiter.consume(db, "password_reset", request, account=email)
     user = await db.users.find_one({"email": email})
     
     if not user:
@@ -256,6 +302,7 @@ async def forgot_password(email: str, request: Request):
 async def reset_password(token: str, new_password: str, request: Request):
     """Reset password with token"""
     db = request.app.state.db
+    await rate_limiter.consume(db, "password_reset", request)
     user = await db.users.find_one({
         "resetToken": token,
         "resetTokenExpiry": {"$gt": datetime.utcnow()}
@@ -271,7 +318,7 @@ async def reset_password(token: str, new_password: str, request: Request):
     await db.users.update_one(
         {"_id": user["_id"]},
         {
-            "$set": {"hashed_password": hash_password(new_password)},
+            "$set": {"hashed_password": await hash_password_async(new_password)},
             "$unset": {"resetToken": "", "resetTokenExpiry": ""}
         }
     )
@@ -2,12 +2,15 @@ from fastapi import APIRouter, Request
 
 from models import ContactForm
 from email_service import send_email, get_contact_form_notification, get_contact_form_confirmation
+from utils.rate_limiter import rate_limiter
 
 router = APIRouter()
 
 @router.post("/")
 async def submit_contact_form(form_data: ContactForm, request: Request):
     """Submit contact form"""
+    await rate_limiter.consume(request.app.state.db, "contact", request)
+    
     # Send notification email to admin
     admin_html, admin_text = get_contact_form_notification(
         form_data.name,
@@ -4,6 +4,11 @@ from pydantic import BaseModel
 from typing import Dict, Optional
 
 from dependencies import get_admin_user
+from utils.cache import TAG_GALLERY, TAG_PAGE_CONTENT
+from utils.cache_bus import invalidate
+from utils.fast_json import FastJSONResponse, fast_json
+from utils.i18n import resolve_language, find_localized, PAGE_CONTENT_TEXT_FIELDS
+from utils.file_delivery import file_response, resolve_file
 
 router = APIRouter()
 
@@ -15,16 +20,20 @@ class PageContent(BaseModel):
 class PageContentUpdate(BaseModel):
     content: Dict[str, str]
 
-@router.get("/pages/{page_id}")
-async def get_page_content(page_id: str, request: Request):
-    """Get all content blocks for a page (public)"""
+@router.get("/pages/{page_id}", response_class=FastJSONResponse)
+@fast_json
+async def get_page_content(page_id: str, request: Request, lang: Optional[str] = None):
+    """Get all content blocks for a page (public, ?lang= returns one language only)"""
     db = request.app.state.db
     
-    content_blocks = await db.page_content.find({"pageId": page_id}).to_list(length=100)
+    content_blocks = await find_localized(
+        db.page_content, {"pageId": page_id}, PAGE_CONTENT_TEXT_FIELDS, resolve_language(request, lang),
+        limit=100
+    )
     
     return {
         "pageId": page_id,
-        "blocks": [{**block, "id": str(block["_id"])} for block in content_blocks]
+        "blocks": content_blocks
     }
 
 @router.post("/pages")
@@ -42,6 +51,7 @@ async def create_page_content(
     content_dict["updatedBy"] = admin["_id"]
     
     await db.page_content.insert_one(content_dict)
+    await invalidate(db, TAG_PAGE_CONTENT)
     
     return {"success": True, "message": "Content created successfully", "id": content_dict["_id"]}
 
@@ -65,6 +75,7 @@ async def update_page_content(
             }
         }
     )
+    await invalidate(db, TAG_PAGE_CONTENT)
     
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Content block not found")
@@ -81,6 +92,7 @@ async def delete_page_content(
     db = request.app.state.db
     
     result = await db.page_content.delete_one({"_id": content_id})
+    await invalidate(db, TAG_PAGE_CONTENT)
     
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Content block not found")
@@ -155,6 +167,7 @@ async def upload_gallery_file(
     }
     
     await db.gallery.insert_one(gallery_item)
+    await invalidate(db, TAG_GALLERY)
     
     return {"success": True, "item": {**gallery_item, "id": str(gallery_item["_id"])}}
 
@@ -185,18 +198,18 @@ async def delete_gallery_item(
             file_path.unlink()
     
     await db.gallery.delete_one({"_id": item_id})
+    await invalidate(db, TAG_GALLERY)
     return {"success": True}
 
 @router.get("/gallery/file/{filename}")
 async def get_gallery_file(filename: str):
     """Serve gallery file"""
-    from fastapi.responses import FileResponse
-    file_path = Path("/app/uploads/gallery") / filename
+    file_path = resolve_file(Path("/app/uploads/gallery"), filename)
     
-    if not file_path.exists():
+    if not file_path:
         raise HTTPException(status_code=404, detail="File not found")
     
-    return FileResponse(path=str(file_path))
+    return file_response(file_path)
 
 # About Page Management
 class AboutContent(BaseModel):
@@ -309,10 +322,9 @@ async def upload_serbian_story_image(
 @router.get("/file/{filename}")
 async def get_content_file(filename: str):
     """Serve content file"""
-    from fastapi.responses import FileResponse
-    file_path = Path("/app/uploads/content") / filename
+    file_path = resolve_file(Path("/app/uploads/content"), filename)
     
-    if not file_path.exists():
+    if not file_path:
         raise HTTPException(status_code=404, detail="File not found")
     
-    return FileResponse(path=str(file_path))
+    return file_response(file_path)
@@ -7,8 +7,8 @@ Three document types:
 3. Association Documents - Official organizational documents
 """
 
-from fastapi import APIRouter, Depends, HTTPException, Request, UploadFile, File, Form
-from fastapi.responses import FileResponse, StreamingResponse
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, UploadFile, File, Form
+from fastapi.responses import StreamingResponse
 from datetime import datetime
 from uuid import uuid4
 from typing import List, Optional
@@ -17,7 +17,10 @@ import os
 import logging
 import shutil
 
-from dependencies import get_current_user, get_admin_user
+from dependencies import get_token_user, get_admin_user
+from utils import rosters
+from utils.zip_stream import MAX_FILES, period_filter, safe_name, stream_zip
+from utils.file_delivery import file_response, resolve_file
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
@@ -62,7 +65,7 @@ def get_file_extension(content_type: str, filename: str) -> str:
 async def get_public_documents(
     category: Optional[str] = None,
     search: Optional[str] = None,
-    user: dict = Depends(get_current_user),
+    user: dict = Depends(get_token_user),
     request: Request = None
 ):
     """Get all public documents (accessible to all logged-in members)"""
@@ -262,7 +265,7 @@ async def delete_public_document(
 
 @router.get("/personal")
 async def get_my_personal_documents(
-    user: dict = Depends(get_current_user),
+    user: dict = Depends(get_token_user),
     request: Request = None
 ):
     """Get current user's personal documents"""
@@ -583,7 +586,7 @@ async def delete_personal_document(
 async def get_association_documents(
     visibility: Optional[str] = None,
     category: Optional[str] = None,
-    user: dict = Depends(get_current_user),
+    user: dict = Depends(get_token_user),
     request: Request = None
 ):
     """Get association/company documents"""
@@ -813,18 +816,71 @@ async def delete_association_document(
 # FILE SERVING
 # ===========================================
 
+@router.get("/bundle")
+async def download_document_bundle(
+    type: str = Query(None, pattern="^(public|personal|association)$"),
+    start: str = Query(None, pattern=r"^\d{4}-\d{2}-\d{2}$"),
+    end: str = Query(None, pattern=r"^\d{4}-\d{2}-\d{2}$"),
+    training_group: str = None,
+    ids: str = None,
+    admin: dict = Depends(get_admin_user),
+    request: Request = None
+):
+    """
+    Download several documents as one ZIP, one folder per document type
+    (Admin only). Filter by type, upload date (start / end), training group
+    (personal documents of its members) and / or comma-separated document ids.
+    The archive is streamed as it is built.
+    """
+    db = request.app.state.db
+    
+    query = {"storedFileName": {"$nin": [None, ""]}, **period_filter(start, end)}
+    if type:
+        query["type"] = type
+    if ids:
+        query["id"] = {"$in": [i.strip() for i in ids.split(",") if i.strip()]}
+    if training_group:
+        roster = await rosters.get_roster(db, training_group)
+        query["type"] = "personal"
+        query["assignedTo"] = {"$in": [m["userId"] for m in roster["members"]]}
+    
+    documents = await db.documents.find(
+        query, {"_id": 0, "type": 1, "fileName": 1, "storedFileName": 1}
+    ).sort("createdAt", 1).limit(MAX_FILES + 1).to_list(length=MAX_FILES + 1)
+    if not documents:
+        raise HTTPException(status_code=404, detail="No documents match the filter")
+    if len(documents) > MAX_FILES:
+        raise HTTPException(status_code=400, detail=f"More than {MAX_FILES} documents match, narrow the filter")
+    
+    used = set()
+    entries = [
+        (
+            DOCUMENTS_DIR / doc["storedFileName"],
+            f"{doc.get('type', 'other')}/{safe_name(doc.get('fileName') or doc['storedFileName'], used)}"
+        )
+        for doc in documents
+    ]
+    
+    filename = f"documents-{datetime.utcnow().strftime('%Y%m%d')}.zip"
+    return StreamingResponse(
+        stream_zip(entries),
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+
 @router.get("/files/{filename}")
 async def serve_document_file(
     filename: str,
-    user: dict = Depends(get_current_user),
+    user: dict = Depends(get_token_user),
     request: Request = None
 ):
     """Serve document files with access control"""
     db = request.app.state.db
     
-    file_path = DOCUMENTS_DIR / filename
+    file_path = resolve_file(DOCUMENTS_DIR, filename)
     
-    if not file_path.exists():
+    if not file_path:
         raise HTTPException(status_code=404, detail="File not found")
     
     # Find the document to check permissions
@@ -856,8 +912,8 @@ async def serve_document_file(
     if doc:
         content_type = doc.get("mimeType", content_type)
     
-    return FileResponse(
-        path=file_path,
+    return file_response(
+        file_path,
         filename=doc.get("fileName", filename) if doc else filename,
         media_type=content_type
     )
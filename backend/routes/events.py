@@ -1,42 +1,179 @@
-from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from datetime import datetime
-from typing import List
+from typing import List, Optional
+import base64
+import json
 import logging
 
 from models import EventCreate, EventUpdate, EventResponse
-from dependencies import get_admin_user, get_current_user
+from dependencies import get_admin_user, get_token_user
 from email_service import send_email, get_cancellation_email_template
+from utils.cache import cached_endpoint, events_list_key, TAG_EVENTS
+from utils.cache_bus import invalidate
+from utils.fast_json import FastJSONResponse, fast_json, find_api_documents
+from utils.i18n import resolve_language, localize_stage, EVENT_TEXT_FIELDS
+from utils import event_reminders, event_rsvps, rosters, rsvp_digest
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
-@router.get("/")
-async def get_events(request: Request):
-    """Get all events/trainings"""
+# RSVP data stays out of listings - counts only
+EVENT_LIST_STAGES = event_rsvps.RSVP_COUNT_STAGES
+EVENTS_PAGE_MAX = 200
+
+
+def _parse_date(value: Optional[str], name: str) -> Optional[str]:
+    if value is None:
+        return None
+    try:
+        datetime.strptime(value, "%Y-%m-%d")
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"'{name}' must be a date (YYYY-MM-DD)")
+    return value
+
+
+def _window_start(date_from: Optional[str]) -> str:
+    """Listings start today unless asked otherwise"""
+    return _parse_date(date_from, "from") or datetime.utcnow().strftime("%Y-%m-%d")
+
+
+def _encode_cursor(event: dict) -> str:
+    return base64.urlsafe_b64encode(json.dumps([event["date"], event["id"]]).encode()).decode()
+
+
+def _decode_cursor(cursor: str) -> tuple:
+    try:
+        date, event_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return date, event_id
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _events_cache_key(request, date_from=None, date_to=None, group=None, cursor=None, limit=100, lang=None, **_):
+    return events_list_key(_window_start(date_from), date_to, group, cursor, limit, resolve_language(request, lang))
+
+
+@router.get("/", response_class=FastJSONResponse)
+@fast_json
+@cached_endpoint(key=_events_cache_key, ttl='events', tags=[TAG_EVENTS])
+async def get_events(
+    request: Request,
+    date_from: Optional[str] = Query(None, alias="from"),
+    date_to: Optional[str] = Query(None, alias="to"),
+    group: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=EVENTS_PAGE_MAX),
+    lang: Optional[str] = None
+):
+    """
+    Events/trainings in a date window, oldest first (?lang= returns one language only)
+    
+    Query params:
+        - from / to: YYYY-MM-DD, inclusive; from defaults to today
+        - group: Training group; events without a group are included
+        - cursor: nextCursor of the previous page
+        - limit: Page size (max 200)
+    """
     db = request.app.state.db
-    cursor = db.events.find().sort("date", 1)
-    events_list = await cursor.to_list(length=100)
+    
+    date_query = {"$gte": _window_start(date_from)}
+    if date_to:
+        date_query["$lte"] = _parse_date(date_to, "to")
+    query = {"date": date_query}
+    if group and group != "all":
+        query["trainingGroup"] = {"$in": [group, None]}
+    if cursor:
+        after_date, after_id = _decode_cursor(cursor)
+        query["$or"] = [
+            {"date": {"$gt": after_date}},
+            {"date": after_date, "_id": {"$gt": after_id}}
+        ]
+    
+    lang = resolve_language(request, lang)
+    events_list = await find_api_documents(
+        db.events, query, sort=[("date", 1), ("_id", 1)], limit=limit,
+        stages=EVENT_LIST_STAGES + ([localize_stage(EVENT_TEXT_FIELDS, lang)] if lang else [])
+    )
     
     return {
-        "events": [{**{k: v for k, v in item.items() if k != '_id'}, "id": str(item["_id"])} for item in events_list]
+        "events": events_list,
+        "nextCursor": _encode_cursor(events_list[-1]) if len(events_list) == limit else None
     }
 
+@router.get("/my-rsvps")
+async def get_my_rsvps(
+    request: Request,
+    date_from: Optional[str] = Query(None, alias="from"),
+    date_to: Optional[str] = Query(None, alias="to"),
+    current_user: dict = Depends(get_token_user)
+):
+    """
+    RSVPs of the current user and their family members for events in a window
+    (same from/to as the listing). Status is "confirmed" or "cancelled".
+    """
+    db = request.app.state.db
+    user_id = current_user["_id"]
+    
+    family = await db.users.find(
+        {"$or": [{"parentId": user_id}, {"primaryAccountId": user_id}]},
+        {"_id": 1}
+    ).to_list(length=None)
+    member_ids = [user_id] + [member["_id"] for member in family]
+    
+    date_query = {"$gte": _window_start(date_from)}
+    if date_to:
+        date_query["$lte"] = _parse_date(date_to, "to")
+    
+    rsvps = await db.event_rsvps.find(
+        {
+            "userId": {"$in": member_ids},
+            "date": date_query,
+            "status": {"$in": [event_rsvps.CONFIRMED, event_rsvps.CANCELLED]}
+        },
+        {"_id": 0, "eventId": 1, "userId": 1, "status": 1}
+    ).to_list(length=None)
+    
+    return {"rsvps": rsvps}
+
 @router.post("/", response_model=EventResponse)
 async def create_event(event: EventCreate, admin: dict = Depends(get_admin_user), request: Request = None):
     """Create event/training (Admin only)"""
     db = request.app.state.db
     event_dict = event.dict()
     event_dict["_id"] = f"event_{int(datetime.utcnow().timestamp() * 1000)}"
-    event_dict["participants"] = []  # Users who confirmed attendance (RSVP)
-    event_dict["attendance"] = {}    # Actual attendance: {userId: {attended: bool, markedAt: datetime, markedBy: str}}
+    # RSVPs and attendance live in event_rsvps (utils/event_rsvps.py)
     event_dict["createdAt"] = datetime.utcnow()
     event_dict["createdBy"] = admin.get("fullName", admin.get("username", "Admin"))
     
     await db.events.insert_one(event_dict)
+    await event_reminders.schedule(db, event_dict)
+    await invalidate(db, TAG_EVENTS)
     
     return EventResponse(**{**event_dict, "id": event_dict["_id"]})
 
 
+async def _rsvps_by_event(db, events: list) -> tuple:
+    """
+    Confirmed user IDs and attendance per event, in the shape the reports use:
+    ({eventId: [userId]}, {eventId: {userId: {attended, markedAt, markedBy}}})
+    """
+    participants, attendance = {}, {}
+    rsvps = await db.event_rsvps.find(
+        {"eventId": {"$in": [event["_id"] for event in events]}},
+        {"eventId": 1, "userId": 1, "status": 1, "attended": 1, "markedAt": 1, "markedBy": 1}
+    ).to_list(length=None)
+    for rsvp in rsvps:
+        if rsvp.get("status") == event_rsvps.CONFIRMED:
+            participants.setdefault(rsvp["eventId"], []).append(rsvp["userId"])
+        if rsvp.get("attended") is not None:
+            attendance.setdefault(rsvp["eventId"], {})[rsvp["userId"]] = {
+                "attended": rsvp["attended"],
+                "markedAt": rsvp.get("markedAt"),
+                "markedBy": rsvp.get("markedBy")
+            }
+    return participants, attendance
+
+
 # ==================== ATTENDANCE REPORTS ====================
 # NOTE: These routes MUST be defined BEFORE any /{event_id} routes
 # to prevent FastAPI from matching "reports" as an event_id
@@ -93,10 +230,22 @@ async def generate_attendance_report(
         events_cursor = db.events.find(query).sort("date", 1)
         events = await events_cursor.to_list(length=500)
     
-    # Fetch all users for member lookup
-    users_cursor = db.users.find()
-    users = await users_cursor.to_list(length=1000)
+    participants_by_event, attendance_by_event = await _rsvps_by_event(db, events)
+    
+    # Fetch the users that appear in the report
+    user_ids = set()
+    for event in events:
+        user_ids.update(participants_by_event.get(event["_id"], []))
+        user_ids.update(attendance_by_event.get(event["_id"], {}))
+    users = await db.users.find(
+        {"_id": {"$in": list(user_ids)}}, {"fullName": 1, "email": 1, "trainingGroup": 1}
+    ).to_list(length=None)
     users_dict = {u["_id"]: u for u in users}
+    member_groups = rosters.groups_by_user(await rosters.get_rosters(db))
+    
+    def member_group(user_id: str, user: dict) -> str:
+        groups = member_groups.get(user_id)
+        return ", ".join(groups) if groups else user.get("trainingGroup") or "-"
     
     # Process events data
     events_data = []
@@ -107,8 +256,8 @@ async def generate_attendance_report(
     total_walkins = 0
     
     for event in events:
-        participants = event.get("participants", [])
-        attendance = event.get("attendance", {})
+        participants = participants_by_event.get(event["_id"], [])
+        attendance = attendance_by_event.get(event["_id"], {})
         
         present_count = 0
         absent_count = 0
@@ -125,7 +274,7 @@ async def generate_attendance_report(
                 member_stats[user_id] = {
                     "name": user.get("fullName", "Unknown"),
                     "email": user.get("email", ""),
-                    "training_group": user.get("trainingGroup", "-"),
+                    "training_group": member_group(user_id, user),
                     "total_rsvps": 0,
                     "total_present": 0,
                     "total_absent": 0,
@@ -150,7 +299,7 @@ async def generate_attendance_report(
                     member_stats[user_id] = {
                         "name": user.get("fullName", "Unknown"),
                         "email": user.get("email", ""),
-                        "training_group": user.get("trainingGroup", "-"),
+                        "training_group": member_group(user_id, user),
                         "total_rsvps": 0,
                         "total_present": 1,
                         "total_absent": 0,
@@ -277,10 +426,7 @@ async def get_attendance_report_data(
         events_cursor = db.events.find(query).sort("date", 1)
         events = await events_cursor.to_list(length=500)
     
-    # Fetch all users
-    users_cursor = db.users.find()
-    users = await users_cursor.to_list(length=1000)
-    users_dict = {u["_id"]: u for u in users}
+    participants_by_event, attendance_by_event = await _rsvps_by_event(db, events)
     
     # Get unique training groups
     training_groups = await db.events.distinct("trainingGroup")
@@ -293,8 +439,8 @@ async def get_attendance_report_data(
     total_confirmed = 0
     
     for event in events:
-        participants = event.get("participants", [])
-        attendance = event.get("attendance", {})
+        participants = participants_by_event.get(event["_id"], [])
+        attendance = attendance_by_event.get(event["_id"], {})
         total_confirmed += len(participants)
         
         for user_id in participants:
@@ -343,12 +489,17 @@ async def update_event(
     db = request.app.state.db
     update_data = event_update.dict(exclude_unset=True)
     
+    # Stored before the update: the reminder only moves if the start does
+    event = await db.events.find_one({"_id": event_id})
+    if not event:
+        raise HTTPException(status_code=404, detail="Event not found")
+    
     # If cancelling, send emails to participants
     if update_data.get("status") == "cancelled":
-        event = await db.events.find_one({"_id": event_id})
-        if event and event.get("participants"):
+        participant_ids = await event_rsvps.confirmed_user_ids(db, event_id)
+        if participant_ids:
             participants = await db.users.find({
-                "_id": {"$in": event["participants"]}
+                "_id": {"$in": participant_ids}
             }).to_list(length=100)
             
             for user in participants:
@@ -377,13 +528,17 @@ async def update_event(
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Event not found")
     
+    await event_rsvps.sync_event(db, event_id, update_data)
+    await event_reminders.reschedule(db, event_id, update_data, event)
+    await invalidate(db, TAG_EVENTS)
+    
     return {"success": True, "message": "Event updated successfully"}
 
 @router.post("/{event_id}/confirm")
 async def confirm_participation(
     event_id: str,
     member_id: str = None,
-    current_user: dict = Depends(get_current_user),
+    current_user: dict = Depends(get_token_user),
     request: Request = None
 ):
     """User confirms participation for themselves or a family member"""
@@ -421,55 +576,19 @@ async def confirm_participation(
         participant_name = family_member.get("fullName", "Family Member")
         participant_email = family_member.get("email") or current_user.get("email")
     
-    await db.events.update_one(
-        {"_id": event_id},
-        {"$addToSet": {"participants": participant_id}}
-    )
-    
-    # Find moderator for this training group
-    from email_service import send_email, get_admin_event_participation_notification
-    
-    training_group = event.get("trainingGroup")
-    notify_emails = set(["info@srpskoudruzenjetaby.se"])  # Default admin
-    
-    if training_group:
-        # Find moderators assigned to this training group
-        moderators = await db.users.find({
-            "role": {"$in": ["moderator", "admin", "superadmin"]},
-            "trainingGroups": training_group
-        }).to_list(length=10)
-        
-        if moderators:
-            for m in moderators:
-                if m.get("email"):
-                    notify_emails.add(m.get("email"))
+    await event_rsvps.confirm(db, event, participant_id)
+    await invalidate(db, TAG_EVENTS)
     
     # Add note if registering a family member
     registered_by = ""
     if member_id and member_id != current_user["_id"]:
         registered_by = f" (registered by {current_user.get('fullName', current_user.get('email'))})"
-        
+    
+    # Moderators get it in their next digest (or right away if they opted in)
     try:
-        admin_html, admin_text = get_admin_event_participation_notification(
-            user_name=participant_name + registered_by,
-            user_email=participant_email,
-            event_title=event["title"].get("en", "Event"),
-            event_date=event["date"],
-            event_time=event["time"],
-            action="confirmed",
-            training_group=training_group
-        )
-        
-        for email in notify_emails:
-            await send_email(
-                email,
-                "✓ Potvrđeno Učešće / Bekräftat Deltagande - SKUD Täby",
-                admin_html,
-                admin_text,
-                db=db
-            )
+        await rsvp_digest.record(db, event, "confirmed", participant_name + registered_by, participant_email)
     except Exception as e:
-        logger.error(f"Failed to send participation notification: {str(e)}")
+        logger.error(f"Failed to queue participation notification: {str(e)}")
     
     return {"success": True, "confirmed": True, "participant_id": participant_id}
 
@@ -478,7 +597,7 @@ async def cancel_participation(
     event_id: str,
     reason: str = None,
     member_id: str = None,
-    current_user: dict = Depends(get_current_user),
+    current_user: dict = Depends(get_token_user),
     request: Request = None
 ):
     """User cancels participation for themselves or a family member"""
@@ -516,67 +635,22 @@ async def cancel_participation(
         participant_name = family_member.get("fullName", "Family Member")
         participant_email = family_member.get("email") or current_user.get("email")
     
-    # Track cancellation in cancellations array
-    cancellation_record = {
-        "userId": participant_id,
-        "reason": reason,
-        "cancelledAt": datetime.utcnow().isoformat(),
-        "cancelledBy": current_user["_id"] if member_id else None
-    }
-    
-    await db.events.update_one(
-        {"_id": event_id},
-        {
-            "$pull": {"participants": participant_id},
-            "$push": {"cancellations": cancellation_record}
-        }
+    await event_rsvps.cancel(
+        db, event, participant_id, reason,
+        cancelled_by=current_user["_id"] if member_id else None
     )
-    
-    # Find moderator for this training group
-    from email_service import send_email, get_admin_event_participation_notification
-    
-    training_group = event.get("trainingGroup")
-    notify_emails = set(["info@srpskoudruzenjetaby.se"])  # Default admin
-    
-    if training_group:
-        # Find moderators assigned to this training group
-        moderators = await db.users.find({
-            "role": {"$in": ["moderator", "admin", "superadmin"]},
-            "trainingGroups": training_group
-        }).to_list(length=10)
-        
-        if moderators:
-            for m in moderators:
-                if m.get("email"):
-                    notify_emails.add(m.get("email"))
+    await invalidate(db, TAG_EVENTS)
     
     # Add note if cancelling for a family member
     cancelled_by = ""
     if member_id and member_id != current_user["_id"]:
         cancelled_by = f" (cancelled by {current_user.get('fullName', current_user.get('email'))})"
     
+    # Moderators get it in their next digest (or right away if they opted in)
     try:
-        admin_html, admin_text = get_admin_event_participation_notification(
-            user_name=participant_name + cancelled_by,
-            user_email=participant_email,
-            event_title=event["title"].get("en", "Event"),
-            event_date=event["date"],
-            event_time=event["time"],
-            action="cancelled",
-            reason=reason,
-            training_group=training_group
-        )
-        
-        for email in notify_emails:
-            await send_email(
-                email,
-                "✗ Otkazano Učešće / Avbokad Deltagande - SKUD Täby",
-                admin_html,
-                admin_text,
-                db=db
-            )
+        await rsvp_digest.record(db, event, "cancelled", participant_name + cancelled_by, participant_email, reason)
     except Exception as e:
-        logger.error(f"Failed to send cancellation notification: {str(e)}")
+        logger.error(f"Failed to queue cancellation notification: {str(e)}")
     
     return {"success": True, "confirmed": False, "participant_id": participant_id}
 
@@ -593,22 +667,20 @@ async def get_participants(
     if not event:
         raise HTTPException(status_code=404, detail="Event not found")
     
-    participant_ids = event.get("participants", [])
-    attendance_data = event.get("attendance", {})
-    participants = await db.users.find({"_id": {"$in": participant_ids}}).to_list(length=None)
+    rsvps = await event_rsvps.for_event_with_users(db, event_id, {"status": event_rsvps.CONFIRMED})
     
     return {
         "participants": [
             {
-                "id": p["_id"],
-                "fullName": p.get("fullName"),
-                "email": p.get("email"),
-                "confirmed": True,  # They're in participants list
-                "attended": attendance_data.get(p["_id"], {}).get("attended"),
-                "attendanceMarkedAt": attendance_data.get(p["_id"], {}).get("markedAt"),
-                "attendanceMarkedBy": attendance_data.get(p["_id"], {}).get("markedBy")
+                "id": rsvp["userId"],
+                "fullName": rsvp["user"].get("fullName"),
+                "email": rsvp["user"].get("email"),
+                "confirmed": True,
+                "attended": rsvp.get("attended"),
+                "attendanceMarkedAt": rsvp.get("markedAt"),
+                "attendanceMarkedBy": rsvp.get("markedBy")
             }
-            for p in participants
+            for rsvp in rsvps if rsvp.get("user")
         ],
         "eventDate": event.get("date"),
         "eventTime": event.get("time"),
@@ -639,13 +711,10 @@ async def mark_attendance(
     # Verify user exists - if not, remove from participants and return success
     user = await db.users.find_one({"_id": user_id})
     if not user:
-        # User was deleted - clean up the participant list
-        if user_id in event.get("participants", []):
-            await db.events.update_one(
-                {"_id": event_id},
-                {"$pull": {"participants": user_id}}
-            )
-            logger.info(f"Removed deleted user {user_id} from event {event_id} participants")
+        # User was deleted - clean up their RSVP
+        await event_rsvps.remove_users(db, event_id, [user_id])
+        await invalidate(db, TAG_EVENTS)
+        logger.info(f"Removed deleted user {user_id} from event {event_id} participants")
         return {
             "success": True,
             "userId": user_id,
@@ -654,16 +723,10 @@ async def mark_attendance(
         }
     
     # Mark attendance
-    attendance_record = {
-        "attended": attended,
-        "markedAt": datetime.utcnow().isoformat(),
-        "markedBy": admin.get("fullName", admin.get("username", "Admin"))
-    }
-    
-    await db.events.update_one(
-        {"_id": event_id},
-        {"$set": {f"attendance.{user_id}": attendance_record}}
+    await event_rsvps.mark_attendance(
+        db, event, {user_id: attended}, marked_by=admin.get("fullName", admin.get("username", "Admin"))
     )
+    await invalidate(db, TAG_EVENTS)
     
     return {
         "success": True,
@@ -691,27 +754,16 @@ async def mark_bulk_attendance(
         raise HTTPException(status_code=404, detail="Event not found")
     
     attendance_updates = body.get("attendance", {})
-    marked_by = admin.get("fullName", admin.get("username", "Admin"))
-    marked_at = datetime.utcnow().isoformat()
-    
-    update_dict = {}
-    for user_id, attended in attendance_updates.items():
-        update_dict[f"attendance.{user_id}"] = {
-            "attended": attended,
-            "markedAt": marked_at,
-            "markedBy": marked_by
-        }
-    
-    if update_dict:
-        await db.events.update_one(
-            {"_id": event_id},
-            {"$set": update_dict}
-        )
+    marked = await event_rsvps.mark_attendance(
+        db, event, attendance_updates, marked_by=admin.get("fullName", admin.get("username", "Admin"))
+    )
+    if marked:
+        await invalidate(db, TAG_EVENTS)
     
     return {
         "success": True,
-        "marked": len(update_dict),
-        "message": f"Attendance updated for {len(update_dict)} users"
+        "marked": marked,
+        "message": f"Attendance updated for {marked} users"
     }
 
 
@@ -732,29 +784,26 @@ async def get_attendance(
     if not event:
         raise HTTPException(status_code=404, detail="Event not found")
     
-    participant_ids = event.get("participants", [])
-    attendance_data = event.get("attendance", {})
-    
-    # Get all users who either confirmed or have attendance marked
-    all_user_ids = list(set(participant_ids + list(attendance_data.keys())))
-    users = await db.users.find({"_id": {"$in": all_user_ids}}).to_list(length=None)
-    users_dict = {u["_id"]: u for u in users}
+    # Users who either confirmed or have attendance marked
+    rsvps = await event_rsvps.for_event_with_users(
+        db, event_id, {"$or": [{"status": event_rsvps.CONFIRMED}, {"attended": {"$ne": None}}]}
+    )
     
     attendance_list = []
     stats = {"confirmed": 0, "attended": 0, "noShow": 0, "walkIn": 0, "pending": 0}
     deleted_user_ids = []
     
-    for user_id in all_user_ids:
-        user = users_dict.get(user_id)
+    for rsvp in rsvps:
+        user_id = rsvp["userId"]
+        user = rsvp.get("user")
         
         # Track deleted users for cleanup
         if not user:
             deleted_user_ids.append(user_id)
             continue  # Skip deleted users
             
-        confirmed = user_id in participant_ids
-        att = attendance_data.get(user_id, {})
-        attended = att.get("attended")
+        confirmed = rsvp.get("status") == event_rsvps.CONFIRMED
+        attended = rsvp.get("attended")
         
         # Calculate status
         if confirmed and attended is True:
@@ -783,16 +832,14 @@ async def get_attendance(
             "confirmed": confirmed,
             "attended": attended,
             "status": status,
-            "markedAt": att.get("markedAt"),
-            "markedBy": att.get("markedBy")
+            "markedAt": rsvp.get("markedAt"),
+            "markedBy": rsvp.get("markedBy")
         })
     
-    # Clean up deleted users from participants list
+    # Clean up RSVPs of deleted users
     if deleted_user_ids:
-        await db.events.update_one(
-            {"_id": event_id},
-            {"$pull": {"participants": {"$in": deleted_user_ids}}}
-        )
+        await event_rsvps.remove_users(db, event_id, deleted_user_ids)
+        await invalidate(db, TAG_EVENTS)
         logger.info(f"Cleaned up {len(deleted_user_ids)} deleted users from event {event_id}")
     
     return {
@@ -826,17 +873,10 @@ async def mark_walkin_attendance(
         raise HTTPException(status_code=404, detail="User not found")
     
     # Mark as attended (walk-in)
-    attendance_record = {
-        "attended": True,
-        "markedAt": datetime.utcnow().isoformat(),
-        "markedBy": admin.get("fullName", admin.get("username", "Admin")),
-        "walkIn": True
-    }
-    
-    await db.events.update_one(
-        {"_id": event_id},
-        {"$set": {f"attendance.{user_id}": attendance_record}}
+    await event_rsvps.mark_attendance(
+        db, event, {user_id: True}, marked_by=admin.get("fullName", admin.get("username", "Admin")), walk_in=True
     )
+    await invalidate(db, TAG_EVENTS)
     
     return {
         "success": True,
@@ -847,31 +887,39 @@ async def mark_walkin_attendance(
 
 @router.get("/stats/my")
 async def get_my_event_stats(
-    current_user: dict = Depends(get_current_user),
+    current_user: dict = Depends(get_token_user),
     request: Request = None
 ):
     """Get user's training statistics"""
     db = request.app.state.db
     user_id = current_user["_id"]
     
-    # Get all events
-    all_events = await db.events.find({"status": "active"}).to_list(length=None)
+    # Active events: count and locations
+    totals = await db.events.aggregate([
+        {"$match": {"status": "active"}},
+        {"$group": {"_id": None, "count": {"$sum": 1}, "locations": {"$addToSet": {"$ifNull": ["$location", "Unknown"]}}}}
+    ]).to_list(length=1)
+    totals = totals[0] if totals else {"count": 0, "locations": []}
     
     # Total trainings available
-    total_trainings = len(all_events)
+    total_trainings = totals["count"]
+    
+    # The user's RSVPs to active events, by status
+    by_status = await db.event_rsvps.aggregate([
+        {"$match": {"userId": user_id, "eventStatus": "active"}},
+        {"$group": {"_id": "$status", "count": {"$sum": 1}}}
+    ]).to_list(length=None)
+    by_status = {row["_id"]: row["count"] for row in by_status}
     
     # Trainings attended (confirmed)
-    attended = sum(1 for event in all_events if event.get("participants") and user_id in event["participants"])
+    attended = by_status.get(event_rsvps.CONFIRMED, 0)
     
-    # Trainings cancelled (historical)
-    cancelled = sum(
-        1 for event in all_events 
-        if event.get("cancellations") and any(c.get("userId") == user_id for c in event["cancellations"])
-    )
+    # Trainings cancelled
+    cancelled = by_status.get(event_rsvps.CANCELLED, 0)
     
     # Training groups (extract unique categories/types if available, otherwise use event types)
     # For now, we'll use unique locations as proxy for groups
-    training_groups = len(set(event.get("location", "Unknown") for event in all_events))
+    training_groups = len(totals["locations"])
     
     return {
         "totalTrainings": total_trainings,
@@ -890,4 +938,8 @@ async def delete_event(event_id: str, admin: dict = Depends(get_admin_user), req
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Event not found")
     
+    await event_rsvps.delete_for_event(db, event_id)
+    await event_reminders.delete(db, event_id)
+    await invalidate(db, TAG_EVENTS)
+    
     return {"success": True, "message": "Event deleted successfully"}
\ No newline at end of file
@@ -5,7 +5,8 @@ from typing import List, Optional
 from pydantic import BaseModel, EmailStr
 
 from dependencies import get_current_user, get_admin_user
-from auth_utils import hash_password
+from auth_utils import hash_password_async
+from utils import rosters
 
 router = APIRouter()
 
@@ -128,7 +129,7 @@ async def add_family_member(
         "trainingGroup": member_data.trainingGroup,
         "role": "user",
         "emailVerified": True,  # Family members are pre-verified
-        "hashed_password": hash_password(temp_password) if temp_password else hash_password(secrets.token_hex(16)),
+        "hashed_password": await hash_password_async(temp_password or secrets.token_hex(16)),
         "primaryAccountId": user["_id"],  # Link to parent account
         "parentEmail": parent_email,  # Store parent's email for notifications
         "relationship": member_data.relationship,
@@ -157,6 +158,7 @@ async def add_family_member(
         {"_id": user["_id"]},
         {"$push": {"dependentMembers": member_id}}
     )
+    rosters.schedule_rebuild(db)
     
     # Send notification emails
     try:
@@ -500,6 +502,7 @@ async def update_family_member(
         {"_id": member_id},
         {"$set": update_doc}
     )
+    rosters.schedule_rebuild(db)
     
     return {"success": True, "message": "Family member updated successfully"}
 
@@ -532,6 +535,7 @@ async def remove_family_member(
         {"_id": member_id},
         {"$unset": {"primaryAccountId": "", "relationship": ""}}
     )
+    rosters.schedule_rebuild(db)
     
     return {
         "success": True, 
@@ -563,22 +567,35 @@ async def admin_get_all_family_relationships(
         }
     ).to_list(length=1000)
     
-    # Enrich with dependent details
+    # Enrich with dependent details - one query for all families
+    all_dependent_ids = list({
+        dependent_id
+        for user in primary_users
+        for dependent_id in user.get("dependentMembers", [])
+    })
+    dependents_by_id = {}
+    if all_dependent_ids:
+        dependents = await db.users.find(
+            {"_id": {"$in": all_dependent_ids}},
+            {
+                "id": 1,
+                "fullName": 1,
+                "email": 1,
+                "relationship": 1,
+                "yearOfBirth": 1
+            }
+        ).to_list(length=None)
+        # Keyed by _id (what dependentMembers holds), not every dependent has "id"
+        dependents_by_id = {d.pop("_id"): d for d in dependents}
+    
     for user in primary_users:
         dependent_ids = user.get("dependentMembers", [])
         if dependent_ids:
-            dependents = await db.users.find(
-                {"_id": {"$in": dependent_ids}},
-                {
-                    "_id": 0,
-                    "id": 1,
-                    "fullName": 1,
-                    "email": 1,
-                    "relationship": 1,
-                    "yearOfBirth": 1
-                }
-            ).to_list(length=100)
-            user["familyMembers"] = dependents
+            user["familyMembers"] = [
+                dependents_by_id[dependent_id]
+                for dependent_id in dependent_ids
+                if dependent_id in dependents_by_id
+            ]
     
     return {
         "families": primary_users,
@@ -663,7 +680,7 @@ async def admin_add_family_member(
         "trainingGroup": member_data.trainingGroup,
         "role": "user",
         "emailVerified": True,
-        "hashed_password": hash_password(temp_password) if temp_password else hash_password(secrets.token_hex(16)),
+        "hashed_password": await hash_password_async(temp_password or secrets.token_hex(16)),
         "primaryAccountId": parent_id,
         "parentEmail": parent_email,
         "relationship": member_data.relationship,
@@ -692,6 +709,7 @@ async def admin_add_family_member(
         {"_id": parent_id},
         {"$push": {"dependentMembers": member_id}}
     )
+    rosters.schedule_rebuild(db)
     
     # Send notification emails
     try:
@@ -907,6 +925,7 @@ async def admin_remove_family_member(
             {"_id": primary_account_id},
             {"$pull": {"dependentMembers": member_id}}
         )
+    rosters.schedule_rebuild(db)
     
     if delete_account:
         # Delete the member account entirely
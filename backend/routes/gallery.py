@@ -1,6 +1,6 @@
 from fastapi import APIRouter, Depends, HTTPException, Request, UploadFile, File
-from fastapi.responses import FileResponse
 from datetime import datetime
+from typing import Optional
 from pathlib import Path
 import shutil
 import logging
@@ -8,19 +8,32 @@ import logging
 from models import GalleryCreate, GalleryResponse
 from dependencies import get_admin_user
 from utils.media_optimizer import optimize_uploaded_file
+from utils.cache import cached_endpoint, gallery_key, TAG_GALLERY
+from utils.cache_bus import invalidate
+from utils.fast_json import FastJSONResponse, fast_json
+from utils.i18n import resolve_language, find_localized, GALLERY_TEXT_FIELDS
+from utils.file_delivery import file_response, resolve_file
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
-@router.get("/")
-async def get_gallery(request: Request):
-    """Get all gallery items"""
+@router.get("/", response_class=FastJSONResponse)
+@fast_json
+@cached_endpoint(
+    key=lambda request, lang=None, **_: gallery_key(lang=resolve_language(request, lang)),
+    ttl='gallery',
+    tags=[TAG_GALLERY]
+)
+async def get_gallery(request: Request, lang: Optional[str] = None):
+    """Get all gallery items (?lang= returns one language only)"""
     db = request.app.state.db
-    cursor = db.gallery.find().sort("date", -1)
-    gallery_list = await cursor.to_list(length=100)
+    gallery_list = await find_localized(
+        db.gallery, {}, GALLERY_TEXT_FIELDS, resolve_language(request, lang),
+        sort=[("date", -1)], limit=100
+    )
     
     return {
-        "items": [{**item, "id": str(item["_id"])} for item in gallery_list]
+        "items": gallery_list
     }
 
 @router.post("/", response_model=GalleryResponse)
@@ -36,6 +49,7 @@ async def create_gallery_item(
     gallery_dict["createdAt"] = datetime.utcnow()
     
     await db.gallery.insert_one(gallery_dict)
+    await invalidate(db, TAG_GALLERY)
     
     return GalleryResponse(**{**gallery_dict, "id": gallery_dict["_id"]})
 
@@ -59,6 +73,7 @@ async def update_gallery_item(
         {"_id": gallery_id},
         {"$set": update_data}
     )
+    await invalidate(db, TAG_GALLERY)
     
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Gallery item not found")
@@ -107,6 +122,7 @@ async def upload_gallery_image(
         {"_id": gallery_id},
         {"$push": {"images": image_url}}
     )
+    await invalidate(db, TAG_GALLERY)
     
     return {"success": True, "imageUrl": image_url}
 
@@ -125,6 +141,7 @@ async def delete_gallery_image(
         {"_id": gallery_id},
         {"$pull": {"images": image_url}}
     )
+    await invalidate(db, TAG_GALLERY)
     
     # Try to delete file if it's a local upload
     if "/api/gallery/images/" in image_url:
@@ -138,11 +155,9 @@ async def delete_gallery_image(
 @router.get("/images/{filename}")
 async def get_gallery_image(filename: str):
     """Serve gallery image with cache headers"""
-    from fastapi.responses import Response
-    
-    file_path = Path("/app/uploads/gallery") / filename
+    file_path = resolve_file(Path("/app/uploads/gallery"), filename)
     
-    if not file_path.exists():
+    if not file_path:
         raise HTTPException(status_code=404, detail="Image not found")
     
     # Determine content type
@@ -156,12 +171,9 @@ async def get_gallery_image(filename: str):
     }
     content_type = content_types.get(ext, 'application/octet-stream')
     
-    # Read file and return with cache headers
-    with open(file_path, 'rb') as f:
-        content = f.read()
-    
-    return Response(
-        content=content,
+    # Sent by nginx when X-Accel-Redirect is enabled
+    return file_response(
+        file_path,
         media_type=content_type,
         headers={
             "Cache-Control": "public, max-age=31536000, immutable",
@@ -178,6 +190,7 @@ async def delete_gallery_item(
     """Delete gallery item (Admin only)"""
     db = request.app.state.db
     result = await db.gallery.delete_one({"_id": gallery_id})
+    await invalidate(db, TAG_GALLERY)
     
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Gallery item not found")
@@ -1,13 +1,19 @@
-from fastapi import APIRouter, Depends, HTTPException, Request, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, UploadFile, File
+from fastapi.responses import StreamingResponse
 from datetime import datetime
 import shutil
 import os
 from pathlib import Path
 
 from models import InvoiceCreate, InvoiceResponse, InvoiceMarkPaid, CreditNoteCreate, CreditNoteResponse
-from dependencies import get_admin_user, get_current_user
+from dependencies import get_admin_user, get_token_user
 from utils.invoice_generator import generate_invoice_pdf
 from utils.credit_note_generator import generate_credit_note_pdf
+from utils.fast_json import FastJSONResponse, fast_json, find_api_documents
+from utils.invoice_overdue import due_fields
+from utils import bank_reconciliation, rosters, sequences
+from utils.zip_stream import MAX_FILES, period_filter, safe_name, stream_zip
+from utils.file_delivery import file_response, resolve_file
 
 router = APIRouter()
 
@@ -18,7 +24,7 @@ CREDIT_NOTES_DIR = Path("/app/uploads/credit_notes")
 CREDIT_NOTES_DIR.mkdir(parents=True, exist_ok=True)
 
 @router.get("/my")
-async def get_my_invoices(current_user: dict = Depends(get_current_user), request: Request = None):
+async def get_my_invoices(current_user: dict = Depends(get_token_user), request: Request = None):
     """Get current user's invoices"""
     db = request.app.state.db
     cursor = db.invoices.find({"userId": current_user["_id"]}).sort("createdAt", -1)
@@ -28,16 +34,72 @@ async def get_my_invoices(current_user: dict = Depends(get_current_user), reques
         "invoices": [{**item, "id": str(item["_id"])} for item in invoices_list]
     }
 
-@router.get("/")
-async def get_all_invoices(admin: dict = Depends(get_admin_user), request: Request = None):
-    """Get all invoices (Admin only)"""
+@router.get("/", response_class=FastJSONResponse)
+@fast_json
+async def get_all_invoices(overdue: bool = None, admin: dict = Depends(get_admin_user), request: Request = None):
+    """Get all invoices, optionally only the overdue (or not overdue) ones (Admin only)"""
     db = request.app.state.db
-    cursor = db.invoices.find().sort("createdAt", -1)
-    invoices_list = await cursor.to_list(length=1000)
+    query = {} if overdue is None else {"overdue": True} if overdue else {"overdue": {"$ne": True}}
+    invoices_list = await find_api_documents(db.invoices, query, sort=[("createdAt", -1)], limit=1000)
     
     return {
-        "invoices": [{**item, "id": str(item["_id"])} for item in invoices_list]
+        "invoices": invoices_list
+    }
+
+@router.get("/bundle")
+async def download_invoice_bundle(
+    start: str = Query(None, pattern=r"^\d{4}-\d{2}-\d{2}$"),
+    end: str = Query(None, pattern=r"^\d{4}-\d{2}-\d{2}$"),
+    training_group: str = None,
+    ids: str = None,
+    status: str = None,
+    admin: dict = Depends(get_admin_user),
+    request: Request = None
+):
+    """
+    Download the PDFs of several invoices as one ZIP (Admin only).
+    Filter by creation date (start / end), training group, status and / or
+    comma-separated invoice ids. The archive is streamed as it is built.
+    """
+    db = request.app.state.db
+    
+    query = {"fileName": {"$nin": [None, ""]}, **period_filter(start, end)}
+    if ids:
+        query["_id"] = {"$in": [i.strip() for i in ids.split(",") if i.strip()]}
+    if status:
+        query["status"] = status
+    if training_group:
+        roster = await rosters.get_roster(db, training_group)
+        query["$or"] = [
+            {"trainingGroup": training_group},
+            {"userId": {"$in": [m["userId"] for m in roster["members"]]}}
+        ]
+    
+    invoices = await db.invoices.find(
+        query, {"fileName": 1, "invoiceNumber": 1, "userId": 1}
+    ).sort("createdAt", 1).limit(MAX_FILES + 1).to_list(length=MAX_FILES + 1)
+    if not invoices:
+        raise HTTPException(status_code=404, detail="No invoice files match the filter")
+    if len(invoices) > MAX_FILES:
+        raise HTTPException(status_code=400, detail=f"More than {MAX_FILES} invoices match, narrow the filter")
+    
+    users = {
+        u["_id"]: u.get("fullName") or u.get("email") or ""
+        async for u in db.users.find({"_id": {"$in": list({i.get("userId") for i in invoices})}}, {"fullName": 1, "email": 1})
     }
+    used = set()
+    entries = []
+    for invoice in invoices:
+        extension = Path(invoice["fileName"]).suffix or ".pdf"
+        label = " ".join(filter(None, [invoice.get("invoiceNumber") or invoice["_id"], users.get(invoice.get("userId"))]))
+        entries.append((INVOICES_DIR / invoice["fileName"], safe_name(f"{label}{extension}", used)))
+    
+    filename = f"invoices-{datetime.utcnow().strftime('%Y%m%d')}.zip"
+    return StreamingResponse(
+        stream_zip(entries),
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
 
 @router.post("/", response_model=InvoiceResponse)
 async def create_invoice(
@@ -65,17 +127,17 @@ async def create_invoice(
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
+    try:
+        due = due_fields(invoice.dueDate)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
     invoice_id = f"invoice_{int(datetime.utcnow().timestamp() * 1000)}"
     created_at = datetime.utcnow()
     
     # Generate sequential invoice number (0001, 0002, etc.)
-    counter_doc = await db.counters.find_one_and_update(
-        {"_id": "invoice_number"},
-        {"$inc": {"seq": 1}},
-        upsert=True,
-        return_document=True
-    )
-    invoice_number = str(counter_doc["seq"]).zfill(4)  # 0001, 0002, etc.
+    invoice_number = sequences.format_invoice_number(await sequences.next_value(db, sequences.INVOICE_NUMBER))
+    ocr = bank_reconciliation.ocr_reference(invoice_number)  # 00018, 00026, etc.
     
     # Calculate VAT amounts
     base_amount = float(invoice.amount)
@@ -86,9 +148,11 @@ async def create_invoice(
     invoice_dict = invoice.dict()
     invoice_dict["_id"] = invoice_id
     invoice_dict["invoiceNumber"] = invoice_number
+    invoice_dict["ocr"] = ocr
     invoice_dict["userId"] = primary_user_id  # Store primary userId for backward compatibility
     invoice_dict["status"] = "unpaid"
     invoice_dict["paymentDate"] = None
+    invoice_dict.update(due)  # dueDate as YYYY-MM-DD, dueAt, overdue (+ overdueSince)
     invoice_dict["createdAt"] = created_at
     invoice_dict["baseAmount"] = base_amount  # Store base amount before VAT
     invoice_dict["vatAmount"] = vat_amount  # Store VAT amount
@@ -115,12 +179,13 @@ async def create_invoice(
             description=invoice.description,
             amount=total_amount,
             currency=invoice.currency or "SEK",
-            due_date=invoice.dueDate,
+            due_date=invoice_dict["dueDate"],
             created_at=created_at.isoformat(),
             output_path=str(pdf_path),
             status="unpaid",
             bank_details=bank_details,
-            vat_rate=vat_rate
+            vat_rate=vat_rate,
+            ocr_reference=ocr
         )
         
         # Store the file URL and filename in the invoice
@@ -152,7 +217,7 @@ async def create_invoice(
                 invoice_description=invoice.description,
                 amount=float(invoice.amount),
                 currency=invoice.currency or "SEK",
-                due_date=invoice.dueDate,
+                due_date=invoice_dict["dueDate"],
                 download_link=download_link
             )
             
@@ -181,7 +246,10 @@ async def mark_invoice_paid(
     db = request.app.state.db
     result = await db.invoices.update_one(
         {"_id": invoice_id},
-        {"$set": {"status": "paid", "paymentDate": payment_data.paymentDate}}
+        {
+            "$set": {"status": "paid", "paymentDate": payment_data.paymentDate, "overdue": False},
+            "$unset": {"overdueSince": ""}
+        }
     )
     
     if result.matched_count == 0:
@@ -189,6 +257,58 @@ async def mark_invoice_paid(
     
     return {"success": True, "message": "Invoice marked as paid"}
 
+@router.post("/reconcile")
+async def reconcile_bank_statement(
+    file: UploadFile = File(...),
+    dry_run: bool = False,
+    admin: dict = Depends(get_admin_user),
+    request: Request = None
+):
+    """
+    Import a Bankgirot BgMax or camt.053 bank statement and mark the invoices
+    it pays as paid (Admin only). Payments that could not be matched are
+    returned with the reason. With dry_run nothing is changed.
+    """
+    db = request.app.state.db
+    
+    head = file.file.read(1024)
+    file.file.seek(0)
+    statement_format = bank_reconciliation.detect_format(head)
+    if not statement_format:
+        raise HTTPException(status_code=400, detail="Unsupported file, expected a BgMax or camt.053 statement")
+    
+    admin_name = admin.get("fullName", admin.get("email"))
+    try:
+        report = await bank_reconciliation.reconcile(
+            db,
+            bank_reconciliation.parse_statement(file.file, statement_format),
+            source=statement_format,
+            reconciled_by=admin_name,
+            dry_run=dry_run
+        )
+    except (ValueError, SyntaxError) as e:
+        # Malformed amounts / XML
+        raise HTTPException(status_code=400, detail=f"Could not read the statement: {e}")
+    
+    if not dry_run:
+        from activity_logger import log_admin_activity
+        await log_admin_activity(
+            db=db,
+            admin_id=admin["_id"],
+            admin_name=admin_name,
+            action="reconcile",
+            target_type="invoice",
+            details={
+                "fileName": file.filename,
+                "format": statement_format,
+                "payments": report["payments"],
+                "marked": report["marked"],
+                "unmatched": len(report["unmatched"])
+            }
+        )
+    
+    return report
+
 @router.put("/{invoice_id}")
 async def update_invoice(
     invoice_id: str,
@@ -219,11 +339,23 @@ async def update_invoice(
     if not update_fields:
         raise HTTPException(status_code=400, detail="No valid fields to update")
     
+    if "dueDate" in update_fields:
+        try:
+            update_fields.update(due_fields(update_fields["dueDate"], existing.get("status")))
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        # Still overdue: keep when it became overdue
+        if update_fields["overdue"] and existing.get("overdue") and existing.get("overdueSince"):
+            del update_fields["overdueSince"]
+    
     update_fields["updatedAt"] = datetime.utcnow()
+    update = {"$set": update_fields}
+    if update_fields.get("overdue") is False:
+        update["$unset"] = {"overdueSince": ""}
     
     result = await db.invoices.update_one(
         {"_id": invoice_id},
-        {"$set": update_fields}
+        update
     )
     
     if result.matched_count == 0:
@@ -282,10 +414,8 @@ async def credit_invoice(
     member_name = user.get("fullName", "Unknown") if user else "Unknown"
     member_email = user.get("email", "") if user else ""
     
-    # Generate credit note number (CN-YYYYMMDD-XXX format)
-    today = datetime.utcnow().strftime("%Y%m%d")
-    count = await db.credit_notes.count_documents({"creditNoteNumber": {"$regex": f"^CN-{today}"}})
-    credit_note_number = f"CN-{today}-{count + 1:03d}"
+    # Generate credit note number (CN-YYYYMMDD-XXX format, per-day sequence)
+    credit_note_number = await sequences.next_credit_note_number(db)
     
     credit_note_id = f"cn_{int(datetime.utcnow().timestamp() * 1000)}"
     created_at = datetime.utcnow()
@@ -351,6 +481,7 @@ async def credit_invoice(
         {"_id": invoice_id},
         {"$set": {
             "status": "credited",
+            "overdue": False,
             "creditNoteId": credit_note_id,
             "creditNoteNumber": credit_note_number,
             "creditedAt": created_at,
@@ -438,22 +569,16 @@ async def credit_invoice(
 @router.get("/credit-notes/files/{filename}")
 async def get_credit_note_file(filename: str, request: Request):
     """Serve credit note PDF files"""
-    from fastapi.responses import FileResponse
+    file_path = resolve_file(CREDIT_NOTES_DIR, filename)
     
-    file_path = CREDIT_NOTES_DIR / filename
-    
-    if not file_path.exists():
+    if not file_path:
         raise HTTPException(status_code=404, detail="Credit note file not found")
     
-    return FileResponse(
-        path=str(file_path),
-        media_type="application/pdf",
-        filename=filename
-    )
+    return file_response(file_path, filename=filename, media_type="application/pdf")
 
 
 @router.get("/credit-notes/my")
-async def get_my_credit_notes(current_user: dict = Depends(get_current_user), request: Request = None):
+async def get_my_credit_notes(current_user: dict = Depends(get_token_user), request: Request = None):
     """Get current user's credit notes"""
     db = request.app.state.db
     cursor = db.credit_notes.find({"userId": current_user["_id"]}).sort("createdAt", -1)
@@ -566,11 +691,10 @@ async def upload_invoice_file(
 @router.get("/{invoice_id}/download")
 async def download_invoice_file(
     invoice_id: str,
-    current_user: dict = Depends(get_current_user),
+    current_user: dict = Depends(get_token_user),
     request: Request = None
 ):
     """Download invoice file"""
-    from fastapi.responses import FileResponse
     db = request.app.state.db
     
     # Get invoice
@@ -590,17 +714,13 @@ async def download_invoice_file(
         raise HTTPException(status_code=403, detail="Access denied")
     
     # Get file path
-    file_path = Path("/app/uploads/invoices") / invoice["fileName"]
+    file_path = resolve_file(INVOICES_DIR, invoice["fileName"])
     
-    if not file_path.exists():
+    if not file_path:
         raise HTTPException(status_code=404, detail="Invoice file not found on server")
     
-    # Return file
-    return FileResponse(
-        path=str(file_path),
-        filename=invoice["fileName"],
-        media_type="application/octet-stream"
-    )
+    # Return file (sent by nginx when X-Accel-Redirect is enabled)
+    return file_response(file_path, filename=invoice["fileName"], media_type="application/octet-stream")
 
 @router.get("/files/{filename}")
 async def serve_invoice_file(
@@ -608,21 +728,14 @@ async def serve_invoice_file(
     request: Request = None
 ):
     """Serve invoice PDF files (auto-generated or uploaded) - public access with filename"""
-    from fastapi.responses import FileResponse
-    
     # Get file path
-    file_path = Path("/app/uploads/invoices") / filename
+    file_path = resolve_file(INVOICES_DIR, filename)
     
-    if not file_path.exists():
+    if not file_path:
         raise HTTPException(status_code=404, detail="Invoice file not found")
     
     # Return file as PDF
-    return FileResponse(
-        path=str(file_path),
-        media_type="application/pdf",
-        filename=filename,
-        headers={"Content-Disposition": f"inline; filename={filename}"}
-    )
+    return file_response(file_path, filename=filename, media_type="application/pdf", inline=True)
 
 
 @router.delete("/{invoice_id}/file")
@@ -1,6 +1,5 @@
 from fastapi import APIRouter, Depends, HTTPException, Request, UploadFile, File
-from fastapi.responses import FileResponse, Response
-from typing import List
+from typing import List, Optional
 from datetime import datetime
 from pathlib import Path
 import shutil
@@ -8,19 +7,32 @@ import shutil
 from models import NewsCreate, NewsResponse
 from dependencies import get_admin_user
 from utils.image_optimizer import optimize_image_bytes
+from utils.cache import cached_endpoint, news_list_key, TAG_NEWS
+from utils.cache_bus import invalidate
+from utils.fast_json import FastJSONResponse, fast_json
+from utils.i18n import resolve_language, find_localized, NEWS_TEXT_FIELDS
+from utils.file_delivery import file_response, resolve_file
 
 router = APIRouter()
 
-@router.get("/")
-async def get_news(limit: int = 10, skip: int = 0, request: Request = None):
-    """Get all news articles"""
+@router.get("/", response_class=FastJSONResponse)
+@fast_json
+@cached_endpoint(
+    key=lambda request, limit=10, skip=0, lang=None, **_: news_list_key(skip, limit, resolve_language(request, lang)),
+    ttl='news',
+    tags=[TAG_NEWS]
+)
+async def get_news(limit: int = 10, skip: int = 0, lang: Optional[str] = None, request: Request = None):
+    """Get all news articles (?lang= returns one language only)"""
     db = request.app.state.db
-    cursor = db.news.find().sort("createdAt", -1).skip(skip).limit(limit)
-    news_list = await cursor.to_list(length=limit)
+    news_list = await find_localized(
+        db.news, {}, NEWS_TEXT_FIELDS, resolve_language(request, lang),
+        sort=[("createdAt", -1)], skip=skip, limit=limit
+    )
     total = await db.news.count_documents({})
     
     return {
-        "news": [{**item, "id": str(item["_id"])} for item in news_list],
+        "news": news_list,
         "total": total
     }
 
@@ -33,6 +45,7 @@ async def create_news(news: NewsCreate, admin: dict = Depends(get_admin_user), r
     news_dict["createdAt"] = datetime.utcnow()
     
     await db.news.insert_one(news_dict)
+    await invalidate(db, TAG_NEWS)
     
     return NewsResponse(**{**news_dict, "id": news_dict["_id"]})
 
@@ -49,6 +62,7 @@ async def update_news(
         {"_id": news_id},
         {"$set": news_update.dict()}
     )
+    await invalidate(db, TAG_NEWS)
     
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="News not found")
@@ -60,6 +74,7 @@ async def delete_news(news_id: str, admin: dict = Depends(get_admin_user), reque
     """Delete news article (Admin only)"""
     db = request.app.state.db
     result = await db.news.delete_one({"_id": news_id})
+    await invalidate(db, TAG_NEWS)
     
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="News not found")
@@ -129,9 +144,9 @@ async def upload_news_image(
 @router.get("/images/{filename}")
 async def get_news_image(filename: str):
     """Serve news image with cache headers"""
-    file_path = Path("/app/uploads/news") / filename
+    file_path = resolve_file(Path("/app/uploads/news"), filename)
     
-    if not file_path.exists():
+    if not file_path:
         raise HTTPException(status_code=404, detail="Image not found")
     
     # Determine content type
@@ -145,12 +160,9 @@ async def get_news_image(filename: str):
     }
     content_type = content_types.get(ext, 'application/octet-stream')
     
-    # Read file and return with cache headers
-    with open(file_path, 'rb') as f:
-        content = f.read()
-    
-    return Response(
-        content=content,
+    # Sent by nginx when X-Accel-Redirect is enabled
+    return file_response(
+        file_path,
         media_type=content_type,
         headers={
             "Cache-Control": "public, max-age=31536000, immutable",  # 1 year cache
@@ -0,0 +1,104 @@
+from fastapi import APIRouter, Request
+from datetime import datetime
+from typing import Optional
+import asyncio
+
+from routes.settings import build_hero_background
+from utils.cache import (
+    cached_endpoint, branding_key, bootstrap_key,
+    TAG_BRANDING, TAG_SETTINGS, TAG_NEWS, TAG_EVENTS, TAG_GALLERY
+)
+from utils.fast_json import FastJSONResponse, fast_json
+from utils.i18n import (
+    resolve_language, find_localized, NEWS_TEXT_FIELDS, EVENT_TEXT_FIELDS, GALLERY_TEXT_FIELDS
+)
+
+router = APIRouter()
+
+DEFAULT_BRANDING = {
+    "logo": "",
+    "colors": {
+        "primary": "#C1272D",
+        "secondary": "#8B1F1F",
+        "buttonPrimary": "#C1272D",
+        "buttonHover": "#8B1F1F"
+    },
+    "language": {
+        "default": "sr",
+        "supported": ["sr", "en", "sv"]
+    }
+}
+
+# Don't expose email templates publicly
+BRANDING_PROJECTION = {"emailTemplates": 0}
+
+# Homepage bootstrap - only what the homepage renders
+BOOTSTRAP_NEWS_LIMIT = 10
+BOOTSTRAP_EVENTS_LIMIT = 20
+BOOTSTRAP_GALLERY_LIMIT = 8
+NEWS_PROJECTION = {"date": 1, "title": 1, "text": 1, "image": 1, "video": 1}
+EVENTS_PROJECTION = {
+    "date": 1, "time": 1, "title": 1, "location": 1, "description": 1,
+    "status": 1, "cancellationReason": 1, "trainingGroup": 1
+}
+GALLERY_PROJECTION = {"date": 1, "title": 1, "description": 1, "place": 1, "images": {"$slice": ["$images", 1]}}
+
+
+def build_public_branding(branding: dict) -> dict:
+    """Public branding from the branding_settings document"""
+    if not branding:
+        return DEFAULT_BRANDING
+    return {k: v for k, v in branding.items() if k not in ("_id", "emailTemplates")}
+
+
+@router.get("/branding")
+@cached_endpoint(key=lambda **_: branding_key(), ttl='branding', tags=[TAG_BRANDING])
+async def get_public_branding(request: Request):
+    """Get branding settings (public endpoint) - cached"""
+    db = request.app.state.db
+    branding = await db.branding_settings.find_one({"_id": "branding"}, BRANDING_PROJECTION)
+    return build_public_branding(branding)
+
+
+@router.get("/bootstrap", response_class=FastJSONResponse)
+@fast_json
+@cached_endpoint(
+    key=lambda request, lang=None, **_: bootstrap_key(resolve_language(request, lang)),
+    ttl='bootstrap',
+    tags=[TAG_BRANDING, TAG_SETTINGS, TAG_NEWS, TAG_EVENTS, TAG_GALLERY]
+)
+async def get_homepage_bootstrap(request: Request, lang: Optional[str] = None):
+    """Everything the homepage needs in one request (public, ?lang= for one language) - cached"""
+    db = request.app.state.db
+    today = datetime.utcnow().strftime("%Y-%m-%d")
+    lang = resolve_language(request, lang)
+
+    branding, settings, news, events, gallery = await asyncio.gather(
+        db.branding_settings.find_one({"_id": "branding"}, BRANDING_PROJECTION),
+        db.settings.find_one({}, {"updatedAt": 0}),
+        find_localized(
+            db.news, {}, NEWS_TEXT_FIELDS, lang,
+            sort=[("createdAt", -1)], limit=BOOTSTRAP_NEWS_LIMIT, projection=NEWS_PROJECTION
+        ),
+        find_localized(
+            db.events, {"date": {"$gte": today}}, EVENT_TEXT_FIELDS, lang,
+            sort=[("date", 1)], limit=BOOTSTRAP_EVENTS_LIMIT, projection=EVENTS_PROJECTION
+        ),
+        find_localized(
+            db.gallery, {}, GALLERY_TEXT_FIELDS, lang,
+            sort=[("date", -1)], limit=BOOTSTRAP_GALLERY_LIMIT,
+            projection=GALLERY_PROJECTION
+        ),
+    )
+
+    if settings:
+        settings.pop("_id", None)
+
+    return {
+        "branding": build_public_branding(branding),
+        "heroBackground": build_hero_background(branding),
+        "settings": settings or {},
+        "news": news,
+        "events": events,
+        "gallery": gallery
+    }
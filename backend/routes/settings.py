@@ -1,11 +1,13 @@
 from fastapi import APIRouter, Depends, HTTPException, Request
-from fastapi.responses import Response
 from datetime import datetime
 from pathlib import Path
+from typing import Optional
 
 from models import SettingsBase
 from dependencies import get_admin_user
-from utils.cache import cache, settings_key, CACHE_TTL
+from utils.cache import cached_endpoint, settings_key, hero_background_key, TAG_SETTINGS, TAG_BRANDING
+from utils.cache_bus import invalidate
+from utils.file_delivery import file_response, resolve_file
 
 router = APIRouter()
 
@@ -55,13 +57,8 @@ DEFAULT_HERO_BACKGROUNDS = [
     }
 ]
 
-@router.get("/hero-background")
-async def get_hero_background(request: Request):
-    """Get hero background settings (public) - for homepage"""
-    db = request.app.state.db
-    
-    settings = await db.branding_settings.find_one({"_id": "branding"})
-    
+def build_hero_background(branding: Optional[dict]) -> dict:
+    """Hero background settings from the branding_settings document"""
     default_hero = {
         "type": "pattern",
         "selectedId": "serbian_nemanjic_1",
@@ -70,10 +67,10 @@ async def get_hero_background(request: Request):
         "availableBackgrounds": DEFAULT_HERO_BACKGROUNDS
     }
     
-    if not settings or "heroBackground" not in settings:
+    if not branding or "heroBackground" not in branding:
         hero = default_hero
     else:
-        hero = settings.get("heroBackground", default_hero)
+        hero = dict(branding.get("heroBackground") or default_hero)
         hero["availableBackgrounds"] = DEFAULT_HERO_BACKGROUNDS
     
     # Get the URL based on selection
@@ -90,6 +87,15 @@ async def get_hero_background(request: Request):
     
     return hero
 
+@router.get("/hero-background")
+@cached_endpoint(key=lambda **_: hero_background_key(), ttl='branding', tags=[TAG_BRANDING])
+async def get_hero_background(request: Request):
+    """Get hero background settings (public) - for homepage"""
+    db = request.app.state.db
+    
+    settings = await db.branding_settings.find_one({"_id": "branding"}, {"heroBackground": 1})
+    return build_hero_background(settings)
+
 
 @router.get("/hero-images/{filename}")
 async def get_hero_image(filename: str):
@@ -98,9 +104,9 @@ async def get_hero_image(filename: str):
     if ".." in filename or "/" in filename:
         raise HTTPException(status_code=400, detail="Invalid filename")
     
-    file_path = Path("/app/backend/uploads/hero") / filename
+    file_path = resolve_file(Path("/app/backend/uploads/hero"), filename)
     
-    if not file_path.exists():
+    if not file_path:
         raise HTTPException(status_code=404, detail="Image not found")
     
     # Determine content type
@@ -113,12 +119,9 @@ async def get_hero_image(filename: str):
     }
     content_type = content_types.get(ext, 'application/octet-stream')
     
-    # Read file and return with long cache headers
-    with open(file_path, 'rb') as f:
-        content = f.read()
-    
-    return Response(
-        content=content,
+    # Sent by nginx when X-Accel-Redirect is enabled
+    return file_response(
+        file_path,
         media_type=content_type,
         headers={
             "Cache-Control": "public, max-age=31536000, immutable",
@@ -128,13 +131,9 @@ async def get_hero_image(filename: str):
 
 
 @router.get("/")
+@cached_endpoint(key=lambda **_: settings_key(), ttl='settings', tags=[TAG_SETTINGS])
 async def get_settings(request: Request):
     """Get association settings (public) - with caching"""
-    # Check cache first
-    cached = await cache.get(settings_key())
-    if cached:
-        return cached
-    
     db = request.app.state.db
     settings = await db.settings.find_one({})
     
@@ -145,9 +144,6 @@ async def get_settings(request: Request):
     settings.pop("_id", None)
     settings.pop("updatedAt", None)
     
-    # Cache the result
-    await cache.set(settings_key(), settings, CACHE_TTL['settings'])
-    
     return settings
 
 @router.put("/")
@@ -168,7 +164,7 @@ async def update_settings(
         upsert=True
     )
     
-    # Invalidate cache
-    await cache.delete(settings_key())
+    # Invalidate cache on all workers
+    await invalidate(db, TAG_SETTINGS)
     
     return {"success": True, "message": "Settings updated successfully"}
\ No newline at end of file
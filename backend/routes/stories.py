@@ -1,23 +1,36 @@
 from fastapi import APIRouter, Depends, HTTPException, Request, UploadFile, File
-from fastapi.responses import FileResponse
+from utils.file_delivery import file_response, resolve_file
 from datetime import datetime
+from typing import Optional
 from pathlib import Path
 import shutil
 
 from models import StoryCreate, StoryResponse
 from dependencies import get_admin_user
+from utils.cache import cached_endpoint, stories_key, TAG_STORIES
+from utils.cache_bus import invalidate
+from utils.fast_json import FastJSONResponse, fast_json
+from utils.i18n import resolve_language, find_localized, STORY_TEXT_FIELDS
 
 router = APIRouter()
 
-@router.get("/")
-async def get_stories(request: Request):
-    """Get all Serbian stories"""
+@router.get("/", response_class=FastJSONResponse)
+@fast_json
+@cached_endpoint(
+    key=lambda request, lang=None, **_: stories_key(lang=resolve_language(request, lang)),
+    ttl='stories',
+    tags=[TAG_STORIES]
+)
+async def get_stories(request: Request, lang: Optional[str] = None):
+    """Get all Serbian stories (?lang= returns one language only)"""
     db = request.app.state.db
-    cursor = db.stories.find().sort("date", -1)
-    stories_list = await cursor.to_list(length=100)
+    stories_list = await find_localized(
+        db.stories, {}, STORY_TEXT_FIELDS, resolve_language(request, lang),
+        sort=[("date", -1)], limit=100
+    )
     
     return {
-        "stories": [{**item, "id": str(item["_id"])} for item in stories_list]
+        "stories": stories_list
     }
 
 @router.post("/", response_model=StoryResponse)
@@ -33,6 +46,7 @@ async def create_story(
     story_dict["createdAt"] = datetime.utcnow()
     
     await db.stories.insert_one(story_dict)
+    await invalidate(db, TAG_STORIES)
     
     return StoryResponse(**{**story_dict, "id": story_dict["_id"]})
 
@@ -49,6 +63,7 @@ async def update_story(
         {"_id": story_id},
         {"$set": story_update.dict()}
     )
+    await invalidate(db, TAG_STORIES)
     
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Story not found")
@@ -64,6 +79,7 @@ async def delete_story(
     """Delete story (Admin only)"""
     db = request.app.state.db
     result = await db.stories.delete_one({"_id": story_id})
+    await invalidate(db, TAG_STORIES)
     
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Story not found")
@@ -107,9 +123,9 @@ async def upload_story_image(
 @router.get("/images/{filename}")
 async def get_story_image(filename: str):
     """Serve story image"""
-    file_path = Path("/app/uploads/stories") / filename
+    file_path = resolve_file(Path("/app/uploads/stories"), filename)
     
-    if not file_path.exists():
+    if not file_path:
         raise HTTPException(status_code=404, detail="Image not found")
     
-    return FileResponse(path=str(file_path))
\ No newline at end of file
+    return file_response(file_path)
\ No newline at end of file
@@ -2,8 +2,9 @@ from fastapi import APIRouter, Depends, Request, HTTPException
 from models import UserResponse, UserUpdate, MembershipCancellation, PasswordChange
 from dependencies import get_current_user
 from email_service import send_email
-from auth_utils import verify_password, hash_password
+from auth_utils import verify_password_async, hash_password_async
 from datetime import datetime
+from utils import rosters
 
 router = APIRouter()
 
@@ -42,6 +43,8 @@ async def update_user_profile(
             {"_id": current_user["_id"]},
             {"$set": update_data}
         )
+        if "fullName" in update_data or "rsvpNotifications" in update_data:
+            rosters.schedule_rebuild(db)
     
     # Get updated user data
     updated_user = await db.users.find_one({"_id": current_user["_id"]})
@@ -61,7 +64,8 @@ async def update_user_profile(
             "parentName": updated_user.get("parentName"),
             "parentEmail": updated_user.get("parentEmail"),
             "parentPhone": updated_user.get("parentPhone"),
-            "photoConsent": updated_user.get("photoConsent", False)
+            "photoConsent": updated_user.get("photoConsent", False),
+            "rsvpNotifications": updated_user.get("rsvpNotifications", "digest")
         }
     }
 
@@ -75,7 +79,7 @@ async def change_password(
     db = request.app.state.db
     
     # Verify current password
-    if not verify_password(password_change.currentPassword, current_user["hashed_password"]):
+    if not await verify_password_async(password_change.currentPassword, current_user["hashed_password"]):
         raise HTTPException(status_code=400, detail="Current password is incorrect")
     
     # Validate new password length
@@ -83,7 +87,7 @@ async def change_password(
         raise HTTPException(status_code=400, detail="New password must be at least 8 characters long")
     
     # Hash new password
-    new_hashed_password = hash_password(password_change.newPassword)
+    new_hashed_password = await hash_password_async(password_change.newPassword)
     
     # Update password in database
     await db.users.update_one(
@@ -1,13 +1,18 @@
 """
 Background scheduler for automated tasks
-- Send event reminder emails 1 day before the event (once per event)
+- Send event reminder emails before each event (once per event, see utils/event_reminders.py)
+- Send moderators their RSVP digests
 """
 import logging
 from datetime import datetime, timedelta, timezone
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.interval import IntervalTrigger
 from motor.motor_asyncio import AsyncIOMotorDatabase
 from email_service import send_email, get_training_reminder_template, get_training_call_to_confirm_template
+from utils.event_rsvps import CONFIRMED, CANCELLED
+from utils import dashboard_snapshots, event_reminders, invoice_overdue, rosters, rsvp_digest
+from utils.scheduler_jobs import leader_lease, leader_only, RENEW_SECONDS
 
 logger = logging.getLogger(__name__)
 
@@ -15,19 +20,216 @@ logger = logging.getLogger(__name__)
 scheduler = None
 
 
-async def send_event_reminders(db: AsyncIOMotorDatabase):
+async def send_event_reminder(db: AsyncIOMotorDatabase, event: dict):
     """
-    Send reminder emails for events happening tomorrow.
-    Runs daily at 9 AM but only sends ONCE per event (tracked by reminderSent flag).
+    Send the reminder emails for one event, once (tracked by the reminderSent flag).
     
     Logic:
     1. Confirmed participants get a reminder email
     2. For kids-only groups (folklore): only PARENTS of unconfirmed children get a call-to-confirm
     3. For adult groups: unconfirmed adults in the group get a call-to-confirm
     4. Adults WITHOUT registered children do NOT get folklore notifications
+    
+    Returns:
+        {"emails": sent, "errors": failed}, or None if the event was already reminded
+    """
+    event_id = event.get("_id")
+    
+    # Claim the event before sending so it is reminded once, even if the
+    # reminder runs twice (e.g. during a scheduler leader change)
+    claimed = await db.events.update_one(
+        {"_id": event_id, "reminderSent": {"$ne": True}},
+        {"$set": {"reminderSent": True, "reminderSentAt": datetime.now(timezone.utc)}}
+    )
+    if not claimed.modified_count:
+        return None
+    
+    emails_sent = 0
+    errors = 0
+    
+    event_title_sr = event.get("title", {}).get("sr-latin", "Trening")
+    event_title_sv = event.get("title", {}).get("sv", event_title_sr)
+    event_date = event.get("date")
+    event_time = event.get("time", "TBD")
+    event_location = event.get("location", "TBD")
+    # Today / tomorrow / the date, as seen when the reminder goes out
+    day_sr, day_sv = event_reminders.day_words(event)
+    rsvps = await db.event_rsvps.find(
+        {"eventId": event_id, "status": {"$in": [CONFIRMED, CANCELLED]}},
+        {"userId": 1, "status": 1}
+    ).to_list(length=None)
+    participants = [r["userId"] for r in rsvps if r["status"] == CONFIRMED]
+    cancelled_user_ids = [r["userId"] for r in rsvps if r["status"] == CANCELLED]
+    training_group = event.get("trainingGroup")
+    
+    # Group members and their parents from the roster index; participants
+    # outside the group (events open to everyone) are looked up once
+    roster = await rosters.get_roster(db, training_group)
+    members, parents = await rosters.members_and_parents(db, roster, participants)
+    responded = set(participants) | set(cancelled_user_ids)
+    
+    # Track emails sent to avoid duplicates within this event
+    emails_sent_to = set()
+    
+    # ===== PART 1: Reminder to confirmed participants =====
+    for participant_id in participants:
+        try:
+            user = members.get(participant_id)
+            if not user:
+                continue
+            
+            user_name = user.get("fullName") or "Member"
+            user_email = user.get("email")
+            
+            # If child without email, send to parent
+            if not user_email:
+                parent = parents.get(user.get("parentId"))
+                if parent:
+                    user_email = parent.get("email")
+                    user_name = f"{user_name} ({parent.get('fullName') or 'roditelj'})"
+            
+            if not user_email or user_email in emails_sent_to:
+                continue
+            
+            html_content, text_content = get_training_reminder_template(
+                name=user_name,
+                event_title=event_title_sr,
+                event_title_sv=event_title_sv,
+                event_date=event_date,
+                event_time=event_time,
+                location=event_location,
+                day_sr=day_sr,
+                day_sv=day_sv
+            )
+            
+            success = await send_email(
+                to_email=user_email,
+                subject=f"Podsetnik: {event_title_sr} - {day_sr.capitalize()}! / Påminnelse: {event_title_sv} - {day_sv.capitalize()}!",
+                html_content=html_content,
+                text_content=text_content,
+                db=db
+            )
+            
+            if success:
+                emails_sent += 1
+                emails_sent_to.add(user_email)
+                logger.info(f"✓ Reminder sent to {user_email}")
+                
+        except Exception as e:
+            logger.error(f"Error sending reminder to {participant_id}: {str(e)}")
+            errors += 1
+            continue
+    
+    # ===== PART 2: Call to confirm for unconfirmed members =====
+    if not training_group:
+        logger.info(f"Event '{event_title_sr}' has no training group, skipping call-to-confirm")
+    else:
+        # Find CHILDREN in this training group who haven't confirmed/declined
+        # Send email to their PARENTS (not to random adults)
+        children_in_group = [
+            m for m in roster["members"]
+            if m.get("parentId") and m["userId"] not in responded
+        ]
+        
+        for child in children_in_group:
+            try:
+                parent = parents.get(child["parentId"])
+                if not parent:
+                    continue
+                
+                parent_email = parent.get("email")
+                if not parent_email or parent_email in emails_sent_to:
+                    continue
+                
+                child_name = child.get("fullName") or "your child"
+                parent_name = parent.get("fullName") or "Member"
+                
+                html_content, text_content = get_training_call_to_confirm_template(
+                    name=parent_name,
+                    event_title=event_title_sr,
+                    event_title_sv=event_title_sv,
+                    event_date=event_date,
+                    event_time=event_time,
+                    location=event_location,
+                    day_sr=day_sr,
+                    day_sv=day_sv
+                )
+                
+                success = await send_email(
+                    to_email=parent_email,
+                    subject=f"Potvrdite za {child_name}: {event_title_sr} - {day_sr.capitalize()}! / Bekräfta för {child_name}: {event_title_sv} - {day_sv.capitalize()}!",
+                    html_content=html_content,
+                    text_content=text_content,
+                    db=db
+                )
+                
+                if success:
+                    emails_sent += 1
+                    emails_sent_to.add(parent_email)
+                    logger.info(f"✓ Call-to-confirm sent to {parent_email} for child {child_name}")
+                
+            except Exception as e:
+                logger.error(f"Error sending call-to-confirm for child: {str(e)}")
+                errors += 1
+                continue
+        
+        # Find ADULTS directly in this training group who haven't confirmed
+        # (only adults who are themselves members of the group, e.g. adult dance class)
+        adults_in_group = [
+            m for m in roster["members"]
+            if not m.get("parentId") and m["userId"] not in responded
+            and m.get("emailVerified") and m.get("email")
+        ]
+        
+        for adult in adults_in_group:
+            try:
+                adult_email = adult.get("email")
+                if not adult_email or adult_email in emails_sent_to:
+                    continue
+                
+                adult_name = adult.get("fullName") or "Member"
+                
+                html_content, text_content = get_training_call_to_confirm_template(
+                    name=adult_name,
+                    event_title=event_title_sr,
+                    event_title_sv=event_title_sv,
+                    event_date=event_date,
+                    event_time=event_time,
+                    location=event_location,
+                    day_sr=day_sr,
+                    day_sv=day_sv
+                )
+                
+                success = await send_email(
+                    to_email=adult_email,
+                    subject=f"Potvrdite: {event_title_sr} - {day_sr.capitalize()}! / Bekräfta: {event_title_sv} - {day_sv.capitalize()}!",
+                    html_content=html_content,
+                    text_content=text_content,
+                    db=db
+                )
+                
+                if success:
+                    emails_sent += 1
+                    emails_sent_to.add(adult_email)
+                    logger.info(f"✓ Call-to-confirm sent to {adult_email}")
+                
+            except Exception as e:
+                logger.error(f"Error sending call-to-confirm to adult: {str(e)}")
+                errors += 1
+                continue
+    
+    logger.info(f"✓ Event '{event_title_sr}' reminded ({emails_sent} email(s))")
+    return {"emails": emails_sent, "errors": errors}
+
+
+async def send_event_reminders(db: AsyncIOMotorDatabase):
+    """
+    Send reminder emails for all events happening tomorrow that were not
+    reminded yet (manual trigger; scheduled reminders go out per event, see
+    send_due_reminders).
     """
     try:
-        logger.info("Starting daily event reminder check...")
+        logger.info("Starting event reminder check for tomorrow...")
         
         tomorrow = (datetime.now(timezone.utc) + timedelta(days=1)).date()
         tomorrow_str = tomorrow.isoformat()
@@ -43,195 +245,70 @@ async def send_event_reminders(db: AsyncIOMotorDatabase):
         
         if not events:
             logger.info(f"No events needing reminders for {tomorrow_str}")
-            return
+            return {"events": 0, "emails": 0, "errors": 0}
         
         logger.info(f"Found {len(events)} event(s) needing reminders")
         
-        total_emails_sent = 0
+        stats = {"events": 0, "emails": 0, "errors": 0}
         for event in events:
-            event_id = event.get("_id")
-            event_title_sr = event.get("title", {}).get("sr-latin", "Trening")
-            event_title_sv = event.get("title", {}).get("sv", event_title_sr)
-            event_date = event.get("date")
-            event_time = event.get("time", "TBD")
-            event_location = event.get("location", "TBD")
-            participants = event.get("participants", [])
-            cancellations = event.get("cancellations", [])
-            cancelled_user_ids = [c.get("userId") for c in cancellations]
-            training_group = event.get("trainingGroup")
-            
-            # Track emails sent to avoid duplicates within this event
-            emails_sent_to = set()
-            
-            # ===== PART 1: Reminder to confirmed participants =====
-            for participant_id in participants:
-                try:
-                    user = await db.users.find_one({"_id": participant_id})
-                    if not user:
-                        continue
-                    
-                    user_name = user.get("fullName", user.get("username", "Member"))
-                    user_email = user.get("email")
-                    
-                    # If child without email, send to parent
-                    if not user_email:
-                        parent_id = user.get("primaryAccountId")
-                        if parent_id:
-                            parent = await db.users.find_one({"_id": parent_id})
-                            if parent:
-                                user_email = parent.get("email")
-                                user_name = f"{user_name} ({parent.get('fullName', 'roditelj')})"
-                    
-                    if not user_email or user_email in emails_sent_to:
-                        continue
-                    
-                    html_content, text_content = get_training_reminder_template(
-                        name=user_name,
-                        event_title=event_title_sr,
-                        event_title_sv=event_title_sv,
-                        event_date=event_date,
-                        event_time=event_time,
-                        location=event_location
-                    )
-                    
-                    success = await send_email(
-                        to_email=user_email,
-                        subject=f"Podsetnik: {event_title_sr} - Sutra! / Påminnelse: {event_title_sv} - Imorgon!",
-                        html_content=html_content,
-                        text_content=text_content,
-                        db=db
-                    )
-                    
-                    if success:
-                        total_emails_sent += 1
-                        emails_sent_to.add(user_email)
-                        logger.info(f"✓ Reminder sent to {user_email}")
-                        
-                except Exception as e:
-                    logger.error(f"Error sending reminder to {participant_id}: {str(e)}")
-                    continue
-            
-            # ===== PART 2: Call to confirm for unconfirmed members =====
-            if not training_group:
-                logger.info(f"Event '{event_title_sr}' has no training group, skipping call-to-confirm")
-            else:
-                # Find CHILDREN in this training group who haven't confirmed/declined
-                # Send email to their PARENTS (not to random adults)
-                children_in_group = await db.users.find({
-                    "trainingGroups": training_group,
-                    "primaryAccountId": {"$exists": True, "$ne": None},
-                    "_id": {"$nin": participants + cancelled_user_ids}
-                }).to_list(length=200)
-                
-                for child in children_in_group:
-                    try:
-                        parent_id = child.get("primaryAccountId")
-                        if not parent_id:
-                            continue
-                        
-                        parent = await db.users.find_one({"_id": parent_id})
-                        if not parent:
-                            continue
-                        
-                        parent_email = parent.get("email")
-                        if not parent_email or parent_email in emails_sent_to:
-                            continue
-                        
-                        child_name = child.get("fullName", "your child")
-                        parent_name = parent.get("fullName", parent.get("username", "Member"))
-                        
-                        html_content, text_content = get_training_call_to_confirm_template(
-                            name=parent_name,
-                            event_title=event_title_sr,
-                            event_title_sv=event_title_sv,
-                            event_date=event_date,
-                            event_time=event_time,
-                            location=event_location
-                        )
-                        
-                        success = await send_email(
-                            to_email=parent_email,
-                            subject=f"Potvrdite za {child_name}: {event_title_sr} - Sutra! / Bekräfta för {child_name}: {event_title_sv} - Imorgon!",
-                            html_content=html_content,
-                            text_content=text_content,
-                            db=db
-                        )
-                        
-                        if success:
-                            total_emails_sent += 1
-                            emails_sent_to.add(parent_email)
-                            logger.info(f"✓ Call-to-confirm sent to {parent_email} for child {child_name}")
-                        
-                    except Exception as e:
-                        logger.error(f"Error sending call-to-confirm for child: {str(e)}")
-                        continue
-                
-                # Find ADULTS directly in this training group who haven't confirmed
-                # (only adults who are themselves members of the group, e.g. adult dance class)
-                adults_in_group = await db.users.find({
-                    "trainingGroups": training_group,
-                    "primaryAccountId": {"$exists": False},
-                    "_id": {"$nin": participants + cancelled_user_ids},
-                    "emailVerified": True,
-                    "email": {"$exists": True, "$ne": None}
-                }).to_list(length=200)
-                
-                for adult in adults_in_group:
-                    try:
-                        adult_email = adult.get("email")
-                        if not adult_email or adult_email in emails_sent_to:
-                            continue
-                        
-                        adult_name = adult.get("fullName", adult.get("username", "Member"))
-                        
-                        html_content, text_content = get_training_call_to_confirm_template(
-                            name=adult_name,
-                            event_title=event_title_sr,
-                            event_title_sv=event_title_sv,
-                            event_date=event_date,
-                            event_time=event_time,
-                            location=event_location
-                        )
-                        
-                        success = await send_email(
-                            to_email=adult_email,
-                            subject=f"Potvrdite: {event_title_sr} - Sutra! / Bekräfta: {event_title_sv} - Imorgon!",
-                            html_content=html_content,
-                            text_content=text_content,
-                            db=db
-                        )
-                        
-                        if success:
-                            total_emails_sent += 1
-                            emails_sent_to.add(adult_email)
-                            logger.info(f"✓ Call-to-confirm sent to {adult_email}")
-                        
-                    except Exception as e:
-                        logger.error(f"Error sending call-to-confirm to adult: {str(e)}")
-                        continue
-            
-            # Mark event as reminded - will NOT send again
-            await db.events.update_one(
-                {"_id": event_id},
-                {"$set": {"reminderSent": True, "reminderSentAt": datetime.now(timezone.utc)}}
-            )
-            logger.info(f"✓ Event '{event_title_sr}' marked as reminded")
+            result = await send_event_reminder(db, event)
+            if result:
+                stats["events"] += 1
+                stats["emails"] += result["emails"]
+                stats["errors"] += result["errors"]
         
-        logger.info(f"Reminder job done. Sent {total_emails_sent} email(s)")
+        logger.info(f"Reminder job done. Sent {stats['emails']} email(s)")
+        return stats
         
     except Exception as e:
         logger.error(f"Error in send_event_reminders: {str(e)}", exc_info=True)
+        raise
+
+
+async def send_due_reminders(db: AsyncIOMotorDatabase):
+    """
+    Send the per-event reminders that are due, at most
+    event_reminders.MAX_PER_RUN per run so a busy day is spread out.
+    """
+    stats = {"events": 0, "emails": 0, "errors": 0}
+    for reminder in await event_reminders.claim_due(db):
+        event_id = reminder["_id"]
+        try:
+            event = await db.events.find_one({"_id": event_id})
+            if not event or event.get("status", "active") != "active":
+                await event_reminders.finish(db, event_id)
+                continue
+            result = await send_event_reminder(db, event)
+            await event_reminders.finish(db, event_id, result)
+            if result:
+                stats["events"] += 1
+                stats["emails"] += result["emails"]
+                stats["errors"] += result["errors"]
+        except Exception as e:
+            logger.error(f"Error sending reminder for event {event_id}: {str(e)}", exc_info=True)
+            await event_reminders.finish(db, event_id, failed=True)
+            stats["errors"] += 1
+    return stats
 
 
 def start_scheduler(db: AsyncIOMotorDatabase):
     """
     Initialize and start the background scheduler
     
+    Every worker runs a scheduler; jobs wrapped with leader_only() run on the
+    worker holding the leader lease only (utils/scheduler_jobs.py) and are
+    recorded in job_runs.
+    
     Schedule:
-    - Event reminders: Daily at 9:00 AM (Stockholm time)
-    - Log cleanup: Monthly on 1st at 2:00 AM (Stockholm time)
+    - Event reminders: checked every minute, sent per event before it starts
+    - Training roster rebuild: hourly
+    - Moderator RSVP digests: every minute, sends what is due
+    - Overdue invoices: flagged nightly at 00:05, reminders daily at 10:00
+    - Dashboard snapshot: nightly at 00:15 (Stockholm time), for the day that ended
+    - Token revocation sync: every few seconds, on every worker
+    - Leader lease renewal: every few seconds, on every worker
     """
-    from activity_logger import cleanup_old_logs
+    from utils.auth_tokens import revocation_list, REVOCATION_SYNC_SECONDS
     
     global scheduler
     
@@ -242,32 +319,115 @@ def start_scheduler(db: AsyncIOMotorDatabase):
     try:
         scheduler = AsyncIOScheduler(timezone="Europe/Stockholm")
         
-        # Add event reminder job - runs daily at 9:00 AM
+        # Per-event reminders that are due (utils/event_reminders.py)
         scheduler.add_job(
-            send_event_reminders,
-            trigger=CronTrigger(hour=9, minute=0),
+            leader_only('event_reminders', send_due_reminders),
+            trigger=IntervalTrigger(minutes=1),
             args=[db],
             id='event_reminders',
-            name='Send event reminder emails',
+            name='Send due event reminder emails',
+            replace_existing=True,
+            max_instances=1,
+            coalesce=True
+        )
+        
+        # Rebuild training rosters, for group changes made outside the API
+        scheduler.add_job(
+            leader_only('roster_rebuild', rosters.rebuild),
+            trigger=IntervalTrigger(hours=1),
+            args=[db],
+            id='roster_rebuild',
+            name='Rebuild training-group rosters',
+            replace_existing=True,
+            max_instances=1,
+            coalesce=True
+        )
+        
+        # Moderator RSVP digests (and opted-in immediate notifications)
+        scheduler.add_job(
+            leader_only('rsvp_digest', rsvp_digest.send_due),
+            trigger=IntervalTrigger(minutes=1),
+            args=[db],
+            id='rsvp_digest',
+            name='Send moderator RSVP digests',
+            replace_existing=True,
+            max_instances=1,
+            coalesce=True
+        )
+        
+        # Overdue invoice flags, before the snapshot counts them
+        scheduler.add_job(
+            leader_only('invoice_overdue', invoice_overdue.flag_overdue),
+            trigger=CronTrigger(hour=0, minute=5),
+            args=[db],
+            id='invoice_overdue',
+            name='Flag overdue invoices',
+            replace_existing=True,
+            misfire_grace_time=6 * 3600
+        )
+        
+        # Overdue invoice reminders, sent over one SMTP session
+        scheduler.add_job(
+            leader_only('invoice_overdue_reminders', invoice_overdue.send_overdue_reminders),
+            trigger=CronTrigger(hour=10, minute=0),
+            args=[db],
+            id='invoice_overdue_reminders',
+            name='Send overdue invoice reminders',
+            replace_existing=True,
+            misfire_grace_time=6 * 3600
+        )
+        
+        # Daily statistics snapshot for the admin trend charts
+        scheduler.add_job(
+            leader_only('dashboard_snapshot', dashboard_snapshots.take_snapshot),
+            trigger=CronTrigger(hour=0, minute=15),
+            args=[db],
+            id='dashboard_snapshot',
+            name='Store daily dashboard snapshot',
             replace_existing=True,
-            misfire_grace_time=3600  # Allow 1 hour grace period if server was down
+            misfire_grace_time=6 * 3600
         )
         
-        # Add log cleanup job - runs monthly on 1st at 2:00 AM
+        # Take or keep the leader lease (first attempt right away)
         scheduler.add_job(
-            cleanup_old_logs,
-            trigger=CronTrigger(day=1, hour=2, minute=0),
-            args=[db, 365],  # 365 days = 1 year retention
-            id='log_cleanup',
-            name='Cleanup old activity logs',
+            leader_lease.renew,
+            trigger=IntervalTrigger(seconds=RENEW_SECONDS),
+            args=[db],
+            id='leader_lease',
+            name='Renew scheduler leader lease',
             replace_existing=True,
-            misfire_grace_time=86400  # Allow 24 hour grace period
+            max_instances=1,
+            coalesce=True,
+            next_run_time=datetime.now(timezone.utc)
+        )
+        
+        # Pull access token revocations made by other workers
+        scheduler.add_job(
+            revocation_list.sync,
+            trigger=IntervalTrigger(seconds=REVOCATION_SYNC_SECONDS),
+            args=[db],
+            id='token_revocation_sync',
+            name='Sync access token revocations',
+            replace_existing=True,
+            max_instances=1,
+            coalesce=True
         )
         
         scheduler.start()
         logger.info("✓ Background scheduler started successfully")
-        logger.info("  - Event reminders: Daily at 9:00 AM (Stockholm time)")
-        logger.info("  - Log cleanup: Monthly on 1st at 2:00 AM (1 year retention)")
+        logger.info(
+            f"  - Event reminders: {event_reminders.REMINDER_OFFSET_HOURS:g}h before each event "
+            f"(up to {event_reminders.REMINDER_JITTER_MINUTES} min earlier), checked every minute"
+        )
+        logger.info("  - Training roster rebuild: hourly")
+        logger.info(f"  - RSVP digests: checked every minute ({rsvp_digest.DIGEST_INTERVAL_MINUTES} min digests)")
+        logger.info(
+            f"  - Overdue invoices: flagged at 00:05, reminders at 10:00 "
+            f"(every {invoice_overdue.REMINDER_INTERVAL_DAYS} days, at most {invoice_overdue.MAX_REMINDERS})"
+        )
+        logger.info("  - Dashboard snapshot: nightly at 00:15")
+        logger.info(f"  - Token revocation sync: every {REVOCATION_SYNC_SECONDS}s")
+        logger.info(f"  - Leader lease ({leader_lease.owner}): renewed every {RENEW_SECONDS}s")
         
         return scheduler
         
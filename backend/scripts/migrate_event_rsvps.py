@@ -0,0 +1,43 @@
+"""
+Event RSVP Migration Script
+Moves participants / cancellations / attendance embedded in event documents
+into the event_rsvps collection (see utils/event_rsvps.py).
+
+The API runs the same migration on startup; this script is for running it by
+hand. Safe to run repeatedly.
+"""
+import asyncio
+import logging
+import os
+import sys
+from pathlib import Path
+
+from motor.motor_asyncio import AsyncIOMotorClient
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from utils.event_rsvps import create_indexes, migrate_embedded  # noqa: E402
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+async def migrate():
+    client = AsyncIOMotorClient(os.environ.get('MONGO_URL'))
+    db = client[os.environ.get('DB_NAME', 'test_database')]
+
+    logger.info("Creating event_rsvps indexes...")
+    await create_indexes(db)
+
+    logger.info("Migrating embedded RSVPs...")
+    stats = await migrate_embedded(db)
+
+    print("\n📊 Migration Summary:")
+    print(f"  events migrated: {stats['events']}")
+    print(f"  RSVP documents created: {stats['rsvps']}")
+    print(f"  event_rsvps total: {await db.event_rsvps.count_documents({})}")
+    client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(migrate())
@@ -5,7 +5,11 @@ Creates indexes for MongoDB collections to improve query performance
 import asyncio
 from motor.motor_asyncio import AsyncIOMotorClient
 import os
+import sys
 import logging
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -65,12 +69,10 @@ async def create_indexes():
     await db.content.create_index("type")
     await db.content.create_index("slug", unique=True, sparse=True)
     
-    # Activity logs (if exists)
-    if "activity_logs" in await db.list_collection_names():
-        logger.info("Creating indexes for 'activity_logs' collection...")
-        await db.activity_logs.create_index("createdAt")
-        await db.activity_logs.create_index("userId", sparse=True)
-        await db.activity_logs.create_index([("createdAt", -1)], expireAfterSeconds=31536000)  # TTL: 1 year
+    # Admin activity logs (impersonation included)
+    logger.info("Creating indexes for 'admin_activity_logs' collection...")
+    from activity_logger import create_indexes as create_activity_log_indexes
+    await create_activity_log_indexes(db)  # TTL: 1 year
     
     logger.info("✅ All indexes created successfully!")
     
@@ -148,7 +148,6 @@ async def seed_database():
                 "sv": "Regelbunden träning för barn i åldern 6-12"
             },
             "status": "active",
-            "participants": [],
             "createdAt": datetime.utcnow()
         },
         {
@@ -169,7 +168,6 @@ async def seed_database():
                 "sv": "Högtidlig akademi med anledning av skolans skyddshelgons dag"
             },
             "status": "active",
-            "participants": [],
             "createdAt": datetime.utcnow()
         }
     ]
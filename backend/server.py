@@ -1,4 +1,5 @@
-from fastapi import FastAPI, APIRouter, Depends, HTTPException, status, UploadFile, File
+from fastapi import FastAPI, APIRouter, Depends, HTTPException, Request, status, UploadFile, File
+from fastapi.responses import JSONResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from fastapi.staticfiles import StaticFiles
 from starlette.middleware.cors import CORSMiddleware
@@ -15,7 +16,7 @@ from functools import lru_cache
 import asyncio
 
 # Import routes
-from routes import auth, users, news, events, invoices, gallery, stories, settings, admin, contact, content, family, documents
+from routes import auth, users, news, events, invoices, gallery, stories, settings, admin, contact, content, family, documents, public
 
 # Import scheduler
 from scheduler import start_scheduler, stop_scheduler
@@ -39,6 +40,10 @@ app = FastAPI(
 # Add GZip compression middleware (compress responses > 500 bytes)
 app.add_middleware(GZipMiddleware, minimum_size=500)
 
+# ETag / 304 for public JSON endpoints (outside GZip, so 304s skip it)
+from utils.http_cache import ETagMiddleware
+app.add_middleware(ETagMiddleware)
+
 # Create a router with the /api prefix
 api_router = APIRouter(prefix="/api")
 
@@ -63,6 +68,18 @@ app.mount("/api/uploads", StaticFiles(directory=str(UPLOAD_DIR)), name="uploads"
 app.state.db = db
 app.state.upload_dir = UPLOAD_DIR
 
+# Password hashing pool saturated (login storms) - ask clients to retry shortly
+from auth_utils import PasswordHasherBusy
+
+@app.exception_handler(PasswordHasherBusy)
+async def password_hasher_busy_handler(request: Request, exc: PasswordHasherBusy):
+    logger.warning(f"Rejected {request.method} {request.url.path}: {exc}")
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Server is busy, please try again in a moment"},
+        headers={"Retry-After": "2"}
+    )
+
 # Include route modules
 api_router.include_router(auth.router, prefix="/auth", tags=["Authentication"])
 api_router.include_router(users.router, prefix="/users", tags=["Users"])
@@ -77,9 +94,7 @@ api_router.include_router(contact.router, prefix="/contact", tags=["Contact"])
 api_router.include_router(content.router, prefix="/content", tags=["Content Management"])
 api_router.include_router(family.router, prefix="/family", tags=["Family Members"])
 api_router.include_router(documents.router, prefix="/documents", tags=["Documents"])
-
-# Import cache
-from utils.cache import cache, branding_key, CACHE_TTL
+api_router.include_router(public.router, prefix="/public", tags=["Public"])
 
 # Root endpoint
 @api_router.get("/")
@@ -105,42 +120,6 @@ async def health_check():
             "timestamp": datetime.utcnow().isoformat()
         }
 
-# Public branding endpoint (no auth required) - with caching
-@api_router.get("/public/branding")
-async def get_public_branding():
-    """Get branding settings (public endpoint) - cached"""
-    # Check cache first
-    cached = await cache.get(branding_key())
-    if cached:
-        return cached
-    
-    branding = await db.branding_settings.find_one({"_id": "branding"})
-    
-    default_branding = {
-        "logo": "",
-        "colors": {
-            "primary": "#C1272D",
-            "secondary": "#8B1F1F",
-            "buttonPrimary": "#C1272D",
-            "buttonHover": "#8B1F1F"
-        },
-        "language": {
-            "default": "sr",
-            "supported": ["sr", "en", "sv"]
-        }
-    }
-    
-    if not branding:
-        await cache.set(branding_key(), default_branding, CACHE_TTL['branding'])
-        return default_branding
-    
-    branding.pop("_id", None)
-    branding.pop("emailTemplates", None)  # Don't expose email templates publicly
-    
-    # Cache the result
-    await cache.set(branding_key(), branding, CACHE_TTL['branding'])
-    return branding
-
 # Include the main API router
 app.include_router(api_router)
 
@@ -154,8 +133,15 @@ app.add_middleware(
 
 @app.on_event("shutdown")
 async def shutdown_db_client():
-    # Stop the scheduler
+    # Stop the scheduler and hand the leader lease to another worker
     stop_scheduler()
+    from utils.scheduler_jobs import leader_lease
+    await leader_lease.release(db)
+    from utils.cache_bus import cache_bus
+    await cache_bus.stop()
+    # Write out buffered activity logs
+    from activity_logger import activity_sink
+    await activity_sink.stop()
     # Close database connection
     client.close()
     logger.info("Application shutdown complete")
@@ -166,13 +152,13 @@ async def startup_event():
     # Initialize default super admin if not exists
     superadmin = await db.users.find_one({"email": "vladanmitic@gmail.com"})
     if not superadmin:
-        from auth_utils import hash_password
+        from auth_utils import hash_password_async
         await db.users.insert_one({
             "_id": "superadmin_1",
             "username": "vladanmitic@gmail.com",
             "email": "vladanmitic@gmail.com",
             "fullName": "Vladan Mitić",
-            "hashed_password": hash_password("Admin123!"),
+            "hashed_password": await hash_password_async("Admin123!"),
             "role": "superadmin",
             "emailVerified": True,
             "createdAt": datetime.utcnow()
@@ -213,11 +199,35 @@ async def startup_event():
         await db.invoices.create_index("createdAt")
         await db.invoices.create_index([("userId", 1), ("status", 1)])
         
+        # Overdue invoices (status+dueAt, overdue+createdAt)
+        from utils import invoice_overdue
+        await invoice_overdue.create_indexes(db)
+        
+        # OCR payment references of invoices (bank statement reconciliation)
+        from utils import bank_reconciliation
+        await bank_reconciliation.create_indexes(db)
+        
         # Events collection indexes
-        await db.events.create_index("date")
+        await db.events.create_index([("date", 1), ("trainingGroup", 1)])  # Windowed listing
         await db.events.create_index("status")
         await db.events.create_index("createdAt")
         
+        # Event RSVPs and attendance (eventId+userId, userId+date)
+        from utils import event_rsvps
+        await event_rsvps.create_indexes(db)
+        
+        # Buffered moderator RSVP notifications (status+recipient, sent TTL)
+        from utils import rsvp_digest
+        await rsvp_digest.create_indexes(db)
+        
+        # Per-event reminders (status+runAt)
+        from utils import event_reminders
+        await event_reminders.create_indexes(db)
+        
+        # Scheduler job run history (jobId+startedAt, TTL)
+        from utils import scheduler_jobs
+        await scheduler_jobs.create_indexes(db)
+        
         # News collection indexes
         await db.news.create_index("createdAt")
         await db.news.create_index("category")
@@ -226,15 +236,101 @@ async def startup_event():
         await db.gallery.create_index("createdAt")
         await db.gallery.create_index("type")
         
-        # Activity logs indexes (for impersonation logs, etc.)
-        await db.activity_logs.create_index("timestamp")
-        await db.activity_logs.create_index("action")
-        await db.activity_logs.create_index([("action", 1), ("timestamp", -1)])
+        # Admin activity logs, impersonation included (timestamp, action / admin + timestamp)
+        from activity_logger import create_indexes as create_activity_log_indexes
+        await create_activity_log_indexes(db)
+        
+        # Rate limit counters expire on their own
+        await db.rate_limits.create_index("expiresAt", expireAfterSeconds=0)
+        await db.rate_limits.create_index("key")
+        
+        # Refresh tokens and access token revocations expire on their own
+        await db.refresh_tokens.create_index("expiresAt", expireAfterSeconds=0)
+        await db.refresh_tokens.create_index("userId")
+        await db.refresh_tokens.create_index("familyId")
+        await db.token_revocations.create_index("expiresAt", expireAfterSeconds=0)
+        await db.token_revocations.create_index("revokedAt")
         
         logger.info("Database indexes created/verified")
     except Exception as e:
         logger.warning(f"Index creation warning (may already exist): {e}")
     
+    # Credit note numbers are unique (utils/sequences.py), in a block of its own
+    # so duplicates from the old numbering cannot stop the other indexes
+    try:
+        from utils.sequences import create_credit_note_index
+        await create_credit_note_index(db)
+    except Exception as e:
+        logger.error(f"Credit note number index failed: {e}")
+    
+    # One-off data jobs below run on the first worker to start only (run_once)
+    from utils.scheduler_jobs import run_once
+    
+    # Move RSVPs still embedded in events into event_rsvps (no-op once done)
+    try:
+        from utils.event_rsvps import migrate_embedded
+        migrated = await run_once(db, "event_rsvp_migration", migrate_embedded)
+        if migrated and migrated["events"]:
+            logger.info(f"Migrated RSVPs of {migrated['events']} events to event_rsvps")
+    except Exception as e:
+        logger.error(f"Event RSVP migration failed (rerun scripts/migrate_event_rsvps.py): {e}")
+    
+    # Normalise invoice due dates (no-op once done) and refresh overdue flags
+    try:
+        from utils import invoice_overdue
+        await run_once(db, "invoice_overdue_refresh", invoice_overdue.refresh)
+    except Exception as e:
+        logger.error(f"Overdue invoice update failed: {e}")
+    
+    # Continue today's credit note numbers from the notes already numbered
+    try:
+        from utils.sequences import seed_credit_note_sequence
+        await run_once(db, "credit_note_sequence", seed_credit_note_sequence)
+    except Exception as e:
+        logger.error(f"Credit note sequence seeding failed: {e}")
+    
+    # OCR references for invoices created before they existed (no-op once done)
+    try:
+        from utils.bank_reconciliation import assign_ocr_references
+        await run_once(db, "invoice_ocr_references", assign_ocr_references)
+    except Exception as e:
+        logger.error(f"Assigning invoice OCR references failed: {e}")
+    
+    # Move impersonation logs from activity_logs to admin_activity_logs (no-op once done)
+    try:
+        from activity_logger import migrate_legacy_logs
+        moved = await run_once(db, "activity_log_migration", migrate_legacy_logs)
+        if moved:
+            logger.info(f"Moved {moved} impersonation logs to admin_activity_logs")
+    except Exception as e:
+        logger.error(f"Activity log migration failed: {e}")
+    
+    # Buffer admin activity logs and write them in batches
+    from activity_logger import activity_sink
+    await activity_sink.start(db)
+    
+    # Follow cache invalidations published by the other workers
+    from utils.cache_bus import cache_bus
+    await cache_bus.start(db)
+    
+    # Reminders for upcoming events created before per-event scheduling
+    try:
+        from utils.event_reminders import schedule_missing
+        await run_once(db, "event_reminders_backfill", schedule_missing)
+    except Exception as e:
+        logger.error(f"Scheduling event reminders failed: {e}")
+    
+    # Training-group rosters (utils/rosters.py) from the current users
+    try:
+        from utils import rosters
+        await run_once(db, "roster_rebuild", rosters.rebuild)
+    except Exception as e:
+        logger.error(f"Training roster rebuild failed: {e}")
+    
+    # Load access token revocations before serving requests
+    from utils.auth_tokens import revocation_list
+    await revocation_list.sync(db)
+    
     # Start the background scheduler for automated tasks
     start_scheduler(db)
     logger.info("Background scheduler initialized")
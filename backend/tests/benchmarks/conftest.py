@@ -0,0 +1,283 @@
+"""
+Micro-benchmark harness for the CPU heavy generators in utils/ and export_utils.
+
+The suite is opt-in because a full run (10k rows, 24MP photos) takes minutes:
+
+    BENCHMARK=1 pytest tests/benchmarks -q
+
+Environment variables:
+- BENCHMARK=1                 enable the suite (otherwise every test is skipped)
+- BENCHMARK_ROUNDS=3          timed rounds per benchmark (after one warm-up run)
+- BENCHMARK_SAVE=path.json    write the results of this run as a baseline
+- BENCHMARK_COMPARE=path.json regression mode: fail when a benchmark is slower
+                              or uses more peak memory than the baseline allows
+- BENCHMARK_THRESHOLD=0.25    allowed relative regression (0.25 = 25%)
+"""
+import io
+import json
+import os
+import statistics
+import time
+import tracemalloc
+from pathlib import Path
+
+import pytest
+
+BENCHMARK_DIR = Path(__file__).resolve().parent
+BENCHMARK_ENABLED = os.environ.get("BENCHMARK") == "1"
+BENCHMARK_ROUNDS = int(os.environ.get("BENCHMARK_ROUNDS", "3"))
+BENCHMARK_SAVE = os.environ.get("BENCHMARK_SAVE")
+BENCHMARK_COMPARE = os.environ.get("BENCHMARK_COMPARE")
+BENCHMARK_THRESHOLD = float(os.environ.get("BENCHMARK_THRESHOLD", "0.25"))
+
+# Differences below these floors are treated as noise, whatever the ratio
+MIN_TIME_DELTA = 0.005          # seconds
+MIN_MEMORY_DELTA = 256 * 1024   # bytes
+
+# Megapixel label -> (width, height), 3:2 camera aspect ratio
+PHOTO_SIZES = {
+    "1MP": (1224, 816),
+    "6MP": (3000, 2000),
+    "12MP": (4242, 2828),
+    "24MP": (6000, 4000),
+}
+
+_results = {}
+
+
+def pytest_collection_modifyitems(config, items):
+    if BENCHMARK_ENABLED:
+        return
+    skip = pytest.mark.skip(reason="benchmarks disabled (set BENCHMARK=1)")
+    for item in items:
+        if BENCHMARK_DIR in Path(str(item.fspath)).resolve().parents:
+            item.add_marker(skip)
+
+
+def pytest_terminal_summary(terminalreporter):
+    if not _results:
+        return
+    terminalreporter.section("benchmark results")
+    terminalreporter.write_line(f"{'benchmark':<60} {'median':>10} {'min':>10} {'peak mem':>12}")
+    for name, stats in sorted(_results.items()):
+        terminalreporter.write_line(
+            f"{name:<60} {stats['median'] * 1000:>8.1f}ms {stats['min'] * 1000:>8.1f}ms "
+            f"{stats['peak_memory'] / 1024 / 1024:>10.2f}MB"
+        )
+
+
+def pytest_sessionfinish(session, exitstatus):
+    if BENCHMARK_SAVE and _results:
+        path = Path(BENCHMARK_SAVE)
+        existing = {}
+        if path.exists():
+            existing = json.loads(path.read_text())
+        existing.update(_results)
+        path.write_text(json.dumps(existing, indent=2, sort_keys=True))
+
+
+def _load_baseline():
+    if not BENCHMARK_COMPARE:
+        return {}
+    path = Path(BENCHMARK_COMPARE)
+    if not path.exists():
+        pytest.exit(f"Benchmark baseline not found: {path}", returncode=4)
+    return json.loads(path.read_text())
+
+
+class BenchmarkRunner:
+    """Times a callable and records its tracemalloc peak memory"""
+
+    def __init__(self, name: str, baseline: dict):
+        self.name = name
+        self.baseline = baseline
+
+    def __call__(self, func, *args, **kwargs):
+        # Warm-up: font registration, lazy imports, reportlab style caches
+        result = func(*args, **kwargs)
+
+        timings = []
+        for _ in range(BENCHMARK_ROUNDS):
+            start = time.perf_counter()
+            result = func(*args, **kwargs)
+            timings.append(time.perf_counter() - start)
+
+        # Separate run for memory, tracemalloc slows everything down.
+        # Note: Pillow pixel buffers are allocated outside the Python heap,
+        # so image peaks cover the encoded bytes and Python objects only.
+        tracemalloc.start()
+        try:
+            func(*args, **kwargs)
+            _, peak_memory = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        stats = {
+            "min": min(timings),
+            "median": statistics.median(timings),
+            "peak_memory": peak_memory,
+            "rounds": len(timings),
+        }
+        _results[self.name] = stats
+        self._check_regression(stats)
+        return result
+
+    def _check_regression(self, stats: dict):
+        reference = self.baseline.get(self.name)
+        if not reference:
+            return
+
+        limit = 1 + BENCHMARK_THRESHOLD
+        failures = []
+        if (stats["median"] > reference["median"] * limit
+                and stats["median"] - reference["median"] > MIN_TIME_DELTA):
+            failures.append(
+                f"time {stats['median'] * 1000:.1f}ms vs baseline {reference['median'] * 1000:.1f}ms"
+            )
+        if (stats["peak_memory"] > reference["peak_memory"] * limit
+                and stats["peak_memory"] - reference["peak_memory"] > MIN_MEMORY_DELTA):
+            failures.append(
+                f"peak memory {stats['peak_memory'] / 1024:.0f}KB vs baseline {reference['peak_memory'] / 1024:.0f}KB"
+            )
+        if failures:
+            pytest.fail(
+                f"{self.name} regressed beyond {BENCHMARK_THRESHOLD:.0%}: " + "; ".join(failures),
+                pytrace=False,
+            )
+
+
+@pytest.fixture(scope="session")
+def benchmark_baseline():
+    return _load_baseline()
+
+
+@pytest.fixture
+def benchmark(request, benchmark_baseline):
+    """Call benchmark(func, *args, **kwargs) to time func and record its peak memory"""
+    return BenchmarkRunner(request.node.name, benchmark_baseline)
+
+
+# ==================== DATA FIXTURES ====================
+
+TRAINING_GROUPS = ["Folklor A", "Folklor B", "Dečija grupa", "Veterani"]
+
+
+def make_members(count: int) -> list:
+    """Member documents shaped like db.users rows"""
+    from datetime import datetime, timedelta
+
+    base = datetime(2024, 1, 1)
+    return [
+        {
+            "_id": f"user_{i:05d}",
+            "fullName": f"Član Testović {i}",
+            "email": f"clan{i}@example.se",
+            "phone": f"+4670{i:07d}",
+            "address": f"Storgatan {i % 200}, 187 30 Täby",
+            "yearOfBirth": str(1950 + i % 70),
+            "role": "user" if i % 50 else "moderator",
+            "emailVerified": i % 3 != 0,
+            "trainingGroup": TRAINING_GROUPS[i % len(TRAINING_GROUPS)],
+            "parentName": f"Roditelj {i}" if i % 4 == 0 else "",
+            "parentEmail": f"roditelj{i}@example.se" if i % 4 == 0 else "",
+            "parentPhone": f"+4673{i:07d}" if i % 4 == 0 else "",
+            "createdAt": base + timedelta(minutes=i),
+        }
+        for i in range(count)
+    ]
+
+
+def make_attendance_report(rows: int) -> dict:
+    """Report data with `rows` members and rows // 10 (at least 1) events"""
+    event_count = max(1, rows // 10)
+    events = [
+        {
+            "date": f"2024-{1 + i % 12:02d}-{1 + i % 28:02d}",
+            "title": f"Proba folklora {i}",
+            "training_group": TRAINING_GROUPS[i % len(TRAINING_GROUPS)],
+            "confirmed": 20,
+            "present": 15 + i % 5,
+            "absent": 5 - i % 5,
+            "walkin": i % 3,
+        }
+        for i in range(event_count)
+    ]
+    members = [
+        {
+            "name": f"Član Testović {i}",
+            "email": f"clan{i}@example.se",
+            "training_group": TRAINING_GROUPS[i % len(TRAINING_GROUPS)],
+            "total_rsvps": 10,
+            "total_present": 5 + i % 6,
+            "total_absent": 5 - i % 6,
+            "attendance_rate": (5 + i % 6) * 10.0,
+        }
+        for i in range(rows)
+    ]
+    return {
+        "date_range": {"start": "2024-01-01", "end": "2024-12-31"},
+        "training_group": "Sve grupe / All groups",
+        "generated_at": "2024-12-31T12:00:00",
+        "generated_by": "Benchmark",
+        "summary": {
+            "total_events": event_count,
+            "total_members": rows,
+            "average_attendance_rate": 78.5,
+            "total_present": sum(e["present"] for e in events),
+            "total_absent": sum(e["absent"] for e in events),
+            "total_walkins": sum(e["walkin"] for e in events),
+        },
+        "events": events,
+        "members": members,
+    }
+
+
+def make_photo(size: tuple) -> bytes:
+    """A camera-like JPEG: smooth gradients with some noise, so it compresses realistically"""
+    from PIL import Image
+
+    width, height = size
+    red = Image.linear_gradient("L").resize((width, height))
+    green = Image.radial_gradient("L").resize((width, height))
+    blue = Image.effect_noise((width // 8, height // 8), 48).resize((width, height))
+    image = Image.merge("RGB", (red, green, blue))
+
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=92)
+    return buffer.getvalue()
+
+
+@pytest.fixture(scope="session")
+def members_factory():
+    cache = {}
+
+    def factory(count: int) -> list:
+        if count not in cache:
+            cache[count] = make_members(count)
+        return cache[count]
+
+    return factory
+
+
+@pytest.fixture(scope="session")
+def attendance_report_factory():
+    cache = {}
+
+    def factory(rows: int) -> dict:
+        if rows not in cache:
+            cache[rows] = make_attendance_report(rows)
+        return cache[rows]
+
+    return factory
+
+
+@pytest.fixture(scope="session")
+def photo_factory():
+    cache = {}
+
+    def factory(label: str) -> bytes:
+        if label not in cache:
+            cache[label] = make_photo(PHOTO_SIZES[label])
+        return cache[label]
+
+    return factory
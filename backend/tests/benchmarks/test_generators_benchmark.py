@@ -0,0 +1,155 @@
+"""
+Generator Micro-Benchmarks
+Time and peak memory for the PDF, Excel, XML and image generators.
+
+Run with: BENCHMARK=1 pytest tests/benchmarks -q
+- Members export (PDF / Excel / XML) - 1, 100 and 10k rows
+- Attendance report (PDF / Excel) - 1, 100 and 10k member rows
+- Invoice and credit note PDFs - single document and a batch of 100
+- Image optimizers - 1MP to 24MP photos
+"""
+
+import pytest
+
+ROW_COUNTS = [1, 100, 10_000]
+DOCUMENT_BATCHES = [1, 100]
+PHOTO_LABELS = ["1MP", "6MP", "12MP", "24MP"]
+
+
+class TestExportBenchmarks:
+    """export_utils member exports"""
+
+    @pytest.mark.parametrize("rows", ROW_COUNTS)
+    def test_members_pdf(self, benchmark, members_factory, rows):
+        from export_utils import generate_members_pdf
+
+        members = members_factory(rows)
+        buffer = benchmark(generate_members_pdf, members)
+        assert buffer.getvalue().startswith(b"%PDF")
+
+    @pytest.mark.parametrize("rows", ROW_COUNTS)
+    def test_members_excel(self, benchmark, members_factory, rows):
+        from export_utils import generate_members_excel
+
+        members = members_factory(rows)
+        buffer = benchmark(generate_members_excel, members)
+        assert buffer.getvalue()[:2] == b"PK"
+
+    @pytest.mark.parametrize("rows", ROW_COUNTS)
+    def test_members_xml(self, benchmark, members_factory, rows):
+        from export_utils import generate_members_xml
+
+        members = members_factory(rows)
+        buffer = benchmark(generate_members_xml, members)
+        assert b"<members" in buffer.getvalue()[:200]
+
+
+class TestAttendanceReportBenchmarks:
+    """utils/attendance_report_generator"""
+
+    @pytest.mark.parametrize("rows", ROW_COUNTS)
+    def test_attendance_pdf(self, benchmark, attendance_report_factory, rows):
+        from utils.attendance_report_generator import generate_attendance_pdf_report
+
+        report_data = attendance_report_factory(rows)
+        pdf_bytes = benchmark(generate_attendance_pdf_report, report_data)
+        assert pdf_bytes.startswith(b"%PDF")
+
+    @pytest.mark.parametrize("rows", ROW_COUNTS)
+    def test_attendance_excel(self, benchmark, attendance_report_factory, rows):
+        from utils.attendance_report_generator import generate_attendance_excel_report
+
+        report_data = attendance_report_factory(rows)
+        excel_bytes = benchmark(generate_attendance_excel_report, report_data)
+        assert excel_bytes[:2] == b"PK"
+
+
+class TestInvoiceBenchmarks:
+    """utils/invoice_generator and utils/credit_note_generator"""
+
+    @pytest.mark.parametrize("count", DOCUMENT_BATCHES)
+    def test_invoice_pdf(self, benchmark, tmp_path, count):
+        from utils.invoice_generator import generate_invoice_pdf
+
+        def generate_batch():
+            for i in range(count):
+                generate_invoice_pdf(
+                    invoice_id=f"inv_bench_{i}",
+                    member_name=f"Član Testović {i}",
+                    member_email=f"clan{i}@example.se",
+                    description="Članarina 2024 / Medlemsavgift 2024",
+                    amount=600.0,
+                    currency="SEK",
+                    due_date="2024-03-31",
+                    created_at="2024-03-01T10:00:00",
+                    output_path=str(tmp_path / f"invoice_{i}.pdf"),
+                    vat_rate=25.0,
+                    invoice_number=str(i + 1).zfill(4),
+                )
+
+        benchmark(generate_batch)
+        assert (tmp_path / "invoice_0.pdf").read_bytes().startswith(b"%PDF")
+
+    @pytest.mark.parametrize("count", DOCUMENT_BATCHES)
+    def test_credit_note_pdf(self, benchmark, tmp_path, count):
+        from utils.credit_note_generator import generate_credit_note_pdf
+
+        def generate_batch():
+            for i in range(count):
+                generate_credit_note_pdf(
+                    credit_note_id=f"cn_bench_{i}",
+                    credit_note_number=f"CN-20240301-{i + 1:03d}",
+                    original_invoice_id=f"inv_bench_{i}",
+                    member_name=f"Član Testović {i}",
+                    member_email=f"clan{i}@example.se",
+                    original_description="Članarina 2024 / Medlemsavgift 2024",
+                    original_amount=600.0,
+                    currency="SEK",
+                    reason="Dubbelfakturering",
+                    created_at="2024-03-01T10:00:00",
+                    created_by="Benchmark",
+                    output_path=str(tmp_path / f"credit_note_{i}.pdf"),
+                    vat_rate=25.0,
+                )
+
+        benchmark(generate_batch)
+        assert (tmp_path / "credit_note_0.pdf").read_bytes().startswith(b"%PDF")
+
+
+class TestImageBenchmarks:
+    """utils/image_optimizer and utils/media_optimizer"""
+
+    @pytest.mark.parametrize("label", PHOTO_LABELS)
+    def test_optimize_image_bytes(self, benchmark, photo_factory, label):
+        from utils.image_optimizer import optimize_image_bytes
+
+        photo = photo_factory(label)
+        optimized, filename, stats = benchmark(
+            optimize_image_bytes, photo, "photo.jpg", max_width=1920, max_height=1080
+        )
+        assert filename.endswith(".webp")
+        assert len(optimized) < len(photo)
+
+    @pytest.mark.parametrize("label", PHOTO_LABELS)
+    def test_media_optimize_image(self, benchmark, photo_factory, tmp_path, label):
+        from utils.media_optimizer import optimize_image
+
+        photo = photo_factory(label)
+        image_path = tmp_path / "photo.jpg"
+
+        def optimize_fresh_copy():
+            # optimize_image rewrites the file in place
+            image_path.write_bytes(photo)
+            return optimize_image(image_path)
+
+        assert benchmark(optimize_fresh_copy) is True
+
+    @pytest.mark.parametrize("label", PHOTO_LABELS)
+    def test_create_thumbnail(self, benchmark, photo_factory, tmp_path, label):
+        from utils.image_optimizer import create_thumbnail
+
+        image_path = tmp_path / "photo.jpg"
+        image_path.write_bytes(photo_factory(label))
+
+        thumbnail_path = benchmark(create_thumbnail, image_path)
+        assert thumbnail_path.exists()
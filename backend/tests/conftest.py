@@ -0,0 +1,7 @@
+import sys
+from pathlib import Path
+
+# Make backend modules (server, routes, utils, ...) importable from tests
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
@@ -0,0 +1,123 @@
+"""
+Query Budget Utility
+Records the MongoDB operations issued while a request is handled so tests can
+assert per-endpoint query budgets and catch N+1 regressions.
+
+Usage:
+    recorder = QueryRecorder(database_name)
+    monitoring.register(recorder)          # before the Motor client is created
+    ...
+    with recorder.record() as queries:
+        client.get("/api/family/admin/all", headers=headers)
+    queries.assert_budget("GET /api/family/admin/all")
+"""
+
+import threading
+from contextlib import contextmanager
+
+from pymongo import monitoring
+
+# Queries performed to authenticate a request: routes using get_token_user
+# (and the admin dependencies) authorise from the access token alone, routes
+# using get_current_user load the user document.
+AUTH_QUERIES = 0
+USER_QUERIES = 1
+
+# Maximum number of queries per endpoint, independent of how many documents
+# (families, events, moderators, ...) the database holds.
+QUERY_BUDGETS = {
+    # admin
+    "GET /api/admin/users": AUTH_QUERIES + 1,
+    "GET /api/admin/statistics": AUTH_QUERIES + 5,
+    "GET /api/admin/members/filtered": AUTH_QUERIES + 1,
+    "GET /api/admin/users/{user_id}/details": AUTH_QUERIES + 2,
+    # public
+    "GET /api/public/bootstrap": 5,
+    # events
+    "GET /api/events/": 1,
+    "GET /api/events/my-rsvps": AUTH_QUERIES + 2,
+    "POST /api/events/{event_id}/confirm": AUTH_QUERIES + 6,  # includes the cache version bump and broadcast
+    "GET /api/events/{event_id}/participants": AUTH_QUERIES + 2,
+    "GET /api/events/{event_id}/attendance": AUTH_QUERIES + 2,
+    "GET /api/events/reports/attendance/data": AUTH_QUERIES + 3,
+    "GET /api/events/stats/my": AUTH_QUERIES + 2,  # event totals + the user's RSVPs
+    # family
+    "GET /api/family/members": USER_QUERIES + 1,
+    "GET /api/family/admin/all": AUTH_QUERIES + 2,
+    # documents
+    "GET /api/documents/public": AUTH_QUERIES + 2,
+    "GET /api/documents/personal": AUTH_QUERIES + 1,
+    "GET /api/documents/personal/admin": AUTH_QUERIES + 2,
+    "GET /api/documents/association": AUTH_QUERIES + 2,
+    "GET /api/documents/stats": AUTH_QUERIES + 5,
+    # invoices
+    "GET /api/invoices/": AUTH_QUERIES + 1,
+    "GET /api/invoices/my": AUTH_QUERIES + 1,
+    "GET /api/invoices/credit-notes/": AUTH_QUERIES + 1,
+}
+
+# Driver housekeeping, not issued by route handlers. getMore only fetches the
+# next batch of a cursor that was already counted, so it is tracked separately.
+IGNORED_COMMANDS = {
+    "hello", "ismaster", "isMaster", "ping", "buildInfo", "buildinfo",
+    "endSessions", "killCursors", "saslStart", "saslContinue", "getMore",
+}
+
+
+class RecordedQueries:
+    """Queries captured during one record() block"""
+
+    def __init__(self):
+        self.queries = []
+        self.batches = 0
+
+    def __len__(self):
+        return len(self.queries)
+
+    def describe(self) -> str:
+        return "\n".join(f"  {name} {collection}" for name, collection in self.queries)
+
+    def assert_budget(self, endpoint: str, budget: int = None):
+        if budget is None:
+            budget = QUERY_BUDGETS[endpoint]
+        assert len(self.queries) <= budget, (
+            f"{endpoint} issued {len(self.queries)} queries (budget {budget}):\n{self.describe()}"
+        )
+
+
+class QueryRecorder(monitoring.CommandListener):
+    """pymongo command listener that captures commands while recording is active"""
+
+    def __init__(self, database_name: str):
+        self.database_name = database_name
+        self._current = None
+        self._lock = threading.Lock()
+
+    def started(self, event):
+        if event.database_name != self.database_name:
+            return
+        with self._lock:
+            if self._current is None:
+                return
+            if event.command_name == "getMore":
+                self._current.batches += 1
+            elif event.command_name not in IGNORED_COMMANDS:
+                collection = event.command.get(event.command_name)
+                self._current.queries.append((event.command_name, collection))
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+    @contextmanager
+    def record(self):
+        recorded = RecordedQueries()
+        with self._lock:
+            self._current = recorded
+        try:
+            yield recorded
+        finally:
+            with self._lock:
+                self._current = None
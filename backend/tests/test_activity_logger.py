@@ -0,0 +1,187 @@
+"""
+Activity Log Sink Tests
+Tests for activity_logger.ActivityLogSink.
+- Entries are buffered and written with one insert_many on size or time
+- Entries that fail to write are retried, and the buffer is drained on stop
+- Page cursors round-trip (timestamp, _id)
+- With MongoDB, old impersonation logs move to admin_activity_logs and
+  keyset pages cover every entry once
+  (MONGO_URL=mongodb://localhost:27017 pytest tests/test_activity_logger.py)
+"""
+
+import asyncio
+import os
+from types import SimpleNamespace
+from unittest.mock import patch
+from uuid import uuid4
+
+import pytest
+
+import activity_logger
+from activity_logger import FLUSH_SIZE, ActivityLogSink, decode_cursor, encode_cursor, log_admin_activity
+
+MONGO_URL = os.environ.get("MONGO_URL")
+
+
+class RecordingCollection:
+    """admin_activity_logs stand-in that records insert_many batches"""
+
+    def __init__(self, failures: int = 0):
+        self.batches = []
+        self.failures = failures
+
+    async def insert_many(self, entries, ordered=True):
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("mongo down")
+        self.batches.append(list(entries))
+
+    async def insert_one(self, entry):
+        self.batches.append([entry])
+
+
+def log(db, n):
+    return log_admin_activity(db, "admin_1", "Admin", "edit", "user", target_id=f"user_{n}")
+
+
+class TestActivityLogSink:
+    """Buffering and flushing"""
+
+    def test_written_directly_without_sink(self):
+        db = SimpleNamespace(admin_activity_logs=RecordingCollection())
+        asyncio.run(log(db, 1))
+        assert len(db.admin_activity_logs.batches) == 1
+        print("✓ Written right away when no sink is running")
+
+    def test_flushed_on_size_and_drained_on_stop(self):
+        db = SimpleNamespace(admin_activity_logs=RecordingCollection())
+        sink = ActivityLogSink()
+
+        async def run():
+            with patch.object(activity_logger, "activity_sink", sink):
+                await sink.start(db)
+                for n in range(FLUSH_SIZE + 3):
+                    await log(db, n)
+                # Nothing written while the request is handled
+                written_inline = len(db.admin_activity_logs.batches)
+                await asyncio.sleep(0.05)
+                after_size_flush = [len(b) for b in db.admin_activity_logs.batches]
+                await log(db, "last")
+                await sink.stop()
+            return written_inline, after_size_flush
+
+        written_inline, after_size_flush = asyncio.run(run())
+        batches = db.admin_activity_logs.batches
+        assert written_inline == 0
+        assert after_size_flush == [FLUSH_SIZE + 3]
+        assert [len(b) for b in batches] == [FLUSH_SIZE + 3, 1]
+        assert batches[1][0]["targetId"] == "user_last"
+        print("✓ One insert_many per full buffer, the rest written on stop")
+
+    def test_failed_batch_retried(self):
+        db = SimpleNamespace(admin_activity_logs=RecordingCollection(failures=1))
+        sink = ActivityLogSink()
+
+        async def run():
+            sink._db = db
+            sink._wake = asyncio.Event()
+            for n in range(3):
+                sink.add({"targetId": n})
+            failed = await sink.flush()
+            pending = sink.pending
+            sink.add({"targetId": 3})
+            written = await sink.flush()
+            return failed, pending, written
+
+        failed, pending, written = asyncio.run(run())
+        assert (failed, pending, written) == (0, 3, 4)
+        assert [e["targetId"] for e in db.admin_activity_logs.batches[0]] == [0, 1, 2, 3]
+        print("✓ Failed entries kept, in order, for the next flush")
+
+
+class TestCursor:
+    """Page cursors"""
+
+    def test_round_trip(self):
+        from datetime import datetime, timezone
+        from bson import ObjectId
+        entry = {"timestamp": datetime(2026, 5, 4, 16, 0, 1, 250000, tzinfo=timezone.utc), "_id": ObjectId()}
+        assert decode_cursor(encode_cursor(entry)) == (datetime(2026, 5, 4, 16, 0, 1, 250000), entry["_id"])
+        with pytest.raises(ValueError):
+            decode_cursor("not-a-cursor")
+        print("✓ Cursor round trip, malformed cursors rejected")
+
+
+@pytest.mark.skipif(not MONGO_URL, reason="MONGO_URL not set")
+class TestStorage:
+    """Migration and browsing against a real MongoDB"""
+
+    def test_impersonation_logs_moved(self):
+        from datetime import datetime
+        from motor.motor_asyncio import AsyncIOMotorClient
+        from activity_logger import migrate_legacy_logs
+
+        async def run():
+            client = AsyncIOMotorClient(MONGO_URL)
+            db = client[f"test_activity_{uuid4().hex[:8]}"]
+            try:
+                await db.activity_logs.insert_one({
+                    "action": "user_impersonation", "superadmin_id": "superadmin_1",
+                    "superadmin_email": "root@example.se", "target_user_id": "user_1",
+                    "target_user_email": "user@example.se", "timestamp": datetime.utcnow()
+                })
+                moved = await migrate_legacy_logs(db)
+                again = await migrate_legacy_logs(db)
+                entry = await db.admin_activity_logs.find_one({})
+                collections = await db.list_collection_names()
+            finally:
+                await client.drop_database(db.name)
+                client.close()
+            return moved, again, entry, collections
+
+        moved, again, entry, collections = asyncio.run(run())
+        assert (moved, again) == (1, 0)
+        assert entry["action"] == "impersonate" and entry["adminId"] == "superadmin_1"
+        assert entry["targetId"] == "user_1" and entry["details"]["targetEmail"] == "user@example.se"
+        assert "activity_logs" not in collections
+        print("✓ Impersonation logs moved to the unified schema")
+
+    def test_keyset_pages(self):
+        from datetime import datetime, timedelta
+        from motor.motor_asyncio import AsyncIOMotorClient
+        from activity_logger import create_indexes, get_activity_logs
+
+        now = datetime.utcnow().replace(microsecond=0)
+
+        async def run():
+            client = AsyncIOMotorClient(MONGO_URL)
+            db = client[f"test_activity_{uuid4().hex[:8]}"]
+            try:
+                await create_indexes(db)
+                # Pairs of entries share a timestamp, so _id breaks the ties
+                await db.admin_activity_logs.insert_many([
+                    {"adminId": "admin_1", "action": "edit" if n % 3 else "delete",
+                     "timestamp": now - timedelta(seconds=n // 2)}
+                    for n in range(11)
+                ])
+                pages, cursor = [], None
+                while True:
+                    page = await get_activity_logs(db, limit=4, cursor=cursor)
+                    pages.append(page)
+                    cursor = page["nextCursor"]
+                    if not cursor:
+                        break
+                deletes = await get_activity_logs(db, action="delete")
+            finally:
+                await client.drop_database(db.name)
+                client.close()
+            return pages, deletes
+
+        pages, deletes = asyncio.run(run())
+        ids = [entry["id"] for page in pages for entry in page["logs"]]
+        timestamps = [entry["timestamp"] for page in pages for entry in page["logs"]]
+        assert [len(page["logs"]) for page in pages] == [4, 4, 3]
+        assert len(set(ids)) == 11 and timestamps == sorted(timestamps, reverse=True)
+        assert "total" in pages[0] and "total" not in pages[1]
+        assert deletes["total"] == 4 and deletes["totalIsExact"]
+        print("✓ Keyset pages cover every entry once, newest first")
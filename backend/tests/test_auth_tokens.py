@@ -0,0 +1,134 @@
+"""
+Access Token Tests
+Tests for short-lived access tokens and the in-memory revocation list,
+without a database.
+- Access tokens carry the claims the admin dependencies need
+- Revoked users are rejected until they get a new token
+- Suspended users and non-access tokens are rejected
+"""
+
+import asyncio
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+from jose import jwt
+
+from auth_utils import ALGORITHM, SECRET_KEY, create_access_token, decode_access_token, user_token_claims
+from dependencies import get_admin_user, get_token_claims, get_token_user
+from utils.auth_tokens import RevocationList, revocation_list
+
+
+class RevocationCollection:
+    """Just enough of a Motor collection for RevocationList"""
+
+    def __init__(self):
+        self.docs = {}
+
+    async def update_one(self, query, update, upsert=False):
+        doc = self.docs.setdefault(query["_id"], {"_id": query["_id"]})
+        doc["revokedAt"] = max(doc.get("revokedAt", update["$max"]["revokedAt"]), update["$max"]["revokedAt"])
+        doc.update(update["$set"])
+
+    def find(self, query, projection=None):
+        since = query.get("revokedAt", {}).get("$gte", datetime.min)
+        docs = [doc for doc in self.docs.values() if doc["revokedAt"] >= since]
+        return SimpleNamespace(to_list=lambda length: asyncio.sleep(0, result=docs))
+
+
+def credentials(token):
+    return SimpleNamespace(credentials=token)
+
+
+USER = {
+    "_id": "user_1",
+    "email": "member@example.se",
+    "username": "member@example.se",
+    "fullName": "Member",
+    "role": "admin"
+}
+
+
+class TestAccessTokens:
+    """Authorisation from token claims"""
+
+    def test_claims_build_admin_user(self):
+        token = create_access_token(user_token_claims(USER))
+
+        async def run():
+            claims = await get_token_claims(credentials(token))
+            user = await get_token_user(claims)
+            return await get_admin_user(user)
+
+        admin = asyncio.run(run())
+        assert admin["_id"] == "user_1"
+        assert admin["email"] == "member@example.se"
+        assert admin["fullName"] == "Member"
+        print("✓ Admin user built from token claims")
+
+    def test_token_expires_in_minutes(self):
+        claims = decode_access_token(create_access_token(user_token_claims(USER)))
+        assert claims["typ"] == "access"
+        assert claims["exp"] - claims["iat"] <= 60 * 60
+        print("✓ Access token is short-lived")
+
+    def test_suspended_user_rejected(self):
+        token = create_access_token(user_token_claims({**USER, "suspended": True}))
+        with pytest.raises(HTTPException) as exc:
+            asyncio.run(get_token_claims(credentials(token)))
+        assert exc.value.status_code == 403
+        print("✓ Suspended user rejected")
+
+    def test_non_access_token_rejected(self):
+        # Legacy 7-day tokens have no typ claim
+        forged = jwt.encode({"sub": "user_1", "exp": time.time() + 60}, SECRET_KEY, algorithm=ALGORITHM)
+        with pytest.raises(HTTPException) as exc:
+            asyncio.run(get_token_claims(credentials(forged)))
+        assert exc.value.status_code == 401
+        print("✓ Legacy token without typ=access rejected")
+
+
+class TestRevocationList:
+    """Revocations reject older tokens on every worker"""
+
+    def test_revoked_token_rejected(self, monkeypatch):
+        db = SimpleNamespace(token_revocations=RevocationCollection())
+        token = create_access_token(user_token_claims(USER))
+        monkeypatch.setattr(revocation_list, "_revoked", {})
+
+        asyncio.run(revocation_list.revoke(db, "user_1", "test"))
+        with pytest.raises(HTTPException) as exc:
+            asyncio.run(get_token_claims(credentials(token)))
+        assert exc.value.status_code == 401
+
+        # A token issued after the revocation works
+        time.sleep(0.01)
+        fresh = create_access_token(user_token_claims(USER))
+        assert asyncio.run(get_token_claims(credentials(fresh)))["sub"] == "user_1"
+        print("✓ Revocation rejects older tokens only")
+
+    def test_sync_from_other_worker(self):
+        db = SimpleNamespace(token_revocations=RevocationCollection())
+        other_worker, this_worker = RevocationList(), RevocationList()
+        claims = decode_access_token(create_access_token(user_token_claims(USER)))
+
+        asyncio.run(this_worker.sync(db))
+        asyncio.run(other_worker.revoke(db, "user_1", "test"))
+        assert not this_worker.is_revoked(claims)
+
+        asyncio.run(this_worker.sync(db))
+        assert this_worker.is_revoked(claims)
+        print("✓ Revocation synced to other workers")
+
+    def test_old_revocations_pruned(self):
+        db = SimpleNamespace(token_revocations=RevocationCollection())
+        db.token_revocations.docs["user_1"] = {
+            "_id": "user_1",
+            "revokedAt": datetime.utcnow() - timedelta(days=1)
+        }
+        revocations = RevocationList()
+        asyncio.run(revocations.sync(db))
+        assert "user_1" not in revocations._revoked
+        print("✓ Expired revocations pruned")
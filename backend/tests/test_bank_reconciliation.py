@@ -0,0 +1,162 @@
+"""
+Bank Reconciliation Tests
+Tests for utils/bank_reconciliation.
+- OCR references carry a valid Luhn check digit
+- BgMax and camt.053 statements are parsed into payments
+- With MongoDB, matching payments mark their invoices paid and the rest is
+  reported with the reason
+  (MONGO_URL=mongodb://localhost:27017 pytest tests/test_bank_reconciliation.py)
+"""
+
+import asyncio
+import io
+import os
+from uuid import uuid4
+
+import pytest
+
+from utils.bank_reconciliation import (
+    ALREADY_PAID, AMOUNT_MISMATCH, BGMAX, CAMT053, DEBIT, NO_REFERENCE, UNKNOWN_REFERENCE,
+    detect_format, luhn_check_digit, ocr_candidates, ocr_reference, parse_statement, valid_ocr
+)
+
+MONGO_URL = os.environ.get("MONGO_URL")
+
+
+def bgmax_record(record: str, body: str) -> str:
+    return (record + body).ljust(80) + "\r\n"
+
+
+def bgmax_payment(reference: str, ore: int, record: str = "20") -> str:
+    return bgmax_record(record, "0000991234" + reference.ljust(25) + str(ore).zfill(18) + "21" + "000000000001" + "0")
+
+
+BGMAX_FILE = (
+    bgmax_record("01", "BGMAX".ljust(20) + "01" + "20260504120000000000" + "P")
+    + bgmax_record("05", "0001234567" + " " * 10 + "SEK")
+    + bgmax_payment("00018", 50000)
+    + bgmax_record("26", "ANA PETROVIC")
+    + bgmax_payment("00026", 45000)
+    + bgmax_payment("12344", 10000)
+    + bgmax_payment("00018", 5000, record="21")
+    + bgmax_record("15", "99999999999".ljust(35) + "20260504" + "00001" + "100000".zfill(18) + "SEK" + "00000003")
+    + bgmax_record("70", "00000003")
+).encode("latin-1")
+
+CAMT_FILE = b"""<?xml version="1.0" encoding="UTF-8"?>
+<Document xmlns="urn:iso:std:iso:20022:tech:xsd:camt.053.001.02">
+  <BkToCstmrStmt><Stmt>
+    <Ntry>
+      <Amt Ccy="SEK">500.00</Amt><CdtDbtInd>CRDT</CdtDbtInd>
+      <BookgDt><Dt>2026-05-04</Dt></BookgDt>
+      <NtryDtls><TxDtls>
+        <RltdPties><Dbtr><Nm>Ana Petrovic</Nm></Dbtr></RltdPties>
+        <RmtInf><Strd><CdtrRefInf><Ref>00018</Ref></CdtrRefInf></Strd></RmtInf>
+      </TxDtls></NtryDtls>
+    </Ntry>
+    <Ntry>
+      <Amt Ccy="SEK">750.00</Amt><CdtDbtInd>CRDT</CdtDbtInd>
+      <BookgDt><Dt>2026-05-05</Dt></BookgDt>
+      <NtryDtls>
+        <TxDtls><Amt Ccy="SEK">450.00</Amt><RmtInf><Ustrd>Faktura 00026 Marko</Ustrd></RmtInf></TxDtls>
+        <TxDtls><Amt Ccy="SEK">300.00</Amt><RmtInf><Ustrd>medlemsavgift</Ustrd></RmtInf></TxDtls>
+      </NtryDtls>
+    </Ntry>
+    <Ntry>
+      <Amt Ccy="SEK">99.00</Amt><CdtDbtInd>DBIT</CdtDbtInd>
+      <BookgDt><Dt>2026-05-05</Dt></BookgDt>
+    </Ntry>
+  </Stmt></BkToCstmrStmt>
+</Document>
+"""
+
+
+class TestOcr:
+    """OCR references"""
+
+    def test_luhn(self):
+        assert luhn_check_digit("7992739871") == "3"
+        assert ocr_reference("0001") == "00018"
+        assert ocr_reference("INV-0002") == "00026"
+        assert ocr_reference("") is None
+        print("✓ Luhn check digit appended to the invoice number")
+
+    def test_candidates(self):
+        assert valid_ocr("00018") and not valid_ocr("00019") and not valid_ocr("8")
+        assert ocr_candidates("000 18") == ["00018"]
+        assert ocr_candidates("Faktura 00026 Marko") == ["00026"]
+        assert ocr_candidates("medlemsavgift 2026") == []
+        print("✓ Only check-digit-valid references are candidates")
+
+
+class TestParsers:
+    """Statement formats"""
+
+    def test_detect_format(self):
+        assert detect_format(BGMAX_FILE[:100]) == BGMAX
+        assert detect_format(CAMT_FILE[:200]) == CAMT053
+        assert detect_format(b"date;amount;reference") is None
+        print("✓ Format detected from the file head")
+
+    def test_bgmax(self):
+        payments = list(parse_statement(io.BytesIO(BGMAX_FILE), BGMAX))
+        assert [(p["reference"], p["amount"], p["debit"]) for p in payments] == [
+            ("00018", 500.0, False), ("00026", 450.0, False), ("12344", 100.0, False), ("00018", 50.0, True)
+        ]
+        assert payments[0]["payer"] == "ANA PETROVIC"
+        assert {p["date"] for p in payments} == {"2026-05-04"} and {p["currency"] for p in payments} == {"SEK"}
+        print("✓ BgMax payments dated by their deposit record")
+
+    def test_camt053(self):
+        payments = list(parse_statement(io.BytesIO(CAMT_FILE), CAMT053))
+        assert [(p["reference"], p["amount"], p["date"], p["debit"]) for p in payments] == [
+            ("00018", 500.0, "2026-05-04", False),
+            ("Faktura 00026 Marko", 450.0, "2026-05-05", False),
+            ("medlemsavgift", 300.0, "2026-05-05", False),
+            ("", 99.0, "2026-05-05", True),
+        ]
+        assert payments[0]["payer"] == "Ana Petrovic"
+        print("✓ camt.053 entries and batched transactions")
+
+
+@pytest.mark.skipif(not MONGO_URL, reason="MONGO_URL not set")
+class TestReconcile:
+    """reconcile() against a real MongoDB"""
+
+    def test_mark_paid_and_report(self):
+        from motor.motor_asyncio import AsyncIOMotorClient
+        from utils.bank_reconciliation import create_indexes, reconcile
+
+        async def run():
+            client = AsyncIOMotorClient(MONGO_URL)
+            db = client[f"test_reconcile_{uuid4().hex[:8]}"]
+            try:
+                await create_indexes(db)
+                await db.invoices.insert_many([
+                    {"_id": "invoice_1", "ocr": "00018", "status": "unpaid", "amount": 500, "currency": "SEK", "overdue": True},
+                    {"_id": "invoice_2", "ocr": "00026", "status": "unpaid", "amount": 400, "currency": "SEK"},
+                    {"_id": "invoice_3", "ocr": "00034", "status": "paid", "amount": 300, "currency": "SEK"},
+                ])
+                payments = list(parse_statement(io.BytesIO(BGMAX_FILE), BGMAX))
+                payments.append({**payments[0], "row": 99})
+                payments.append({**payments[0], "row": 100, "reference": "00034", "amount": 300.0})
+                payments.append({**payments[0], "row": 101, "reference": "no ref"})
+                dry = await reconcile(db, payments, BGMAX, "Admin", dry_run=True)
+                report = await reconcile(db, payments, BGMAX, "Admin")
+                invoices = {i["_id"]: i for i in await db.invoices.find({}).to_list(length=None)}
+            finally:
+                await client.drop_database(db.name)
+                client.close()
+            return dry, report, invoices
+
+        dry, report, invoices = asyncio.run(run())
+        assert (dry["matched"], dry["marked"]) == (1, 0)
+        assert (report["payments"], report["matched"], report["marked"], report["matchedAmount"]) == (7, 1, 1, 500.0)
+        assert {u["row"]: u["reason"] for u in report["unmatched"]} == {
+            5: AMOUNT_MISMATCH, 6: UNKNOWN_REFERENCE, 7: DEBIT, 99: ALREADY_PAID, 100: ALREADY_PAID, 101: NO_REFERENCE
+        }
+        paid = invoices["invoice_1"]
+        assert paid["status"] == "paid" and paid["paymentDate"] == "2026-05-04" and paid["overdue"] is False
+        assert paid["payment"]["payer"] == "ANA PETROVIC"
+        assert invoices["invoice_2"]["status"] == "unpaid"
+        print("✓ Matching payments marked paid, the rest reported")
@@ -0,0 +1,198 @@
+"""
+Cache Tests
+- Concurrent misses share one loader (single-flight)
+- Expired entries are served stale while refreshed in the background
+- Loads started before an invalidation are neither stored nor joined
+- Tagged entries are dropped by invalidate_tags
+- invalidate() clears the local cache even when the bus cannot broadcast
+- With MongoDB, an invalidation published by one worker reaches another
+  (MONGO_URL=mongodb://localhost:27017 pytest tests/test_cache.py)
+"""
+
+import asyncio
+import os
+from datetime import datetime
+from uuid import uuid4
+
+import pytest
+
+from utils.cache import SimpleCache, cache
+from utils.cache_bus import CacheInvalidationBus, invalidate
+
+MONGO_URL = os.environ.get("MONGO_URL")
+
+
+class UnavailableDB:
+    def __getitem__(self, name):
+        return self
+
+    async def insert_one(self, doc):
+        raise ConnectionError("database unavailable")
+
+
+class TestReadThrough:
+    """get_or_load coalescing and stale-while-revalidate"""
+
+    def test_concurrent_misses_share_one_load(self):
+        local = SimpleCache()
+        calls = []
+
+        async def loader():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return {"logo": "a"}
+
+        async def run():
+            return await asyncio.gather(*[local.get_or_load("branding:global", loader) for _ in range(20)])
+
+        results = asyncio.run(run())
+        assert len(calls) == 1
+        assert all(result == {"logo": "a"} for result in results)
+        assert local.stats()["coalesced"] == 19
+        print("✓ 20 concurrent misses, 1 load")
+
+    def test_stale_value_served_while_refreshing(self):
+        local = SimpleCache()
+        values = iter(["old", "new"])
+
+        async def loader():
+            await asyncio.sleep(0.01)
+            return next(values)
+
+        async def run():
+            await local.get_or_load("settings:global", loader, ttl_seconds=0, stale_seconds=60)
+            stale = await local.get_or_load("settings:global", loader, ttl_seconds=0, stale_seconds=60)
+            await asyncio.sleep(0.05)
+            entry = local._cache["settings:global"]["value"]
+            return stale, entry
+
+        stale, refreshed = asyncio.run(run())
+        assert stale == "old"
+        assert refreshed == "new"
+        print("✓ Stale value served, refreshed in the background")
+
+    def test_load_started_before_invalidation_not_stored(self):
+        local = SimpleCache()
+
+        async def loader():
+            await asyncio.sleep(0.05)
+            return "before"
+
+        async def run():
+            load = asyncio.create_task(local.get_or_load("news:list:0:10", loader, tags=["news"]))
+            await asyncio.sleep(0.01)
+            await local.invalidate_tags(["news"])
+            value = await load
+            return value, await local.get("news:list:0:10")
+
+        value, cached = asyncio.run(run())
+        assert value == "before"
+        assert cached is None
+        print("✓ Value read before an invalidation is not cached")
+
+    def test_caller_after_invalidation_gets_fresh_value(self):
+        local = SimpleCache()
+        values = iter(["before", "after"])
+
+        async def loader():
+            value = next(values)
+            await asyncio.sleep(0.05 if value == "before" else 0.01)
+            return value
+
+        async def run():
+            first = asyncio.create_task(local.get_or_load("news:list:0:10", loader, tags=["news"]))
+            await asyncio.sleep(0.01)
+            await local.invalidate_tags(["news"])
+            # Must not join the load that started before the invalidation
+            second = await local.get_or_load("news:list:0:10", loader, tags=["news"])
+            first = await first
+            await asyncio.sleep(0.06)
+            return first, second, await local.get("news:list:0:10")
+
+        first, second, cached = asyncio.run(run())
+        assert first == "before"
+        assert second == "after"
+        assert cached == "after"
+        print("✓ Caller after an invalidation starts a fresh load")
+
+
+class TestCacheTags:
+    """Tag-based invalidation on one worker"""
+
+    def test_invalidate_tags(self):
+        local = SimpleCache()
+
+        async def run():
+            await local.set("branding:global", {"logo": "a"}, tags=["branding"])
+            await local.set("settings:global", {"address": "b"}, tags=["settings"])
+            deleted = await local.invalidate_tags(["branding"])
+            return deleted, await local.get("branding:global"), await local.get("settings:global")
+
+        deleted, branding, settings = asyncio.run(run())
+        assert deleted == 1
+        assert branding is None
+        assert settings == {"address": "b"}
+        print("✓ Only entries with the invalidated tag are dropped")
+
+    def test_invalidate_without_database(self):
+        async def run():
+            await cache.set("branding:global", {"logo": "a"}, tags=["branding"])
+            await invalidate(UnavailableDB(), "branding")
+            return await cache.get("branding:global")
+
+        assert asyncio.run(run()) is None
+        print("✓ Local cache invalidated when broadcasting fails")
+
+    def test_versions_move_after_cache_is_cleared(self, monkeypatch):
+        bus = CacheInvalidationBus()
+        bus.versions = {"news": 3}
+        seen = []
+
+        async def invalidate_tags(tags):
+            # A request here must still get the old ETag
+            seen.append(bus.versions["news"])
+            return 0
+
+        monkeypatch.setattr(cache, "invalidate_tags", invalidate_tags)
+        asyncio.run(bus._apply(["news"], {"news": 4}))
+        assert seen == [3]
+        assert bus.versions["news"] == 4
+        print("✓ New ETag only once the old cached data is gone")
+
+
+@pytest.mark.skipif(not MONGO_URL, reason="MONGO_URL not set - the bus needs MongoDB")
+class TestCacheBus:
+    """Invalidations reach the other workers"""
+
+    def test_invalidation_reaches_other_worker(self):
+        from motor.motor_asyncio import AsyncIOMotorClient
+
+        # Both "workers" share this process's cache, so the publisher's message
+        # is inserted directly instead of via publish(), which clears locally
+        publisher, follower = CacheInvalidationBus(), CacheInvalidationBus()
+        db_name = f"cache_bus_{uuid4().hex[:8]}"
+
+        async def run():
+            client = AsyncIOMotorClient(MONGO_URL)
+            db = client[db_name]
+            try:
+                await follower.start(db)
+                await asyncio.sleep(0.5)
+                await cache.set("branding:global", {"logo": "old"}, tags=["branding"])
+                await db["cache_invalidations"].insert_one({
+                    "tags": ["branding"], "origin": publisher.worker_id,
+                    "at": datetime.utcnow()
+                })
+                for _ in range(50):
+                    if await cache.get("branding:global") is None:
+                        return True
+                    await asyncio.sleep(0.1)
+                return False
+            finally:
+                await follower.stop()
+                await client.drop_database(db_name)
+                client.close()
+
+        assert asyncio.run(run())
+        assert follower.received == 1
+        print("✓ Invalidation received from another worker")
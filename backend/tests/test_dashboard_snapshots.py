@@ -0,0 +1,68 @@
+"""
+Dashboard Snapshot Tests
+Tests for utils/dashboard_snapshots.
+- With MongoDB, a snapshot holds the member, invoice and RSVP figures of a day,
+  is replaced when taken again and is returned by get_trend()
+  (MONGO_URL=mongodb://localhost:27017 pytest tests/test_dashboard_snapshots.py)
+"""
+
+import asyncio
+import os
+from uuid import uuid4
+
+import pytest
+
+MONGO_URL = os.environ.get("MONGO_URL")
+
+DAY = "2026-05-04"
+
+
+@pytest.mark.skipif(not MONGO_URL, reason="MONGO_URL not set")
+class TestSnapshots:
+    """take_snapshot() and get_trend() against a real MongoDB"""
+
+    def test_snapshot_of_a_day(self):
+        from motor.motor_asyncio import AsyncIOMotorClient
+        from utils.cache import cache, TAG_ROSTERS
+        from utils.dashboard_snapshots import get_trend, take_snapshot
+
+        async def run():
+            client = AsyncIOMotorClient(MONGO_URL)
+            db = client[f"test_snapshots_{uuid4().hex[:8]}"]
+            try:
+                await cache.invalidate_tags([TAG_ROSTERS])
+                await db.users.insert_many([
+                    {"_id": "user_1", "role": "user"}, {"_id": "user_2", "role": "user"},
+                    {"_id": "admin_1", "role": "admin"}
+                ])
+                await db.training_rosters.insert_one({"_id": "Folklor", "members": [{"userId": "user_1"}]})
+                await db.invoices.insert_many([
+                    {"status": "paid", "amount": 500, "paymentDate": DAY},
+                    {"status": "paid", "amount": 300, "paymentDate": "2026-04-01"},
+                    {"status": "unpaid", "amount": 500, "dueDate": "2026-04-01", "overdue": True},
+                    {"status": "unpaid", "amount": 500, "dueDate": "2026-05-01", "overdue": False},
+                ])
+                await db.events.insert_one({"_id": "event_1", "date": DAY, "status": "active"})
+                await db.event_rsvps.insert_many([
+                    {"eventId": "event_1", "userId": "user_1", "date": DAY, "eventStatus": "active",
+                     "status": "confirmed", "attended": True},
+                    {"eventId": "event_1", "userId": "user_2", "date": DAY, "eventStatus": "active",
+                     "status": "confirmed", "attended": False},
+                ])
+                await take_snapshot(db, DAY)
+                snapshot = await take_snapshot(db, DAY)
+                trend = await get_trend(db, "2026-05-01", "2026-05-31")
+            finally:
+                await cache.invalidate_tags([TAG_ROSTERS])
+                await client.drop_database(db.name)
+                client.close()
+            return snapshot, trend
+
+        snapshot, trend = asyncio.run(run())
+        assert snapshot["members"] == {"total": 2, "byRole": {"user": 2, "admin": 1}, "byGroup": {"Folklor": 1}}
+        assert snapshot["invoices"] == {
+            "paid": 2, "unpaid": 2, "overdue": 1, "revenue": 800, "paidOnDay": 1, "revenueOnDay": 500
+        }
+        assert snapshot["rsvps"] == {"events": 1, "confirmed": 2, "cancelled": 0, "attended": 1, "attendanceRate": 0.5}
+        assert [s["date"] for s in trend] == [DAY]
+        print("✓ Daily snapshot stored once and returned as a trend")
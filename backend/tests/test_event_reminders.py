@@ -0,0 +1,142 @@
+"""
+Event Reminder Tests
+Tests for utils/event_reminders.
+- Start times are local (Stockholm) and reminders fall inside the jitter window
+- With MongoDB, reminders follow event updates and are claimed once
+  (MONGO_URL=mongodb://localhost:27017 pytest tests/test_event_reminders.py)
+"""
+
+import asyncio
+import os
+from datetime import datetime, timedelta
+from uuid import uuid4
+
+import pytest
+
+from utils.event_reminders import (
+    CANCELLED, PENDING, REMINDER_JITTER_MINUTES, REMINDER_OFFSET_HOURS, SENDING,
+    day_words, event_start, reminder_time, start_changed
+)
+
+MONGO_URL = os.environ.get("MONGO_URL")
+
+
+class TestReminderTimes:
+    """Event start and reminder time"""
+
+    def test_event_start_is_local(self):
+        # CEST (UTC+2) in May, CET (UTC+1) in January
+        assert event_start({"date": "2026-05-04", "time": "18:00"}) == datetime(2026, 5, 4, 16, 0)
+        assert event_start({"date": "2026-01-15", "time": "18:00"}) == datetime(2026, 1, 15, 17, 0)
+        print("✓ Local start converted to UTC")
+
+    def test_event_start_without_time(self):
+        assert event_start({"date": "2026-05-04", "time": "TBD"}) == datetime(2026, 5, 4, 7, 0)
+        assert event_start({"date": "soon"}) is None
+        print("✓ Default start time, invalid dates ignored")
+
+    def test_reminder_inside_jitter_window(self):
+        start = datetime(2026, 5, 4, 16, 0)
+        latest = start - timedelta(hours=REMINDER_OFFSET_HOURS)
+        earliest = latest - timedelta(minutes=REMINDER_JITTER_MINUTES)
+        for _ in range(50):
+            assert earliest <= reminder_time(start, datetime(2026, 1, 1)) <= latest
+        print("✓ Reminder offset with jitter")
+
+    def test_late_event_reminded_now(self):
+        now = datetime(2026, 5, 4, 10, 0)
+        assert reminder_time(datetime(2026, 5, 4, 16, 0), now) == now
+        print("✓ Event created after its reminder time is reminded right away")
+
+    def test_day_words(self):
+        # 23:30 UTC on May 3rd is already May 4th in Stockholm
+        now = datetime(2026, 5, 3, 23, 30)
+        assert day_words({"date": "2026-05-04"}, now) == ("danas", "idag")
+        assert day_words({"date": "2026-05-05"}, now) == ("sutra", "imorgon")
+        assert day_words({"date": "2026-05-07"}, now) == ("dana 2026-05-07", "den 2026-05-07")
+        print("✓ Late reminders say today, not tomorrow")
+
+    def test_start_changed(self):
+        stored = {"date": "2026-05-04", "time": "18:00", "status": "active"}
+        assert not start_changed(stored, {"date": "2026-05-04", "time": "18:00", "location": "Hall 2"})
+        assert not start_changed(stored, {"title": {"en": "Training"}})
+        assert start_changed(stored, {"date": "2026-05-04", "time": "19:00"})
+        assert start_changed(stored, {"date": "2026-05-05"})
+        print("✓ Only a new date / time moves the reminder")
+
+
+@pytest.mark.skipif(not MONGO_URL, reason="MONGO_URL not set")
+class TestScheduling:
+    """schedule / reschedule / claim_due against a real MongoDB"""
+
+    def test_follow_event_updates(self):
+        from motor.motor_asyncio import AsyncIOMotorClient
+        from utils.event_reminders import claim_due, create_indexes, reschedule, schedule
+
+        in_a_week = (datetime.utcnow() + timedelta(days=7)).strftime("%Y-%m-%d")
+        tomorrow_ish = (datetime.utcnow() + timedelta(hours=20)).strftime("%Y-%m-%d")
+
+        async def run():
+            client = AsyncIOMotorClient(MONGO_URL)
+            db = client[f"test_reminders_{uuid4().hex[:8]}"]
+            try:
+                await create_indexes(db)
+                event = {"_id": "event_1", "date": in_a_week, "time": "18:00", "status": "active"}
+                await db.events.insert_one(dict(event))
+                await schedule(db, event)
+                not_due = await claim_due(db)
+
+                # Cancelled, then moved closer and re-activated
+                await db.events.update_one({"_id": "event_1"}, {"$set": {"status": "cancelled"}})
+                await reschedule(db, "event_1", {"status": "cancelled"}, event)
+                cancelled = await db.event_reminders.find_one({"_id": "event_1"})
+                await db.events.update_one({"_id": "event_1"}, {"$set": {"status": "active", "date": tomorrow_ish, "time": "23:59"}})
+                await reschedule(
+                    db, "event_1", {"status": "active", "date": tomorrow_ish, "time": "23:59"},
+                    {**event, "status": "cancelled"}
+                )
+                pending = await db.event_reminders.find_one({"_id": "event_1"})
+
+                await db.event_reminders.update_one({"_id": "event_1"}, {"$set": {"runAt": datetime.utcnow()}})
+                first, second = await claim_due(db), await claim_due(db)
+            finally:
+                await client.drop_database(db.name)
+                client.close()
+            return not_due, cancelled, pending, first, second
+
+        not_due, cancelled, pending, first, second = asyncio.run(run())
+        assert not_due == []
+        assert cancelled["status"] == CANCELLED
+        assert pending["status"] == PENDING and pending["eventStart"] > datetime.utcnow()
+        assert [r["_id"] for r in first] == ["event_1"] and first[0]["status"] == SENDING
+        assert second == []
+        print("✓ Reminder cancelled, rescheduled and claimed once")
+
+    def test_unchanged_edit_keeps_sent_reminder(self):
+        from motor.motor_asyncio import AsyncIOMotorClient
+        from utils.event_reminders import SENT, reschedule
+
+        soon = (datetime.utcnow() + timedelta(hours=20)).strftime("%Y-%m-%d")
+
+        async def run():
+            client = AsyncIOMotorClient(MONGO_URL)
+            db = client[f"test_reminders_{uuid4().hex[:8]}"]
+            try:
+                event = {"_id": "event_1", "date": soon, "time": "23:59", "status": "active", "reminderSent": True}
+                await db.events.insert_one(dict(event))
+                await db.event_reminders.insert_one({"_id": "event_1", "status": SENT})
+                # The edit form sends every field, date and time included
+                form = {"date": soon, "time": "23:59", "status": "active", "location": "Hall 2"}
+                await db.events.update_one({"_id": "event_1"}, {"$set": form})
+                await reschedule(db, "event_1", form, event)
+                stored = await db.events.find_one({"_id": "event_1"})
+                reminder = await db.event_reminders.find_one({"_id": "event_1"})
+            finally:
+                await client.drop_database(db.name)
+                client.close()
+            return stored, reminder
+
+        stored, reminder = asyncio.run(run())
+        assert stored["reminderSent"] is True
+        assert reminder["status"] == SENT
+        print("✓ Editing other fields does not send the reminder again")
@@ -0,0 +1,94 @@
+"""
+Event RSVP Tests
+Tests for utils/event_rsvps.
+- Embedded participants / cancellations / attendance become one RSVP per user
+- With MongoDB, the migration is idempotent and keeps newer RSVPs
+  (MONGO_URL=mongodb://localhost:27017 pytest tests/test_event_rsvps.py)
+"""
+
+import asyncio
+import os
+from uuid import uuid4
+
+import pytest
+
+from utils.event_rsvps import CANCELLED, CONFIRMED, build_rsvp_docs, confirm, create_indexes, migrate_embedded
+
+MONGO_URL = os.environ.get("MONGO_URL")
+
+EVENT = {
+    "_id": "event_1",
+    "date": "2026-05-04",
+    "trainingGroup": "Folklor",
+    "status": "active",
+    "participants": ["user_a", "user_b"],
+    "cancellations": [
+        {"userId": "user_b", "reason": "sick", "cancelledAt": "2026-05-01T10:00:00"},
+        {"userId": "user_c", "reason": "travel", "cancelledAt": "2026-05-02T10:00:00", "cancelledBy": "parent_c"},
+    ],
+    "attendance": {
+        "user_a": {"attended": True, "markedAt": "2026-05-04T19:00:00", "markedBy": "Admin"},
+        "user_d": {"attended": True, "markedAt": "2026-05-04T19:05:00", "markedBy": "Admin", "walkIn": True},
+    },
+}
+
+
+class TestBuildRsvpDocs:
+    """Embedded event fields -> event_rsvps documents"""
+
+    def test_one_document_per_user(self):
+        docs = {doc["userId"]: doc for doc in build_rsvp_docs(EVENT)}
+        assert set(docs) == {"user_a", "user_b", "user_c", "user_d"}
+        for doc in docs.values():
+            assert (doc["eventId"], doc["date"], doc["trainingGroup"], doc["eventStatus"]) == (
+                "event_1", "2026-05-04", "Folklor", "active"
+            )
+        print("✓ One RSVP per user with the event fields copied")
+
+    def test_status_and_attendance(self):
+        docs = {doc["userId"]: doc for doc in build_rsvp_docs(EVENT)}
+        assert docs["user_a"]["status"] == CONFIRMED and docs["user_a"]["attended"] is True
+        # Confirmed again after cancelling: still a participant
+        assert docs["user_b"]["status"] == CONFIRMED and docs["user_b"]["cancelReason"] == "sick"
+        assert docs["user_c"]["status"] == CANCELLED and docs["user_c"]["cancelledBy"] == "parent_c"
+        assert docs["user_d"]["status"] is None and docs["user_d"]["walkIn"] is True
+        print("✓ Confirmed, cancelled and walk-in mapped")
+
+    def test_event_without_rsvps(self):
+        assert build_rsvp_docs({"_id": "event_2", "date": "2026-05-05"}) == []
+        print("✓ Nothing to migrate")
+
+
+@pytest.mark.skipif(not MONGO_URL, reason="MONGO_URL not set")
+class TestMigration:
+    """migrate_embedded against a real MongoDB"""
+
+    def test_migration_idempotent(self):
+        from motor.motor_asyncio import AsyncIOMotorClient
+
+        async def run():
+            client = AsyncIOMotorClient(MONGO_URL)
+            db = client[f"test_rsvps_{uuid4().hex[:8]}"]
+            try:
+                await create_indexes(db)
+                await db.events.insert_one(dict(EVENT))
+                # Written by the new code before the migration ran
+                await confirm(db, EVENT, "user_c")
+
+                first = await migrate_embedded(db)
+                second = await migrate_embedded(db)
+                event = await db.events.find_one({"_id": "event_1"})
+                user_c = await db.event_rsvps.find_one({"eventId": "event_1", "userId": "user_c"})
+                total = await db.event_rsvps.count_documents({})
+            finally:
+                await client.drop_database(db.name)
+                client.close()
+            return first, second, event, user_c, total
+
+        first, second, event, user_c, total = asyncio.run(run())
+        assert first == {"events": 1, "rsvps": 3}
+        assert second == {"events": 0, "rsvps": 0}
+        assert not {"participants", "cancellations", "attendance"} & set(event)
+        assert user_c["status"] == CONFIRMED
+        assert total == 4
+        print("✓ Migrated once, newer RSVP kept, embedded fields removed")
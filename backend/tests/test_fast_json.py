@@ -0,0 +1,51 @@
+"""
+Fast JSON Tests
+Tests for utils/fast_json without a database.
+- FastJSONResponse renders datetimes and ObjectIds like the default encoder
+- @fast_json keeps the route's query parameters and returns orjson responses
+- API_ID_STAGES maps _id to id
+"""
+
+import json
+from datetime import datetime
+
+from bson import ObjectId
+from fastapi import FastAPI
+from fastapi.encoders import jsonable_encoder
+from fastapi.testclient import TestClient
+
+from utils.fast_json import API_ID_STAGES, FastJSONResponse, fast_json
+
+
+class TestFastJSON:
+    """orjson response class and decorator"""
+
+    def test_render_matches_default_encoder(self):
+        content = {
+            "items": [{"id": "news_1", "createdAt": datetime(2026, 3, 1, 12, 30, 5, 250000), "count": 3}],
+            "total": 1
+        }
+        assert json.loads(FastJSONResponse(content).body) == jsonable_encoder(content)
+
+        objectid = ObjectId()
+        assert json.loads(FastJSONResponse({"updatedBy": objectid}).body) == {"updatedBy": str(objectid)}
+        print("✓ Datetimes and ObjectIds rendered as before")
+
+    def test_decorated_route(self):
+        app = FastAPI()
+
+        @app.get("/items", response_class=FastJSONResponse)
+        @fast_json
+        async def items(limit: int = 10):
+            return {"items": list(range(limit)), "at": datetime(2026, 1, 1)}
+
+        response = TestClient(app).get("/items?limit=3")
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/json"
+        assert response.json() == {"items": [0, 1, 2], "at": "2026-01-01T00:00:00"}
+        print("✓ Query parameters kept, response rendered by orjson")
+
+    def test_id_stages(self):
+        assert API_ID_STAGES[0] == {"$set": {"id": {"$toString": "$_id"}}}
+        assert API_ID_STAGES[-1] == {"$unset": "_id"}
+        print("✓ _id renamed to id in the pipeline")
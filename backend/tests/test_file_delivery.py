@@ -0,0 +1,64 @@
+"""
+File Delivery Tests
+Tests for utils/file_delivery.
+- File names cannot leave their upload directory
+- With X-Accel-Redirect enabled the response has no body and points nginx at
+  the internal location; otherwise (or outside the mapped directories) the
+  file is sent by FileResponse
+"""
+
+from fastapi.responses import FileResponse
+
+from utils import file_delivery
+from utils.file_delivery import _parse_roots, content_disposition, file_response, resolve_file
+
+
+class TestResolve:
+    """resolve_file()"""
+
+    def test_inside_only(self, tmp_path):
+        (tmp_path / "invoices").mkdir()
+        (tmp_path / "invoices" / "0001.pdf").write_bytes(b"%PDF")
+        (tmp_path / "secret.txt").write_text("x")
+        directory = tmp_path / "invoices"
+        assert resolve_file(directory, "0001.pdf") == (directory / "0001.pdf").resolve()
+        assert resolve_file(directory, "0002.pdf") is None
+        assert resolve_file(directory, "../secret.txt") is None
+        assert resolve_file(directory, str(tmp_path / "secret.txt")) is None
+        assert resolve_file(directory, ".") is None
+        print("✓ Missing files and path traversal rejected")
+
+
+class TestResponse:
+    """file_response()"""
+
+    def test_accel_redirect(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(file_delivery, "ACCEL_REDIRECT", True)
+        monkeypatch.setattr(file_delivery, "ACCEL_ROOTS", _parse_roots(f"{tmp_path}=/_protected/uploads"))
+        path = tmp_path / "invoices" / "Faktura 1.pdf"
+
+        response = file_response(path, filename="Faktura 1.pdf", media_type="application/pdf", inline=True)
+        assert not isinstance(response, FileResponse)
+        assert response.body == b""
+        assert response.headers["X-Accel-Redirect"] == "/_protected/uploads/invoices/Faktura%201.pdf"
+        assert response.headers["Content-Type"] == "application/pdf"
+        assert response.headers["Content-Disposition"] == "inline; filename*=utf-8''Faktura%201.pdf"
+        print("✓ nginx sends the file")
+
+    def test_fallback(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(file_delivery, "ACCEL_ROOTS", _parse_roots("/app/uploads=/_protected/uploads/"))
+        path = tmp_path / "a.pdf"
+
+        monkeypatch.setattr(file_delivery, "ACCEL_REDIRECT", False)
+        assert isinstance(file_response(path), FileResponse)
+        # Enabled, but nginx cannot read this directory
+        monkeypatch.setattr(file_delivery, "ACCEL_REDIRECT", True)
+        response = file_response(path, headers={"Cache-Control": "public"})
+        assert isinstance(response, FileResponse)
+        assert response.headers["Cache-Control"] == "public"
+        print("✓ FileResponse for local runs and unmapped directories")
+
+    def test_content_disposition(self):
+        assert content_disposition("0001.pdf") == 'attachment; filename="0001.pdf"'
+        assert content_disposition("Čačak.pdf") == "attachment; filename*=utf-8''%C4%8Ca%C4%8Dak.pdf"
+        print("✓ Non-ASCII names encoded")
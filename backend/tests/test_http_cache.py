@@ -0,0 +1,84 @@
+"""
+HTTP Cache Tests
+Tests for utils/http_cache.ETagMiddleware on a minimal app, without a database.
+- Public endpoints get an ETag built from the cache tag versions
+- A matching If-None-Match gets 304 without running the route
+- Bumping the tag version changes the ETag
+"""
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from utils.cache_bus import cache_bus
+from utils.http_cache import ETagMiddleware, PUBLIC_REVALIDATE
+
+
+@pytest.fixture
+def app_client(monkeypatch):
+    monkeypatch.setattr(cache_bus, "versions", {"news": 3})
+    monkeypatch.setattr(cache_bus, "versions_loaded", True)
+
+    app = FastAPI()
+    app.add_middleware(ETagMiddleware)
+    app.state.calls = 0
+
+    @app.get("/api/news/")
+    async def news(limit: int = 10):
+        app.state.calls += 1
+        return {"news": [], "limit": limit}
+
+    @app.get("/api/users/me")
+    async def me():
+        return {"id": "user_1"}
+
+    return app, TestClient(app)
+
+
+class TestETagMiddleware:
+    """Conditional GETs for public JSON endpoints"""
+
+    def test_etag_and_cache_control(self, app_client):
+        app, client = app_client
+        response = client.get("/api/news/")
+        assert response.status_code == 200
+        assert response.headers["ETag"].startswith('"')
+        assert response.headers["Cache-Control"] == PUBLIC_REVALIDATE
+        print(f"✓ ETag {response.headers['ETag']}")
+
+    def test_not_modified_skips_route(self, app_client):
+        app, client = app_client
+        etag = client.get("/api/news/").headers["ETag"]
+        calls = app.state.calls
+
+        response = client.get("/api/news/", headers={"If-None-Match": f"W/{etag}"})
+        assert response.status_code == 304
+        assert response.content == b""
+        assert app.state.calls == calls
+        print("✓ 304 answered before the route runs")
+
+    def test_version_bump_changes_etag(self, app_client):
+        app, client = app_client
+        etag = client.get("/api/news/").headers["ETag"]
+
+        cache_bus.versions["news"] = 4
+        response = client.get("/api/news/", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.headers["ETag"] != etag
+        print("✓ Write bumps the ETag")
+
+    def test_query_string_part_of_etag(self, app_client):
+        app, client = app_client
+        assert client.get("/api/news/?limit=5").headers["ETag"] != client.get("/api/news/").headers["ETag"]
+        print("✓ Different query, different ETag")
+
+    def test_other_routes_untouched(self, app_client):
+        app, client = app_client
+        assert "ETag" not in client.get("/api/users/me").headers
+        print("✓ Private endpoints get no ETag")
+
+    def test_no_etag_until_versions_loaded(self, app_client, monkeypatch):
+        app, client = app_client
+        monkeypatch.setattr(cache_bus, "versions_loaded", False)
+        assert "ETag" not in client.get("/api/news/").headers
+        print("✓ No ETag while versions are unknown")
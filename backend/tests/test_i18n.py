@@ -0,0 +1,104 @@
+"""
+Language Projection Tests
+Tests for utils/i18n without a database.
+- Accept-Language negotiation maps browser tags to our language codes
+- ?lang= is validated; no lang means full documents
+- The $set stage keeps {lang: text} and falls back on empty translations
+- Each language gets its own ETag for ?lang=auto
+(With MongoDB the stage itself runs: MONGO_URL=mongodb://localhost:27017 pytest tests/test_i18n.py)
+"""
+
+import asyncio
+import os
+from uuid import uuid4
+
+import pytest
+from fastapi import HTTPException
+from starlette.datastructures import Headers
+
+from utils.i18n import negotiate_language, resolve_language, localize_stage, find_localized, DEFAULT_LANGUAGE
+from utils.http_cache import make_etag, negotiated_language
+
+MONGO_URL = os.environ.get("MONGO_URL")
+
+
+class FakeRequest:
+    def __init__(self, accept_language=None):
+        self.headers = Headers({"accept-language": accept_language} if accept_language else {})
+
+
+class TestNegotiation:
+    """Accept-Language and ?lang="""
+
+    def test_accept_language(self):
+        assert negotiate_language("sv-SE,sv;q=0.9,en;q=0.8") == "sv"
+        assert negotiate_language("sr-Cyrl-RS") == "sr-cyrillic"
+        assert negotiate_language("sr-Latn-RS,en;q=0.5") == "sr-latin"
+        assert negotiate_language("de-DE,en;q=0.7,sv;q=0.9") == "sv"
+        assert negotiate_language("de-DE") == DEFAULT_LANGUAGE
+        assert negotiate_language(None) == DEFAULT_LANGUAGE
+        print("✓ Accept-Language negotiated by quality")
+
+    def test_resolve_language(self):
+        assert resolve_language(FakeRequest("en-GB"), None) is None
+        assert resolve_language(FakeRequest("en-GB"), "sv") == "sv"
+        assert resolve_language(FakeRequest("en-GB"), "auto") == "en"
+        with pytest.raises(HTTPException) as exc:
+            resolve_language(FakeRequest(), "de")
+        assert exc.value.status_code == 400
+        print("✓ Explicit, auto and missing lang resolved")
+
+
+class TestLocalizeStage:
+    """Shape of the aggregation stage"""
+
+    def test_stage_keeps_language_key(self):
+        stage = localize_stage(("title", "text"), "sv")
+        assert set(stage["$set"]) == {"title", "text"}
+        pair = stage["$set"]["title"]["$cond"][1]["$arrayToObject"][0][0]
+        assert pair[0] == "sv"
+        # sv first, then its fallbacks
+        assert pair[1]["$cond"][1] == "$title.sv"
+        assert pair[1]["$cond"][2]["$cond"][1] == "$title.en"
+        print("✓ Stage projects {sv: ...} with fallback chain")
+
+    def test_auto_etag_varies_by_language(self):
+        versions = (1,)
+        query = b"lang=auto"
+        sv = negotiated_language(query, Headers({"accept-language": "sv"}))
+        en = negotiated_language(query, Headers({"accept-language": "en"}))
+        assert (sv, en) == ("sv", "en")
+        assert negotiated_language(b"lang=sv", Headers({"accept-language": "en"})) is None
+        assert make_etag("/api/news", query, ("news",), versions, sv) != make_etag("/api/news", query, ("news",), versions, en)
+        print("✓ lang=auto ETag depends on Accept-Language")
+
+
+@pytest.mark.skipif(not MONGO_URL, reason="MONGO_URL not set")
+class TestFindLocalized:
+    """Projection and fallback against a real MongoDB"""
+
+    def test_projection_with_fallback(self):
+        from motor.motor_asyncio import AsyncIOMotorClient
+
+        async def run():
+            client = AsyncIOMotorClient(MONGO_URL)
+            db = client[f"test_i18n_{uuid4().hex[:8]}"]
+            try:
+                await db.news.insert_many([
+                    {"_id": "1", "order": 1, "title": {"sr-latin": "Vesti", "sr-cyrillic": "Вести", "en": "News", "sv": "Nyheter"}},
+                    {"_id": "2", "order": 2, "title": {"sr-latin": "Dan", "sr-cyrillic": "Дан", "en": "Day", "sv": ""}},
+                    {"_id": "3", "order": 3, "title": None},
+                ])
+                full = await find_localized(db.news, {}, ("title",), None, sort=[("order", 1)])
+                items = await find_localized(db.news, {}, ("title",), "sv", sort=[("order", 1)])
+            finally:
+                await client.drop_database(db.name)
+                client.close()
+            return full, items
+
+        full, items = asyncio.run(run())
+        assert len(full[0]["title"]) == 4
+        assert items[0]["title"] == {"sv": "Nyheter"}
+        assert items[1]["title"] == {"sv": "Day"}
+        assert items[2]["title"] is None
+        print("✓ One language returned, empty translation falls back")
@@ -0,0 +1,154 @@
+"""
+Overdue Invoice Tests
+Tests for utils/invoice_overdue and email_service.send_emails.
+- Due dates are normalised and flagged overdue after the grace period
+- Batched emails share one SMTP session and reconnect once if it drops
+- With MongoDB, flags are set / cleared in bulk and every overdue invoice is
+  reminded once per interval
+  (MONGO_URL=mongodb://localhost:27017 pytest tests/test_invoice_overdue.py)
+"""
+
+import asyncio
+import os
+from datetime import date, datetime, timedelta
+from unittest.mock import AsyncMock, patch
+from uuid import uuid4
+
+import aiosmtplib
+import pytest
+
+from email_service import send_emails
+from utils.invoice_overdue import OVERDUE_GRACE_DAYS, due_fields, parse_due_date
+
+MONGO_URL = os.environ.get("MONGO_URL")
+
+SMTP_CONFIG = {
+    "host": "smtp.example.se", "port": 465, "user": "info@example.se", "password": "secret",
+    "from_email": "info@example.se", "use_tls": True, "start_tls": False
+}
+
+
+class FakeSMTP:
+    """aiosmtplib.SMTP stand-in counting connections"""
+
+    connections = 0
+    drop_after = None
+
+    def __init__(self, **kwargs):
+        self.is_connected = False
+        self.sent = 0
+
+    async def connect(self):
+        FakeSMTP.connections += 1
+        self.is_connected = True
+
+    async def login(self, user, password):
+        pass
+
+    async def send_message(self, message):
+        if FakeSMTP.drop_after is not None and self.sent == FakeSMTP.drop_after:
+            FakeSMTP.drop_after = None
+            self.is_connected = False
+            raise aiosmtplib.SMTPServerDisconnected("bye")
+        self.sent += 1
+
+    async def quit(self):
+        self.is_connected = False
+
+
+def email(n):
+    return {"to_email": f"member{n}@example.se", "subject": "Påminnelse", "html_content": "<p>Hej</p>", "text_content": "Hej"}
+
+
+class TestDueDates:
+    """Due date parsing and overdue flag"""
+
+    def test_parse_due_date(self):
+        assert parse_due_date("2026-05-04") == date(2026, 5, 4)
+        assert parse_due_date("2026-05-04T00:00:00.000Z") == date(2026, 5, 4)
+        assert parse_due_date(datetime(2026, 5, 4, 12)) == date(2026, 5, 4)
+        assert parse_due_date("next week") is None
+        print("✓ Date strings, ISO datetimes and datetimes accepted")
+
+    def test_due_fields(self):
+        late = (datetime.utcnow() - timedelta(days=OVERDUE_GRACE_DAYS + 1)).date()
+        recent = (datetime.utcnow() - timedelta(days=OVERDUE_GRACE_DAYS - 1)).date()
+        assert due_fields(f"{late.isoformat()}T10:00:00")["dueDate"] == late.isoformat()
+        assert due_fields(late.isoformat())["overdue"] is True
+        assert isinstance(due_fields(late.isoformat())["overdueSince"], datetime)
+        assert due_fields(late.isoformat(), "paid")["overdue"] is False
+        assert due_fields(recent.isoformat())["overdue"] is False
+        assert "overdueSince" not in due_fields(recent.isoformat())
+        with pytest.raises(ValueError):
+            due_fields("")
+        print("✓ Overdue only when unpaid past the grace period")
+
+
+class TestPooledSending:
+    """send_emails() over one SMTP session"""
+
+    def run(self, emails):
+        FakeSMTP.connections = 0
+        with patch("email_service.get_smtp_config", new=AsyncMock(return_value=SMTP_CONFIG)), \
+                patch("email_service.aiosmtplib.SMTP", new=FakeSMTP):
+            return asyncio.run(send_emails(emails))
+
+    def test_one_connection(self):
+        assert self.run([email(n) for n in range(5)]) == [True] * 5
+        assert FakeSMTP.connections == 1
+        print("✓ Five emails, one connection")
+
+    def test_reconnect_after_drop(self):
+        FakeSMTP.drop_after = 2
+        assert self.run([email(n) for n in range(4)]) == [True] * 4
+        assert FakeSMTP.connections == 2
+        print("✓ Dropped session reopened, no email lost")
+
+
+@pytest.mark.skipif(not MONGO_URL, reason="MONGO_URL not set")
+class TestOverdueJob:
+    """flag_overdue() and send_overdue_reminders() against a real MongoDB"""
+
+    def test_flag_and_remind(self):
+        from motor.motor_asyncio import AsyncIOMotorClient
+        from utils.invoice_overdue import create_indexes, flag_overdue, normalize_due_dates, send_overdue_reminders
+
+        long_ago = (datetime.utcnow() - timedelta(days=30)).strftime("%Y-%m-%d")
+        soon = (datetime.utcnow() + timedelta(days=5)).strftime("%Y-%m-%d")
+
+        async def run():
+            client = AsyncIOMotorClient(MONGO_URL)
+            db = client[f"test_overdue_{uuid4().hex[:8]}"]
+            send = AsyncMock(side_effect=lambda emails, db=None: [True] * len(emails))
+            try:
+                await create_indexes(db)
+                await db.users.insert_one({"_id": "user_1", "email": "member@example.se", "fullName": "Ana"})
+                await db.invoices.insert_many([
+                    {"_id": "late", "userId": "user_1", "status": "unpaid", "dueDate": long_ago, "amount": 500},
+                    {"_id": "paid", "userId": "user_1", "status": "paid", "dueDate": long_ago, "amount": 500},
+                    {"_id": "upcoming", "userId": "user_1", "status": "unpaid", "dueDate": soon, "amount": 500},
+                ])
+                normalized = await normalize_due_dates(db)
+                # Stale flag on an invoice paid in the meantime
+                await db.invoices.update_one({"_id": "paid"}, {"$set": {"overdue": True}})
+                flags = await flag_overdue(db)
+                with patch("email_service.send_emails", new=send):
+                    first = await send_overdue_reminders(db)
+                    second = await send_overdue_reminders(db)
+                overdue = await db.invoices.distinct("_id", {"overdue": True})
+                late = await db.invoices.find_one({"_id": "late"})
+            finally:
+                await client.drop_database(db.name)
+                client.close()
+            return normalized, flags, first, second, overdue, late, send.await_args_list
+
+        normalized, flags, first, second, overdue, late, calls = asyncio.run(run())
+        assert normalized == 3
+        assert flags == {"flagged": 0, "cleared": 1}
+        assert overdue == ["late"]
+        assert (first["sent"], second["sent"]) == (1, 0)
+        assert late["overdueReminders"] == 1 and late["dueAt"] == datetime.fromisoformat(long_ago)
+        # Flagged by the normalisation, not by flag_overdue
+        assert isinstance(late["overdueSince"], datetime)
+        assert [e["to_email"] for e in calls[0].args[0]] == ["member@example.se"]
+        print("✓ Overdue flagged in bulk, one reminder per interval")
@@ -0,0 +1,72 @@
+"""
+Password Hashing Service Tests
+Tests for the non-blocking bcrypt service in auth_utils:
+- hash/verify run in the hashing pool
+- hashes made with another bcrypt cost are re-hashed on verify
+- a saturated pool rejects callers with PasswordHasherBusy
+"""
+
+import asyncio
+from unittest.mock import patch
+
+import pytest
+from passlib.hash import bcrypt
+
+import auth_utils
+
+
+class TestPasswordHashing:
+    """Hashing service behaviour"""
+
+    def test_hash_and_verify(self):
+        async def run():
+            hashed = await auth_utils.hash_password_async("Secret123!")
+            return (
+                hashed,
+                await auth_utils.verify_password_async("Secret123!", hashed),
+                await auth_utils.verify_password_async("wrong", hashed),
+            )
+
+        hashed, valid, invalid = asyncio.run(run())
+        assert hashed.startswith(f"$2b${auth_utils.BCRYPT_ROUNDS:02d}$")
+        assert valid is True
+        assert invalid is False
+        print("✓ Hash and verify run in the hashing pool")
+
+    def test_current_hash_is_not_rehashed(self):
+        hashed = auth_utils.hash_password("Secret123!")
+        valid, new_hash = asyncio.run(auth_utils.verify_and_update_password("Secret123!", hashed))
+        assert valid is True
+        assert new_hash is None
+        print("✓ Hash with current cost is kept")
+
+    def test_outdated_cost_is_rehashed(self):
+        other_rounds = 4 if auth_utils.BCRYPT_ROUNDS != 4 else 5
+        outdated = bcrypt.using(rounds=other_rounds).hash("Secret123!")
+
+        valid, new_hash = asyncio.run(auth_utils.verify_and_update_password("Secret123!", outdated))
+        assert valid is True
+        assert new_hash.startswith(f"$2b${auth_utils.BCRYPT_ROUNDS:02d}$")
+        assert auth_utils.verify_password("Secret123!", new_hash)
+        print(f"✓ Cost {other_rounds} hash re-hashed with cost {auth_utils.BCRYPT_ROUNDS}")
+
+    def test_wrong_password_is_not_rehashed(self):
+        outdated = bcrypt.using(rounds=4 if auth_utils.BCRYPT_ROUNDS != 4 else 5).hash("Secret123!")
+        valid, new_hash = asyncio.run(auth_utils.verify_and_update_password("wrong", outdated))
+        assert valid is False
+        assert new_hash is None
+        print("✓ Failed verification never returns a new hash")
+
+    def test_saturated_pool_rejects(self):
+        async def run():
+            slots = asyncio.Semaphore(1)
+            with patch.object(auth_utils, "_hash_slots", slots), \
+                    patch.object(auth_utils, "PASSWORD_HASH_QUEUE_TIMEOUT", 0.05):
+                await slots.acquire()  # all slots taken
+                with pytest.raises(auth_utils.PasswordHasherBusy):
+                    await auth_utils.hash_password_async("Secret123!")
+                slots.release()
+                return await auth_utils.hash_password_async("Secret123!")
+
+        assert asyncio.run(run())
+        print("✓ Saturated pool rejects with PasswordHasherBusy and recovers")
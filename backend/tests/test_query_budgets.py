@@ -0,0 +1,352 @@
+"""
+Query Budget Tests
+Asserts that the main admin, events, family, documents and invoices endpoints
+stay within their MongoDB query budget (see tests/query_budget.py), and that
+the number of queries does not grow with the amount of data.
+
+Each endpoint is called, more families/events/documents/invoices are seeded,
+and the endpoint is called again - both calls must fit the same budget.
+
+Requires a MongoDB instance: MONGO_URL=mongodb://localhost:27017 pytest tests/test_query_budgets.py
+A throwaway database is created and dropped for the run.
+"""
+
+import os
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, patch
+from uuid import uuid4
+
+import pytest
+from pymongo import MongoClient, monitoring
+
+from query_budget import QUERY_BUDGETS, QueryRecorder
+
+MONGO_URL = os.environ.get("MONGO_URL")
+TEST_DB_NAME = f"query_budget_{uuid4().hex[:8]}"
+TRAINING_GROUP = "Budget Group"
+SEED_STEP = 20
+
+SUPER_ADMIN_ID = "superadmin_1"
+SUPER_ADMIN_EMAIL = "vladanmitic@gmail.com"
+SUPER_ADMIN_PASSWORD = "Admin123!"
+
+pytestmark = pytest.mark.skipif(not MONGO_URL, reason="MONGO_URL not set - query budgets need MongoDB")
+
+
+@pytest.fixture(scope="module")
+def recorder():
+    # Must be registered before server.py creates its Motor client
+    recorder = QueryRecorder(TEST_DB_NAME)
+    monitoring.register(recorder)
+    return recorder
+
+
+@pytest.fixture(scope="module")
+def seed_db():
+    mongo = MongoClient(MONGO_URL)
+    yield mongo[TEST_DB_NAME]
+    mongo.drop_database(TEST_DB_NAME)
+    mongo.close()
+
+
+@pytest.fixture(scope="module")
+def client(recorder, seed_db):
+    from fastapi.testclient import TestClient
+
+    os.environ["DB_NAME"] = TEST_DB_NAME
+    import server
+
+    with patch("aiosmtplib.send", new=AsyncMock(return_value=({}, "OK"))):
+        with TestClient(server.app) as test_client:
+            yield test_client
+
+
+@pytest.fixture(scope="module")
+def headers(client):
+    response = client.post("/api/auth/login", json={
+        "username": SUPER_ADMIN_EMAIL,
+        "password": SUPER_ADMIN_PASSWORD
+    })
+    assert response.status_code == 200, response.text
+    return {"Authorization": f"Bearer {response.json()['token']}"}
+
+
+@pytest.fixture(scope="module")
+def budget_event(seed_db):
+    event_id = f"event_budget_{uuid4().hex[:8]}"
+    seed_db.events.insert_one({
+        "_id": event_id,
+        "date": datetime.utcnow().strftime("%Y-%m-%d"),
+        "time": "18:00",
+        "title": {"en": "Budget training", "sr-latin": "Trening"},
+        "location": "Täby",
+        "description": {"en": ""},
+        "status": "active",
+        "trainingGroup": TRAINING_GROUP,
+        "createdAt": datetime.utcnow()
+    })
+    return event_id
+
+
+def rsvp(event_id: str, user_id: str, date: str, status: str = "confirmed", attended=None) -> dict:
+    return {
+        "eventId": event_id, "userId": user_id, "date": date,
+        "trainingGroup": TRAINING_GROUP, "eventStatus": "active",
+        "status": status, "attended": attended, "markedBy": SUPER_ADMIN_ID if attended is not None else None
+    }
+
+
+def grow(db, event_id: str, count: int = SEED_STEP):
+    """Add `count` families, moderators, events, documents, invoices and credit notes"""
+    batch = uuid4().hex[:8]
+    now = datetime.utcnow()
+    users, dependent_ids, member_ids = [], [], []
+
+    for i in range(count):
+        parent_id = f"budget_parent_{batch}_{i}"
+        children = [f"budget_child_{batch}_{i}_{c}" for c in range(2)]
+        member_ids.append(parent_id)
+        dependent_ids.extend(children)
+        users.append({
+            "_id": parent_id, "id": parent_id,
+            "email": f"{parent_id}@example.se", "username": f"{parent_id}@example.se",
+            "fullName": f"Parent {i}", "role": "user", "trainingGroup": TRAINING_GROUP,
+            "dependentMembers": children, "createdAt": now
+        })
+        for child_id in children:
+            users.append({
+                "_id": child_id, "id": child_id, "fullName": f"Child {child_id}",
+                "role": "user", "relationship": "child", "yearOfBirth": "2015",
+                "primaryAccountId": parent_id, "trainingGroup": TRAINING_GROUP, "createdAt": now
+            })
+        moderator_id = f"budget_moderator_{batch}_{i}"
+        users.append({
+            "_id": moderator_id, "id": moderator_id,
+            "email": f"{moderator_id}@example.se", "username": f"{moderator_id}@example.se",
+            "fullName": f"Moderator {i}", "role": "moderator",
+            "trainingGroups": [TRAINING_GROUP], "createdAt": now
+        })
+    db.users.insert_many(users)
+
+    # The logged-in super admin gets family members too
+    db.users.update_one(
+        {"_id": SUPER_ADMIN_ID},
+        {"$push": {"dependentMembers": {"$each": dependent_ids[:count]}}}
+    )
+
+    today = now.strftime("%Y-%m-%d")
+    rsvps = [
+        rsvp(event_id, member_id, today, attended=True if n % 2 == 0 else None)
+        for n, member_id in enumerate(member_ids)
+    ]
+    events = []
+    for i in range(count):
+        event = {
+            "_id": f"event_{batch}_{i}",
+            "date": (now - timedelta(days=i % 30)).strftime("%Y-%m-%d"),
+            "time": "18:00",
+            "title": {"en": f"Training {i}"},
+            "location": f"Hall {i % 3}",
+            "description": {"en": ""},
+            "status": "active",
+            "trainingGroup": TRAINING_GROUP,
+            "createdAt": now
+        }
+        events.append(event)
+        rsvps.extend(
+            rsvp(event["_id"], member_id, event["date"], attended=True if member_id == member_ids[0] else None)
+            for member_id in member_ids[: i + 1] + [SUPER_ADMIN_ID]
+        )
+        rsvps.append(rsvp(event["_id"], dependent_ids[i], event["date"], status="cancelled"))
+    db.events.insert_many(events)
+    db.event_rsvps.insert_many(rsvps)
+
+    documents = []
+    for i in range(count):
+        for doc_type in ("public", "personal", "association"):
+            doc_id = f"doc_{batch}_{doc_type}_{i}"
+            documents.append({
+                "_id": doc_id, "id": doc_id, "type": doc_type,
+                "title": f"Document {i}", "description": "", "category": f"category_{i % 4}",
+                "visibility": "members_only", "downloadCount": i,
+                "assignedTo": [SUPER_ADMIN_ID, member_ids[i]] if doc_type == "personal" else None,
+                "uploadedByName": "Budget", "createdAt": now
+            })
+    db.documents.insert_many(documents)
+
+    db.invoices.insert_many([
+        {
+            "_id": f"inv_{batch}_{i}", "id": f"inv_{batch}_{i}",
+            "userId": SUPER_ADMIN_ID if i % 2 else member_ids[i],
+            "amount": 100 + i, "currency": "SEK",
+            "dueDate": (now - timedelta(days=i)).strftime("%Y-%m-%d"),
+            "description": f"Invoice {i}", "status": "paid" if i % 3 == 0 else "unpaid",
+            "createdAt": now
+        }
+        for i in range(count)
+    ])
+    db.credit_notes.insert_many([
+        {
+            "_id": f"cn_{batch}_{i}", "userId": SUPER_ADMIN_ID,
+            "originalInvoiceId": f"inv_{batch}_{i}", "amount": -(100 + i), "createdAt": now
+        }
+        for i in range(count)
+    ])
+
+
+class TestQueryBudgets:
+    """Every endpoint must fit its budget before and after the data grows"""
+
+    @pytest.fixture(autouse=True)
+    def _setup(self, client, headers, recorder, seed_db, budget_event):
+        self.client = client
+        self.headers = headers
+        self.recorder = recorder
+        self.db = seed_db
+        self.event_id = budget_event
+
+    def assert_constant_budget(self, endpoint: str, method: str = "GET", path: str = None, auth: bool = True, **kwargs):
+        path = path or endpoint.split(" ", 1)[1]
+        headers = self.headers if auth else {}
+
+        grow(self.db, self.event_id)
+        with self.recorder.record() as small:
+            response = self.client.request(method, path, headers=headers, **kwargs)
+        assert response.status_code == 200, f"{endpoint}: {response.status_code} {response.text[:200]}"
+
+        grow(self.db, self.event_id)
+        with self.recorder.record() as large:
+            response = self.client.request(method, path, headers=headers, **kwargs)
+        assert response.status_code == 200, f"{endpoint}: {response.status_code} {response.text[:200]}"
+
+        small.assert_budget(endpoint)
+        large.assert_budget(endpoint)
+        assert len(large) <= len(small), (
+            f"{endpoint} query count grew with data: {len(small)} -> {len(large)}\n{large.describe()}"
+        )
+        print(f"✓ {endpoint}: {len(large)} queries (budget {QUERY_BUDGETS[endpoint]})")
+
+    # ---------- admin ----------
+
+    def test_admin_users(self):
+        self.assert_constant_budget("GET /api/admin/users")
+
+    def test_admin_statistics(self):
+        self.assert_constant_budget("GET /api/admin/statistics")
+
+    def test_admin_members_filtered(self):
+        self.assert_constant_budget(
+            "GET /api/admin/members/filtered",
+            params={"training_group": TRAINING_GROUP}
+        )
+
+    def test_admin_user_details(self):
+        self.assert_constant_budget(
+            "GET /api/admin/users/{user_id}/details",
+            path=f"/api/admin/users/{SUPER_ADMIN_ID}/details"
+        )
+
+    # ---------- public ----------
+
+    def test_homepage_bootstrap(self):
+        self.assert_constant_budget("GET /api/public/bootstrap", auth=False)
+
+    def test_homepage_bootstrap_localized(self):
+        self.assert_constant_budget("GET /api/public/bootstrap", auth=False, params={"lang": "sv"})
+
+    # ---------- events ----------
+
+    def test_events_list(self):
+        self.assert_constant_budget("GET /api/events/", auth=False)
+
+    def test_events_list_window(self):
+        self.assert_constant_budget(
+            "GET /api/events/",
+            auth=False,
+            params={"from": (datetime.utcnow() - timedelta(days=30)).strftime("%Y-%m-%d"), "group": TRAINING_GROUP}
+        )
+
+    def test_my_rsvps(self):
+        self.assert_constant_budget(
+            "GET /api/events/my-rsvps",
+            params={"from": (datetime.utcnow() - timedelta(days=30)).strftime("%Y-%m-%d")}
+        )
+
+    def test_confirm_participation(self):
+        # Moderators of the event's training group grow with every seed step
+        self.assert_constant_budget(
+            "POST /api/events/{event_id}/confirm",
+            method="POST",
+            path=f"/api/events/{self.event_id}/confirm"
+        )
+
+    def test_event_participants(self):
+        self.assert_constant_budget(
+            "GET /api/events/{event_id}/participants",
+            path=f"/api/events/{self.event_id}/participants"
+        )
+
+    def test_event_attendance(self):
+        self.assert_constant_budget(
+            "GET /api/events/{event_id}/attendance",
+            path=f"/api/events/{self.event_id}/attendance"
+        )
+
+    def test_attendance_report_data(self):
+        self.assert_constant_budget("GET /api/events/reports/attendance/data")
+
+    def test_my_event_stats(self):
+        self.assert_constant_budget("GET /api/events/stats/my")
+
+    # ---------- family ----------
+
+    def test_family_members(self):
+        self.assert_constant_budget("GET /api/family/members")
+
+    def test_family_admin_all(self):
+        self.assert_constant_budget("GET /api/family/admin/all")
+
+    def test_family_admin_all_dependent_without_id(self):
+        suffix = uuid4().hex[:8]
+        parent_id, child_id = f"budget_parent_{suffix}", f"budget_child_{suffix}"
+        self.db.users.insert_many([
+            {
+                "_id": parent_id, "id": parent_id, "email": f"{parent_id}@example.se",
+                "fullName": "Parent", "role": "user", "dependentMembers": [child_id]
+            },
+            # Older dependents were stored without the "id" field
+            {"_id": child_id, "fullName": "Legacy Child", "relationship": "child", "primaryAccountId": parent_id},
+        ])
+        response = self.client.get("/api/family/admin/all", headers=self.headers)
+        assert response.status_code == 200
+        family = next(f for f in response.json()["families"] if f.get("id") == parent_id)
+        assert family["familyMembers"] == [{"fullName": "Legacy Child", "relationship": "child"}]
+        print("✓ Dependents without an id field are listed")
+
+    # ---------- documents ----------
+
+    def test_public_documents(self):
+        self.assert_constant_budget("GET /api/documents/public")
+
+    def test_personal_documents(self):
+        self.assert_constant_budget("GET /api/documents/personal")
+
+    def test_admin_personal_documents(self):
+        self.assert_constant_budget("GET /api/documents/personal/admin")
+
+    def test_association_documents(self):
+        self.assert_constant_budget("GET /api/documents/association")
+
+    def test_document_stats(self):
+        self.assert_constant_budget("GET /api/documents/stats")
+
+    # ---------- invoices ----------
+
+    def test_all_invoices(self):
+        self.assert_constant_budget("GET /api/invoices/")
+
+    def test_my_invoices(self):
+        self.assert_constant_budget("GET /api/invoices/my")
+
+    def test_all_credit_notes(self):
+        self.assert_constant_budget("GET /api/invoices/credit-notes/")
@@ -0,0 +1,119 @@
+"""
+Rate Limiter Tests
+Tests for utils/rate_limiter without a database: MongoDB errors make the
+limiter fall back to its per-worker counters, which use the same sliding
+window logic as the shared counters.
+- Login is locked after maxLoginAttempts failures per account
+- Register / contact are limited per IP
+- Lockouts are counted in the metrics
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+
+from utils.rate_limiter import RateLimit, RateLimiter, get_client_ip
+
+
+class UnavailableCollection:
+    def __getattr__(self, name):
+        def fail(*args, **kwargs):
+            raise ConnectionError("database unavailable")
+        return fail
+
+
+class UnavailableDB:
+    def __getattr__(self, name):
+        return UnavailableCollection()
+
+
+def make_request(ip="10.0.0.1"):
+    return SimpleNamespace(headers={"x-real-ip": ip}, client=SimpleNamespace(host="127.0.0.1"))
+
+
+@pytest.fixture(autouse=True)
+def security_defaults(monkeypatch):
+    async def max_attempts(db):
+        return 3
+    monkeypatch.setattr("utils.rate_limiter.get_max_login_attempts", max_attempts)
+
+
+class TestRateLimiter:
+    """Sliding window limits and lockouts"""
+
+    def test_login_locked_after_max_attempts(self):
+        limiter = RateLimiter()
+        db = UnavailableDB()
+
+        async def run():
+            for _ in range(3):
+                await limiter.check(db, "login", make_request(), account="member@example.se")
+                await limiter.hit(db, "login", make_request(), account="member@example.se")
+            with pytest.raises(HTTPException) as exc:
+                await limiter.check(db, "login", make_request(), account="Member@Example.se")
+            return exc.value
+
+        error = asyncio.run(run())
+        assert error.status_code == 429
+        assert int(error.headers["Retry-After"]) > 0
+        assert limiter.metrics["login"]["lockouts"] == 1
+        assert limiter.metrics["login"]["blocked"] == 1
+        print("✓ Account locked after maxLoginAttempts failed logins")
+
+    def test_other_account_not_affected(self):
+        limiter = RateLimiter()
+        db = UnavailableDB()
+
+        async def run():
+            for _ in range(3):
+                await limiter.hit(db, "login", make_request(), account="member@example.se")
+            return await limiter.check(db, "login", make_request(), account="other@example.se")
+
+        state = asyncio.run(run())
+        assert state.estimates["account"] == 0
+        print("✓ Lockout is per account")
+
+    def test_reset_clears_account(self):
+        limiter = RateLimiter()
+        db = UnavailableDB()
+
+        async def run():
+            for _ in range(3):
+                await limiter.hit(db, "login", make_request(), account="member@example.se")
+            await limiter.reset(db, "login", account="member@example.se")
+            return await limiter.check(db, "login", make_request(), account="member@example.se")
+
+        assert asyncio.run(run()).estimates["account"] == 0
+        print("✓ Reset clears the account counter")
+
+    def test_contact_limited_per_ip(self):
+        limiter = RateLimiter()
+        db = UnavailableDB()
+
+        async def run():
+            for _ in range(5):
+                await limiter.consume(db, "contact", make_request("10.0.0.2"))
+            with pytest.raises(HTTPException) as exc:
+                await limiter.consume(db, "contact", make_request("10.0.0.2"))
+            # A different IP still gets through
+            await limiter.consume(db, "contact", make_request("10.0.0.3"))
+            return exc.value
+
+        assert asyncio.run(run()).status_code == 429
+        print("✓ Contact form limited per IP")
+
+    def test_retry_after_decays_with_previous_window(self):
+        limit = RateLimit(5, 600)
+        # Over the limit only because of the previous window: wait for it to decay
+        assert 0 < RateLimiter._retry_after(limit, previous=10, current=0, elapsed=0.0) <= 600
+        # Current window alone is over the limit: wait past its end
+        assert RateLimiter._retry_after(limit, previous=0, current=5, elapsed=0.5) >= 300
+        print("✓ Retry-After follows the sliding window")
+
+    def test_client_ip_from_proxy_headers(self):
+        assert get_client_ip(make_request("192.168.1.5")) == "192.168.1.5"
+        request = SimpleNamespace(headers={"x-forwarded-for": "1.2.3.4, 10.0.0.1"}, client=None)
+        assert get_client_ip(request) == "1.2.3.4"
+        print("✓ Client IP taken from nginx headers")
@@ -0,0 +1,89 @@
+"""
+Training Roster Tests
+Tests for utils/rosters.
+- trainingGroup and trainingGroups both put a user on a roster
+- Staff listed in trainingGroups moderate the group, parents are resolved once
+- With MongoDB, rebuild() replaces stale rosters
+  (MONGO_URL=mongodb://localhost:27017 pytest tests/test_rosters.py)
+"""
+
+import asyncio
+import os
+from uuid import uuid4
+
+import pytest
+
+from utils.rosters import build_rosters, groups_by_user, moderator_emails
+
+MONGO_URL = os.environ.get("MONGO_URL")
+
+PARENT = {"_id": "parent_1", "fullName": "Parent", "email": "parent@example.se"}
+USERS = [
+    # Family members only get the string field
+    {"_id": "child_1", "fullName": "Child 1", "trainingGroup": "Folklor", "primaryAccountId": "parent_1"},
+    {"_id": "child_2", "fullName": "Child 2", "trainingGroup": "Folklor", "parentId": "parent_1"},
+    {"_id": "adult_1", "fullName": "Adult", "email": "adult@example.se", "emailVerified": True,
+     "role": "user", "trainingGroups": ["Kolo", "Folklor"]},
+    {"_id": "mod_1", "fullName": "Moderator", "email": "mod@example.se", "role": "moderator",
+     "trainingGroups": ["Folklor"]},
+    {"_id": "admin_1", "fullName": "Admin", "email": "admin@example.se", "role": "admin",
+     "trainingGroup": "Kolo", "trainingGroups": ["Hor"]},
+]
+
+
+class TestBuildRosters:
+    """User documents -> roster documents"""
+
+    def test_members_from_both_fields(self):
+        rosters = build_rosters(USERS, [PARENT])
+        folklor = {m["userId"] for m in rosters["Folklor"]["members"]}
+        assert folklor == {"child_1", "child_2", "adult_1"}
+        assert {m["userId"] for m in rosters["Kolo"]["members"]} == {"adult_1", "admin_1"}
+        print("✓ trainingGroup and trainingGroups both count")
+
+    def test_moderators_and_parents(self):
+        rosters = build_rosters(USERS, [PARENT])
+        assert moderator_emails(rosters["Folklor"]) == {"mod@example.se"}
+        assert moderator_emails(rosters["Hor"]) == {"admin@example.se"}
+        assert rosters["Hor"]["members"] == []
+        assert rosters["Folklor"]["parents"] == [
+            {"userId": "parent_1", "fullName": "Parent", "email": "parent@example.se"}
+        ]
+        children = {m["userId"]: m["parentId"] for m in rosters["Folklor"]["members"]}
+        assert children["child_1"] == children["child_2"] == "parent_1"
+        print("✓ Staff moderate, parents listed once")
+
+    def test_groups_by_user(self):
+        groups = groups_by_user(build_rosters(USERS, [PARENT]))
+        assert groups["adult_1"] == ["Folklor", "Kolo"]
+        assert "mod_1" not in groups
+        print("✓ Member groups per user")
+
+
+@pytest.mark.skipif(not MONGO_URL, reason="MONGO_URL not set")
+class TestRebuild:
+    """rebuild() against a real MongoDB"""
+
+    def test_rebuild_replaces_stale_rosters(self):
+        from motor.motor_asyncio import AsyncIOMotorClient
+        from utils.rosters import rebuild
+
+        async def run():
+            client = AsyncIOMotorClient(MONGO_URL)
+            db = client[f"test_rosters_{uuid4().hex[:8]}"]
+            try:
+                await db.training_rosters.insert_one({"_id": "Gone", "members": [], "parents": [], "moderators": []})
+                await db.users.insert_many([dict(PARENT)] + [dict(user) for user in USERS])
+                groups = await rebuild(db)
+                folklor = await db.training_rosters.find_one({"_id": "Folklor"})
+                ids = await db.training_rosters.distinct("_id")
+            finally:
+                await client.drop_database(db.name)
+                client.close()
+            return groups, folklor, ids
+
+        groups, folklor, ids = asyncio.run(run())
+        assert groups == 3
+        assert sorted(ids) == ["Folklor", "Hor", "Kolo"]
+        assert len(folklor["members"]) == 3 and folklor["updatedAt"]
+        print("✓ Rosters rebuilt, stale group removed")
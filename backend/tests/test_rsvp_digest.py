@@ -0,0 +1,95 @@
+"""
+RSVP Digest Tests
+Tests for utils/rsvp_digest.
+- Event start times and the digest email
+- With MongoDB, immediate recipients are sent at once, digests when an event
+  is close, and every notification only once
+  (MONGO_URL=mongodb://localhost:27017 pytest tests/test_rsvp_digest.py)
+"""
+
+import asyncio
+import os
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, patch
+from uuid import uuid4
+
+import pytest
+
+from email_service import get_admin_rsvp_digest_template
+from utils.rsvp_digest import ADMIN_EMAIL, PENDING, SENT, _event_start
+
+MONGO_URL = os.environ.get("MONGO_URL")
+
+
+def notification(user_name: str, action: str, reason: str = None) -> dict:
+    return {
+        "eventTitle": "Folklor training", "eventDate": "2026-05-04", "eventTime": "18:00",
+        "trainingGroup": "Folklor", "userName": user_name, "userEmail": f"{user_name}@example.se",
+        "action": action, "reason": reason, "createdAt": datetime.utcnow()
+    }
+
+
+class TestDigestContent:
+    """Start times and the digest email"""
+
+    def test_event_start(self):
+        assert _event_start({"date": "2026-05-04", "time": "18:30"}) == "2026-05-04T18:30"
+        assert _event_start({"date": "2026-05-04", "time": "TBD"}) == "2026-05-04T00:00"
+        print("✓ Local start time, midnight when unknown")
+
+    def test_digest_groups_by_event(self):
+        html, text = get_admin_rsvp_digest_template([
+            notification("ana", "confirmed"),
+            notification("marko", "cancelled", reason="sick"),
+        ])
+        assert "Folklor training - Folklor - 2026-05-04 18:00 (✓ 1 / ✗ 1)" in text
+        assert "✗ marko <marko@example.se> (sick)" in text
+        assert "ana@example.se" in html
+        print("✓ One section per event with counts")
+
+
+@pytest.mark.skipif(not MONGO_URL, reason="MONGO_URL not set")
+class TestSendDue:
+    """record() and send_due() against a real MongoDB"""
+
+    def test_immediate_then_pre_event_digest(self):
+        from motor.motor_asyncio import AsyncIOMotorClient
+        from utils.cache import cache, TAG_ROSTERS
+        from utils.rsvp_digest import create_indexes, record, send_due
+
+        later = (datetime.utcnow() + timedelta(days=7)).strftime("%Y-%m-%d")
+        event = {"_id": "event_1", "date": later, "time": "18:00", "title": {"en": "Training"}, "trainingGroup": "Folklor"}
+
+        async def run():
+            client = AsyncIOMotorClient(MONGO_URL)
+            db = client[f"test_digest_{uuid4().hex[:8]}"]
+            send = AsyncMock(return_value=True)
+            try:
+                await cache.invalidate_tags([TAG_ROSTERS])
+                await create_indexes(db)
+                await db.training_rosters.insert_one({"_id": "Folklor", "members": [], "parents": [], "moderators": [
+                    {"userId": "mod_1", "email": "now@example.se", "rsvpNotifications": "immediate"},
+                    {"userId": "mod_2", "email": "later@example.se"},
+                ]})
+                with patch("email_service.send_email", new=send):
+                    await record(db, event, "confirmed", "Ana", "ana@example.se")
+                    await record(db, event, "cancelled", "Marko", "marko@example.se", "sick")
+                    first = await send_due(db)
+                    # The event moves to within the pre-event window
+                    await db.rsvp_notifications.update_many({}, {"$set": {"eventStart": "2000-01-01T00:00"}})
+                    second = await send_due(db)
+                    third = await send_due(db)
+                statuses = await db.rsvp_notifications.distinct("status")
+            finally:
+                await cache.invalidate_tags([TAG_ROSTERS])
+                await client.drop_database(db.name)
+                client.close()
+            return first, second, third, statuses, [call.args[0] for call in send.await_args_list]
+
+        first, second, third, statuses, sent_to = asyncio.run(run())
+        assert first == {"recipients": 1, "notifications": 2, "failed": 0}
+        assert second == {"recipients": 2, "notifications": 4, "failed": 0}
+        assert third["recipients"] == 0
+        assert statuses == [SENT] and PENDING not in statuses
+        assert sorted(sent_to) == sorted(["now@example.se", "later@example.se", ADMIN_EMAIL])
+        print("✓ Immediate sent first, digests before the event, nothing twice")
@@ -0,0 +1,129 @@
+"""
+Scheduler Job Tests
+Tests for utils/scheduler_jobs.
+- Jobs wrapped with leader_only() do nothing on workers without the lease
+- With MongoDB, only one worker holds the lease at a time, it moves on
+  release, and runs are recorded with their result or error
+- With MongoDB, a startup job runs on one of the workers starting together,
+  and is retried after a failure
+  (MONGO_URL=mongodb://localhost:27017 pytest tests/test_scheduler_jobs.py)
+"""
+
+import asyncio
+import os
+from uuid import uuid4
+
+import pytest
+
+from utils.scheduler_jobs import ERROR, SUCCESS, LeaderLease, leader_only
+
+MONGO_URL = os.environ.get("MONGO_URL")
+
+
+class TestLeaderOnly:
+    """Jobs on a worker that does not hold the lease"""
+
+    def test_skipped_without_lease(self):
+        calls = []
+
+        async def job(db):
+            calls.append(db)
+            return 1
+
+        assert asyncio.run(leader_only("test_job", job)(None)) is None
+        assert calls == []
+        print("✓ Job skipped on a non-leader worker")
+
+
+@pytest.mark.skipif(not MONGO_URL, reason="MONGO_URL not set")
+class TestLeaseAndRuns:
+    """Leader lease and job_runs against a real MongoDB"""
+
+    def test_single_leader_and_handover(self):
+        from motor.motor_asyncio import AsyncIOMotorClient
+
+        async def run():
+            client = AsyncIOMotorClient(MONGO_URL)
+            db = client[f"test_scheduler_{uuid4().hex[:8]}"]
+            first, second = LeaderLease(), LeaderLease()
+            try:
+                results = [await first.renew(db), await second.renew(db), await first.renew(db)]
+                await first.release(db)
+                results += [first.is_leader, await second.renew(db), await first.renew(db)]
+            finally:
+                await client.drop_database(db.name)
+                client.close()
+            return results
+
+        assert asyncio.run(run()) == [True, False, True, False, True, False]
+        print("✓ One leader at a time, handed over on release")
+
+    def test_runs_recorded(self):
+        from motor.motor_asyncio import AsyncIOMotorClient
+        from utils import scheduler_jobs
+
+        async def ok(db):
+            return {"emails": 3}
+
+        async def broken(db):
+            raise ValueError("SMTP down")
+
+        async def run():
+            client = AsyncIOMotorClient(MONGO_URL)
+            db = client[f"test_scheduler_{uuid4().hex[:8]}"]
+            try:
+                await scheduler_jobs.create_indexes(db)
+                await scheduler_jobs.leader_lease.renew(db)
+                result = await leader_only("ok_job", ok)(db)
+                with pytest.raises(ValueError):
+                    await leader_only("broken_job", broken)(db)
+                runs = await scheduler_jobs.recent_runs(db)
+            finally:
+                await scheduler_jobs.leader_lease.release(db)
+                await client.drop_database(db.name)
+                client.close()
+            return result, {r["jobId"]: r for r in runs}
+
+        result, runs = asyncio.run(run())
+        assert result == {"emails": 3}
+        assert runs["ok_job"]["status"] == SUCCESS and runs["ok_job"]["result"] == {"emails": 3}
+        assert runs["broken_job"]["status"] == ERROR and "SMTP down" in runs["broken_job"]["error"]
+        assert all(r["durationMs"] >= 0 and r["finishedAt"] for r in runs.values())
+        print("✓ Successful and failed runs recorded")
+
+    def test_startup_job_runs_once(self):
+        from motor.motor_asyncio import AsyncIOMotorClient
+        from utils.scheduler_jobs import run_once
+
+        calls = []
+
+        async def migrate(db):
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return len(calls)
+
+        async def broken(db):
+            raise ValueError("migration failed")
+
+        async def run():
+            client = AsyncIOMotorClient(MONGO_URL)
+            db = client[f"test_scheduler_{uuid4().hex[:8]}"]
+            try:
+                # Four workers starting at the same time
+                results = await asyncio.gather(*[run_once(db, "migrate", migrate) for _ in range(4)])
+                with pytest.raises(ValueError):
+                    await run_once(db, "broken", broken)
+                # Failed: the lock is freed, the next start retries
+                with pytest.raises(ValueError):
+                    await run_once(db, "broken", broken)
+                runs = await db.job_runs.find({}).to_list(length=None)
+            finally:
+                await client.drop_database(db.name)
+                client.close()
+            return results, runs
+
+        results, runs = asyncio.run(run())
+        assert sorted(results, key=lambda r: r is None) == [1, None, None, None]
+        assert calls == [1]
+        assert [r["trigger"] for r in runs] == ["startup"] * 3
+        print("✓ Startup job ran on one worker, retried after a failure")
@@ -0,0 +1,103 @@
+"""
+Sequence Tests
+Tests for utils/sequences.
+- Per-day / per-year keys and number formats
+- With MongoDB, concurrent callers never share a number, blocks are
+  contiguous and a day's credit notes continue after the existing ones;
+  duplicate credit note numbers are reported instead of failing the index
+  (MONGO_URL=mongodb://localhost:27017 pytest tests/test_sequences.py)
+"""
+
+import asyncio
+import os
+from datetime import datetime
+from uuid import uuid4
+
+import pytest
+
+from utils.sequences import (
+    CREDIT_NOTE, DAY, YEAR, format_credit_note_number, format_invoice_number, sequence_key
+)
+
+MONGO_URL = os.environ.get("MONGO_URL")
+
+WHEN = datetime(2026, 5, 4, 12, 0)
+
+
+class TestKeys:
+    """Sequence keys and formats"""
+
+    def test_keys(self):
+        assert sequence_key("invoice_number") == "invoice_number"
+        assert sequence_key(CREDIT_NOTE, DAY, WHEN) == "credit_note:20260504"
+        assert sequence_key(CREDIT_NOTE, YEAR, WHEN) == "credit_note:2026"
+        print("✓ One counter per period")
+
+    def test_formats(self):
+        assert format_invoice_number(7) == "0007"
+        assert format_credit_note_number(3, WHEN) == "CN-20260504-003"
+        assert format_credit_note_number(1234, WHEN) == "CN-20260504-1234"
+        print("✓ Invoice and credit note numbers")
+
+
+@pytest.mark.skipif(not MONGO_URL, reason="MONGO_URL not set")
+class TestCounters:
+    """next_value / reserve against a real MongoDB"""
+
+    def test_unique_under_concurrency(self):
+        from motor.motor_asyncio import AsyncIOMotorClient
+        from utils.sequences import next_credit_note_number, next_value, reserve, seed_credit_note_sequence
+
+        async def run():
+            client = AsyncIOMotorClient(MONGO_URL)
+            db = client[f"test_sequences_{uuid4().hex[:8]}"]
+            try:
+                values = await asyncio.gather(*[next_value(db, "invoice_number") for _ in range(50)])
+                block = await reserve(db, "invoice_number", 10)
+                after_block = await next_value(db, "invoice_number")
+                other_day = await next_value(db, CREDIT_NOTE, DAY, datetime(2026, 5, 5))
+                # Numbered by the count-based scheme before the sequence existed
+                await db.credit_notes.insert_many([
+                    {"creditNoteNumber": "CN-20260504-001"}, {"creditNoteNumber": "CN-20260504-002"}
+                ])
+                seeded = await seed_credit_note_sequence(db, WHEN)
+                number = await next_credit_note_number(db, WHEN)
+            finally:
+                await client.drop_database(db.name)
+                client.close()
+            return values, block, after_block, other_day, seeded, number
+
+        values, block, after_block, other_day, seeded, number = asyncio.run(run())
+        assert sorted(values) == list(range(1, 51))
+        assert block == range(51, 61) and after_block == 61
+        assert other_day == 1
+        assert seeded == 2 and number == "CN-20260504-003"
+        print("✓ No duplicates, contiguous blocks, seeded from existing notes")
+
+    def test_credit_note_index_with_duplicates(self):
+        from motor.motor_asyncio import AsyncIOMotorClient
+        from utils.sequences import create_credit_note_index
+
+        async def run():
+            client = AsyncIOMotorClient(MONGO_URL)
+            db = client[f"test_sequences_{uuid4().hex[:8]}"]
+            try:
+                await db.credit_notes.insert_many([
+                    {"creditNoteNumber": "CN-20260504-001"},
+                    {"creditNoteNumber": "CN-20260504-001"},
+                    {"creditNoteNumber": "CN-20260504-002"},
+                ])
+                duplicates = await create_credit_note_index(db)
+                unique_before = "creditNoteNumber_1" in await db.credit_notes.index_information()
+                await db.credit_notes.delete_one({"creditNoteNumber": "CN-20260504-001"})
+                after = await create_credit_note_index(db)
+                index = (await db.credit_notes.index_information()).get("creditNoteNumber_1", {})
+            finally:
+                await client.drop_database(db.name)
+                client.close()
+            return duplicates, unique_before, after, index
+
+        duplicates, unique_before, after, index = asyncio.run(run())
+        assert duplicates == ["CN-20260504-001"] and not unique_before
+        assert after == [] and index.get("unique") is True
+        print("✓ Duplicates reported, unique index once they are gone")
@@ -0,0 +1,169 @@
+"""
+Session token management
+- Refresh tokens: opaque, stored hashed in `refresh_tokens`, rotated on every use.
+  Presenting an already-rotated token revokes the whole token family.
+- Revocation list: users whose access tokens must stop working before they
+  expire (suspension, deletion, role change). Kept in memory per worker and
+  synced from `token_revocations` every few seconds, so authorisation needs no
+  database lookup.
+"""
+import logging
+import os
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Tuple
+from uuid import uuid4
+
+from fastapi import HTTPException, status
+from pymongo import ReturnDocument
+
+from auth_utils import (
+    ACCESS_TOKEN_EXPIRE_MINUTES,
+    REFRESH_TOKEN_EXPIRE_DAYS,
+    create_access_token,
+    generate_refresh_token,
+    hash_refresh_token,
+    user_token_claims,
+)
+
+logger = logging.getLogger(__name__)
+
+REVOCATION_SYNC_SECONDS = int(os.environ.get("TOKEN_REVOCATION_SYNC_SECONDS", "5"))
+# Two tabs refreshing at the same moment present the same token; don't treat
+# that as token theft.
+REFRESH_REUSE_GRACE_SECONDS = 30
+
+EPOCH = datetime(1970, 1, 1)
+
+
+class RevocationList:
+    """user_id -> revocation time; access tokens issued at or before it are rejected"""
+
+    def __init__(self):
+        self._revoked: Dict[str, float] = {}
+        self._last_sync: Optional[datetime] = None
+
+    def is_revoked(self, claims: dict) -> bool:
+        revoked_at = self._revoked.get(claims.get("sub"))
+        if revoked_at is None:
+            return False
+        # iat is a float timestamp, so a token issued right after the revocation passes
+        return claims.get("iat", 0) <= revoked_at
+
+    async def revoke(self, db, user_id: str, reason: str = None):
+        """Reject the user's current access tokens on every worker"""
+        now = datetime.utcnow()
+        self._revoked[user_id] = time.time()
+        await db.token_revocations.update_one(
+            {"_id": user_id},
+            {
+                "$max": {"revokedAt": now},
+                "$set": {
+                    "reason": reason,
+                    # Older tokens have expired by then, the entry is no longer needed
+                    "expiresAt": now + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES + 5)
+                }
+            },
+            upsert=True
+        )
+        logger.info(f"Revoked access tokens for user {user_id} ({reason})")
+
+    async def sync(self, db):
+        """Load revocations made by other workers"""
+        now = datetime.utcnow()
+        query = {}
+        if self._last_sync:
+            # Overlap a little so slow writes from other workers are not missed
+            query = {"revokedAt": {"$gte": self._last_sync - timedelta(seconds=REVOCATION_SYNC_SECONDS * 2)}}
+
+        try:
+            docs = await db.token_revocations.find(query, {"revokedAt": 1}).to_list(length=None)
+        except Exception as e:
+            logger.error(f"Token revocation sync failed: {str(e)}")
+            return
+
+        for doc in docs:
+            revoked_at = (doc["revokedAt"].replace(tzinfo=None) - EPOCH).total_seconds()
+            self._revoked[doc["_id"]] = max(revoked_at, self._revoked.get(doc["_id"], 0))
+        self._last_sync = now
+
+        # Tokens issued before this are expired anyway
+        cutoff = time.time() - (ACCESS_TOKEN_EXPIRE_MINUTES + 5) * 60
+        self._revoked = {user_id: at for user_id, at in self._revoked.items() if at > cutoff}
+
+
+# Global revocation list (one per worker)
+revocation_list = RevocationList()
+
+
+async def issue_session(db, user: dict, family_id: str = None) -> dict:
+    """Create an access token and a new refresh token for the user"""
+    refresh_token = generate_refresh_token()
+    now = datetime.utcnow()
+    await db.refresh_tokens.insert_one({
+        "_id": hash_refresh_token(refresh_token),
+        "userId": str(user.get("_id") or user.get("id")),
+        "familyId": family_id or str(uuid4()),
+        "createdAt": now,
+        "expiresAt": now + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
+    })
+
+    return {
+        "token": create_access_token(user_token_claims(user)),
+        "refreshToken": refresh_token,
+        "expiresIn": ACCESS_TOKEN_EXPIRE_MINUTES * 60
+    }
+
+
+def _invalid_refresh_token(detail: str = "Invalid or expired refresh token"):
+    return HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail=detail)
+
+
+async def rotate_session(db, refresh_token: str) -> Tuple[dict, dict]:
+    """
+    Exchange a refresh token for a new access/refresh token pair.
+
+    Returns:
+        (user, session) where session has token, refreshToken and expiresIn
+    """
+    token_hash = hash_refresh_token(refresh_token)
+    now = datetime.utcnow()
+
+    stored = await db.refresh_tokens.find_one_and_update(
+        {"_id": token_hash, "usedAt": {"$exists": False}, "expiresAt": {"$gt": now}},
+        {"$set": {"usedAt": now}},
+        return_document=ReturnDocument.AFTER
+    )
+
+    if not stored:
+        reused = await db.refresh_tokens.find_one({"_id": token_hash})
+        if reused and reused.get("usedAt"):
+            if (now - reused["usedAt"]).total_seconds() > REFRESH_REUSE_GRACE_SECONDS:
+                # A rotated token came back: assume it was stolen, end the whole session
+                await db.refresh_tokens.delete_many({"familyId": reused["familyId"]})
+                logger.warning(f"Refresh token reuse detected for user {reused['userId']}, session revoked")
+        raise _invalid_refresh_token()
+
+    user = await db.users.find_one({"_id": stored["userId"]})
+    if not user:
+        await revoke_user_sessions(db, stored["userId"], "user deleted")
+        raise _invalid_refresh_token()
+    if user.get("suspended"):
+        await revoke_user_sessions(db, stored["userId"], "user suspended")
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Account suspended")
+
+    session = await issue_session(db, user, family_id=stored["familyId"])
+    return user, session
+
+
+async def end_session(db, refresh_token: str):
+    """Logout: drop the refresh token and everything rotated from it"""
+    stored = await db.refresh_tokens.find_one({"_id": hash_refresh_token(refresh_token)}, {"familyId": 1})
+    if stored:
+        await db.refresh_tokens.delete_many({"familyId": stored["familyId"]})
+
+
+async def revoke_user_sessions(db, user_id: str, reason: str = None):
+    """Log the user out everywhere: no new access tokens, current ones rejected within seconds"""
+    await db.refresh_tokens.delete_many({"userId": user_id})
+    await revocation_list.revoke(db, user_id, reason)
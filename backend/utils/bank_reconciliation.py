@@ -0,0 +1,336 @@
+"""
+Bank statement reconciliation
+Every invoice gets an OCR reference (its invoice number plus a Luhn check
+digit, Bankgirot "variable length, check digit" OCR) printed on the PDF and
+stored indexed in `invoices.ocr`. Incoming payments from a Bankgirot BgMax
+file or an ISO 20022 camt.053 statement are streamed, matched to unpaid
+invoices by that reference with one indexed lookup per CHUNK_SIZE payments,
+and marked paid with one bulk_write:
+
+    invoice: {"ocr": "00018", ..., "status": "paid", "paymentDate": "YYYY-MM-DD",
+              "payment": {"source", "reference", "amount", "currency", "payer"},
+              "reconciledAt", "reconciledBy"}
+
+A payment is only matched when its reference passes the check digit, the
+invoice is unpaid and the amount and currency are the invoice's. Everything
+else is returned in the report with the reason, to be handled by hand.
+"""
+import logging
+import re
+import xml.etree.ElementTree as ET
+from datetime import datetime
+from typing import IO, Dict, Iterable, Iterator, List, Optional
+
+from pymongo import UpdateOne
+
+logger = logging.getLogger(__name__)
+
+BGMAX = "bgmax"
+CAMT053 = "camt053"
+
+# Payments matched per invoice lookup
+CHUNK_SIZE = 1000
+# Amounts are compared to the öre
+AMOUNT_TOLERANCE = 0.005
+
+# Unmatched reasons
+NO_REFERENCE = "no_reference"
+UNKNOWN_REFERENCE = "unknown_reference"
+AMBIGUOUS_REFERENCE = "ambiguous_reference"
+ALREADY_PAID = "already_paid"
+NOT_PAYABLE = "not_payable"
+AMOUNT_MISMATCH = "amount_mismatch"
+CURRENCY_MISMATCH = "currency_mismatch"
+DEBIT = "debit"
+
+_DIGIT_RUN = re.compile(r"\d{2,25}")
+
+
+async def create_indexes(db):
+    await db.invoices.create_index("ocr", sparse=True)
+
+
+def luhn_check_digit(digits: str) -> str:
+    """Luhn (modulus 10) check digit of a digit string"""
+    total = 0
+    for i, digit in enumerate(reversed(digits)):
+        value = int(digit) * (2 if i % 2 == 0 else 1)
+        total += value - 9 if value > 9 else value
+    return str((10 - total % 10) % 10)
+
+
+def valid_ocr(reference: str) -> bool:
+    return 2 <= len(reference) <= 25 and reference.isdigit() and luhn_check_digit(reference[:-1]) == reference[-1]
+
+
+def ocr_reference(invoice_number: str) -> Optional[str]:
+    """OCR reference of an invoice number ("0001" -> "00018"), None if it has no digits"""
+    digits = "".join(c for c in str(invoice_number or "") if c.isdigit())
+    return digits + luhn_check_digit(digits) if digits else None
+
+
+def ocr_candidates(reference: Optional[str]) -> List[str]:
+    """Check-digit-valid OCR references in a payment reference / message"""
+    if not reference:
+        return []
+    compact = reference.replace(" ", "")
+    if valid_ocr(compact):
+        return [compact]
+    return [run for run in _DIGIT_RUN.findall(reference) if valid_ocr(run)]
+
+
+async def assign_ocr_references(db) -> int:
+    """
+    Give invoices created before OCR references existed one (no-op once done).
+
+    Returns:
+        Number of invoices updated
+    """
+    updates = []
+    async for invoice in db.invoices.find(
+        {"ocr": {"$exists": False}, "invoiceNumber": {"$nin": [None, ""]}},
+        {"invoiceNumber": 1}
+    ):
+        ocr = ocr_reference(invoice["invoiceNumber"])
+        if ocr:
+            updates.append(UpdateOne({"_id": invoice["_id"]}, {"$set": {"ocr": ocr}}))
+    if updates:
+        await db.invoices.bulk_write(updates, ordered=False)
+        logger.info(f"Assigned OCR references to {len(updates)} invoices")
+    return len(updates)
+
+
+def detect_format(head: bytes) -> Optional[str]:
+    """Statement format from the first bytes of the file"""
+    text = head.lstrip(b"\xef\xbb\xbf").lstrip()
+    if text.startswith(b"01BGMAX"):
+        return BGMAX
+    if text.startswith(b"<") and b"camt.053" in head:
+        return CAMT053
+    return None
+
+
+def _payment(row: int, reference, amount: float, currency: str, date: Optional[str], payer=None, debit=False) -> dict:
+    return {
+        "row": row, "reference": (reference or "").strip(), "amount": round(amount, 2),
+        "currency": currency, "date": date, "payer": payer, "debit": debit
+    }
+
+
+def parse_bgmax(lines: Iterable[str]) -> Iterator[dict]:
+    """
+    Payments of a Bankgirot BgMax file (ISO-8859-1 text, fixed-width records).
+
+    The payment date is in the deposit record (TK15) closing each section, so
+    payments are held until the end of their section.
+    """
+    currency = "SEK"
+    section: List[dict] = []
+    for row, line in enumerate(lines, start=1):
+        line = line.rstrip("\r\n")
+        record = line[:2]
+        if record == "05":
+            currency = line[22:25].strip() or "SEK"
+        elif record in ("20", "21", "22", "23"):
+            # 20 payment, 21 deduction, 22 / 23 extra reference (positive / negative)
+            amount = int(line[37:55] or 0) / 100
+            section.append(_payment(row, line[12:37], amount, currency, None, debit=record in ("21", "23")))
+        elif record == "26" and section:
+            section[-1]["payer"] = line[2:37].strip() or None
+        elif record == "15":
+            raw_date = line[37:45]
+            date = f"{raw_date[:4]}-{raw_date[4:6]}-{raw_date[6:8]}" if raw_date.isdigit() else None
+            currency = line[68:71].strip() or currency
+            for payment in section:
+                payment["date"] = date
+                payment["currency"] = currency
+            yield from section
+            section = []
+    # File without closing deposit records
+    yield from section
+
+
+def _local(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1]
+
+
+def _child(elem, *path: str):
+    for name in path:
+        if elem is None:
+            return None
+        elem = next((c for c in elem if _local(c.tag) == name), None)
+    return elem
+
+
+def _children(elem, name: str) -> list:
+    return [] if elem is None else [c for c in elem if _local(c.tag) == name]
+
+
+def _text(elem, *path: str) -> Optional[str]:
+    found = _child(elem, *path)
+    return found.text.strip() if found is not None and found.text else None
+
+
+def _tx_reference(tx) -> Optional[str]:
+    remittance = _child(tx, "RmtInf")
+    for structured in _children(remittance, "Strd"):
+        reference = _text(structured, "CdtrRefInf", "Ref")
+        if reference:
+            return reference
+    unstructured = " ".join(u.text.strip() for u in _children(remittance, "Ustrd") if u.text)
+    return unstructured or _text(tx, "Refs", "EndToEndId")
+
+
+def parse_camt053(stream: IO[bytes]) -> Iterator[dict]:
+    """
+    Credit entries of an ISO 20022 camt.053 bank statement (any version).
+    Entries are parsed one at a time and then dropped, so large statements
+    are not held in memory.
+    """
+    row = 0
+    for _, elem in ET.iterparse(stream, events=("end",)):
+        if _local(elem.tag) != "Ntry":
+            continue
+        row += 1
+        amount_elem = _child(elem, "Amt")
+        entry_amount = float(amount_elem.text) if amount_elem is not None else 0.0
+        entry_currency = amount_elem.get("Ccy", "SEK") if amount_elem is not None else "SEK"
+        debit = _text(elem, "CdtDbtInd") == "DBIT"
+        date = (_text(elem, "BookgDt", "Dt") or _text(elem, "BookgDt", "DtTm")
+                or _text(elem, "ValDt", "Dt") or "")[:10] or None
+
+        transactions = [tx for details in _children(elem, "NtryDtls") for tx in _children(details, "TxDtls")]
+        for tx in transactions or [None]:
+            tx_amount = _child(tx, "Amt") if tx is not None else None
+            if tx_amount is None and tx is not None:
+                tx_amount = _child(tx, "AmtDtls", "TxAmt", "Amt")
+            if tx_amount is None or len(transactions) <= 1:
+                amount, currency = entry_amount, entry_currency
+            else:
+                amount, currency = float(tx_amount.text), tx_amount.get("Ccy", entry_currency)
+            reference = _tx_reference(tx) if tx is not None else _text(elem, "AddtlNtryInf")
+            payer = (_text(tx, "RltdPties", "Dbtr", "Nm") or _text(tx, "RltdPties", "Dbtr", "Pty", "Nm")) if tx is not None else None
+            yield _payment(row, reference, amount, currency, date, payer=payer, debit=debit)
+        elem.clear()
+
+
+def parse_statement(stream: IO[bytes], statement_format: str) -> Iterator[dict]:
+    if statement_format == BGMAX:
+        return parse_bgmax(line.decode("latin-1") for line in stream)
+    if statement_format == CAMT053:
+        return parse_camt053(stream)
+    raise ValueError(f"Unsupported statement format: {statement_format}")
+
+
+def _chunks(payments: Iterable[dict]) -> Iterator[List[dict]]:
+    chunk = []
+    for payment in payments:
+        chunk.append(payment)
+        if len(chunk) >= CHUNK_SIZE:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+async def reconcile(db, payments: Iterable[dict], source: str, reconciled_by: str, dry_run: bool = False) -> dict:
+    """
+    Match payments to unpaid invoices by OCR reference and mark them paid.
+
+    Args:
+        db: Database
+        payments: Parsed payments (parse_statement)
+        source: Statement format, stored with the payment
+        reconciled_by: Name of the admin importing the statement
+        dry_run: Only report what would be matched
+
+    Returns:
+        {"format", "payments", "matched", "marked", "matchedAmount",
+         "unmatched": [payment + "reason" (+ "invoiceId")], "dryRun"}
+    """
+    now = datetime.utcnow()
+    paid_in_file: Dict[str, int] = {}
+    operations: List[UpdateOne] = []
+    unmatched: List[dict] = []
+    total = 0
+    matched_amount = 0.0
+
+    for chunk in _chunks(payments):
+        total += len(chunk)
+        candidates = {payment["row"]: ocr_candidates(payment["reference"]) for payment in chunk}
+        wanted = list({ocr for ocrs in candidates.values() for ocr in ocrs})
+        by_ocr: Dict[str, List[dict]] = {}
+        if wanted:
+            async for invoice in db.invoices.find(
+                {"ocr": {"$in": wanted}},
+                {"ocr": 1, "status": 1, "amount": 1, "currency": 1}
+            ):
+                by_ocr.setdefault(invoice["ocr"], []).append(invoice)
+
+        for payment in chunk:
+            ocrs = candidates[payment["row"]]
+            found = [ocr for ocr in ocrs if ocr in by_ocr]
+            invoices = by_ocr[found[0]] if found else []
+            invoice = invoices[0] if len(invoices) == 1 else None
+            if payment["debit"]:
+                reason = DEBIT
+            elif not ocrs:
+                reason = NO_REFERENCE
+            elif not invoices:
+                reason = UNKNOWN_REFERENCE
+            elif invoice is None:
+                reason = AMBIGUOUS_REFERENCE
+            elif invoice.get("status") == "paid" or invoice["_id"] in paid_in_file:
+                reason = ALREADY_PAID
+            elif invoice.get("status") != "unpaid":
+                reason = NOT_PAYABLE
+            elif (invoice.get("currency") or "SEK") != payment["currency"]:
+                reason = CURRENCY_MISMATCH
+            elif abs(float(invoice.get("amount") or 0) - payment["amount"]) > AMOUNT_TOLERANCE:
+                reason = AMOUNT_MISMATCH
+            else:
+                reason = None
+
+            if reason:
+                unmatched.append({**payment, "reason": reason, "invoiceId": invoice["_id"] if invoice else None})
+                continue
+
+            paid_in_file[invoice["_id"]] = payment["row"]
+            matched_amount += payment["amount"]
+            operations.append(UpdateOne(
+                {"_id": invoice["_id"], "status": "unpaid"},
+                {
+                    "$set": {
+                        "status": "paid",
+                        "paymentDate": payment["date"] or now.date().isoformat(),
+                        "overdue": False,
+                        "payment": {
+                            "source": source, "reference": payment["reference"], "amount": payment["amount"],
+                            "currency": payment["currency"], "payer": payment["payer"]
+                        },
+                        "reconciledAt": now,
+                        "reconciledBy": reconciled_by
+                    },
+                    "$unset": {"overdueSince": ""}
+                }
+            ))
+
+    marked = 0
+    if operations and not dry_run:
+        result = await db.invoices.bulk_write(operations, ordered=False)
+        # Less than matched if an invoice was marked paid by hand meanwhile
+        marked = result.modified_count
+
+    logger.info(
+        f"Reconciled {source} statement: {total} payments, {len(operations)} matched, "
+        f"{marked} marked paid, {len(unmatched)} unmatched{' (dry run)' if dry_run else ''}"
+    )
+    return {
+        "format": source,
+        "payments": total,
+        "matched": len(operations),
+        "marked": marked,
+        "matchedAmount": round(matched_amount, 2),
+        "unmatched": unmatched,
+        "dryRun": dry_run
+    }
@@ -1,10 +1,19 @@
 """
 Simple in-memory cache for frequently accessed data
 Reduces database queries for static/semi-static content
+
+Each worker has its own cache. Entries are tagged with the data they were
+built from; use utils.cache_bus.invalidate() after a write so the tags are
+dropped on every worker.
+
+get_or_load() / @cached_endpoint are read-through: one loader runs per key
+while concurrent callers await it, and an expired entry is served for a
+little longer while it is refreshed in the background.
 """
 import asyncio
+import functools
 from datetime import datetime, timedelta
-from typing import Any, Optional, Dict
+from typing import Any, Awaitable, Callable, Optional, Dict, Iterable, Set
 import logging
 
 logger = logging.getLogger(__name__)
@@ -14,31 +23,135 @@ class SimpleCache:
     
     def __init__(self):
         self._cache: Dict[str, Dict[str, Any]] = {}
+        self._tags: Dict[str, Set[str]] = {}
+        self._loading: Dict[str, asyncio.Task] = {}
+        # Bumped on every invalidation so loads that started before it are
+        # neither stored nor joined by later callers
+        self._epoch = 0
         self._lock = asyncio.Lock()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.coalesced = 0
     
     async def get(self, key: str) -> Optional[Any]:
         """Get value from cache if not expired"""
         async with self._lock:
             if key in self._cache:
                 entry = self._cache[key]
-                if datetime.utcnow() < entry['expires']:
+                now = datetime.utcnow()
+                if now < entry['expires']:
                     return entry['value']
-                else:
+                elif now >= entry['stale_until']:
                     # Expired, remove it
                     del self._cache[key]
             return None
     
-    async def set(self, key: str, value: Any, ttl_seconds: int = 300):
-        """Set value in cache with TTL (default 5 minutes)"""
+    async def set(self, key: str, value: Any, ttl_seconds: int = 300, tags: Iterable[str] = (), stale_seconds: int = 0):
+        """Set value in cache with TTL (default 5 minutes) and invalidation tags"""
         async with self._lock:
-            self._cache[key] = {
-                'value': value,
-                'expires': datetime.utcnow() + timedelta(seconds=ttl_seconds)
-            }
+            self._store(key, value, ttl_seconds, tags, stale_seconds)
+    
+    def _store(self, key: str, value: Any, ttl_seconds: int, tags: Iterable[str], stale_seconds: int):
+        expires = datetime.utcnow() + timedelta(seconds=ttl_seconds)
+        self._cache[key] = {
+            'value': value,
+            'expires': expires,
+            'stale_until': expires + timedelta(seconds=stale_seconds)
+        }
+        for tag in tags:
+            self._tags.setdefault(tag, set()).add(key)
+    
+    async def get_or_load(
+        self,
+        key: str,
+        loader: Callable[[], Awaitable[Any]],
+        ttl_seconds: int = 300,
+        tags: Iterable[str] = (),
+        stale_seconds: int = 0
+    ) -> Any:
+        """
+        Read-through lookup.
+        
+        Args:
+            key: Cache key
+            loader: Coroutine function producing the value on a miss
+            ttl_seconds: How long the value is fresh
+            tags: Invalidation tags
+            stale_seconds: How long an expired value may still be served while
+                it is refreshed in the background
+        
+        Returns:
+            The cached or freshly loaded value
+        """
+        tags = tuple(tags)
+        async with self._lock:
+            entry = self._cache.get(key)
+            now = datetime.utcnow()
+            if entry and now < entry['expires']:
+                self.hits += 1
+                return entry['value']
+            
+            if entry and now < entry['stale_until']:
+                self.stale_hits += 1
+                if key not in self._loading:
+                    task = self._start_load(key, loader, ttl_seconds, tags, stale_seconds)
+                    task.add_done_callback(self._log_refresh_error)
+                return entry['value']
+            
+            task = self._loading.get(key)
+            if task is None:
+                self.misses += 1
+                task = self._start_load(key, loader, ttl_seconds, tags, stale_seconds)
+            else:
+                self.coalesced += 1
+        
+        # Shielded so a cancelled request does not cancel the load for the others
+        return await asyncio.shield(task)
+    
+    def _start_load(self, key, loader, ttl_seconds, tags, stale_seconds) -> asyncio.Task:
+        task = asyncio.create_task(self._load(key, loader, ttl_seconds, tags, stale_seconds, self._epoch))
+        self._loading[key] = task
+        return task
+    
+    async def _load(self, key, loader, ttl_seconds, tags, stale_seconds, epoch):
+        try:
+            value = await loader()
+            async with self._lock:
+                # Don't store a value read before an invalidation
+                if epoch == self._epoch:
+                    self._store(key, value, ttl_seconds, tags, stale_seconds)
+            return value
+        finally:
+            # An invalidation may already have replaced this load with a newer one
+            if self._loading.get(key) is asyncio.current_task():
+                del self._loading[key]
+    
+    def _next_epoch(self):
+        """Start a new epoch (call with the lock held); in-flight loads read old data"""
+        self._epoch += 1
+        self._loading.clear()
+    
+    @staticmethod
+    def _log_refresh_error(task: asyncio.Task):
+        if not task.cancelled() and task.exception():
+            logger.error(f"Background cache refresh failed: {task.exception()}")
+    
+    async def invalidate_tags(self, tags: Iterable[str]) -> int:
+        """Delete every key stored with one of the tags (this worker only)"""
+        async with self._lock:
+            self._next_epoch()
+            deleted = 0
+            for tag in tags:
+                for key in self._tags.pop(tag, set()):
+                    if self._cache.pop(key, None) is not None:
+                        deleted += 1
+            return deleted
     
     async def delete(self, key: str):
         """Delete a specific key from cache"""
         async with self._lock:
+            self._next_epoch()
             self._cache.pop(key, None)
     
     async def clear_pattern(self, pattern: str):
@@ -51,13 +164,20 @@ class SimpleCache:
     async def clear_all(self):
         """Clear all cached data"""
         async with self._lock:
+            self._next_epoch()
             self._cache.clear()
+            self._tags.clear()
     
     def stats(self) -> Dict[str, int]:
         """Get cache statistics"""
         return {
             'total_keys': len(self._cache),
-            'memory_entries': len(self._cache)
+            'memory_entries': len(self._cache),
+            'tags': len(self._tags),
+            'hits': self.hits,
+            'stale_hits': self.stale_hits,
+            'misses': self.misses,
+            'coalesced': self.coalesced
         }
 
 # Global cache instance
@@ -70,28 +190,99 @@ def settings_key() -> str:
 def branding_key() -> str:
     return "branding:global"
 
-def news_list_key(page: int = 1, limit: int = 10) -> str:
-    return f"news:list:{page}:{limit}"
+def hero_background_key() -> str:
+    return "branding:hero"
+
+def _lang(lang: Optional[str]) -> str:
+    # Language-projected responses (utils.i18n) are cached per language
+    return f":{lang}" if lang else ""
 
-def events_list_key(upcoming: bool = True) -> str:
-    return f"events:list:{'upcoming' if upcoming else 'all'}"
+def bootstrap_key(lang: Optional[str] = None) -> str:
+    return f"public:bootstrap{_lang(lang)}"
 
-def gallery_key(album_id: str = "all") -> str:
-    return f"gallery:{album_id}"
+def news_list_key(skip: int = 0, limit: int = 10, lang: Optional[str] = None) -> str:
+    return f"news:list:{skip}:{limit}{_lang(lang)}"
 
-def stories_key(page: int = 1) -> str:
-    return f"stories:page:{page}"
+def events_list_key(
+    date_from: str, date_to: Optional[str] = None, group: Optional[str] = None,
+    cursor: Optional[str] = None, limit: int = 100, lang: Optional[str] = None
+) -> str:
+    return f"events:list:{date_from}:{date_to or ''}:{group or 'all'}:{cursor or ''}:{limit}{_lang(lang)}"
+
+def gallery_key(album_id: str = "all", lang: Optional[str] = None) -> str:
+    return f"gallery:{album_id}{_lang(lang)}"
+
+def stories_key(page: int = 1, lang: Optional[str] = None) -> str:
+    return f"stories:page:{page}{_lang(lang)}"
 
 def user_key(user_id: str) -> str:
     return f"user:{user_id}"
 
-# Cache TTLs (in seconds)
+def smtp_config_key() -> str:
+    return "smtp:config"
+
+def security_settings_key() -> str:
+    return "security:settings"
+
+def rosters_key() -> str:
+    return "rosters:all"
+
+# Invalidation tags - the data a cached value was built from
+TAG_SETTINGS = "settings"
+TAG_BRANDING = "branding"
+TAG_PLATFORM_SETTINGS = "platform_settings"
+TAG_NEWS = "news"
+TAG_EVENTS = "events"
+TAG_GALLERY = "gallery"
+TAG_STORIES = "stories"
+TAG_PAGE_CONTENT = "page_content"
+TAG_ROSTERS = "rosters"
+
+# Cache TTLs (in seconds). Entries tagged above are invalidated on every worker
+# when the data changes, so their TTL is only a safety net.
 CACHE_TTL = {
-    'settings': 600,      # 10 minutes
-    'branding': 600,      # 10 minutes
+    'settings': 86400,    # 24 hours (invalidated on update)
+    'branding': 86400,    # 24 hours (invalidated on update)
     'news': 300,          # 5 minutes
     'events': 300,        # 5 minutes
     'gallery': 600,       # 10 minutes
     'stories': 600,       # 10 minutes
     'user': 120,          # 2 minutes
+    'smtp': 3600,         # 1 hour (invalidated on update)
+    'bootstrap': 300,     # 5 minutes (upcoming events depend on the date)
+    'rosters': 3600,      # 1 hour (invalidated on rebuild)
 }
+
+# How long an expired entry may still be served while it is refreshed
+STALE_TTL = 60
+
+
+def cached_endpoint(key: Callable[..., str], ttl: str, tags: Iterable[str], stale_seconds: int = STALE_TTL):
+    """
+    Read-through cache for a route handler.
+    
+    Args:
+        key: Builds the cache key from the handler's keyword arguments
+        ttl: Name of the CACHE_TTL entry to use
+        tags: Invalidation tags (see utils.cache_bus.invalidate)
+        stale_seconds: Stale-while-revalidate window
+    
+    Usage:
+        @router.get("/")
+        @cached_endpoint(key=lambda **_: gallery_key(), ttl='gallery', tags=[TAG_GALLERY])
+        async def get_gallery(request: Request): ...
+    """
+    tags = tuple(tags)
+    
+    def decorator(handler):
+        @functools.wraps(handler)
+        async def wrapper(*args, **kwargs):
+            return await cache.get_or_load(
+                key(**kwargs),
+                lambda: handler(*args, **kwargs),
+                ttl_seconds=CACHE_TTL[ttl],
+                tags=tags,
+                stale_seconds=stale_seconds
+            )
+        return wrapper
+    return decorator
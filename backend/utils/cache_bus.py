@@ -0,0 +1,184 @@
+"""
+Cross-worker cache invalidation bus
+Every uvicorn worker has its own utils.cache.cache. Writes publish the tags
+they affect to the capped `cache_invalidations` collection; each worker tails
+it and drops the tagged keys from its local cache.
+
+Each publish also bumps the tag's version counter in `cache_versions`. The
+versions travel with the broadcast, so every worker knows the current version
+of each tag without a query - utils.http_cache builds ETags from them.
+
+A tailable cursor on a capped collection works on a standalone MongoDB (change
+streams need a replica set). Until the bus is started - scripts, unit tests -
+invalidate() only clears the local cache.
+"""
+import asyncio
+import logging
+import os
+from datetime import datetime
+from typing import Dict, Iterable, Optional
+from uuid import uuid4
+
+from pymongo import CursorType, ReturnDocument
+from pymongo.errors import CollectionInvalid
+
+from utils.cache import cache
+
+logger = logging.getLogger(__name__)
+
+COLLECTION = "cache_invalidations"
+VERSIONS_COLLECTION = "cache_versions"
+VERSIONS_ID = "versions"
+CAPPED_SIZE_BYTES = 1024 * 1024
+CAPPED_MAX_DOCUMENTS = 10000
+RETRY_SECONDS = int(os.environ.get("CACHE_BUS_RETRY_SECONDS", "5"))
+
+
+class CacheInvalidationBus:
+    """Publishes tag invalidations and applies the ones from other workers"""
+
+    def __init__(self):
+        self.worker_id = uuid4().hex
+        self._db = None
+        self._task = None
+        self.received = 0
+        self.versions: Dict[str, int] = {}
+        self.versions_loaded = False
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def version_of(self, tags: Iterable[str]) -> Optional[tuple]:
+        """Current version of each tag, or None until the versions are loaded"""
+        if not self.versions_loaded:
+            return None
+        return tuple(self.versions.get(tag, 0) for tag in tags)
+
+    async def publish(self, db, tags: Iterable[str]):
+        """Invalidate tags here and broadcast them to the other workers"""
+        tags = list(tags)
+        versions = {}
+        try:
+            doc = await db[VERSIONS_COLLECTION].find_one_and_update(
+                {"_id": VERSIONS_ID},
+                {"$inc": {tag: 1 for tag in tags}},
+                projection={tag: 1 for tag in tags},
+                upsert=True,
+                return_document=ReturnDocument.AFTER
+            )
+            versions = {tag: doc.get(tag, 0) for tag in tags}
+        except Exception as e:
+            # Versions can't be trusted now - no ETags until they are reloaded
+            self.versions_loaded = False
+            logger.error(f"Failed to bump cache versions {tags}: {str(e)}")
+
+        await self._apply(tags, versions)
+        try:
+            await db[COLLECTION].insert_one({
+                "tags": tags,
+                "versions": versions,
+                "origin": self.worker_id,
+                "at": datetime.utcnow()
+            })
+        except Exception as e:
+            # Other workers keep stale entries until their TTL runs out
+            logger.error(f"Failed to broadcast cache invalidation {tags}: {str(e)}")
+
+    async def start(self, db):
+        """Create the capped collection and start tailing it"""
+        self._db = db
+        try:
+            await db.create_collection(COLLECTION, capped=True, size=CAPPED_SIZE_BYTES, max=CAPPED_MAX_DOCUMENTS)
+        except CollectionInvalid:
+            pass  # Already exists
+        except Exception as e:
+            logger.warning(f"Cache invalidation bus disabled: {str(e)}")
+            return
+        self._task = asyncio.create_task(self._tail())
+
+    async def stop(self):
+        self.versions_loaded = False
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _tail(self):
+        first_run = True
+        while True:
+            try:
+                await self._follow(reconnected=not first_run)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Cache invalidation bus error: {str(e)}")
+            # Bumps from other workers are missed until we follow again
+            self.versions_loaded = False
+            first_run = False
+            await asyncio.sleep(RETRY_SECONDS)
+
+    async def _apply(self, tags, versions: Dict[str, int]):
+        # Cache first: until the versions move, requests still get the old
+        # ETag, so a body served from the old cache is never labelled as new
+        await cache.invalidate_tags(tags)
+        for tag, version in versions.items():
+            self.versions[tag] = max(version, self.versions.get(tag, 0))
+
+    async def _load_versions(self):
+        doc = await self._db[VERSIONS_COLLECTION].find_one({"_id": VERSIONS_ID}) or {}
+        doc.pop("_id", None)
+        for tag, version in doc.items():
+            self.versions[tag] = max(version, self.versions.get(tag, 0))
+        self.versions_loaded = True
+
+    async def _follow(self, reconnected: bool):
+        collection = self._db[COLLECTION]
+
+        # A tailable cursor on an empty collection dies at once
+        newest = await collection.find_one({}, sort=[("$natural", -1)])
+        if not newest:
+            await collection.insert_one({"tags": [], "origin": self.worker_id, "at": datetime.utcnow()})
+            newest = await collection.find_one({}, sort=[("$natural", -1)])
+
+        if reconnected:
+            # Invalidations may have been missed while the cursor was down
+            await cache.clear_all()
+            logger.info("Cache invalidation bus reconnected, local cache cleared")
+        await self._load_versions()
+
+        # Documents up to the current newest one were published before we
+        # started following; ObjectIds from different workers are not ordered,
+        # so skip by position rather than filtering on _id.
+        skipping = True
+        cursor = collection.find({}, cursor_type=CursorType.TAILABLE_AWAIT)
+        while cursor.alive:
+            async for doc in cursor:
+                if skipping:
+                    if doc["_id"] == newest["_id"]:
+                        skipping = False
+                        continue
+                    if doc["at"] <= newest["at"]:
+                        continue
+                    # The marker rolled off the capped collection meanwhile
+                    skipping = False
+                if doc.get("origin") == self.worker_id or not doc.get("tags"):
+                    continue
+                self.received += 1
+                await self._apply(doc["tags"], doc.get("versions", {}))
+            if not self.versions_loaded:
+                await self._load_versions()
+            await asyncio.sleep(0.1)
+        raise RuntimeError("tailable cursor closed")
+
+
+# Global bus (one per worker)
+cache_bus = CacheInvalidationBus()
+
+
+async def invalidate(db, *tags: str):
+    """Drop cached entries with these tags on every worker"""
+    await cache_bus.publish(db, tags)
@@ -0,0 +1,130 @@
+"""
+Daily dashboard snapshots
+The admin statistics are computed from invoices, users and RSVPs on demand,
+which only gives today's numbers. A nightly job stores one small document per
+day in `dashboard_snapshots`, so trend charts read a few hundred documents:
+
+    {
+        "_id": "YYYY-MM-DD", "date": "YYYY-MM-DD", "createdAt": datetime,
+        "members": {"total", "byRole": {role: n}, "byGroup": {group: n}},
+        "invoices": {"paid", "unpaid", "overdue", "revenue", "paidOnDay", "revenueOnDay"},
+        "rsvps": {"events", "confirmed", "cancelled", "attended", "attendanceRate"}
+    }
+
+Member and invoice figures are the state when the snapshot is taken (just
+after midnight, so the end of `date`). RSVP figures are for the events held
+on `date`. Taking a snapshot again replaces it.
+"""
+import logging
+from datetime import datetime, timedelta
+from typing import List, Optional
+from zoneinfo import ZoneInfo
+
+from utils import rosters
+
+logger = logging.getLogger(__name__)
+
+# Trend queries return at most this many days
+MAX_DAYS = 3 * 366
+
+LOCAL_TIMEZONE = ZoneInfo("Europe/Stockholm")
+
+
+def _yesterday() -> str:
+    return (datetime.now(LOCAL_TIMEZONE).date() - timedelta(days=1)).isoformat()
+
+
+async def _members(db) -> dict:
+    by_role = {
+        row["_id"] or "unknown": row["count"]
+        async for row in db.users.aggregate([{"$group": {"_id": "$role", "count": {"$sum": 1}}}])
+    }
+    by_group = {group: len(roster.get("members", [])) for group, roster in (await rosters.get_rosters(db)).items()}
+    return {"total": by_role.get("user", 0), "byRole": by_role, "byGroup": by_group}
+
+
+async def _invoices(db, day: str) -> dict:
+    next_day = (datetime.fromisoformat(day) + timedelta(days=1)).date().isoformat()
+    # paymentDate is an ISO string, so it compares as a date. Overdue is the
+    # flag set by utils/invoice_overdue.py
+    rows = await db.invoices.aggregate([
+        {"$match": {"status": {"$in": ["paid", "unpaid"]}}},
+        {"$group": {
+            "_id": None,
+            "paid": {"$sum": {"$cond": [{"$eq": ["$status", "paid"]}, 1, 0]}},
+            "unpaid": {"$sum": {"$cond": [{"$eq": ["$status", "unpaid"]}, 1, 0]}},
+            "overdue": {"$sum": {"$cond": [{"$and": [
+                {"$eq": ["$status", "unpaid"]},
+                {"$eq": ["$overdue", True]}
+            ]}, 1, 0]}},
+            "revenue": {"$sum": {"$cond": [{"$eq": ["$status", "paid"]}, "$amount", 0]}},
+            "paidOnDay": {"$sum": {"$cond": [{"$and": [
+                {"$eq": ["$status", "paid"]},
+                {"$gte": ["$paymentDate", day]},
+                {"$lt": ["$paymentDate", next_day]}
+            ]}, 1, 0]}},
+            "revenueOnDay": {"$sum": {"$cond": [{"$and": [
+                {"$eq": ["$status", "paid"]},
+                {"$gte": ["$paymentDate", day]},
+                {"$lt": ["$paymentDate", next_day]}
+            ]}, "$amount", 0]}}
+        }},
+        {"$unset": "_id"}
+    ]).to_list(length=1)
+    return rows[0] if rows else {"paid": 0, "unpaid": 0, "overdue": 0, "revenue": 0, "paidOnDay": 0, "revenueOnDay": 0}
+
+
+async def _rsvps(db, day: str) -> dict:
+    events = await db.events.count_documents({"date": day, "status": "active"})
+    rows = await db.event_rsvps.aggregate([
+        {"$match": {"date": day, "eventStatus": "active"}},
+        {"$group": {
+            "_id": None,
+            "confirmed": {"$sum": {"$cond": [{"$eq": ["$status", "confirmed"]}, 1, 0]}},
+            "cancelled": {"$sum": {"$cond": [{"$eq": ["$status", "cancelled"]}, 1, 0]}},
+            "attended": {"$sum": {"$cond": [{"$eq": ["$attended", True]}, 1, 0]}}
+        }},
+        {"$unset": "_id"}
+    ]).to_list(length=1)
+    counts = rows[0] if rows else {"confirmed": 0, "cancelled": 0, "attended": 0}
+    # Attendance of those who confirmed (walk-ins can push it over 1)
+    rate = round(counts["attended"] / counts["confirmed"], 3) if counts["confirmed"] else None
+    return {"events": events, **counts, "attendanceRate": rate}
+
+
+async def take_snapshot(db, day: Optional[str] = None) -> dict:
+    """
+    Store the snapshot of a day (default: yesterday, local time).
+
+    Args:
+        db: Database
+        day: YYYY-MM-DD
+
+    Returns:
+        The snapshot document
+    """
+    day = day or _yesterday()
+    snapshot = {
+        "_id": day,
+        "date": day,
+        "createdAt": datetime.utcnow(),
+        "members": await _members(db),
+        "invoices": await _invoices(db, day),
+        "rsvps": await _rsvps(db, day)
+    }
+    await db.dashboard_snapshots.replace_one({"_id": day}, snapshot, upsert=True)
+    logger.info(f"Dashboard snapshot stored for {day}")
+    return snapshot
+
+
+async def get_trend(db, start: Optional[str] = None, end: Optional[str] = None) -> List[dict]:
+    """
+    Snapshots from start to end (inclusive, YYYY-MM-DD), oldest first.
+    Defaults to the last year; at most MAX_DAYS are returned.
+    """
+    end = end or _yesterday()
+    start = start or (datetime.fromisoformat(end) - timedelta(days=365)).date().isoformat()
+    return await db.dashboard_snapshots.find(
+        {"_id": {"$gte": start, "$lte": end}},
+        {"_id": 0, "createdAt": 0}
+    ).sort("_id", 1).limit(MAX_DAYS).to_list(length=MAX_DAYS)
@@ -0,0 +1,230 @@
+"""
+Scheduled event reminders
+Instead of one 09:00 run for all of tomorrow's events, every event gets its
+own reminder in `event_reminders`, due REMINDER_OFFSET_HOURS before it starts:
+
+    {
+        "_id": "<eventId>", "eventStart": datetime (UTC), "runAt": datetime (UTC),
+        "status": "pending" | "sending" | "sent" | "cancelled",
+        "attempts", "claimedAt", "result", "createdAt", "updatedAt"
+    }
+
+runAt is moved up to REMINDER_JITTER_MINUTES earlier at random, so events
+starting at the same time do not all send at once, and the scheduler sends at
+most MAX_PER_RUN due reminders per minute (scheduler.send_due_reminders).
+
+Reminders are scheduled when an event is created, rescheduled when its date,
+time or status changes (events.update_event), and dropped with the event.
+schedule_missing() covers events created before this existed.
+"""
+import logging
+import os
+import random
+from datetime import date, datetime, timedelta, timezone
+from typing import List, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+from pymongo import ReturnDocument
+
+logger = logging.getLogger(__name__)
+
+REMINDER_OFFSET_HOURS = float(os.environ.get("EVENT_REMINDER_OFFSET_HOURS", "24"))
+REMINDER_JITTER_MINUTES = int(os.environ.get("EVENT_REMINDER_JITTER_MINUTES", "30"))
+MAX_PER_RUN = int(os.environ.get("EVENT_REMINDER_MAX_PER_RUN", "5"))
+# No reminder for events starting sooner than this after they are scheduled
+MIN_NOTICE_MINUTES = 60
+# Events without a time are treated as starting at 09:00, so with the default
+# offset their reminder goes out at 09:00 the day before, as it always did
+DEFAULT_START_TIME = "09:00"
+# Claimed reminders not finished by then (worker stopped mid-send) are retried
+CLAIM_TIMEOUT_MINUTES = 15
+MAX_ATTEMPTS = 3
+
+PENDING = "pending"
+SENDING = "sending"
+SENT = "sent"
+CANCELLED = "cancelled"
+
+# Event dates and times are local (Stockholm) wall-clock strings
+EVENT_TIMEZONE = ZoneInfo("Europe/Stockholm")
+
+
+async def create_indexes(db):
+    await db.event_reminders.create_index([("status", 1), ("runAt", 1)])
+
+
+def event_start(event: dict) -> Optional[datetime]:
+    """Event start as naive UTC, None if the date is missing or invalid"""
+    time = event.get("time") or ""
+    if len(time) != 5 or time[2] != ":":
+        time = DEFAULT_START_TIME
+    try:
+        local = datetime.strptime(f"{event.get('date')} {time}", "%Y-%m-%d %H:%M")
+    except ValueError:
+        return None
+    return local.replace(tzinfo=EVENT_TIMEZONE).astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def day_words(event: dict, now: Optional[datetime] = None) -> Tuple[str, str]:
+    """
+    How a reminder sent now refers to the event day, (Serbian, Swedish):
+    ("danas", "idag"), ("sutra", "imorgon") or ("dana <date>", "den <date>").
+    Late reminders and offsets other than 24h do not always mean tomorrow.
+    """
+    today = (now or datetime.utcnow()).replace(tzinfo=timezone.utc).astimezone(EVENT_TIMEZONE).date()
+    try:
+        days = (date.fromisoformat(event.get("date") or "") - today).days
+    except ValueError:
+        days = None
+    if days == 0:
+        return "danas", "idag"
+    if days == 1:
+        return "sutra", "imorgon"
+    return f"dana {event.get('date')}", f"den {event.get('date')}"
+
+
+def reminder_time(start: datetime, now: datetime) -> datetime:
+    """When to remind about an event starting at `start` (UTC)"""
+    run_at = start - timedelta(hours=REMINDER_OFFSET_HOURS, minutes=random.uniform(0, REMINDER_JITTER_MINUTES))
+    # Created / moved after its reminder time: remind right away
+    return max(run_at, now)
+
+
+async def cancel(db, event_id: str):
+    await db.event_reminders.update_one(
+        {"_id": event_id, "status": {"$in": [PENDING, SENDING]}},
+        {"$set": {"status": CANCELLED, "updatedAt": datetime.utcnow()}}
+    )
+
+
+async def delete(db, event_id: str):
+    await db.event_reminders.delete_one({"_id": event_id})
+
+
+async def schedule(db, event: dict) -> Optional[datetime]:
+    """
+    (Re)schedule the reminder of an event.
+
+    Args:
+        db: Database
+        event: Event document
+
+    Returns:
+        When the reminder will be sent, None if the event gets no reminder
+        (cancelled, in the past or starting too soon)
+    """
+    now = datetime.utcnow()
+    start = event_start(event)
+    if (
+        event.get("status", "active") != "active"
+        or start is None
+        or start - now < timedelta(minutes=MIN_NOTICE_MINUTES)
+    ):
+        await cancel(db, event["_id"])
+        return None
+
+    run_at = reminder_time(start, now)
+    await db.event_reminders.update_one(
+        {"_id": event["_id"]},
+        {
+            "$set": {
+                "eventStart": start, "runAt": run_at, "status": PENDING,
+                "attempts": 0, "updatedAt": now
+            },
+            "$setOnInsert": {"createdAt": now}
+        },
+        upsert=True
+    )
+    return run_at
+
+
+def start_changed(previous: dict, update_data: dict) -> bool:
+    """Whether an update moves the event start (the edit form resends unchanged dates)"""
+    return event_start(previous) != event_start({**previous, **update_data})
+
+
+async def reschedule(db, event_id: str, update_data: dict, previous: dict):
+    """
+    Follow an event update: a new date / time schedules the reminder again
+    (also if the old one was already sent), a status change cancels or
+    restores it. Updates that repeat the stored values change nothing.
+
+    Args:
+        db: Database
+        event_id: Event id
+        update_data: Fields set by the update
+        previous: The event as stored before the update (date, time, status)
+    """
+    moved = start_changed(previous, update_data)
+    status_changed = "status" in update_data and update_data["status"] != previous.get("status", "active")
+    if not moved and not status_changed:
+        return
+    if moved:
+        # Moved: the members are reminded about the new date
+        await db.events.update_one({"_id": event_id}, {"$unset": {"reminderSent": "", "reminderSentAt": ""}})
+    event = await db.events.find_one({"_id": event_id}, {"date": 1, "time": 1, "status": 1, "reminderSent": 1})
+    if not event:
+        await delete(db, event_id)
+    elif event.get("reminderSent"):
+        # Already reminded and not moved (e.g. re-activated): nothing to send
+        return
+    else:
+        await schedule(db, event)
+
+
+async def schedule_missing(db) -> int:
+    """
+    Schedule reminders for upcoming active events that have none yet.
+
+    Returns:
+        Number of reminders scheduled
+    """
+    today = datetime.now(EVENT_TIMEZONE).strftime("%Y-%m-%d")
+    events = await db.events.find(
+        {"date": {"$gte": today}, "status": "active", "reminderSent": {"$ne": True}},
+        {"date": 1, "time": 1, "status": 1}
+    ).to_list(length=None)
+    if not events:
+        return 0
+    scheduled = set(await db.event_reminders.distinct("_id", {"_id": {"$in": [e["_id"] for e in events]}}))
+    count = 0
+    for event in events:
+        if event["_id"] not in scheduled and await schedule(db, event):
+            count += 1
+    if count:
+        logger.info(f"Scheduled reminders for {count} upcoming event(s)")
+    return count
+
+
+async def claim_due(db, limit: int = MAX_PER_RUN) -> List[dict]:
+    """Due reminders, oldest first, marked as being sent by this worker"""
+    now = datetime.utcnow()
+    await db.event_reminders.update_many(
+        {"status": SENDING, "claimedAt": {"$lte": now - timedelta(minutes=CLAIM_TIMEOUT_MINUTES)}},
+        {"$set": {"status": PENDING}}
+    )
+    claimed = []
+    while len(claimed) < limit:
+        reminder = await db.event_reminders.find_one_and_update(
+            {"status": PENDING, "runAt": {"$lte": now}},
+            {"$set": {"status": SENDING, "claimedAt": now}, "$inc": {"attempts": 1}},
+            sort=[("runAt", 1)],
+            return_document=ReturnDocument.AFTER
+        )
+        if not reminder:
+            break
+        claimed.append(reminder)
+    return claimed
+
+
+async def finish(db, event_id: str, result: Optional[dict] = None, failed: bool = False):
+    """Record the outcome of a claimed reminder (failed ones are retried up to MAX_ATTEMPTS)"""
+    reminder = await db.event_reminders.find_one({"_id": event_id}, {"attempts": 1})
+    if failed and reminder and reminder.get("attempts", 0) < MAX_ATTEMPTS:
+        status = PENDING
+    else:
+        status = CANCELLED if failed else SENT
+    await db.event_reminders.update_one(
+        {"_id": event_id, "status": SENDING},
+        {"$set": {"status": status, "result": result, "updatedAt": datetime.utcnow()}}
+    )
@@ -0,0 +1,236 @@
+"""
+Event RSVPs and attendance
+One document per (event, user) in `event_rsvps` instead of the participants /
+cancellations / attendance fields embedded in each event:
+
+    {
+        "eventId": "event_...", "userId": "...",
+        "date": "YYYY-MM-DD", "trainingGroup": ..., "eventStatus": "active",
+        "status": "confirmed" | "cancelled" | None,   # None: attendance only (walk-in)
+        "confirmedAt", "cancelledAt", "cancelReason", "cancelledBy",
+        "attended": True | False | None, "markedAt", "markedBy", "walkIn"
+    }
+
+date, trainingGroup and eventStatus are copied from the event (kept in sync by
+sync_event) so per-user questions are answered from the userId+date index.
+"""
+import logging
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+from pymongo import UpdateOne
+
+logger = logging.getLogger(__name__)
+
+CONFIRMED = "confirmed"
+CANCELLED = "cancelled"
+
+# Event fields copied onto its RSVPs
+EVENT_FIELDS = {"date": "date", "trainingGroup": "trainingGroup", "status": "eventStatus"}
+
+# Embedded fields replaced by this collection
+LEGACY_FIELDS = ("participants", "cancellations", "attendance")
+
+# Listing stages: per-event counts instead of the RSVP data itself
+RSVP_COUNT_STAGES = [
+    {"$lookup": {
+        "from": "event_rsvps",
+        "localField": "_id",
+        "foreignField": "eventId",
+        "pipeline": [{"$group": {
+            "_id": None,
+            "participantCount": {"$sum": {"$cond": [{"$eq": ["$status", CONFIRMED]}, 1, 0]}},
+            "cancellationCount": {"$sum": {"$cond": [{"$eq": ["$status", CANCELLED]}, 1, 0]}},
+            "attendedCount": {"$sum": {"$cond": [{"$eq": ["$attended", True]}, 1, 0]}}
+        }}],
+        "as": "rsvpCounts"
+    }},
+    {"$set": {
+        field: {"$ifNull": [{"$first": f"$rsvpCounts.{field}"}, 0]}
+        for field in ("participantCount", "cancellationCount", "attendedCount")
+    }},
+    {"$unset": ["rsvpCounts", *LEGACY_FIELDS]},
+]
+
+
+async def create_indexes(db):
+    await db.event_rsvps.create_index([("eventId", 1), ("userId", 1)], unique=True)
+    await db.event_rsvps.create_index([("userId", 1), ("date", 1)])
+
+
+def _event_fields(event: dict) -> dict:
+    return {target: event.get(source) for source, target in EVENT_FIELDS.items()}
+
+
+def _upsert(event: dict, user_id: str, fields: dict) -> UpdateOne:
+    return UpdateOne(
+        {"eventId": event["_id"], "userId": user_id},
+        {
+            "$set": {**fields, **_event_fields(event), "updatedAt": datetime.utcnow()},
+            "$setOnInsert": {"createdAt": datetime.utcnow()}
+        },
+        upsert=True
+    )
+
+
+async def confirm(db, event: dict, user_id: str):
+    """RSVP yes"""
+    await db.event_rsvps.bulk_write([
+        _upsert(event, user_id, {"status": CONFIRMED, "confirmedAt": datetime.utcnow().isoformat()})
+    ])
+
+
+async def cancel(db, event: dict, user_id: str, reason: Optional[str], cancelled_by: Optional[str]):
+    """RSVP no (or withdraw a yes)"""
+    await db.event_rsvps.bulk_write([
+        _upsert(event, user_id, {
+            "status": CANCELLED,
+            "cancelledAt": datetime.utcnow().isoformat(),
+            "cancelReason": reason,
+            "cancelledBy": cancelled_by
+        })
+    ])
+
+
+async def mark_attendance(db, event: dict, attendance: Dict[str, bool], marked_by: str, walk_in: bool = False) -> int:
+    """
+    Record who actually came.
+
+    Args:
+        db: Database
+        event: Event document (at least _id, date, trainingGroup, status)
+        attendance: {userId: attended}
+        marked_by: Name of the admin marking it
+        walk_in: Attended without an RSVP
+
+    Returns:
+        Number of users marked
+    """
+    if not attendance:
+        return 0
+    marked_at = datetime.utcnow().isoformat()
+    fields = {"markedAt": marked_at, "markedBy": marked_by}
+    if walk_in:
+        fields["walkIn"] = True
+    await db.event_rsvps.bulk_write(
+        [_upsert(event, user_id, {**fields, "attended": attended}) for user_id, attended in attendance.items()],
+        ordered=False
+    )
+    return len(attendance)
+
+
+async def remove_users(db, event_id: str, user_ids: Iterable[str]):
+    """Drop RSVPs of users that no longer exist"""
+    await db.event_rsvps.delete_many({"eventId": event_id, "userId": {"$in": list(user_ids)}})
+
+
+async def delete_for_event(db, event_id: str):
+    await db.event_rsvps.delete_many({"eventId": event_id})
+
+
+async def sync_event(db, event_id: str, update_data: dict):
+    """Copy changed date / trainingGroup / status onto the event's RSVPs"""
+    fields = {target: update_data[source] for source, target in EVENT_FIELDS.items() if source in update_data}
+    if fields:
+        await db.event_rsvps.update_many({"eventId": event_id}, {"$set": fields})
+
+
+async def confirmed_user_ids(db, event_id: str) -> List[str]:
+    rsvps = await db.event_rsvps.find(
+        {"eventId": event_id, "status": CONFIRMED}, {"userId": 1, "_id": 0}
+    ).to_list(length=None)
+    return [rsvp["userId"] for rsvp in rsvps]
+
+
+async def for_event_with_users(db, event_id: str, query: Optional[dict] = None) -> List[dict]:
+    """
+    RSVPs of one event joined with their user (`user`, None if deleted) in
+    a single query.
+    """
+    return await db.event_rsvps.aggregate([
+        {"$match": {"eventId": event_id, **(query or {})}},
+        {"$lookup": {
+            "from": "users",
+            "localField": "userId",
+            "foreignField": "_id",
+            "pipeline": [{"$project": {"fullName": 1, "email": 1}}],
+            "as": "user"
+        }},
+        {"$set": {"user": {"$first": "$user"}}},
+    ]).to_list(length=None)
+
+
+def build_rsvp_docs(event: dict) -> List[dict]:
+    """RSVP documents for the embedded participants / cancellations / attendance of an event"""
+    participants = event.get("participants") or []
+    cancellations = {c.get("userId"): c for c in (event.get("cancellations") or []) if c.get("userId")}
+    attendance = event.get("attendance") or {}
+    now = datetime.utcnow()
+
+    docs = {}
+    for user_id in set(participants) | set(cancellations) | set(attendance):
+        doc = {
+            "eventId": event["_id"],
+            "userId": user_id,
+            **_event_fields(event),
+            "status": None,
+            "attended": None,
+            "createdAt": now,
+            "updatedAt": now
+        }
+        if user_id in participants:
+            doc["status"] = CONFIRMED
+        elif user_id in cancellations:
+            doc["status"] = CANCELLED
+        cancellation = cancellations.get(user_id)
+        if cancellation:
+            doc.update({
+                "cancelledAt": cancellation.get("cancelledAt"),
+                "cancelReason": cancellation.get("reason"),
+                "cancelledBy": cancellation.get("cancelledBy")
+            })
+        marked = attendance.get(user_id)
+        if isinstance(marked, dict):
+            doc.update({
+                "attended": marked.get("attended"),
+                "markedAt": marked.get("markedAt"),
+                "markedBy": marked.get("markedBy"),
+                "walkIn": marked.get("walkIn", False)
+            })
+        docs[user_id] = doc
+    return list(docs.values())
+
+
+async def migrate_embedded(db, batch_size: int = 100) -> dict:
+    """
+    Move embedded RSVP data into event_rsvps. Idempotent: existing RSVP
+    documents are kept (they are newer), and the embedded fields are removed
+    once copied, so a rerun only sees events that were not finished.
+
+    Returns:
+        {"events": migrated events, "rsvps": RSVP documents inserted}
+    """
+    stats = {"events": 0, "rsvps": 0}
+    query = {"$or": [{field: {"$exists": True}} for field in LEGACY_FIELDS]}
+    projection = {"date": 1, "trainingGroup": 1, "status": 1, **{field: 1 for field in LEGACY_FIELDS}}
+
+    while True:
+        events = await db.events.find(query, projection).limit(batch_size).to_list(length=batch_size)
+        if not events:
+            return stats
+
+        operations = [
+            UpdateOne({"eventId": doc["eventId"], "userId": doc["userId"]}, {"$setOnInsert": doc}, upsert=True)
+            for event in events
+            for doc in build_rsvp_docs(event)
+        ]
+        if operations:
+            result = await db.event_rsvps.bulk_write(operations, ordered=False)
+            stats["rsvps"] += result.upserted_count
+
+        await db.events.update_many(
+            {"_id": {"$in": [event["_id"] for event in events]}},
+            {"$unset": {field: "" for field in LEGACY_FIELDS}}
+        )
+        stats["events"] += len(events)
+        logger.info(f"Migrated RSVPs of {stats['events']} events ({stats['rsvps']} RSVP documents)")
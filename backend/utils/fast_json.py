@@ -0,0 +1,98 @@
+"""
+Fast JSON path for list endpoints
+MongoDB maps _id to id while projecting (API_ID_STAGES), and FastJSONResponse
+serialises the documents with orjson, which handles datetimes natively. Routes
+decorated with @fast_json return a FastJSONResponse, so FastAPI does not walk
+the result again with jsonable_encoder.
+"""
+import functools
+from decimal import Decimal
+from typing import Any, Iterable, List, Optional
+
+import orjson
+from bson import ObjectId
+from fastapi.responses import JSONResponse, Response
+
+# _id -> id (as a string, like str(item["_id"]) did)
+API_ID_STAGES = [
+    {"$set": {"id": {"$toString": "$_id"}}},
+    {"$unset": "_id"},
+]
+
+
+def _default(value: Any):
+    """Types orjson does not know"""
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson"""
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+def fast_json(handler):
+    """
+    Return the handler's result as a FastJSONResponse.
+
+    Goes above @cached_endpoint, so the cache keeps the data and every request
+    gets its own response object.
+
+    Usage:
+        @router.get("/", response_class=FastJSONResponse)
+        @fast_json
+        @cached_endpoint(...)
+        async def get_news(...): ...
+    """
+    @functools.wraps(handler)
+    async def wrapper(*args, **kwargs):
+        result = await handler(*args, **kwargs)
+        if isinstance(result, Response):
+            return result
+        return FastJSONResponse(result)
+    return wrapper
+
+
+async def find_api_documents(
+    collection,
+    query: dict,
+    sort: Optional[List[tuple]] = None,
+    skip: int = 0,
+    limit: Optional[int] = None,
+    projection: Optional[dict] = None,
+    stages: Iterable[dict] = ()
+) -> list:
+    """
+    find() returning API-shaped documents (id instead of _id).
+
+    Args:
+        collection: Motor collection
+        query: Filter
+        sort: [(field, direction), ...]
+        skip: Documents to skip
+        limit: Maximum number of documents
+        projection: Optional $project stage (aggregation syntax)
+        stages: Extra stages run before the id mapping
+
+    Returns:
+        List of documents
+    """
+    pipeline = [{"$match": query}]
+    if sort:
+        pipeline.append({"$sort": dict(sort)})
+    if skip:
+        pipeline.append({"$skip": skip})
+    if limit:
+        pipeline.append({"$limit": limit})
+    if projection:
+        pipeline.append({"$project": projection})
+    pipeline.extend(stages)
+    pipeline.extend(API_ID_STAGES)
+    return await collection.aggregate(pipeline).to_list(length=limit)
@@ -0,0 +1,105 @@
+"""
+File delivery
+Routes check access, then hand the file to file_response(). With
+FILE_ACCEL_REDIRECT=1 (set when nginx fronts the app) the response carries
+no body, only an X-Accel-Redirect header: nginx serves the bytes from an
+internal location with sendfile and range support, so no worker is tied up
+by a large download. Without it, or for files outside the directories
+nginx can read, a plain FileResponse is returned (local runs, tests).
+
+Upload directories and their internal nginx locations are set with
+FILE_ACCEL_ROOTS, comma-separated "directory=location" pairs:
+
+    FILE_ACCEL_ROOTS=/app/uploads=/_protected/uploads/
+
+    location /_protected/uploads/ {
+        internal;
+        alias /app/uploads/;
+    }
+"""
+import os
+from pathlib import Path
+from typing import Dict, Optional
+from urllib.parse import quote
+
+from fastapi.responses import FileResponse, Response
+
+ACCEL_REDIRECT = os.environ.get("FILE_ACCEL_REDIRECT", "").lower() in ("1", "true", "yes")
+
+
+def _parse_roots(value: str) -> Dict[Path, str]:
+    roots = {}
+    for pair in value.split(","):
+        directory, _, location = pair.strip().partition("=")
+        if directory and location:
+            roots[Path(directory)] = location.rstrip("/") + "/"
+    return roots
+
+
+ACCEL_ROOTS = _parse_roots(os.environ.get("FILE_ACCEL_ROOTS", "/app/uploads=/_protected/uploads/"))
+
+
+def resolve_file(directory: Path, filename: str) -> Optional[Path]:
+    """
+    File `filename` in `directory`, if it exists there.
+
+    Returns:
+        The path, or None if the file is missing or the name points outside
+        the directory ("../", absolute paths)
+    """
+    path = (directory / filename).resolve()
+    if not path.is_relative_to(directory.resolve()) or not path.is_file():
+        return None
+    return path
+
+
+def accel_location(path: Path) -> Optional[str]:
+    """Internal nginx URI of a file, None if nginx cannot read its directory"""
+    for directory, location in ACCEL_ROOTS.items():
+        if path.is_relative_to(directory):
+            return location + quote(path.relative_to(directory).as_posix())
+    return None
+
+
+def content_disposition(filename: str, inline: bool = False) -> str:
+    """Content-Disposition value, RFC 6266 encoded for non-ASCII names (as FileResponse does)"""
+    kind = "inline" if inline else "attachment"
+    quoted = quote(filename)
+    if quoted != filename:
+        return f"{kind}; filename*=utf-8''{quoted}"
+    return f'{kind}; filename="{filename}"'
+
+
+def file_response(
+    path: Path,
+    filename: Optional[str] = None,
+    media_type: Optional[str] = None,
+    inline: bool = False,
+    headers: Optional[dict] = None
+) -> Response:
+    """
+    Response for a file the caller has already authorized.
+
+    Args:
+        path: File on disk
+        filename: Download name (None: no Content-Disposition)
+        media_type: Content-Type (None: guessed from the name)
+        inline: Display in the browser instead of downloading
+        headers: Extra headers (e.g. Cache-Control)
+
+    Returns:
+        X-Accel-Redirect response when enabled and nginx can serve the file,
+        FileResponse otherwise
+    """
+    headers = dict(headers or {})
+    if filename:
+        headers["Content-Disposition"] = content_disposition(filename, inline)
+    location = accel_location(path) if ACCEL_REDIRECT else None
+    if location is None:
+        return FileResponse(path=str(path), media_type=media_type, headers=headers)
+    headers["X-Accel-Redirect"] = location
+    response = Response(headers=headers)
+    # nginx keeps the upstream Content-Type; without one it uses its mime.types
+    if media_type:
+        response.headers["Content-Type"] = media_type
+    return response
@@ -0,0 +1,130 @@
+"""
+HTTP caching for public JSON endpoints
+Strong ETags built from the cache tag versions kept by utils.cache_bus, so a
+matching If-None-Match is answered with 304 before the route (and its
+queries) runs. Writes already call utils.cache_bus.invalidate(), which bumps
+the versions - no body hashing needed.
+"""
+import hashlib
+from datetime import datetime
+from typing import Iterable, List, Optional, Tuple
+
+from starlette.datastructures import Headers, MutableHeaders, QueryParams
+
+from utils.cache import (
+    TAG_BRANDING, TAG_SETTINGS, TAG_NEWS, TAG_EVENTS, TAG_GALLERY, TAG_STORIES, TAG_PAGE_CONTENT
+)
+from utils.cache_bus import cache_bus
+from utils.i18n import AUTO, negotiate_language
+
+# Browsers and nginx may store the response but must revalidate it every time
+PUBLIC_REVALIDATE = "public, max-age=0, must-revalidate"
+
+# Pseudo-tag for responses that also change with the date (upcoming events)
+TAG_TODAY = "today"
+
+# (path, match as prefix, tags the response is built from)
+ETAG_ROUTES: List[Tuple[str, bool, Tuple[str, ...]]] = [
+    ("/api/public/branding", False, (TAG_BRANDING,)),
+    ("/api/public/bootstrap", False, (TAG_BRANDING, TAG_SETTINGS, TAG_NEWS, TAG_EVENTS, TAG_GALLERY, TAG_TODAY)),
+    ("/api/settings", False, (TAG_SETTINGS,)),
+    ("/api/settings/hero-background", False, (TAG_BRANDING,)),
+    ("/api/news", False, (TAG_NEWS,)),
+    ("/api/events", False, (TAG_EVENTS, TAG_TODAY)),  # window starts today by default
+    ("/api/gallery", False, (TAG_GALLERY,)),
+    ("/api/stories", False, (TAG_STORIES,)),
+    ("/api/content/pages/", True, (TAG_PAGE_CONTENT,)),
+]
+
+
+def match_route(path: str) -> Optional[Tuple[str, ...]]:
+    """Tags for a path, or None if it is not ETag-cached"""
+    normalized = path.rstrip("/")
+    for route, prefix, tags in ETAG_ROUTES:
+        if prefix:
+            if path.startswith(route):
+                return tags
+        elif normalized == route:
+            return tags
+    return None
+
+
+def negotiated_language(query_string: bytes, headers: Headers) -> Optional[str]:
+    """Language picked from Accept-Language for ?lang=auto, else None"""
+    if QueryParams(query_string.decode("latin-1")).get("lang") != AUTO:
+        return None
+    return negotiate_language(headers.get("accept-language"))
+
+
+def make_etag(
+    path: str, query_string: bytes, tags: Iterable[str], versions: tuple, language: Optional[str] = None
+) -> str:
+    """Same path, query and tag versions -> same body, on every worker"""
+    raw = f"{path.rstrip('/')}?{query_string.decode('latin-1')}|{','.join(tags)}|{versions}"
+    if TAG_TODAY in tags:
+        raw += datetime.utcnow().strftime("|%Y-%m-%d")
+    if language:
+        raw += f"|{language}"
+    return f'"{hashlib.sha1(raw.encode()).hexdigest()[:20]}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # nginx gzip turns strong ETags into weak ones; weak comparison is fine for GET
+    candidates = [value.strip().removeprefix("W/") for value in if_none_match.split(",")]
+    return etag in candidates
+
+
+class ETagMiddleware:
+    """ASGI middleware answering conditional GETs for the routes in ETAG_ROUTES"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in ("GET", "HEAD"):
+            await self.app(scope, receive, send)
+            return
+
+        tags = match_route(scope["path"])
+        # Versions are unknown until the bus is following - no ETags then
+        versions = cache_bus.version_of(tags) if tags else None
+        if versions is None:
+            await self.app(scope, receive, send)
+            return
+
+        # Computed before the route runs: a write during the request leaves
+        # the client with the older ETag, never new ETag on old data
+        request_headers = Headers(scope=scope)
+        query_string = scope.get("query_string", b"")
+        language = negotiated_language(query_string, request_headers)
+        etag = make_etag(scope["path"], query_string, tags, versions, language)
+
+        if etag_matches(request_headers.get("if-none-match"), etag):
+            headers = [
+                (b"etag", etag.encode()),
+                (b"cache-control", PUBLIC_REVALIDATE.encode()),
+            ]
+            if language:
+                headers.append((b"vary", b"Accept-Language"))
+            await send({
+                "type": "http.response.start",
+                "status": 304,
+                "headers": headers,
+            })
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        async def send_with_etag(message):
+            if message["type"] == "http.response.start" and message["status"] == 200:
+                headers = MutableHeaders(scope=message)
+                headers["ETag"] = etag
+                headers["Cache-Control"] = PUBLIC_REVALIDATE
+                if language:
+                    headers.add_vary_header("Accept-Language")
+            await send(message)
+
+        await self.app(scope, receive, send_with_etag)
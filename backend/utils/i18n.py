@@ -0,0 +1,147 @@
+"""
+Language projection for MultiLangText fields
+News, events, gallery, stories and page content store every text in all four
+languages. With ?lang=<code> (or ?lang=auto, negotiated from Accept-Language)
+list endpoints return only that language, projected in MongoDB:
+
+    {"title": {"sr-latin": "...", "sr-cyrillic": "...", "en": "...", "sv": "..."}}
+    -> ?lang=sv -> {"title": {"sv": "..."}}
+
+The requested key is kept, so clients reading title[language] work unchanged.
+Empty or missing translations fall back along FALLBACK_ORDER. Without ?lang
+the full documents are returned (admin editing needs every language).
+"""
+from typing import Iterable, List, Optional
+
+from fastapi import HTTPException, Request
+
+from utils.fast_json import find_api_documents
+
+SUPPORTED_LANGUAGES = ("sr-latin", "sr-cyrillic", "en", "sv")
+AUTO = "auto"
+DEFAULT_LANGUAGE = "sr-latin"
+
+FALLBACK_ORDER = {
+    "sr-latin": ("sr-latin", "sr-cyrillic", "en", "sv"),
+    "sr-cyrillic": ("sr-cyrillic", "sr-latin", "en", "sv"),
+    "en": ("en", "sv", "sr-latin", "sr-cyrillic"),
+    "sv": ("sv", "en", "sr-latin", "sr-cyrillic"),
+}
+
+# Accept-Language tags (lowercase) -> our language codes
+ACCEPT_LANGUAGE_CODES = {
+    "sr-latn": "sr-latin",
+    "sr-cyrl": "sr-cyrillic",
+    "sr": "sr-latin",
+    "bs": "sr-latin",
+    "hr": "sr-latin",
+    "en": "en",
+    "sv": "sv",
+}
+
+# MultiLangText fields per collection
+NEWS_TEXT_FIELDS = ("title", "text")
+EVENT_TEXT_FIELDS = ("title", "description")
+GALLERY_TEXT_FIELDS = ("title", "description")
+STORY_TEXT_FIELDS = ("title", "text")
+PAGE_CONTENT_TEXT_FIELDS = ("content",)
+
+
+def negotiate_language(accept_language: Optional[str]) -> str:
+    """Best supported language for an Accept-Language header"""
+    candidates = []
+    for position, part in enumerate((accept_language or "").split(",")):
+        tag, _, params = part.strip().partition(";")
+        quality = 1.0
+        if params.strip().startswith("q="):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        candidates.append((-quality, position, tag.strip().lower()))
+
+    for _, _, tag in sorted(candidates):
+        # sr-Latn-RS -> sr-latn -> sr
+        parts = tag.split("-")
+        for length in range(len(parts), 0, -1):
+            code = ACCEPT_LANGUAGE_CODES.get("-".join(parts[:length]))
+            if code:
+                return code
+    return DEFAULT_LANGUAGE
+
+
+def resolve_language(request: Request, lang: Optional[str]) -> Optional[str]:
+    """Language to project, or None for full MultiLangText documents"""
+    if not lang:
+        return None
+    if lang == AUTO:
+        return negotiate_language(request.headers.get("accept-language"))
+    if lang not in SUPPORTED_LANGUAGES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported language. Use one of: {', '.join(SUPPORTED_LANGUAGES)} or auto"
+        )
+    return lang
+
+
+def _translation(field: str, lang: str) -> dict:
+    """First non-empty translation along the fallback order"""
+    expression = None
+    for code in reversed(FALLBACK_ORDER[lang]):
+        value = f"${field}.{code}"
+        if expression is None:
+            expression = {"$ifNull": [value, ""]}
+        else:
+            expression = {
+                "$cond": [{"$gt": [{"$strLenCP": {"$ifNull": [value, ""]}}, 0]}, value, expression]
+            }
+    return expression
+
+
+def localize_stage(fields: Iterable[str], lang: str) -> dict:
+    """$set stage replacing each MultiLangText field with {lang: text}"""
+    return {
+        "$set": {
+            field: {
+                "$cond": [
+                    {"$eq": [{"$type": f"${field}"}, "object"]},
+                    {"$arrayToObject": [[[lang, _translation(field, lang)]]]},
+                    f"${field}"
+                ]
+            }
+            for field in fields
+        }
+    }
+
+
+async def find_localized(
+    collection,
+    query: dict,
+    fields: Iterable[str],
+    lang: Optional[str],
+    sort: Optional[List[tuple]] = None,
+    skip: int = 0,
+    limit: Optional[int] = None,
+    projection: Optional[dict] = None
+) -> list:
+    """
+    API-shaped documents (see utils.fast_json), with MultiLangText fields
+    projected to one language when lang is set.
+
+    Args:
+        collection: Motor collection
+        query: Filter
+        fields: MultiLangText fields to project
+        lang: Resolved language (see resolve_language), or None for all
+        sort: [(field, direction), ...]
+        skip: Documents to skip
+        limit: Maximum number of documents
+        projection: Optional $project stage applied first
+
+    Returns:
+        List of documents
+    """
+    return await find_api_documents(
+        collection, query, sort=sort, skip=skip, limit=limit, projection=projection,
+        stages=[localize_stage(fields, lang)] if lang else []
+    )
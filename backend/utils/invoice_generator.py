@@ -105,9 +105,10 @@ def generate_invoice_pdf(
     payment_date: str = None,
     bank_details: dict = None,
     vat_rate: float = 0.0,
-    invoice_number: str = None
+    invoice_number: str = None,
+    ocr_reference: str = None
 ) -> str:
-    """Generate a Swedish-standard professional PDF invoice"""
+    """Generate a Swedish-standard professional PDF invoice (with the OCR reference to pay with, if given)"""
     
     bd = bank_details or DEFAULT_BANK_DETAILS
     
@@ -284,8 +285,11 @@ def generate_invoice_pdf(
     bankgiro = bd.get('bankgiro', '___-____')
     qr_image = None
     
+    # Payments are matched to the invoice by this reference (utils/bank_reconciliation.py)
+    payment_reference = ocr_reference or invoice_number
+    
     if swish_number:
-        qr_path = generate_payment_qr(swish_number, amount, invoice_number)
+        qr_path = generate_payment_qr(swish_number, amount, payment_reference)
         qr_image = Image(qr_path, width=28*mm, height=28*mm)
     
     # Build bank info text
@@ -305,7 +309,7 @@ def generate_invoice_pdf(
 <font face="{FONT_BOLD}">IBAN:</font> {bd.get('iban', 'SE__ ____ ____ ____ ____ ____')}<br/>
 <font face="{FONT_BOLD}">BIC/SWIFT:</font> {bd.get('bicSwift', '________')}<br/>
 {swish_line}<font face="{FONT_BOLD}">Org.nummer:</font> {bd.get('orgNumber', '______-____')}<br/>
-{vat_line}<font face="{FONT_BOLD}">Referens:</font> {invoice_number}<br/>
+{vat_line}<font face="{FONT_BOLD}">{'OCR' if ocr_reference else 'Referens'}:</font> {payment_reference}<br/>
 <font face="{FONT_NORMAL}" size="8" color="#666666">Anges vid betalning.</font>
 </font>"""
     
@@ -354,7 +358,7 @@ def generate_invoice_pdf(
     footer_text = f"""<font face="{FONT_BOLD}" size="8" color="#666666">Serbiska Kulturföreningen i Täby</font><br/>
 <font face="{FONT_NORMAL}" size="8" color="#666666">{ORG_DETAILS.get('address_line2', 'Täby')} | {ORG_DETAILS['email']} | {ORG_DETAILS['website']}</font><br/>
 <font face="{FONT_NORMAL}" size="8" color="#666666">Organisationsnr: {org_nr} | Godkänd för F-skatt</font><br/><br/>
-<font face="{FONT_NORMAL}" size="8" color="#666666">Vänligen ange fakturanummer ({invoice_number}) som referens vid betalning.</font>"""
+<font face="{FONT_NORMAL}" size="8" color="#666666">Vänligen ange {'OCR-nummer' if ocr_reference else 'fakturanummer'} ({payment_reference}) som referens vid betalning.</font>"""
     
     content.append(Paragraph(footer_text, ParagraphStyle('Footer', alignment=TA_CENTER, fontSize=8, textColor=GREY_COLOR, fontName=FONT_NORMAL)))
     
@@ -0,0 +1,197 @@
+"""
+Overdue invoices
+Invoices keep `dueDate` as a "YYYY-MM-DD" string (what the API, PDFs and
+emails show) and get a real date next to it, so overdue invoices can be found
+with an index instead of parsing every unpaid invoice:
+
+    {
+        "dueDate": "YYYY-MM-DD", "dueAt": datetime (midnight UTC of dueDate),
+        "overdue": True | False, "overdueSince": datetime,
+        "overdueReminderSentAt": datetime, "overdueReminders": int
+    }
+
+An unpaid invoice is overdue once OVERDUE_GRACE_DAYS have passed since its
+due date. flag_overdue() sets / clears the flag in bulk (nightly and at
+startup); paying or editing an invoice updates it right away.
+send_overdue_reminders() emails the members of overdue invoices over one SMTP
+session, at most every REMINDER_INTERVAL_DAYS per invoice.
+"""
+import logging
+import os
+from datetime import date, datetime, timedelta
+from typing import Optional
+
+from pymongo import UpdateOne
+
+logger = logging.getLogger(__name__)
+
+OVERDUE_GRACE_DAYS = 7
+REMINDER_INTERVAL_DAYS = int(os.environ.get("INVOICE_REMINDER_INTERVAL_DAYS", "7"))
+MAX_REMINDERS = int(os.environ.get("INVOICE_MAX_REMINDERS", "3"))
+MAX_REMINDERS_PER_RUN = 200
+
+FRONTEND_URL = os.environ.get("FRONTEND_URL", "https://srpskoudruzenjetaby.se")
+
+
+async def create_indexes(db):
+    await db.invoices.create_index([("status", 1), ("dueAt", 1)])
+    await db.invoices.create_index([("overdue", 1), ("createdAt", -1)])
+
+
+def parse_due_date(value) -> Optional[date]:
+    """Due date from a "YYYY-MM-DD" / ISO datetime string or a datetime, None if invalid"""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    try:
+        return datetime.fromisoformat(str(value).strip().replace("Z", "+00:00")).date()
+    except ValueError:
+        return None
+
+
+def _overdue_cutoff(now: Optional[datetime] = None) -> datetime:
+    """Invoices due before this are overdue"""
+    today = (now or datetime.utcnow()).replace(hour=0, minute=0, second=0, microsecond=0)
+    return today - timedelta(days=OVERDUE_GRACE_DAYS)
+
+
+def due_fields(value, status: str = "unpaid") -> dict:
+    """
+    Normalised due date fields for an invoice being created or edited;
+    overdueSince (now) comes with overdue=True.
+
+    Raises:
+        ValueError: The due date is not a date
+    """
+    due = parse_due_date(value)
+    if due is None:
+        raise ValueError("Invalid due date, expected YYYY-MM-DD")
+    due_at = datetime(due.year, due.month, due.day)
+    fields = {
+        "dueDate": due.isoformat(),
+        "dueAt": due_at,
+        "overdue": status == "unpaid" and due_at < _overdue_cutoff()
+    }
+    if fields["overdue"]:
+        fields["overdueSince"] = datetime.utcnow()
+    return fields
+
+
+async def normalize_due_dates(db) -> int:
+    """
+    Give invoices created before dueAt existed their normalised due date
+    (no-op once done).
+
+    Returns:
+        Number of invoices updated
+    """
+    updates = []
+    async for invoice in db.invoices.find({"dueAt": {"$exists": False}}, {"dueDate": 1, "status": 1}):
+        try:
+            fields = due_fields(invoice.get("dueDate"), invoice.get("status"))
+        except ValueError:
+            logger.warning(f"Invoice {invoice['_id']} has an invalid due date: {invoice.get('dueDate')!r}")
+            fields = {"dueAt": None, "overdue": False}
+        updates.append(UpdateOne({"_id": invoice["_id"]}, {"$set": fields}))
+    if updates:
+        await db.invoices.bulk_write(updates, ordered=False)
+        logger.info(f"Normalised the due date of {len(updates)} invoices")
+    return len(updates)
+
+
+async def flag_overdue(db) -> dict:
+    """
+    Flag unpaid invoices past the grace period as overdue, and clear the
+    flag of invoices that were paid or moved.
+
+    Returns:
+        {"flagged": n, "cleared": n}
+    """
+    cutoff = _overdue_cutoff()
+    now = datetime.utcnow()
+    flagged = await db.invoices.update_many(
+        {"status": "unpaid", "dueAt": {"$lt": cutoff}, "overdue": {"$ne": True}},
+        {"$set": {"overdue": True, "overdueSince": now}}
+    )
+    cleared = await db.invoices.update_many(
+        {"overdue": True, "$or": [{"status": {"$ne": "unpaid"}}, {"dueAt": {"$gte": cutoff}}]},
+        {"$set": {"overdue": False}, "$unset": {"overdueSince": ""}}
+    )
+    if flagged.modified_count or cleared.modified_count:
+        logger.info(f"Overdue invoices: {flagged.modified_count} flagged, {cleared.modified_count} cleared")
+    return {"flagged": flagged.modified_count, "cleared": cleared.modified_count}
+
+
+async def refresh(db) -> dict:
+    """
+    Startup pass: normalise due dates, then flag on the normalised dates.
+
+    Returns:
+        {"normalized": n, "flagged": n, "cleared": n}
+    """
+    normalized = await normalize_due_dates(db)
+    return {"normalized": normalized, **await flag_overdue(db)}
+
+
+async def send_overdue_reminders(db) -> dict:
+    """
+    Flag overdue invoices, then remind their members in one SMTP session.
+
+    Returns:
+        {"flagged", "cleared", "invoices", "sent", "failed"}
+    """
+    from email_service import get_invoice_overdue_reminder_template, send_emails
+
+    stats = await flag_overdue(db)
+    now = datetime.utcnow()
+    invoices = await db.invoices.find(
+        {
+            "status": "unpaid",
+            "overdue": True,
+            "overdueReminders": {"$not": {"$gte": MAX_REMINDERS}},
+            "$or": [
+                {"overdueReminderSentAt": {"$exists": False}},
+                {"overdueReminderSentAt": {"$lte": now - timedelta(days=REMINDER_INTERVAL_DAYS)}}
+            ]
+        },
+        {"userId": 1, "invoiceNumber": 1, "description": 1, "amount": 1, "currency": 1, "dueDate": 1, "fileName": 1}
+    ).sort("dueAt", 1).limit(MAX_REMINDERS_PER_RUN).to_list(length=MAX_REMINDERS_PER_RUN)
+
+    users = {
+        user["_id"]: user
+        async for user in db.users.find(
+            {"_id": {"$in": list({invoice.get("userId") for invoice in invoices})}},
+            {"email": 1, "fullName": 1, "username": 1}
+        )
+    }
+    to_send, emails = [], []
+    for invoice in invoices:
+        user = users.get(invoice.get("userId"))
+        if not user or not user.get("email"):
+            continue
+        html, text = get_invoice_overdue_reminder_template(
+            user_name=user.get("fullName", user.get("username", "Member")),
+            invoice_description=invoice.get("description", ""),
+            invoice_number=invoice.get("invoiceNumber") or invoice["_id"],
+            amount=invoice.get("amount", 0),
+            currency=invoice.get("currency") or "SEK",
+            due_date=invoice.get("dueDate"),
+            download_link=f"{FRONTEND_URL}/api/invoices/files/{invoice['fileName']}" if invoice.get("fileName") else None
+        )
+        to_send.append(invoice["_id"])
+        emails.append({
+            "to_email": user["email"],
+            "subject": f"Podsetnik / Påminnelse - {invoice.get('description', '')}",
+            "html_content": html,
+            "text_content": text
+        })
+
+    results = await send_emails(emails, db=db)
+    sent_ids = [invoice_id for invoice_id, sent in zip(to_send, results) if sent]
+    if sent_ids:
+        await db.invoices.update_many(
+            {"_id": {"$in": sent_ids}},
+            {"$set": {"overdueReminderSentAt": now}, "$inc": {"overdueReminders": 1}}
+        )
+    return {**stats, "invoices": len(invoices), "sent": len(sent_ids), "failed": len(emails) - len(sent_ids)}
@@ -0,0 +1,372 @@
+"""
+Rate limiting for login, registration, password reset and the contact form.
+
+Attempts are counted per client IP and per account in a sliding window,
+approximated from two fixed windows:
+    estimate = previous_count * (1 - elapsed_fraction) + current_count
+
+Counters live in MongoDB (`rate_limits`, TTL index on expiresAt) so all uvicorn
+workers share them. Each worker also remembers which keys it has seen locked,
+so a credential-stuffing burst against a locked account or IP is rejected
+without touching the database or running bcrypt.
+"""
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+from fastapi import HTTPException, Request
+from pymongo import UpdateOne
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_LOGIN_ATTEMPTS = 5
+LOGIN_WINDOW_SECONDS = 15 * 60
+# Several members may share one IP (home network, training venue)
+LOGIN_IP_MULTIPLIER = 6
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    limit: int
+    window_seconds: int
+
+
+# action -> {scope: RateLimit}. The login limits are derived from
+# platform_settings.security.maxLoginAttempts at runtime.
+RATE_LIMITS = {
+    "login": {
+        "account": RateLimit(DEFAULT_MAX_LOGIN_ATTEMPTS, LOGIN_WINDOW_SECONDS),
+        "ip": RateLimit(DEFAULT_MAX_LOGIN_ATTEMPTS * LOGIN_IP_MULTIPLIER, LOGIN_WINDOW_SECONDS),
+    },
+    "register": {
+        "ip": RateLimit(5, 60 * 60),
+    },
+    "password_reset": {
+        "ip": RateLimit(10, 60 * 60),
+        "account": RateLimit(3, 60 * 60),
+    },
+    "contact": {
+        "ip": RateLimit(5, 60 * 60),
+    },
+}
+
+
+def get_client_ip(request: Request) -> str:
+    """Client IP as seen by nginx (X-Real-IP), falling back to the socket peer"""
+    real_ip = request.headers.get("x-real-ip")
+    if real_ip:
+        return real_ip.strip()
+    forwarded = request.headers.get("x-forwarded-for")
+    if forwarded:
+        return forwarded.split(",")[0].strip()
+    return request.client.host if request.client else "unknown"
+
+
+async def get_max_login_attempts(db) -> int:
+    """platform_settings.security.maxLoginAttempts (cached)"""
+    from utils.cache import cache, security_settings_key, CACHE_TTL, TAG_PLATFORM_SETTINGS
+
+    security = await cache.get(security_settings_key())
+    if security is None:
+        settings = await db.platform_settings.find_one({"_id": "system"}, {"security": 1})
+        security = (settings or {}).get("security") or {}
+        await cache.set(security_settings_key(), security, CACHE_TTL['settings'], tags=[TAG_PLATFORM_SETTINGS])
+
+    try:
+        return max(1, int(security.get("maxLoginAttempts", DEFAULT_MAX_LOGIN_ATTEMPTS)))
+    except (TypeError, ValueError):
+        return DEFAULT_MAX_LOGIN_ATTEMPTS
+
+
+class RateLimitState:
+    """Estimated attempts per scope for one action"""
+
+    def __init__(self):
+        self.estimates: Dict[str, float] = {}
+        self.retry_after: Dict[str, int] = {}
+
+    def has_attempts(self, scope: str) -> bool:
+        return self.estimates.get(scope, 0) > 0
+
+
+class RateLimiter:
+    """Sliding-window limiter shared through MongoDB with a per-worker fast path"""
+
+    MAX_LOCAL_KEYS = 10000
+    RECENT_LOCKOUTS = 50
+
+    def __init__(self):
+        # key -> {window_index: count}; used when MongoDB is unavailable
+        self._local_counts: Dict[str, Dict[int, int]] = {}
+        self._local_touched: Dict[str, float] = {}
+        # key -> unix time until which the key is known to be locked
+        self._locked_until: Dict[str, float] = {}
+        self.metrics = {
+            action: {"allowed": 0, "blocked": 0, "lockouts": 0}
+            for action in RATE_LIMITS
+        }
+        self.recent_lockouts = deque(maxlen=self.RECENT_LOCKOUTS)
+
+    # ---------- public API ----------
+
+    async def check(self, db, action: str, request: Request, account: Optional[str] = None) -> RateLimitState:
+        """Raise 429 if the IP or account is over the limit; does not count an attempt"""
+        keys = await self._keys(db, action, request, account)
+        self._reject_if_locked(action, keys)
+
+        state = await self._load_state(db, keys)
+        self._enforce(action, keys, state, at_limit=True)
+        self.metrics[action]["allowed"] += 1
+        return state
+
+    async def hit(self, db, action: str, request: Request, account: Optional[str] = None) -> RateLimitState:
+        """Count an attempt (e.g. a failed login) and record lockouts"""
+        keys = await self._keys(db, action, request, account)
+        return await self._hit(db, action, keys)
+
+    async def consume(self, db, action: str, request: Request, account: Optional[str] = None) -> RateLimitState:
+        """Count an attempt and raise 429 once it goes over the limit"""
+        keys = await self._keys(db, action, request, account)
+        self._reject_if_locked(action, keys)
+
+        state = await self._hit(db, action, keys)
+        self._enforce(action, keys, state, at_limit=False)
+        self.metrics[action]["allowed"] += 1
+        return state
+
+    async def reset(self, db, action: str, account: Optional[str] = None, ip: Optional[str] = None):
+        """Forget attempts, e.g. the account's failed logins after a successful one"""
+        keys = []
+        if account:
+            keys.append(self._key(action, "account", account))
+        if ip:
+            keys.append(self._key(action, "ip", ip))
+
+        for key in keys:
+            self._local_counts.pop(key, None)
+            self._local_touched.pop(key, None)
+            self._locked_until.pop(key, None)
+        if keys:
+            try:
+                await db.rate_limits.delete_many({"key": {"$in": keys}})
+            except Exception as e:
+                logger.error(f"Rate limit reset failed: {str(e)}")
+
+    async def get_stats(self, db) -> dict:
+        """Per-worker counters plus lockouts currently active across all workers"""
+        now = datetime.utcnow()
+        active = []
+        lockouts_24h = 0
+        try:
+            active = await db.rate_limits.find(
+                {"lockedAt": {"$exists": True}, "expiresAt": {"$gt": now}},
+                {"_id": 0, "action": 1, "scope": 1, "identifier": 1, "count": 1, "limit": 1, "lockedAt": 1, "lockedUntil": 1}
+            ).sort("lockedAt", -1).to_list(length=100)
+            lockouts_24h = await db.rate_limits.count_documents(
+                {"lockedAt": {"$gte": now - timedelta(hours=24)}}
+            )
+        except Exception as e:
+            logger.error(f"Failed to load rate limit stats: {str(e)}")
+
+        return {
+            "worker": {
+                "metrics": self.metrics,
+                "recentLockouts": list(self.recent_lockouts),
+                "lockedKeys": sum(1 for until in self._locked_until.values() if until > time.time()),
+            },
+            "activeLockouts": active,
+            "lockoutsLast24h": lockouts_24h,
+        }
+
+    # ---------- internals ----------
+
+    async def _hit(self, db, action: str, keys: dict) -> RateLimitState:
+        await self._increment(db, keys)
+        state = await self._load_state(db, keys)
+
+        for scope, (key, rate_limit) in keys.items():
+            # This attempt is the one that reached the limit
+            estimate = state.estimates.get(scope, 0)
+            crossed = estimate - 1 < rate_limit.limit <= estimate
+            if crossed:
+                await self._record_lockout(db, action, scope, key, rate_limit, state.retry_after.get(scope, 0))
+        return state
+
+    @staticmethod
+    def _key(action: str, scope: str, identifier: str) -> str:
+        return f"{action}:{scope}:{identifier.strip().lower()}"
+
+    async def _keys(self, db, action: str, request: Request, account: Optional[str]) -> dict:
+        """scope -> (key, RateLimit) for the scopes that apply to this request"""
+        limits = RATE_LIMITS[action]
+        if action == "login":
+            max_attempts = await get_max_login_attempts(db)
+            limits = {
+                "account": RateLimit(max_attempts, LOGIN_WINDOW_SECONDS),
+                "ip": RateLimit(max_attempts * LOGIN_IP_MULTIPLIER, LOGIN_WINDOW_SECONDS),
+            }
+
+        keys = {}
+        if "ip" in limits:
+            keys["ip"] = (self._key(action, "ip", get_client_ip(request)), limits["ip"])
+        if "account" in limits and account:
+            keys["account"] = (self._key(action, "account", account), limits["account"])
+        return keys
+
+    @staticmethod
+    def _window(rate_limit: RateLimit, now: float):
+        window_index = int(now // rate_limit.window_seconds)
+        elapsed = (now % rate_limit.window_seconds) / rate_limit.window_seconds
+        return window_index, elapsed
+
+    @staticmethod
+    def _retry_after(rate_limit: RateLimit, previous: int, current: int, elapsed: float) -> int:
+        """Seconds until the sliding estimate drops below the limit"""
+        window = rate_limit.window_seconds
+        limit = rate_limit.limit
+        if current >= limit:
+            # Wait for this window to end, then for the carried-over weight to decay
+            return int((1 - elapsed) * window + (1 - limit / current) * window) + 1
+        if previous <= 0:
+            return 0
+        decay_until = 1 - (limit - current) / previous
+        return max(0, int((decay_until - elapsed) * window) + 1)
+
+    def _reject_if_locked(self, action: str, keys: dict):
+        now = time.time()
+        for scope, (key, _) in keys.items():
+            until = self._locked_until.get(key)
+            if until and until > now:
+                self._block(action, int(until - now) + 1)
+
+    def _enforce(self, action: str, keys: dict, state: RateLimitState, at_limit: bool):
+        for scope, (key, rate_limit) in keys.items():
+            estimate = state.estimates.get(scope, 0)
+            over = estimate >= rate_limit.limit if at_limit else estimate > rate_limit.limit
+            if over:
+                retry_after = max(1, state.retry_after.get(scope, 1))
+                self._locked_until[key] = time.time() + retry_after
+                self._block(action, retry_after)
+
+    def _block(self, action: str, retry_after: int):
+        self.metrics[action]["blocked"] += 1
+        minutes = max(1, round(retry_after / 60))
+        raise HTTPException(
+            status_code=429,
+            detail=f"Too many attempts. Please try again in {minutes} minute{'s' if minutes != 1 else ''}.",
+            headers={"Retry-After": str(retry_after)}
+        )
+
+    async def _load_state(self, db, keys: dict) -> RateLimitState:
+        now = time.time()
+        windows = {}
+        doc_ids = []
+        for scope, (key, rate_limit) in keys.items():
+            window_index, elapsed = self._window(rate_limit, now)
+            windows[scope] = (window_index, elapsed)
+            doc_ids += [f"{key}:{window_index}", f"{key}:{window_index - 1}"]
+
+        counts = None
+        if doc_ids:
+            try:
+                docs = await db.rate_limits.find({"_id": {"$in": doc_ids}}, {"count": 1}).to_list(length=None)
+                counts = {doc["_id"]: doc.get("count", 0) for doc in docs}
+            except Exception as e:
+                logger.error(f"Rate limit lookup failed, using local counters: {str(e)}")
+
+        state = RateLimitState()
+        for scope, (key, rate_limit) in keys.items():
+            window_index, elapsed = windows[scope]
+            if counts is not None:
+                current = counts.get(f"{key}:{window_index}", 0)
+                previous = counts.get(f"{key}:{window_index - 1}", 0)
+            else:
+                local = self._local_counts.get(key, {})
+                current = local.get(window_index, 0)
+                previous = local.get(window_index - 1, 0)
+            state.estimates[scope] = previous * (1 - elapsed) + current
+            state.retry_after[scope] = self._retry_after(rate_limit, previous, current, elapsed)
+        return state
+
+    async def _increment(self, db, keys: dict):
+        """Add one attempt to every key"""
+        now = time.time()
+        operations = []
+        for scope, (key, rate_limit) in keys.items():
+            window_index, _ = self._window(rate_limit, now)
+
+            local = self._local_counts.setdefault(key, {})
+            self._local_touched[key] = now
+            local[window_index] = local.get(window_index, 0) + 1
+            for old_index in [i for i in local if i < window_index - 1]:
+                del local[old_index]
+
+            action, scope_name, identifier = key.split(":", 2)
+            window_end = datetime.utcfromtimestamp((window_index + 1) * rate_limit.window_seconds)
+            operations.append(UpdateOne(
+                {"_id": f"{key}:{window_index}"},
+                {
+                    "$inc": {"count": 1},
+                    "$set": {"limit": rate_limit.limit},
+                    "$setOnInsert": {
+                        "key": key,
+                        "action": action,
+                        "scope": scope_name,
+                        "identifier": identifier,
+                        # Kept for one extra window, it is the "previous" count then
+                        "expiresAt": window_end + timedelta(seconds=rate_limit.window_seconds),
+                    }
+                },
+                upsert=True
+            ))
+
+        self._prune_local()
+        if operations:
+            try:
+                await db.rate_limits.bulk_write(operations, ordered=False)
+            except Exception as e:
+                logger.error(f"Rate limit update failed, using local counters: {str(e)}")
+
+    async def _record_lockout(self, db, action: str, scope: str, key: str, rate_limit: RateLimit, retry_after: int):
+        now = time.time()
+        self._locked_until[key] = now + retry_after
+        self.metrics[action]["lockouts"] += 1
+        identifier = key.split(":", 2)[2]
+        self.recent_lockouts.appendleft({
+            "action": action,
+            "scope": scope,
+            "identifier": identifier,
+            "lockedAt": datetime.utcnow().isoformat(),
+            "retryAfter": retry_after,
+        })
+        logger.warning(f"Rate limit lockout: {action} {scope}={identifier} for {retry_after}s")
+
+        window_index, _ = self._window(rate_limit, now)
+        try:
+            await db.rate_limits.update_one(
+                {"_id": f"{key}:{window_index}"},
+                {"$set": {
+                    "lockedAt": datetime.utcnow(),
+                    "lockedUntil": datetime.utcfromtimestamp(now + retry_after),
+                }}
+            )
+        except Exception as e:
+            logger.error(f"Failed to record rate limit lockout: {str(e)}")
+
+    def _prune_local(self):
+        if len(self._local_counts) + len(self._locked_until) <= self.MAX_LOCAL_KEYS:
+            return
+        now = time.time()
+        self._locked_until = {k: v for k, v in self._locked_until.items() if v > now}
+        # Longest window is an hour; counts untouched for two windows are dead
+        stale = [k for k, touched in self._local_touched.items() if touched < now - 2 * 60 * 60]
+        for key in stale:
+            self._local_counts.pop(key, None)
+            self._local_touched.pop(key, None)
+
+
+# Global rate limiter instance
+rate_limiter = RateLimiter()
@@ -0,0 +1,217 @@
+"""
+Training-group rosters
+One document per training group in `training_rosters`, rebuilt from users:
+
+    {
+        "_id": "<group>",
+        "members": [{"userId", "fullName", "email", "emailVerified", "parentId"}],
+        "parents": [{"userId", "fullName", "email"}],    # accounts of members with a parentId
+        "moderators": [{"userId", "fullName", "email", "role", "rsvpNotifications"}],
+        "updatedAt": datetime
+    }
+
+Group membership lives in two user fields: `trainingGroup` (a string, set for
+members and family members) and `trainingGroups` (an array, set for
+moderators and some adult members). Both count here: staff (STAFF_ROLES)
+listed in `trainingGroups` moderate the group, everyone else with the group in
+either field is a member. parentId is the member's primaryAccountId / parentId.
+
+Rosters are rebuilt in full after user and family changes (schedule_rebuild
+batches a burst of writes into one rebuild) and periodically by the scheduler
+for edits made outside the API. Reads go through the in-memory cache, dropped
+on every worker by cache_bus when a rebuild finishes.
+"""
+import asyncio
+import logging
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Set
+
+from pymongo import ReplaceOne
+
+from utils.cache import cache, CACHE_TTL, TAG_ROSTERS, rosters_key
+from utils.cache_bus import invalidate
+
+logger = logging.getLogger(__name__)
+
+STAFF_ROLES = ("moderator", "admin", "superadmin")
+
+# Delay before a scheduled rebuild, so bulk family / user edits share one
+REBUILD_DELAY_SECONDS = 2
+
+USER_FIELDS = {
+    "fullName": 1, "email": 1, "emailVerified": 1, "role": 1,
+    "trainingGroup": 1, "trainingGroups": 1, "primaryAccountId": 1, "parentId": 1,
+    "rsvpNotifications": 1
+}
+
+_rebuild_task: Optional[asyncio.Task] = None
+_rebuild_pending = False
+
+
+def _groups(user: dict) -> Dict[str, Set[str]]:
+    """{"member": groups, "moderator": groups} of one user"""
+    string_group = user.get("trainingGroup")
+    array_groups = {g for g in (user.get("trainingGroups") or []) if g}
+    if user.get("role") in STAFF_ROLES:
+        return {"member": {string_group} if string_group else set(), "moderator": array_groups}
+    return {"member": array_groups | ({string_group} if string_group else set()), "moderator": set()}
+
+
+def _member(user: dict) -> dict:
+    return {
+        "userId": user["_id"],
+        "fullName": user.get("fullName"),
+        "email": user.get("email"),
+        "emailVerified": user.get("emailVerified", False),
+        "parentId": user.get("primaryAccountId") or user.get("parentId")
+    }
+
+
+def _parent(user: dict) -> dict:
+    return {"userId": user["_id"], "fullName": user.get("fullName"), "email": user.get("email")}
+
+
+def build_rosters(users: Iterable[dict], parents: Iterable[dict]) -> Dict[str, dict]:
+    """
+    Roster documents from user documents.
+
+    Args:
+        users: Users with a training group (USER_FIELDS)
+        parents: Parent accounts referenced by those users
+
+    Returns:
+        {group: roster document}
+    """
+    parents_by_id = {parent["_id"]: parent for parent in parents}
+    rosters: Dict[str, dict] = {}
+
+    def roster(group: str) -> dict:
+        return rosters.setdefault(group, {"_id": group, "members": [], "parents": [], "moderators": []})
+
+    for user in users:
+        groups = _groups(user)
+        for group in groups["member"]:
+            member = _member(user)
+            roster(group)["members"].append(member)
+            parent = parents_by_id.get(member["parentId"])
+            if parent and all(p["userId"] != parent["_id"] for p in roster(group)["parents"]):
+                roster(group)["parents"].append(_parent(parent))
+        for group in groups["moderator"]:
+            roster(group)["moderators"].append({
+                "userId": user["_id"],
+                "fullName": user.get("fullName"),
+                "email": user.get("email"),
+                "role": user.get("role"),
+                "rsvpNotifications": user.get("rsvpNotifications")
+            })
+    return rosters
+
+
+async def rebuild(db) -> int:
+    """
+    Rebuild every roster from the users collection.
+
+    Returns:
+        Number of training groups
+    """
+    users = await db.users.find(
+        {"$or": [
+            {"trainingGroup": {"$nin": [None, ""]}},
+            {"trainingGroups.0": {"$exists": True}}
+        ]},
+        USER_FIELDS
+    ).to_list(length=None)
+    parent_ids = {user.get("primaryAccountId") or user.get("parentId") for user in users} - {None}
+    parents = await db.users.find(
+        {"_id": {"$in": list(parent_ids)}}, {"fullName": 1, "email": 1}
+    ).to_list(length=None) if parent_ids else []
+
+    rosters = build_rosters(users, parents)
+    now = datetime.utcnow()
+    if rosters:
+        await db.training_rosters.bulk_write(
+            [ReplaceOne({"_id": group}, {**doc, "updatedAt": now}, upsert=True) for group, doc in rosters.items()],
+            ordered=False
+        )
+    await db.training_rosters.delete_many({"_id": {"$nin": list(rosters)}})
+    await invalidate(db, TAG_ROSTERS)
+    logger.info(f"Rebuilt training rosters: {len(rosters)} group(s), {len(users)} user(s)")
+    return len(rosters)
+
+
+async def _rebuild_later(db):
+    global _rebuild_pending
+    while _rebuild_pending:
+        await asyncio.sleep(REBUILD_DELAY_SECONDS)
+        # Changes made while rebuilding schedule another pass
+        _rebuild_pending = False
+        try:
+            await rebuild(db)
+        except Exception as e:
+            logger.error(f"Training roster rebuild failed: {str(e)}")
+
+
+def schedule_rebuild(db):
+    """Rebuild the rosters shortly after a user / family change (does not wait for it)"""
+    global _rebuild_task, _rebuild_pending
+    _rebuild_pending = True
+    if _rebuild_task is None or _rebuild_task.done():
+        _rebuild_task = asyncio.create_task(_rebuild_later(db))
+
+
+async def get_rosters(db) -> Dict[str, dict]:
+    """All rosters by training group, from the cache"""
+    async def load():
+        docs = await db.training_rosters.find({}).to_list(length=None)
+        return {doc["_id"]: doc for doc in docs}
+
+    return await cache.get_or_load(
+        rosters_key(), load, ttl_seconds=CACHE_TTL['rosters'], tags=(TAG_ROSTERS,)
+    )
+
+
+async def get_roster(db, group: Optional[str]) -> dict:
+    """Roster of one training group (empty if nobody is in it)"""
+    if group:
+        roster = (await get_rosters(db)).get(group)
+        if roster:
+            return roster
+    return {"_id": group, "members": [], "parents": [], "moderators": []}
+
+
+def moderator_emails(roster: dict) -> Set[str]:
+    return {m["email"] for m in roster["moderators"] if m.get("email")}
+
+
+def groups_by_user(rosters: Dict[str, dict]) -> Dict[str, List[str]]:
+    """{userId: training groups the user is a member of}"""
+    groups: Dict[str, List[str]] = {}
+    for group, roster in sorted(rosters.items()):
+        for member in roster["members"]:
+            groups.setdefault(member["userId"], []).append(group)
+    return groups
+
+
+async def members_and_parents(db, roster: dict, user_ids: Iterable[str] = ()):
+    """
+    Roster members and parents by userId, plus the users in `user_ids` that
+    are not on the roster (e.g. participants of an event open to every group).
+
+    Returns:
+        ({userId: member}, {userId: parent})
+    """
+    members = {m["userId"]: m for m in roster["members"]}
+    parents = {p["userId"]: p for p in roster["parents"]}
+
+    missing = [user_id for user_id in user_ids if user_id not in members]
+    if missing:
+        users = await db.users.find({"_id": {"$in": missing}}, USER_FIELDS).to_list(length=None)
+        added = [_member(user) for user in users]
+        members.update((member["userId"], member) for member in added)
+        missing_parents = list({m["parentId"] for m in added if m["parentId"]} - set(parents))
+        if missing_parents:
+            for parent in await db.users.find(
+                {"_id": {"$in": missing_parents}}, {"fullName": 1, "email": 1}
+            ).to_list(length=None):
+                parents[parent["_id"]] = _parent(parent)
+    return members, parents
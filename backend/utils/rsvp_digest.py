@@ -0,0 +1,212 @@
+"""
+Moderator RSVP digests
+Confirmations / cancellations are not emailed from the request any more.
+Each RSVP buffers one notification per recipient (the group's moderators from
+utils/rosters.py and the association address) in `rsvp_notifications`:
+
+    {
+        "recipient": "<email>", "mode": "digest" | "immediate",
+        "eventId", "eventTitle", "eventDate", "eventTime", "eventStart", "trainingGroup",
+        "userName", "userEmail", "action": "confirmed" | "cancelled", "reason",
+        "status": "pending" | "sending" | "sent" | "failed", "attempts", "batch", "claimedAt",
+        "createdAt", "sentAt"
+    }
+
+send_due() runs every minute from the scheduler and sends one email per
+recipient with everything pending for them once:
+- they opted in to immediate notifications (users.rsvpNotifications), or
+- their oldest pending notification is DIGEST_INTERVAL_MINUTES old, or
+- one of the events starts within PRE_EVENT_MINUTES.
+
+Notifications are claimed with a batch id before sending, so workers running
+the job at the same time never send the same notification twice.
+"""
+import logging
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List
+from uuid import uuid4
+from zoneinfo import ZoneInfo
+
+from utils import rosters
+
+logger = logging.getLogger(__name__)
+
+ADMIN_EMAIL = "info@srpskoudruzenjetaby.se"
+
+DIGEST = "digest"
+IMMEDIATE = "immediate"
+MODES = (DIGEST, IMMEDIATE)
+
+PENDING = "pending"
+SENDING = "sending"
+SENT = "sent"
+FAILED = "failed"
+
+DIGEST_INTERVAL_MINUTES = int(os.environ.get("RSVP_DIGEST_INTERVAL_MINUTES", "60"))
+PRE_EVENT_MINUTES = int(os.environ.get("RSVP_DIGEST_PRE_EVENT_MINUTES", "180"))
+MAX_ATTEMPTS = 3
+# Claimed notifications not sent by then (worker stopped mid-send) are retried
+CLAIM_TIMEOUT_MINUTES = 10
+# Sent notifications are kept for a while for troubleshooting
+SENT_RETENTION_DAYS = 30
+
+# Event dates and times are local (Stockholm) wall-clock strings
+EVENT_TIMEZONE = ZoneInfo("Europe/Stockholm")
+
+
+async def create_indexes(db):
+    await db.rsvp_notifications.create_index([("status", 1), ("recipient", 1)])
+    await db.rsvp_notifications.create_index("batch", sparse=True)
+    await db.rsvp_notifications.create_index("sentAt", expireAfterSeconds=SENT_RETENTION_DAYS * 86400)
+
+
+def _event_start(event: dict) -> str:
+    """Local start as "YYYY-MM-DDTHH:MM" (midnight when the time is not set)"""
+    time = event.get("time") or ""
+    if len(time) != 5 or time[2] != ":":
+        time = "00:00"
+    return f"{event.get('date')}T{time}"
+
+
+async def record(db, event: dict, action: str, user_name: str, user_email: str, reason: str = None) -> int:
+    """
+    Buffer an RSVP for the event's moderators and the association address.
+
+    Args:
+        db: Database
+        event: Event document
+        action: "confirmed" or "cancelled"
+        user_name: Who confirmed / cancelled (with "registered by ..." if for a family member)
+        user_email: Their email
+        reason: Cancellation reason
+
+    Returns:
+        Number of recipients
+    """
+    recipients = {ADMIN_EMAIL: DIGEST}
+    roster = await rosters.get_roster(db, event.get("trainingGroup"))
+    for moderator in roster["moderators"]:
+        if moderator.get("email"):
+            recipients[moderator["email"]] = moderator.get("rsvpNotifications") or DIGEST
+
+    now = datetime.utcnow()
+    notification = {
+        "eventId": event["_id"],
+        "eventTitle": (event.get("title") or {}).get("en", "Event"),
+        "eventDate": event.get("date"),
+        "eventTime": event.get("time"),
+        "eventStart": _event_start(event),
+        "trainingGroup": event.get("trainingGroup"),
+        "userName": user_name,
+        "userEmail": user_email,
+        "action": action,
+        "reason": reason,
+        "status": PENDING,
+        "attempts": 0,
+        "createdAt": now
+    }
+    await db.rsvp_notifications.insert_many([
+        {**notification, "recipient": email, "mode": mode} for email, mode in recipients.items()
+    ])
+    return len(recipients)
+
+
+async def _due_recipients(db, now: datetime) -> List[str]:
+    local_now = now.replace(tzinfo=timezone.utc).astimezone(EVENT_TIMEZONE)
+    soon = (local_now + timedelta(minutes=PRE_EVENT_MINUTES)).strftime("%Y-%m-%dT%H:%M")
+    return await db.rsvp_notifications.distinct("recipient", {
+        "status": PENDING,
+        "$or": [
+            {"mode": IMMEDIATE},
+            {"createdAt": {"$lte": now - timedelta(minutes=DIGEST_INTERVAL_MINUTES)}},
+            {"eventStart": {"$lte": soon}}
+        ]
+    })
+
+
+async def _send(db, recipient: str, notifications: List[dict]) -> bool:
+    from email_service import (
+        send_email, get_admin_event_participation_notification, get_admin_rsvp_digest_template
+    )
+
+    if len(notifications) == 1:
+        n = notifications[0]
+        html, text = get_admin_event_participation_notification(
+            user_name=n["userName"],
+            user_email=n["userEmail"],
+            event_title=n["eventTitle"],
+            event_date=n["eventDate"],
+            event_time=n["eventTime"],
+            action=n["action"],
+            reason=n.get("reason"),
+            training_group=n.get("trainingGroup")
+        )
+        subject = (
+            "✓ Potvrđeno Učešće / Bekräftat Deltagande - SKUD Täby" if n["action"] == "confirmed"
+            else "✗ Otkazano Učešće / Avbokad Deltagande - SKUD Täby"
+        )
+    else:
+        html, text = get_admin_rsvp_digest_template(notifications)
+        subject = f"Prijave na događaje ({len(notifications)}) / Anmälningar ({len(notifications)}) - SKUD Täby"
+    return await send_email(recipient, subject, html, text, db=db)
+
+
+async def send_due(db) -> Dict[str, int]:
+    """
+    Send the digests (and immediate notifications) that are due.
+
+    Returns:
+        {"recipients": emails sent, "notifications": notifications covered, "failed": emails not sent}
+    """
+    stats = {"recipients": 0, "notifications": 0, "failed": 0}
+    now = datetime.utcnow()
+    await db.rsvp_notifications.update_many(
+        {"status": SENDING, "claimedAt": {"$lte": now - timedelta(minutes=CLAIM_TIMEOUT_MINUTES)}},
+        {"$set": {"status": PENDING}}
+    )
+    recipients = await _due_recipients(db, now)
+    if not recipients:
+        return stats
+
+    batch = uuid4().hex
+    await db.rsvp_notifications.update_many(
+        {"recipient": {"$in": recipients}, "status": PENDING},
+        {"$set": {"status": SENDING, "batch": batch, "claimedAt": now}}
+    )
+    claimed = await db.rsvp_notifications.find({"batch": batch}).sort("createdAt", 1).to_list(length=None)
+
+    by_recipient: Dict[str, List[dict]] = {}
+    for notification in claimed:
+        by_recipient.setdefault(notification["recipient"], []).append(notification)
+
+    for recipient, notifications in by_recipient.items():
+        ids = [n["_id"] for n in notifications]
+        try:
+            sent = await _send(db, recipient, notifications)
+        except Exception as e:
+            logger.error(f"RSVP digest to {recipient} failed: {str(e)}")
+            sent = False
+
+        if sent:
+            await db.rsvp_notifications.update_many(
+                {"_id": {"$in": ids}}, {"$set": {"status": SENT, "sentAt": datetime.utcnow()}}
+            )
+            stats["recipients"] += 1
+            stats["notifications"] += len(notifications)
+        else:
+            # Retried on the next run, given up after MAX_ATTEMPTS
+            await db.rsvp_notifications.update_many(
+                {"_id": {"$in": ids}}, {"$set": {"status": PENDING}, "$inc": {"attempts": 1}}
+            )
+            await db.rsvp_notifications.update_many(
+                {"_id": {"$in": ids}, "attempts": {"$gte": MAX_ATTEMPTS}},
+                {"$set": {"status": FAILED}}
+            )
+            stats["failed"] += 1
+
+    logger.info(
+        f"RSVP digests: {stats['recipients']} email(s) covering {stats['notifications']} notification(s), "
+        f"{stats['failed']} failed"
+    )
+    return stats
@@ -0,0 +1,215 @@
+"""
+Scheduler leadership and job run history
+Every uvicorn worker starts the APScheduler (scheduler.py), but jobs that act on
+shared data must run once per deployment, not once per worker. One worker
+holds a lease in `scheduler_locks`:
+
+    {"_id": "scheduler_leader", "owner": "<host>:<pid>:<id>", "expiresAt", "renewedAt", "acquiredAt"}
+
+Each worker renews / tries to take it every RENEW_SECONDS; it lasts
+LEASE_SECONDS, so a stopped leader is replaced within that time. Jobs wrapped
+with leader_only() are skipped on the other workers. Per-worker jobs (the
+token revocation sync) are not wrapped.
+
+Startup data jobs (migrations, backfills) go through run_once(): the first
+worker to start takes a one-shot lock for STARTUP_LOCK_SECONDS and runs the
+job, the workers starting next to it skip it. The leader lease is not used
+here, the old deployment's leader may still hold it while the new one starts.
+
+    {"_id": "startup:<job id>", "owner", "expiresAt", "acquiredAt"}
+
+Every run of a wrapped job is stored in `job_runs` (kept RUN_RETENTION_DAYS):
+
+    {"jobId", "trigger": "scheduled" | "manual", "worker", "startedAt", "finishedAt",
+     "durationMs", "status": "running" | "success" | "error", "result", "error"}
+
+`trigger` is "startup" for run_once() jobs.
+
+`result` is what the job returned: a dict of counters or a single count.
+"""
+import logging
+import os
+import socket
+import traceback
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, List, Optional
+from uuid import uuid4
+
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+logger = logging.getLogger(__name__)
+
+LEADER_LOCK_ID = "scheduler_leader"
+LEASE_SECONDS = int(os.environ.get("SCHEDULER_LEASE_SECONDS", "30"))
+RENEW_SECONDS = max(1, LEASE_SECONDS // 3)
+RUN_RETENTION_DAYS = 90
+# Long enough for every worker of a deployment to have started
+STARTUP_LOCK_SECONDS = 600
+
+RUNNING = "running"
+SUCCESS = "success"
+ERROR = "error"
+
+
+async def create_indexes(db):
+    await db.job_runs.create_index([("jobId", 1), ("startedAt", -1)])
+    await db.job_runs.create_index("startedAt", expireAfterSeconds=RUN_RETENTION_DAYS * 86400)
+
+
+class LeaderLease:
+    """The scheduler leader lease, as seen by this worker"""
+
+    def __init__(self):
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid4().hex[:8]}"
+        self._expires_at: Optional[datetime] = None
+
+    @property
+    def is_leader(self) -> bool:
+        # Stop acting as leader a little before the lease runs out, so two
+        # workers never both believe they hold it
+        return self._expires_at is not None and datetime.utcnow() < self._expires_at - timedelta(seconds=RENEW_SECONDS)
+
+    async def renew(self, db) -> bool:
+        """Renew the lease, or take it over if it expired. Returns whether this worker leads."""
+        now = datetime.utcnow()
+        was_leader = self.is_leader
+        update = {"owner": self.owner, "expiresAt": now + timedelta(seconds=LEASE_SECONDS), "renewedAt": now}
+        if not was_leader:
+            update["acquiredAt"] = now
+        try:
+            lock = await db.scheduler_locks.find_one_and_update(
+                {"_id": LEADER_LOCK_ID, "$or": [{"owner": self.owner}, {"expiresAt": {"$lte": now}}]},
+                {"$set": update},
+                upsert=True,
+                return_document=ReturnDocument.AFTER
+            )
+        except DuplicateKeyError:
+            # Held by another worker (the upsert raced with its lease document)
+            lock = None
+        except Exception as e:
+            logger.error(f"Scheduler lease renewal failed: {str(e)}")
+            lock = None
+
+        self._expires_at = update["expiresAt"] if lock and lock.get("owner") == self.owner else None
+        if self.is_leader != was_leader:
+            logger.info(f"Scheduler leadership {'acquired' if self.is_leader else 'lost'} by {self.owner}")
+        return self.is_leader
+
+    async def release(self, db):
+        """Give up the lease on shutdown so another worker takes over right away"""
+        if self._expires_at is None:
+            return
+        self._expires_at = None
+        try:
+            await db.scheduler_locks.delete_one({"_id": LEADER_LOCK_ID, "owner": self.owner})
+        except Exception as e:
+            logger.error(f"Scheduler lease release failed: {str(e)}")
+
+    async def current(self, db) -> Optional[dict]:
+        return await db.scheduler_locks.find_one({"_id": LEADER_LOCK_ID})
+
+
+# One lease per worker
+leader_lease = LeaderLease()
+
+
+async def run_recorded(db, job_id: str, func: Callable[..., Awaitable[Any]], *args, trigger: str = "scheduled") -> Any:
+    """
+    Run a job and store the run in job_runs.
+
+    Args:
+        db: Database
+        job_id: Job name (the APScheduler job id)
+        func: Job coroutine function
+        *args: Arguments for func
+        trigger: "scheduled", "manual" or "startup"
+
+    Returns:
+        What the job returned (errors are recorded and re-raised)
+    """
+    started = datetime.utcnow()
+    run = await db.job_runs.insert_one({
+        "jobId": job_id,
+        "trigger": trigger,
+        "worker": leader_lease.owner,
+        "startedAt": started,
+        "status": RUNNING
+    })
+    fields = {}
+    try:
+        result = await func(*args)
+        fields = {"status": SUCCESS, "result": result}
+        return result
+    except Exception as e:
+        fields = {"status": ERROR, "error": f"{type(e).__name__}: {e}", "traceback": traceback.format_exc(limit=5)}
+        raise
+    finally:
+        finished = datetime.utcnow()
+        await db.job_runs.update_one({"_id": run.inserted_id}, {"$set": {
+            **fields,
+            "finishedAt": finished,
+            "durationMs": int((finished - started).total_seconds() * 1000)
+        }})
+
+
+def leader_only(job_id: str, func: Callable[..., Awaitable[Any]]) -> Callable[..., Awaitable[Any]]:
+    """
+    Job function that only runs on the worker holding the leader lease, and
+    records each run.
+
+    Usage:
+        scheduler.add_job(leader_only('roster_rebuild', rosters.rebuild), args=[db], ...)
+    """
+    async def job(db, *args):
+        if not leader_lease.is_leader:
+            return None
+        return await run_recorded(db, job_id, func, db, *args)
+
+    job.__name__ = f"leader_only_{job_id}"
+    return job
+
+
+async def run_once(db, job_id: str, func: Callable[..., Awaitable[Any]], *args) -> Any:
+    """
+    Run a startup data job on one worker only, and record the run.
+
+    Args:
+        db: Database
+        job_id: Job name
+        func: Job coroutine function, called with db and *args
+        *args: More arguments for func
+
+    Returns:
+        What the job returned, None if another worker took it (errors are
+        recorded and re-raised, the lock is freed so the next start retries)
+    """
+    lock_id = f"startup:{job_id}"
+    now = datetime.utcnow()
+    try:
+        await db.scheduler_locks.find_one_and_update(
+            {"_id": lock_id, "expiresAt": {"$lte": now}},
+            {"$set": {
+                "owner": leader_lease.owner,
+                "expiresAt": now + timedelta(seconds=STARTUP_LOCK_SECONDS),
+                "acquiredAt": now
+            }},
+            upsert=True
+        )
+    except DuplicateKeyError:
+        # Taken by a worker that started before this one
+        return None
+
+    try:
+        return await run_recorded(db, job_id, func, db, *args, trigger="startup")
+    except Exception:
+        await db.scheduler_locks.delete_one({"_id": lock_id, "owner": leader_lease.owner})
+        raise
+
+
+async def recent_runs(db, job_id: Optional[str] = None, limit: int = 50) -> List[dict]:
+    query = {"jobId": job_id} if job_id else {}
+    runs = await db.job_runs.find(query, {"traceback": 0}).sort("startedAt", -1).limit(limit).to_list(length=limit)
+    for run in runs:
+        run["id"] = str(run.pop("_id"))
+    return runs
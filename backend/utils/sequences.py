@@ -0,0 +1,130 @@
+"""
+Number sequences
+Gapless, race-free numbers from `counters`, one document per sequence:
+
+    {"_id": "invoice_number", "seq": 42}
+    {"_id": "credit_note:20260504", "seq": 3}
+
+A sequence can restart every day or year (period=DAY / YEAR), its key then
+ends with the date. next_value() and reserve() are a single atomic $inc, so
+concurrent requests never get the same number; reserve() hands out a block
+of numbers for bulk operations in one round trip.
+"""
+import logging
+from datetime import datetime
+from typing import List, Optional
+
+from pymongo import ReturnDocument
+
+logger = logging.getLogger(__name__)
+
+DAY = "%Y%m%d"
+YEAR = "%Y"
+
+INVOICE_NUMBER = "invoice_number"
+CREDIT_NOTE = "credit_note"
+
+
+def sequence_key(name: str, period: Optional[str] = None, when: Optional[datetime] = None) -> str:
+    if not period:
+        return name
+    return f"{name}:{(when or datetime.utcnow()).strftime(period)}"
+
+
+async def reserve(db, name: str, count: int, period: Optional[str] = None, when: Optional[datetime] = None) -> range:
+    """
+    Take the next `count` numbers of a sequence.
+
+    Args:
+        db: Database
+        name: Sequence name
+        count: Numbers to take (at least 1)
+        period: None, DAY or YEAR
+        when: Date of the period (default: now, UTC)
+
+    Returns:
+        The numbers, e.g. range(4, 7) for 3 numbers after 3
+    """
+    if count < 1:
+        raise ValueError("count must be at least 1")
+    counter = await db.counters.find_one_and_update(
+        {"_id": sequence_key(name, period, when)},
+        {"$inc": {"seq": count}},
+        upsert=True,
+        return_document=ReturnDocument.AFTER
+    )
+    return range(counter["seq"] - count + 1, counter["seq"] + 1)
+
+
+async def next_value(db, name: str, period: Optional[str] = None, when: Optional[datetime] = None) -> int:
+    """Next number of a sequence (1 for a new sequence / period)"""
+    return (await reserve(db, name, 1, period, when))[0]
+
+
+async def raise_to(db, name: str, value: int, period: Optional[str] = None, when: Optional[datetime] = None):
+    """Make sure the sequence continues after `value` (for numbers given out before it existed)"""
+    await db.counters.update_one(
+        {"_id": sequence_key(name, period, when)},
+        {"$max": {"seq": value}},
+        upsert=True
+    )
+
+
+def format_invoice_number(value: int) -> str:
+    return str(value).zfill(4)  # 0001, 0002, etc.
+
+
+def format_credit_note_number(value: int, when: datetime) -> str:
+    return f"CN-{when.strftime(DAY)}-{value:03d}"  # CN-YYYYMMDD-XXX
+
+
+async def next_credit_note_number(db, when: Optional[datetime] = None) -> str:
+    when = when or datetime.utcnow()
+    return format_credit_note_number(await next_value(db, CREDIT_NOTE, DAY, when), when)
+
+
+async def create_credit_note_index(db) -> List[str]:
+    """
+    Unique index on credit note numbers. Numbers given out twice by the
+    count-based numbering are logged and the index is left out until they are
+    renumbered (issued credit notes are not renumbered automatically).
+
+    Returns:
+        Credit note numbers used more than once
+    """
+    duplicates = [
+        doc["_id"]
+        async for doc in db.credit_notes.aggregate([
+            {"$match": {"creditNoteNumber": {"$type": "string"}}},
+            {"$group": {"_id": "$creditNoteNumber", "count": {"$sum": 1}}},
+            {"$match": {"count": {"$gt": 1}}},
+            {"$sort": {"_id": 1}}
+        ])
+    ]
+    if duplicates:
+        logger.warning(
+            f"Credit note numbers used more than once, unique index not created: {', '.join(duplicates)}"
+        )
+        return duplicates
+    await db.credit_notes.create_index("creditNoteNumber", unique=True, sparse=True)
+    return duplicates
+
+
+async def seed_credit_note_sequence(db, when: Optional[datetime] = None) -> int:
+    """
+    Continue today's credit note sequence after the numbers given out by the
+    count-based numbering it replaces (no-op once in step).
+
+    Returns:
+        Highest credit note number of the day
+    """
+    when = when or datetime.utcnow()
+    prefix = f"CN-{when.strftime(DAY)}-"
+    highest = 0
+    async for note in db.credit_notes.find({"creditNoteNumber": {"$regex": f"^{prefix}"}}, {"creditNoteNumber": 1}):
+        suffix = note["creditNoteNumber"][len(prefix):]
+        if suffix.isdigit():
+            highest = max(highest, int(suffix))
+    if highest:
+        await raise_to(db, CREDIT_NOTE, highest, DAY, when)
+    return highest
@@ -51,7 +51,7 @@ const AttendanceReportGenerator = ({ open, onClose, selectedEvent = null }) => {
 
   const loadEvents = async () => {
     try {
-      const data = await eventsAPI.getAll();
+      const data = await eventsAPI.getHistory();
       setEvents(data.events || []);
     } catch (error) {
       console.error('Failed to load events:', error);
@@ -115,19 +115,19 @@ const EventsTab = ({
                         <strong>{t('admin.events.reason')}:</strong> {event.cancellationReason}
                       </p>
                     )}
-                    {event.participants && (
+                    {event.participantCount !== undefined && (
                       <div className="mt-3 space-y-1">
                         <p className="text-sm text-gray-500 dark:text-gray-400">
-                          👥 {event.participants.length} {t('admin.events.participantsConfirmed')}
-                          {event.cancellations && event.cancellations.length > 0 && (
+                          👥 {event.participantCount} {t('admin.events.participantsConfirmed')}
+                          {event.cancellationCount > 0 && (
                             <span className="ml-2 text-red-600">
-                              · ✗ {event.cancellations.length} {t('admin.events.rejectedList') || 'Declined'}
+                              · ✗ {event.cancellationCount} {t('admin.events.rejectedList') || 'Declined'}
                             </span>
                           )}
                         </p>
-                        {event.attendance && Object.keys(event.attendance).length > 0 && (
+                        {event.attendedCount > 0 && (
                           <p className="text-sm text-green-600 dark:text-green-400">
-                            ✓ {Object.values(event.attendance).filter(a => a.attended).length} {t('admin.events.attended') || 'attended'}
+                            ✓ {event.attendedCount} {t('admin.events.attended') || 'attended'}
                           </p>
                         )}
                       </div>
@@ -716,7 +716,7 @@ const AdminDashboard = () => {
         const apiCalls = [
           adminAPI.getStatistics(),
           adminAPI.getUsers(),
-          eventsAPI.getAll(),
+          eventsAPI.getHistory(),
           invoicesAPI.getAll(),
           newsAPI.getAll(100, 0),
           storiesAPI.getAll(),
@@ -1098,7 +1098,7 @@ const AdminDashboard = () => {
       toast.success('Event created successfully');
       setCreateEventOpen(false);
       // Refresh events
-      const eventsData = await eventsAPI.getAll();
+      const eventsData = await eventsAPI.getHistory();
       setEvents(eventsData.events || []);
     } catch (error) {
       toast.error('Failed to create event');
@@ -1118,7 +1118,7 @@ const AdminDashboard = () => {
       setEditEventOpen(false);
       setSelectedEvent(null);
       // Refresh events
-      const eventsData = await eventsAPI.getAll();
+      const eventsData = await eventsAPI.getHistory();
       setEvents(eventsData.events || []);
     } catch (error) {
       toast.error('Failed to update event');
@@ -1140,7 +1140,7 @@ const AdminDashboard = () => {
       });
       toast.success('Event cancelled and participants notified via email');
       // Refresh events
-      const eventsData = await eventsAPI.getAll();
+      const eventsData = await eventsAPI.getHistory();
       setEvents(eventsData.events || []);
     } catch (error) {
       toast.error('Failed to cancel event');
@@ -1157,7 +1157,7 @@ const AdminDashboard = () => {
       await eventsAPI.delete(eventId);
       toast.success(t('admin.events.deleteSuccess'));
       // Refresh events
-      const eventsData = await eventsAPI.getAll();
+      const eventsData = await eventsAPI.getHistory();
       setEvents(eventsData.events || []);
     } catch (error) {
       toast.error(t('admin.events.deleteFailed'));
@@ -5083,7 +5083,7 @@ const AdminDashboard = () => {
             onClose={() => setAttendanceEvent(null)}
             onUpdate={async () => {
               // Refresh events data
-              const eventsData = await eventsAPI.getAll();
+              const eventsData = await eventsAPI.getHistory();
               setEvents(eventsData.events || []);
             }}
           />
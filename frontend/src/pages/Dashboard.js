@@ -118,6 +118,7 @@ const Dashboard = () => {
   const [creditNotes, setCreditNotes] = useState([]);
   const [events, setEvents] = useState([]);
   const [confirmedEvents, setConfirmedEvents] = useState([]);
+  const [rsvps, setRsvps] = useState([]);
   const [familyMembers, setFamilyMembers] = useState([]);
   const [selectedMember, setSelectedMember] = useState('self'); // 'self' or member id
   const [loading, setLoading] = useState(true);
@@ -134,9 +135,10 @@ const Dashboard = () => {
   useEffect(() => {
     const fetchData = async () => {
       try {
-        const [invoicesData, eventsData, statsData, familyData] = await Promise.all([
+        const [invoicesData, eventsData, rsvpsData, statsData, familyData] = await Promise.all([
           invoicesAPI.getMy(),
           eventsAPI.getAll(),
+          eventsAPI.getMyRsvps(),
           eventsAPI.getMyStats().catch(err => {
             console.error('Stats error:', err);
             return { totalTrainings: 0, attended: 0, cancelled: 0, trainingGroups: 0, attendanceRate: 0 };
@@ -158,6 +160,8 @@ const Dashboard = () => {
         
         const allEvents = eventsData.events || [];
         setEvents(allEvents);
+        const allRsvps = rsvpsData.rsvps || [];
+        setRsvps(allRsvps);
         
         // Set family members
         setFamilyMembers(familyData.members || []);
@@ -169,9 +173,9 @@ const Dashboard = () => {
         // Use user from closure or check again
         const currentUser = user;
         if (currentUser && currentUser.id) {
-          const confirmedIds = allEvents
-            .filter(event => event.participants && event.participants.includes(currentUser.id))
-            .map(event => event.id);
+          const confirmedIds = allRsvps
+            .filter(rsvp => rsvp.userId === currentUser.id && rsvp.status === 'confirmed')
+            .map(rsvp => rsvp.eventId);
           setConfirmedEvents(confirmedIds);
           console.log('User confirmed events:', confirmedIds);
         }
@@ -350,16 +354,18 @@ const Dashboard = () => {
   };
 
   // Check if selected member is confirmed for an event
-  const isSelectedMemberConfirmed = (event) => {
+  const getSelectedMemberRsvp = (event) => {
     const memberId = selectedMember === 'self' ? user?.id : selectedMember;
-    return event.participants && event.participants.includes(memberId);
+    return rsvps.find(rsvp => rsvp.eventId === event.id && rsvp.userId === memberId);
+  };
+
+  const isSelectedMemberConfirmed = (event) => {
+    return getSelectedMemberRsvp(event)?.status === 'confirmed';
   };
 
   // Check if selected member has declined an event
   const isSelectedMemberDeclined = (event) => {
-    const memberId = selectedMember === 'self' ? user?.id : selectedMember;
-    if (!event.cancellations || event.cancellations.length === 0) return false;
-    return event.cancellations.some(c => c.userId === memberId);
+    return getSelectedMemberRsvp(event)?.status === 'cancelled';
   };
 
   const handleConfirmEvent = async (eventId, eventTitle) => {
@@ -392,9 +398,9 @@ const Dashboard = () => {
           : `${t('dashboard.trainings.confirmSuccessFor') || 'Participation confirmed for'} ${memberName}!`
       );
       
-      // Refresh events to get updated participant list
-      const eventsData = await eventsAPI.getAll();
-      setEvents(eventsData.events || []);
+      // Refresh RSVPs to get the updated status
+      const rsvpsData = await eventsAPI.getMyRsvps();
+      setRsvps(rsvpsData.rsvps || []);
     } catch (error) {
       toast.error(t('dashboard.trainings.confirmFailed') || 'Failed to confirm participation');
       console.error(error);
@@ -431,9 +437,9 @@ const Dashboard = () => {
           : `${t('dashboard.trainings.cancelSuccessFor') || 'Participation cancelled for'} ${memberName}.`
       );
       
-      // Refresh events to get updated participant list
-      const eventsData = await eventsAPI.getAll();
-      setEvents(eventsData.events || []);
+      // Refresh RSVPs to get the updated status
+      const rsvpsData = await eventsAPI.getMyRsvps();
+      setRsvps(rsvpsData.rsvps || []);
     } catch (error) {
       toast.error(t('dashboard.trainings.cancelFailed') || 'Failed to cancel participation');
       console.error(error);
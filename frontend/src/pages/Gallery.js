@@ -20,7 +20,7 @@ const Gallery = () => {
   useEffect(() => {
     const fetchGallery = async () => {
       try {
-        const data = await galleryAPI.getAll();
+        const data = await galleryAPI.getAll(language);
         setAlbums(data.items || []);
       } catch (error) {
         console.error('Error fetching gallery:', error);
@@ -30,7 +30,7 @@ const Gallery = () => {
     };
     
     fetchGallery();
-  }, []);
+  }, [language]);
 
   const openLightbox = (album, index) => {
     setSelectedAlbum(album);
@@ -12,7 +12,7 @@ import {
   DialogTitle,
 } from '../components/ui/dialog';
 import { Calendar, MapPin, ChevronRight, ChevronLeft, X } from 'lucide-react';
-import { newsAPI, eventsAPI } from '../services/api';
+import { publicAPI } from '../services/api';
 import LazyImage from '../components/ui/LazyImage';
 import SEOHead from '../components/SEOHead';
 
@@ -52,23 +52,11 @@ const Home = () => {
   useEffect(() => {
     const fetchData = async () => {
       try {
-        const [newsData, eventsData] = await Promise.all([
-          newsAPI.getAll(10, 0),
-          eventsAPI.getAll()
-        ]);
-        setNews(newsData.news || []);
-        setEvents(eventsData.events || []);
-        
-        // Fetch hero background settings
-        try {
-          const API_BASE = process.env.REACT_APP_BACKEND_URL || '';
-          const heroResponse = await fetch(`${API_BASE}/api/settings/hero-background`);
-          if (heroResponse.ok) {
-            const heroData = await heroResponse.json();
-            setHeroBackground(heroData);
-          }
-        } catch (heroError) {
-          console.log('Using default hero background');
+        const data = await publicAPI.getBootstrap(language);
+        setNews(data.news || []);
+        setEvents(data.events || []);
+        if (data.heroBackground) {
+          setHeroBackground(data.heroBackground);
         }
       } catch (error) {
         console.error('Error fetching data:', error);
@@ -78,7 +66,7 @@ const Home = () => {
     };
     
     fetchData();
-  }, []);
+  }, [language]);
 
   // Pagination for news
   const totalNewsPages = Math.ceil(news.length / newsPerPage);
@@ -143,8 +143,8 @@ const ModeratorDashboard = () => {
     const fetchData = async () => {
       try {
         if (permissions.manageEvents) {
-          const eventsData = await eventsAPI.getAll();
-          setEvents(eventsData.items || []);
+          const eventsData = await eventsAPI.getHistory();
+          setEvents(eventsData.events || []);
         }
         if (permissions.manageContent) {
           const newsData = await newsAPI.getAll();
@@ -17,7 +17,7 @@ const SerbianStory = () => {
   useEffect(() => {
     const fetchStories = async () => {
       try {
-        const data = await storiesAPI.getAll();
+        const data = await storiesAPI.getAll(language);
         setStories(data.stories || []);
       } catch (error) {
         console.error('Error fetching stories:', error);
@@ -27,7 +27,7 @@ const SerbianStory = () => {
     };
     
     fetchStories();
-  }, []);
+  }, [language]);
 
   // Calculate pagination
   const totalPages = Math.ceil(stories.length / STORIES_PER_PAGE);
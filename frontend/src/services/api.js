@@ -20,15 +20,93 @@ api.interceptors.request.use((config) => {
   return config;
 });
 
+// ==================== Session refresh ====================
+// Access tokens are short-lived; the refresh token is exchanged for a new pair
+// shortly before expiry, and on a 401 as a fallback.
+const REFRESH_MARGIN_MS = 60 * 1000;
+let refreshPromise = null;
+let refreshTimer = null;
+
+const isImpersonating = () => localStorage.getItem('is_impersonating') === 'true';
+
+const clearSession = () => {
+  clearTimeout(refreshTimer);
+  localStorage.removeItem('token');
+  localStorage.removeItem('refreshToken');
+  localStorage.removeItem('tokenExpiresAt');
+  localStorage.removeItem('user');
+};
+
+const scheduleTokenRefresh = () => {
+  clearTimeout(refreshTimer);
+  const expiresAt = Number(localStorage.getItem('tokenExpiresAt'));
+  if (!expiresAt || !localStorage.getItem('refreshToken') || isImpersonating()) {
+    return;
+  }
+  const delay = Math.max(expiresAt - Date.now() - REFRESH_MARGIN_MS, 0);
+  refreshTimer = setTimeout(() => {
+    refreshSession().catch(() => {});
+  }, delay);
+};
+
+export const saveSession = (data) => {
+  localStorage.setItem('token', data.token);
+  if (data.refreshToken) {
+    localStorage.setItem('refreshToken', data.refreshToken);
+    localStorage.setItem('tokenExpiresAt', String(Date.now() + data.expiresIn * 1000));
+  }
+  scheduleTokenRefresh();
+};
+
+// Only one refresh at a time: concurrent 401s wait for the same request
+export const refreshSession = () => {
+  if (!refreshPromise) {
+    const refreshToken = localStorage.getItem('refreshToken');
+    refreshPromise = axios.post(`${API_BASE}/auth/refresh`, { refreshToken })
+      .then((response) => {
+        saveSession(response.data);
+        return response.data.token;
+      })
+      .catch((error) => {
+        // Another tab may have rotated the token first
+        const current = localStorage.getItem('refreshToken');
+        if (current && current !== refreshToken) {
+          scheduleTokenRefresh();
+          return localStorage.getItem('token');
+        }
+        throw error;
+      })
+      .finally(() => {
+        refreshPromise = null;
+      });
+  }
+  return refreshPromise;
+};
+
+scheduleTokenRefresh();
+
 // Handle response errors
 api.interceptors.response.use(
   (response) => response,
-  (error) => {
+  async (error) => {
+    const config = error.config || {};
     if (error.response?.status === 401) {
-      // Token expired or invalid
-      localStorage.removeItem('token');
-      localStorage.removeItem('user');
-      window.location.href = '/login';
+      const isAuthCall = config.url?.startsWith('/auth/');
+      if (!config._retried && !isAuthCall && !isImpersonating() && localStorage.getItem('refreshToken')) {
+        config._retried = true;
+        try {
+          const token = await refreshSession();
+          config.headers.Authorization = `Bearer ${token}`;
+          return api(config);
+        } catch (refreshError) {
+          // Fall through to logout
+        }
+      }
+      if (!isAuthCall) {
+        // Token expired or invalid
+        clearSession();
+        window.location.href = '/login';
+      }
     }
     return Promise.reject(error);
   }
@@ -44,12 +122,20 @@ export const authAPI = {
   login: async (credentials) => {
     const response = await api.post('/auth/login', credentials);
     if (response.data.success && response.data.token) {
-      localStorage.setItem('token', response.data.token);
+      saveSession(response.data);
       localStorage.setItem('user', JSON.stringify(response.data.user));
     }
     return response.data;
   },
   
+  logout: async () => {
+    const refreshToken = localStorage.getItem('refreshToken');
+    clearSession();
+    if (refreshToken) {
+      await api.post('/auth/logout', { refreshToken }).catch(() => {});
+    }
+  },
+  
   verifyEmail: async (token) => {
     const response = await api.get(`/auth/verify-email?token=${token}`);
     return response.data;
@@ -102,8 +188,9 @@ export const userAPI = {
 
 // ==================== News APIs ====================
 export const newsAPI = {
-  getAll: async (limit = 10, skip = 0) => {
-    const response = await api.get(`/news/?limit=${limit}&skip=${skip}`);
+  // lang: only that language of title/text (public pages); omit for all languages (admin)
+  getAll: async (limit = 10, skip = 0, lang = null) => {
+    const response = await api.get('/news/', { params: { limit, skip, ...(lang && { lang }) } });
     return response.data;
   },
   
@@ -125,8 +212,31 @@ export const newsAPI = {
 
 // ==================== Events APIs ====================
 export const eventsAPI = {
-  getAll: async () => {
-    const response = await api.get('/events/');
+  // params: { from, to, group, cursor, limit, lang } - from defaults to today on the server
+  getAll: async (params = {}) => {
+    const response = await api.get('/events/', { params });
+    return response.data;
+  },
+
+  // Admin views: the past `days` days and all upcoming events. Pages are
+  // oldest first, so nextCursor is followed until the last page.
+  getHistory: async (days = 365) => {
+    const from = new Date(Date.now() - days * 24 * 60 * 60 * 1000).toISOString().split('T')[0];
+    const events = [];
+    let cursor = null;
+    do {
+      const response = await api.get('/events/', {
+        params: { from, limit: 200, ...(cursor && { cursor }) },
+      });
+      events.push(...(response.data.events || []));
+      cursor = response.data.nextCursor;
+    } while (cursor);
+    return { events, nextCursor: null };
+  },
+  
+  // Confirmed/cancelled RSVPs of the current user and their family members
+  getMyRsvps: async (params = {}) => {
+    const response = await api.get('/events/my-rsvps', { params });
     return response.data;
   },
   
@@ -281,8 +391,8 @@ export const invoicesAPI = {
 
 // ==================== Gallery APIs ====================
 export const galleryAPI = {
-  getAll: async () => {
-    const response = await api.get('/gallery/');
+  getAll: async (lang = null) => {
+    const response = await api.get('/gallery/', { params: lang ? { lang } : {} });
     return response.data;
   },
   
@@ -313,8 +423,8 @@ export const galleryAPI = {
 
 // ==================== Stories APIs ====================
 export const storiesAPI = {
-  getAll: async () => {
-    const response = await api.get('/stories/');
+  getAll: async (lang = null) => {
+    const response = await api.get('/stories/', { params: lang ? { lang } : {} });
     return response.data;
   },
   
@@ -347,6 +457,15 @@ export const settingsAPI = {
   },
 };
 
+// ==================== Public APIs ====================
+export const publicAPI = {
+  // Branding, hero background, settings, latest news, upcoming events and gallery in one request
+  getBootstrap: async (lang = null) => {
+    const response = await api.get('/public/bootstrap', { params: lang ? { lang } : {} });
+    return response.data;
+  },
+};
+
 // ==================== Admin APIs ====================
 export const adminAPI = {
   getUsers: async () => {
@@ -431,8 +550,8 @@ export const adminAPI = {
 
 // ==================== Content Management APIs ====================
 export const contentAPI = {
-  getPageContent: async (pageId) => {
-    const response = await api.get(`/content/pages/${pageId}`);
+  getPageContent: async (pageId, lang = null) => {
+    const response = await api.get(`/content/pages/${pageId}`, { params: lang ? { lang } : {} });
     return response.data;
   },
   